@@ -0,0 +1,138 @@
+"""起動時間ベンチマーク: import時間・ウィンドウ表示・環境チェックの計測
+
+使い方::
+    
+    python benchmarks/startup_benchmark.py [--repeat N]
+
+ディスプレイのない環境ではQT_QPA_PLATFORM=offscreenで実行される。
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+# パッケージの親ディレクトリをパスに追加
+PACKAGE_PARENT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PACKAGE_PARENT))
+
+PACKAGE_NAME = "markdown_to_pdf_gui"
+
+# -X importtime の出力行: "import time: self [us] | cumulative | imported package"
+IMPORTTIME_PATTERN = re.compile(r'^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)')
+
+
+def measure_import_times(module: str) -> List[Tuple[str, int, int]]:
+    """
+    python -X importtime でモジュールのimport時間を計測
+    
+    Args:
+        module: 計測するモジュール
+    
+    Returns:
+        (モジュール名, 自身の時間[us], 累積時間[us]) のリスト（累積時間の降順）
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(PACKAGE_PARENT),
+        capture_output=True,
+        text=True,
+        check=False
+    )
+    
+    times = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if match:
+            times.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    
+    times.sort(key=lambda item: item[2], reverse=True)
+    return times
+
+
+def measure_window_startup(repeat: int) -> List[Tuple[float, float]]:
+    """
+    MainWindowの最初の表示と起動時のバックグラウンド処理の完了までの時間を計測
+    
+    Returns:
+        (最初の表示までの時間[秒], 環境チェック・履歴読み込み完了までの時間[秒]) のリスト
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    from markdown_to_pdf_gui.gui.main_window import MainWindow
+    
+    class BenchmarkWindow(MainWindow):
+        """環境チェック結果のダイアログを表示しないMainWindow"""
+        
+        def on_environment_checked(self, success, errors, warnings, instructions):
+            pass
+    
+    app = QApplication.instance() or QApplication(sys.argv)
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        window = BenchmarkWindow()
+        window.show()
+        app.processEvents()
+        first_paint = time.perf_counter() - start
+        
+        while window.startup_loader is None or window.startup_loader.isRunning():
+            app.processEvents()
+            time.sleep(0.001)
+        app.processEvents()
+        ready = time.perf_counter() - start
+        
+        durations.append((first_paint, ready))
+        window.close()
+    
+    return durations
+
+
+def measure_environment_check() -> Tuple[float, float]:
+    """環境チェックの時間を計測（キャッシュなし, キャッシュあり）"""
+    from markdown_to_pdf_gui.core.environment_checker import EnvironmentChecker
+    
+    start = time.perf_counter()
+    EnvironmentChecker().check_all_cached(force=True)
+    uncached = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    EnvironmentChecker().check_all_cached()
+    cached = time.perf_counter() - start
+    
+    return uncached, cached
+
+
+def main() -> None:
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="起動時間ベンチマーク")
+    parser.add_argument("--repeat", type=int, default=3, help="ウィンドウ構築の繰り返し回数")
+    parser.add_argument("--top", type=int, default=15, help="表示するimport時間の上位件数")
+    args = parser.parse_args()
+    
+    module = f"{PACKAGE_NAME}.gui.main_window"
+    print(f"== import時間 ({module}) ==")
+    times = measure_import_times(module)
+    for name, self_us, cumulative_us in times[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms (self {self_us / 1000:6.1f} ms)  {name}")
+    
+    own = [item for item in times if item[0].startswith(PACKAGE_NAME)]
+    print(f"  {PACKAGE_NAME} 自身のimport合計: {sum(item[1] for item in own) / 1000:.1f} ms")
+    
+    print("\n== ウィンドウ表示まで ==")
+    durations = measure_window_startup(args.repeat)
+    for idx, (first_paint, ready) in enumerate(durations, 1):
+        print(f"  {idx}回目: 表示 {first_paint * 1000:.1f} ms / 初期化完了 {ready * 1000:.1f} ms")
+    
+    print("\n== 環境チェック ==")
+    uncached, cached = measure_environment_check()
+    print(f"  キャッシュなし: {uncached * 1000:.1f} ms")
+    print(f"  キャッシュあり: {cached * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
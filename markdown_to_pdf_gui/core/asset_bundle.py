@@ -0,0 +1,296 @@
+"""アセットバンドル: 変換に必要なファイルをコンテンツアドレスで収集・転送"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+
+# バンドル内でテンプレート・ヘッダー・絶対パスで参照された画像を置くディレクトリ
+TEMPLATE_DIR = "_template"
+HEADER_DIR = "_header"
+EXTERNAL_DIR = "_external"
+
+# マークダウンの画像参照
+IMAGE_REFERENCE_PATTERN = re.compile(r'(!\[[^\]]*\]\()([^)\s]+)((?:\s+"[^"]*")?\))')
+
+# ヘッダーから別のファイルを読み込む命令（読み込まれるファイルはバンドルに含められない）
+HEADER_INPUT_PATTERN = re.compile(r'\\(?:input|include|InputIfFileExists|subfile)(?![A-Za-z@])')
+
+# LaTeXのコメント（エスケープされていない%から行末まで）
+LATEX_COMMENT_PATTERN = re.compile(r'(?<!\\)%.*')
+
+
+def _sha256_bytes(data: bytes) -> str:
+    """バイト列のSHA-256"""
+    return hashlib.sha256(data).hexdigest()
+
+
+@dataclass
+class BundleManifest:
+    """
+    バンドルの内容の一覧
+    
+    filesはバンドル内の相対パスとSHA-256の対応。マークダウンと画像の
+    相対的な位置関係は元のディレクトリ構成のまま保持する。
+    """
+    markdown: str
+    files: Dict[str, str] = field(default_factory=dict)
+    template: Optional[str] = None
+    header: Optional[str] = None
+    
+    @property
+    def blobs(self) -> Set[str]:
+        """バンドルが参照するblobのハッシュ"""
+        return set(self.files.values())
+    
+    @property
+    def digest(self) -> str:
+        """内容全体のダイジェスト（同じ入力のバンドルは同じ値になる）"""
+        payload = json.dumps(self.to_dict(), sort_keys=True, ensure_ascii=False)
+        return _sha256_bytes(payload.encode("utf-8"))
+    
+    def to_dict(self) -> Dict:
+        """辞書に変換"""
+        return {
+            "markdown": self.markdown,
+            "files": dict(self.files),
+            "template": self.template,
+            "header": self.header,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "BundleManifest":
+        """辞書から作成"""
+        return cls(
+            markdown=data["markdown"],
+            files=dict(data.get("files", {})),
+            template=data.get("template"),
+            header=data.get("header"),
+        )
+
+
+@dataclass
+class MaterializedBundle:
+    """ディレクトリに展開したバンドル"""
+    root: Path
+    md_file: Path
+    template_path: Optional[Path] = None
+    header_path: Optional[Path] = None
+
+
+class BlobStore:
+    """
+    SHA-256をキーにファイルを保存するblobストア
+    
+    同じ内容のファイルは1回だけ保存される。書き込みは一時ファイルから
+    置き換えるため、共有ファイルシステム上で複数のプロセスが同時に
+    書き込んでも壊れたblobは見えない。
+    """
+    
+    def __init__(self, root: Path):
+        """
+        blobストアを初期化
+        
+        Args:
+            root: 保存ディレクトリ
+        """
+        self.root = Path(root)
+    
+    def blob_path(self, blob_hash: str) -> Path:
+        """blobの保存先"""
+        return self.root / blob_hash[:2] / blob_hash
+    
+    def has(self, blob_hash: str) -> bool:
+        """blobを保持しているかどうか"""
+        return self.blob_path(blob_hash).exists()
+    
+    def missing(self, blob_hashes: Iterable[str]) -> List[str]:
+        """保持していないblobのハッシュ"""
+        return sorted(h for h in set(blob_hashes) if not self.has(h))
+    
+    def put_bytes(self, data: bytes) -> str:
+        """
+        バイト列を保存
+        
+        Returns:
+            SHA-256
+        """
+        blob_hash = _sha256_bytes(data)
+        if not self.has(blob_hash):
+            target = self.blob_path(blob_hash)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = target.with_name(f"{blob_hash}.{uuid.uuid4().hex}.tmp")
+            tmp_file.write_bytes(data)
+            tmp_file.replace(target)
+        return blob_hash
+    
+    def put_file(self, path: Path) -> str:
+        """
+        ファイルを保存
+        
+        Returns:
+            SHA-256
+        """
+        return self.put_bytes(Path(path).read_bytes())
+    
+    def transfer_to(self, other: "BlobStore", blob_hashes: Iterable[str]) -> List[str]:
+        """
+        相手が保持していないblobだけをコピー
+        
+        Args:
+            other: コピー先のblobストア
+            blob_hashes: 必要なblobのハッシュ
+        
+        Returns:
+            コピーしたblobのハッシュ
+        
+        Raises:
+            FileNotFoundError: このストアが保持していないblobがある場合
+        """
+        transferred = []
+        for blob_hash in other.missing(blob_hashes):
+            source = self.blob_path(blob_hash)
+            if not source.exists():
+                raise FileNotFoundError(f"blobが見つかりません: {blob_hash}")
+            target = other.blob_path(blob_hash)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = target.with_name(f"{blob_hash}.{uuid.uuid4().hex}.tmp")
+            shutil.copyfile(source, tmp_file)
+            tmp_file.replace(target)
+            transferred.append(blob_hash)
+        return transferred
+    
+    def materialize(self, manifest: BundleManifest, dest_dir: Path) -> MaterializedBundle:
+        """
+        バンドルをディレクトリに展開（可能な場合はハードリンク）
+        
+        Args:
+            manifest: バンドルの内容
+            dest_dir: 展開先のディレクトリ
+        
+        Returns:
+            展開したバンドルのパス
+        
+        Raises:
+            FileNotFoundError: 保持していないblobがある場合
+        """
+        missing = self.missing(manifest.blobs)
+        if missing:
+            raise FileNotFoundError(f"blobが見つかりません: {', '.join(missing)}")
+        
+        for rel_path, blob_hash in manifest.files.items():
+            target = dest_dir / rel_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(self.blob_path(blob_hash), target)
+            except OSError:
+                shutil.copyfile(self.blob_path(blob_hash), target)
+        
+        return MaterializedBundle(
+            root=dest_dir,
+            md_file=dest_dir / manifest.markdown,
+            template_path=dest_dir / manifest.template if manifest.template else None,
+            header_path=dest_dir / manifest.header if manifest.header else None,
+        )
+
+
+def check_header(header_path: Path) -> None:
+    """
+    ヘッダーファイルをバンドルに含められるか確認
+    
+    ヘッダーは単独のファイルとしてバンドルに含めるため、\\input等で
+    別のファイルを読み込むヘッダーは展開先で解決できない。
+    
+    Raises:
+        ValueError: 別のファイルを読み込んでいる場合
+    """
+    text = LATEX_COMMENT_PATTERN.sub("", Path(header_path).read_text(encoding="utf-8"))
+    commands = sorted(set(HEADER_INPUT_PATTERN.findall(text)))
+    if commands:
+        raise ValueError(
+            f"ヘッダーファイル {Path(header_path).name} は {', '.join(commands)} で"
+            "別のファイルを読み込んでいるため、バンドルに含められません"
+            "（読み込むファイルの内容をヘッダーに直接記述してください）"
+        )
+
+
+def build_bundle(
+    md_file: Path,
+    image_paths: Sequence[Path],
+    store: BlobStore,
+    template_path: Optional[Path] = None,
+    header_path: Optional[Path] = None,
+    encoding: str = "utf-8"
+) -> BundleManifest:
+    """
+    マークダウンと参照するファイルをバンドルにまとめる
+    
+    画像はマークダウンからの相対的な位置を保つように配置する
+    （"../figures/a.png" のような参照もそのまま解決できる）。絶対パスで
+    参照された画像はバンドル内に移し、マークダウンの参照を書き換える。
+    
+    Args:
+        md_file: マークダウンファイル
+        image_paths: 参照する画像（ValidationResult.image_paths）
+        store: blobを保存するストア
+        template_path: テンプレートファイルのパス
+        header_path: ヘッダーファイルのパス
+        encoding: マークダウンの文字コード（ValidationResult.encoding）
+    
+    Returns:
+        バンドルの内容
+    
+    Raises:
+        ValueError: ヘッダーが別のファイルを読み込んでいる場合（check_header）
+    """
+    if header_path is not None:
+        check_header(header_path)
+    
+    md_file = Path(md_file).resolve()
+    md_dir = md_file.parent
+    text = md_file.read_text(encoding=encoding)
+    
+    # 絶対パスの参照はバンドル内の相対パスに置き換える
+    external: Dict[str, Path] = {}
+    
+    def rewrite(match: "re.Match") -> str:
+        reference = match.group(2)
+        if not Path(reference).is_absolute():
+            return match.group(0)
+        source = Path(reference)
+        if not source.is_file():
+            return match.group(0)
+        name = f"{EXTERNAL_DIR}/{_sha256_bytes(str(source).encode('utf-8'))[:16]}/{source.name}"
+        external[name] = source
+        return f"{match.group(1)}{name}{match.group(3)}"
+    
+    text = IMAGE_REFERENCE_PATTERN.sub(rewrite, text)
+    external_sources = {source.resolve() for source in external.values()}
+    
+    # 相対参照の画像をすべて含むディレクトリをバンドルのルートにする
+    relative_images = [Path(p).resolve() for p in image_paths if Path(p).resolve() not in external_sources]
+    root = Path(os.path.commonpath([str(md_dir)] + [str(p.parent) for p in relative_images]))
+    md_rel = md_file.relative_to(root)
+    md_rel_dir = md_rel.parent
+    
+    files: Dict[str, str] = {md_rel.as_posix(): store.put_bytes(text.encode(encoding))}
+    for image in relative_images:
+        files[image.relative_to(root).as_posix()] = store.put_file(image)
+    for name, source in external.items():
+        files[(md_rel_dir / name).as_posix()] = store.put_file(source)
+    
+    manifest = BundleManifest(markdown=md_rel.as_posix(), files=files)
+    if template_path is not None:
+        manifest.template = f"{TEMPLATE_DIR}/{Path(template_path).name}"
+        files[manifest.template] = store.put_file(template_path)
+    if header_path is not None:
+        manifest.header = f"{HEADER_DIR}/{Path(header_path).name}"
+        files[manifest.header] = store.put_file(header_path)
+    
+    return manifest
@@ -0,0 +1,148 @@
+"""バッチ内の重複排除: 入力が同一のジョブをまとめ、前処理の結果を共有"""
+
+import hashlib
+import json
+import shutil
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+from .path_index import FileSignature, file_signature
+
+
+T = TypeVar("T")
+
+
+class BatchDeduplicator:
+    """
+    1回のバッチの中で入力が同一のジョブを検出するクラス
+    
+    ジョブの指紋は、マークダウンと参照する画像の内容、画像の相対的な
+    位置、変換レシピのダイジェスト（設定・モード・テンプレート・ヘッダー）
+    から作成する。同じ指紋のジョブは1回だけ変換し、出力を他の出力先に
+    コピーする。検証結果・SVGの変換・図の生成など、ファイルやディレクトリ
+    単位の前処理の結果もバッチの中で共有する。
+    """
+    
+    def __init__(self):
+        self._hashes: Dict[FileSignature, str] = {}
+        self._outputs: Dict[str, Tuple[Path, Path]] = {}
+        self._shared: Dict[Tuple, object] = {}
+    
+    def begin_batch(self) -> None:
+        """新しいバッチを開始（前のバッチの結果は使用しない）"""
+        self._outputs.clear()
+        self._shared.clear()
+        # ファイル内容のハッシュはシグネチャで無効化されるため保持する
+    
+    def content_hash(self, path: Path) -> Optional[str]:
+        """
+        ファイル内容のSHA-256（シグネチャが同じ間はキャッシュを使用）
+        
+        Returns:
+            ハッシュ、ファイルを読み込めない場合はNone
+        """
+        signature = file_signature(path)
+        if signature is None:
+            return None
+        cached = self._hashes.get(signature)
+        if cached is not None:
+            return cached
+        digest = hashlib.sha256()
+        try:
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+        except OSError:
+            return None
+        self._hashes[signature] = digest.hexdigest()
+        return self._hashes[signature]
+    
+    def fingerprint(
+        self,
+        md_file: Path,
+        image_paths: Sequence[Path],
+        recipe_digest: str,
+        output_name: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        ジョブの入力全体の指紋を作成
+        
+        Args:
+            md_file: マークダウンファイル
+            image_paths: 参照する画像（ValidationResult.image_paths）
+            recipe_digest: 変換レシピのダイジェスト
+            output_name: 出力の内容にファイル名が影響する場合のみ指定（HTMLのタイトルなど）
+        
+        Returns:
+            指紋、入力を読み込めない場合はNone
+        """
+        md_hash = self.content_hash(md_file)
+        if md_hash is None:
+            return None
+        
+        md_dir = md_file.parent
+        images: List[Tuple[str, str]] = []
+        for image in image_paths:
+            image_hash = self.content_hash(image)
+            if image_hash is None:
+                return None
+            try:
+                location = image.relative_to(md_dir).as_posix()
+            except ValueError:
+                location = str(image)
+            images.append((location, image_hash))
+        
+        payload = json.dumps({
+            "markdown": md_hash,
+            "images": sorted(images),
+            "recipe": recipe_digest,
+            "output_name": output_name,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def lookup(self, fingerprint: Optional[str]) -> Optional[Tuple[Path, Path]]:
+        """
+        同じ指紋のジョブの結果を取得
+        
+        Returns:
+            (元のマークダウンファイル, 出力ファイル)、未変換の場合はNone
+        """
+        if fingerprint is None:
+            return None
+        return self._outputs.get(fingerprint)
+    
+    def record(self, fingerprint: Optional[str], md_file: Path, output_file: Path) -> None:
+        """変換に成功したジョブの出力を記録"""
+        if fingerprint is not None:
+            self._outputs[fingerprint] = (md_file, output_file)
+    
+    def fan_out(self, fingerprint: str, destination: Path) -> Path:
+        """
+        記録済みの出力を別の出力先にコピー
+        
+        Args:
+            fingerprint: ジョブの指紋
+            destination: コピー先のファイル
+        
+        Returns:
+            コピー先のファイル（元の出力と同じ場合はコピーしない）
+        """
+        _, output_file = self._outputs[fingerprint]
+        if destination.resolve() != output_file.resolve():
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(output_file, destination)
+        return destination
+    
+    def shared(self, key: Tuple, compute: Callable[[], T]) -> T:
+        """
+        バッチの中で前処理の結果を共有
+        
+        Args:
+            key: 前処理の種類と入力を表すキー
+            compute: 結果がない場合に呼び出す関数
+        
+        Returns:
+            前処理の結果
+        """
+        if key not in self._shared:
+            self._shared[key] = compute()
+        return self._shared[key]
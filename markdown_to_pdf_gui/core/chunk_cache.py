@@ -0,0 +1,150 @@
+"""チャンクキャッシュ: 見出し単位で分割したマークダウンのLaTeX変換結果のキャッシュ"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+
+# YAMLメタデータブロック（文書先頭のみ）
+FRONT_MATTER_PATTERN = re.compile(r'\A---[ \t]*\n.*?\n(?:---|\.\.\.)[ \t]*(?:\n|\Z)', re.DOTALL)
+
+# レベル1のATX見出し
+LEVEL1_HEADING_PATTERN = re.compile(r'^ {0,3}#(?!#)(?:[ \t]|$)')
+
+# フェンスコードブロックの開始・終了
+FENCE_PATTERN = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+
+
+def split_markdown_chunks(text: str) -> Tuple[str, List[str]]:
+    """
+    マークダウンをYAMLメタデータとレベル1見出しごとのチャンクに分割
+    
+    コードブロック内の「#」は見出しとして扱わない。最初の見出しより前の
+    本文は先頭のチャンクになる。
+    
+    Args:
+        text: マークダウンのテキスト
+    
+    Returns:
+        (YAMLメタデータブロック, チャンクのリスト)
+    """
+    front_matter = ""
+    match = FRONT_MATTER_PATTERN.match(text)
+    if match:
+        front_matter = match.group(0)
+        text = text[match.end():]
+    
+    chunks: List[str] = []
+    current: List[str] = []
+    fence: Optional[str] = None
+    
+    for line in text.splitlines(keepends=True):
+        fence_match = FENCE_PATTERN.match(line)
+        if fence_match:
+            marker = fence_match.group(1)
+            if fence is None:
+                fence = marker
+            elif marker[0] == fence[0] and len(marker) >= len(fence):
+                fence = None
+        elif fence is None and LEVEL1_HEADING_PATTERN.match(line) and current:
+            chunks.append("".join(current))
+            current = []
+        current.append(line)
+    
+    if current:
+        chunks.append("".join(current))
+    
+    # 空白だけの先頭チャンクは除く
+    chunks = [chunk for chunk in chunks if chunk.strip()]
+    return front_matter, chunks
+
+
+class ChunkCache:
+    """
+    チャンクごとのLaTeX変換結果をコンテンツハッシュで保存するクラス
+    
+    キーはチャンクの本文と、本文の変換結果に影響するPandocの設定から作成する。
+    編集されていないチャンクは再変換せずにキャッシュから読み込む。
+    """
+    
+    # 保持するチャンクの最大数（超えた場合は古いものから削除）
+    MAX_ENTRIES = 2000
+    
+    def __init__(self, cache_dir: Optional[Path] = None):
+        """
+        チャンクキャッシュを初期化
+        
+        Args:
+            cache_dir: キャッシュの保存ディレクトリ（Noneの場合はデフォルト）
+        """
+        if cache_dir is None:
+            cache_dir = Path.home() / "Library" / "Application Support" / "MarkdownToPDF" / "chunks"
+        self.cache_dir = cache_dir
+    
+    def get_key(self, chunk: str, options: Sequence[str]) -> str:
+        """チャンクと変換オプションからキャッシュキーを生成"""
+        payload = json.dumps([list(options), chunk], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        キャッシュされたLaTeXを取得
+        
+        Args:
+            key: キャッシュキー
+        
+        Returns:
+            LaTeXソース、キャッシュがない場合はNone
+        """
+        cache_file = self.cache_dir / f"{key}.tex"
+        try:
+            latex = cache_file.read_text(encoding="utf-8")
+            cache_file.touch()
+            return latex
+        except OSError:
+            return None
+    
+    def put(self, key: str, latex: str) -> None:
+        """LaTeXをキャッシュに保存"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_dir / f"{key}.tex.tmp"
+            tmp_file.write_text(latex, encoding="utf-8")
+            tmp_file.replace(self.cache_dir / f"{key}.tex")
+        except OSError:
+            pass
+    
+    def prune(self) -> None:
+        """最大数を超えたチャンクを最終使用時刻の古い順に削除"""
+        if not self.cache_dir.exists():
+            return
+        
+        entries = []
+        for cache_file in self.cache_dir.glob("*.tex"):
+            try:
+                entries.append((cache_file.stat().st_mtime, cache_file))
+            except OSError:
+                pass
+        
+        if len(entries) <= self.MAX_ENTRIES:
+            return
+        
+        entries.sort()
+        for _, cache_file in entries[:len(entries) - self.MAX_ENTRIES]:
+            try:
+                cache_file.unlink()
+            except OSError:
+                pass
+    
+    def clear(self) -> None:
+        """キャッシュをすべて削除"""
+        if not self.cache_dir.exists():
+            return
+        
+        for cache_file in self.cache_dir.glob("*.tex"):
+            try:
+                cache_file.unlink()
+            except OSError:
+                pass
@@ -1,10 +1,49 @@
 """設定管理: JSON + YAML対応、バリデーション"""
 
+import copy
 import json
 import yaml
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List, Tuple
 from .config_migrator import ConfigMigrator
+from .path_index import FileSignature, file_signature
+
+
+# 変換モード（build_pandoc_commandのmode引数）
+CONVERSION_MODES = ("final", "preview")
+
+# プレビュー用プロファイルのデフォルト（設定の"preview"で上書きできる）
+DEFAULT_PREVIEW_PROFILE = {
+    "toc": False,  # 目次を生成しない
+    "draft_images": True,  # 画像を枠だけで表示（graphicxのdraft）
+    "engine_passes": 1,  # エンジンの実行は1回のみ
+    "output_format": "pdf",  # "pdf" または "html"
+}
+
+# プレビューの出力形式
+PREVIEW_OUTPUT_FORMATS = ("pdf", "html")
+
+
+def apply_conversion_mode(config: Dict, mode: str) -> Dict:
+    """
+    変換モードを適用した設定を取得
+    
+    Args:
+        config: 変換設定
+        mode: 変換モード（"final" または "preview"）
+    
+    Returns:
+        モードを適用した設定のコピー（"mode"キーにモード名を含む）
+    """
+    if mode not in CONVERSION_MODES:
+        raise ValueError(f"不明な変換モード: {mode}")
+    
+    resolved = dict(config)
+    if mode == "preview":
+        resolved.update(DEFAULT_PREVIEW_PROFILE)
+        resolved.update(config.get("preview") or {})
+    resolved["mode"] = mode
+    return resolved
 
 
 class ConfigManager:
@@ -28,6 +67,12 @@ class ConfigManager:
         
         self.migrator = ConfigMigrator()
         self.config: Dict = {}
+        # 現在の設定の読み込み元ファイルのシグネチャ（パス, 更新時刻, サイズ）
+        self._source: FileSignature = None
+        # 読み込んだ設定ファイル → (シグネチャ, バリデーション済みの内容)
+        self._loaded: Dict[Path, Tuple[FileSignature, Dict]] = {}
+        # (読み込み元のシグネチャ, テンプレート, ヘッダー) → 存在確認の結果
+        self._path_checks: Dict[Tuple[FileSignature, str, str], bool] = {}
         self.load_default_config()
     
     def load_default_config(self) -> None:
@@ -36,7 +81,9 @@ class ConfigManager:
         if default_config_path.exists():
             with open(default_config_path, 'r', encoding='utf-8') as f:
                 self.config = json.load(f)
+            self._source = file_signature(default_config_path)
         else:
+            self._source = None
             # フォールバック: ハードコードされたデフォルト設定
             self.config = {
                 "version": "1.0.0",
@@ -63,32 +110,60 @@ class ConfigManager:
         Returns:
             成功した場合はTrue
         """
-        if not self.config_file.exists():
+        loaded = self._load_file(self.config_file, self._read_config_file)
+        if loaded is None:
             return False
+        self.config.update(loaded[0])
+        self._source = loaded[1]
+        return True
+    
+    def _read_config_file(self, config_file: Path) -> Dict:
+        """設定ファイルを読み込み、必要ならマイグレーション"""
+        with open(config_file, 'r', encoding='utf-8') as f:
+            loaded_config = json.load(f)
+        
+        # バージョンチェックとマイグレーション
+        if 'version' in loaded_config:
+            current_version = loaded_config['version']
+            if current_version != self.config.get('version', '1.0.0'):
+                loaded_config = self.migrator.migrate(
+                    loaded_config,
+                    current_version,
+                    self.config.get('version', '1.0.0')
+                )
+        return loaded_config
+    
+    def _load_file(
+        self,
+        path: Path,
+        read: Callable[[Path], Optional[Dict]]
+    ) -> Optional[Tuple[Dict, FileSignature]]:
+        """
+        設定ファイルを読み込んでバリデーション
         
-        try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                loaded_config = json.load(f)
-            
-            # バージョンチェックとマイグレーション
-            if 'version' in loaded_config:
-                current_version = loaded_config['version']
-                if current_version != self.config.get('version', '1.0.0'):
-                    loaded_config = self.migrator.migrate(
-                        loaded_config,
-                        current_version,
-                        self.config.get('version', '1.0.0')
-                    )
-            
-            # バリデーション
-            if self.validate_config(loaded_config):
-                self.config.update(loaded_config)
-                return True
-            else:
-                return False
+        結果はファイルのパス・更新時刻・サイズをキーにメモ化し、ファイルが
+        変更されていなければ読み込みとバリデーション（存在確認を含む）を省略する。
         
-        except Exception:
-            return False
+        Args:
+            path: 設定ファイルのパス
+            read: ファイルを読み込んで設定の辞書を返す関数
+        
+        Returns:
+            (設定のコピー, ファイルのシグネチャ)、読み込めないか無効な場合はNone
+        """
+        signature = file_signature(path)
+        if signature is None:
+            return None
+        cached = self._loaded.get(path)
+        if cached is None or cached[0] != signature:
+            try:
+                config = read(path)
+            except Exception:
+                return None
+            if not config or not self.validate_config(config, source=signature):
+                return None
+            self._loaded[path] = cached = (signature, config)
+        return copy.deepcopy(cached[1]), signature
     
     def save_config(self) -> bool:
         """
@@ -103,7 +178,7 @@ class ConfigManager:
                 self.migrator.backup(self.config_file)
             
             # バリデーション
-            if not self.validate_config(self.config):
+            if not self.validate_config(self.config, source=self._source):
                 return False
             
             # 保存
@@ -115,12 +190,17 @@ class ConfigManager:
         except Exception:
             return False
     
-    def validate_config(self, config: Dict) -> bool:
+    def validate_config(self, config: Dict, source: FileSignature = None) -> bool:
         """
         設定をバリデーション
         
+        テンプレート・ヘッダーの存在確認は、設定の読み込み元ファイルの
+        シグネチャ（source）とパスをキーにメモ化する。読み込み元が
+        変更されるまで同じパスは再確認しない。
+        
         Args:
             config: 検証する設定
+            source: 設定の読み込み元ファイルのシグネチャ（Noneの場合はファイルに由来しない設定）
         
         Returns:
             有効な場合はTrue
@@ -138,20 +218,77 @@ class ConfigManager:
                 return False
         
         # ファイルパスの存在確認（指定されている場合）
-        if "template_path" in config and config["template_path"]:
-            if not Path(config["template_path"]).exists():
+        if not self._paths_exist(config, source):
+            return False
+        
+        # プレビュー用プロファイル
+        if "preview" in config and config["preview"]:
+            preview = config["preview"]
+            if not isinstance(preview, dict):
+                return False
+            if preview.get("output_format", "pdf") not in PREVIEW_OUTPUT_FORMATS:
+                return False
+            engine_passes = preview.get("engine_passes", 1)
+            if not isinstance(engine_passes, int) or engine_passes < 1 or engine_passes > 3:
                 return False
         
-        if "header_path" in config and config["header_path"]:
-            if not Path(config["header_path"]).exists():
+        # 分散変換（有効な場合はキューのパスが必要）
+        if "distributed" in config and config["distributed"]:
+            distributed = config["distributed"]
+            if not isinstance(distributed, dict):
+                return False
+            if distributed.get("enabled", False) and not distributed.get("queue_path"):
                 return False
         
         return True
     
+    def _paths_exist(self, config: Dict, source: FileSignature) -> bool:
+        """テンプレート・ヘッダーが存在するか（読み込み元ごとにメモ化）"""
+        template = str(config.get("template_path") or "")
+        header = str(config.get("header_path") or "")
+        key = (source, template, header)
+        if key not in self._path_checks:
+            # 読み込み元が変わった古い結果は破棄
+            self._path_checks = {k: v for k, v in self._path_checks.items() if k[0] == source}
+            self._path_checks[key] = all(not path or Path(path).exists() for path in (template, header))
+        return self._path_checks[key]
+    
     def get_config(self) -> Dict:
         """現在の設定を取得"""
         return self.config.copy()
     
+    def get_mode_config(self, mode: str) -> Dict:
+        """
+        変換モードを適用した設定を取得
+        
+        Args:
+            mode: 変換モード（"final" または "preview"）
+        
+        Returns:
+            設定の辞書
+        """
+        return apply_conversion_mode(self.config, mode)
+    
+    def get_preview_profile(self) -> Dict:
+        """プレビュー用プロファイルを取得（デフォルト値を含む）"""
+        profile = dict(DEFAULT_PREVIEW_PROFILE)
+        profile.update(self.config.get("preview") or {})
+        return profile
+    
+    def update_preview_profile(self, updates: Dict) -> bool:
+        """
+        プレビュー用プロファイルを更新
+        
+        Args:
+            updates: 更新する項目
+        
+        Returns:
+            成功した場合はTrue
+        """
+        preview = dict(self.config.get("preview") or {})
+        preview.update(updates)
+        return self.update_config({"preview": preview})
+    
     def update_config(self, updates: Dict) -> bool:
         """
         設定を更新
@@ -163,7 +300,7 @@ class ConfigManager:
             成功した場合はTrue
         """
         self.config.update(updates)
-        return self.validate_config(self.config)
+        return self.validate_config(self.config, source=self._source)
     
     def load_profile(self, profile_name: str) -> bool:
         """
@@ -175,23 +312,18 @@ class ConfigManager:
         Returns:
             成功した場合はTrue
         """
-        profile_file = self.profiles_dir / f"{profile_name}.json"
-        if not profile_file.exists():
+        loaded = self._load_file(self.profiles_dir / f"{profile_name}.json", self._read_json)
+        if loaded is None:
             return False
-        
-        try:
-            with open(profile_file, 'r', encoding='utf-8') as f:
-                profile_config = json.load(f)
-            
-            if self.validate_config(profile_config):
-                self.config.update(profile_config)
-                self.config['profile_name'] = profile_name
-                return True
-        
-        except Exception:
-            pass
-        
-        return False
+        self.config.update(loaded[0])
+        self.config['profile_name'] = profile_name
+        self._source = loaded[1]
+        return True
+    
+    def _read_json(self, path: Path) -> Dict:
+        """JSONファイルを読み込み"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
     
     def save_profile(self, profile_name: str) -> bool:
         """
@@ -209,7 +341,7 @@ class ConfigManager:
             profile_config = self.config.copy()
             profile_config['profile_name'] = profile_name
             
-            if not self.validate_config(profile_config):
+            if not self.validate_config(profile_config, source=self._source):
                 return False
             
             with open(profile_file, 'w', encoding='utf-8') as f:
@@ -242,27 +374,23 @@ class ConfigManager:
         Returns:
             成功した場合はTrue
         """
-        if not yaml_path.exists():
+        loaded = self._load_file(yaml_path, self._read_yaml)
+        if loaded is None:
             return False
+        self.config.update(loaded[0])
+        self._source = loaded[1]
+        return True
+    
+    def _read_yaml(self, yaml_path: Path) -> Optional[Dict]:
+        """YAMLファイルを読み込み、設定形式に変換"""
+        with open(yaml_path, 'r', encoding='utf-8') as f:
+            yaml_data = yaml.safe_load(f)
         
-        try:
-            with open(yaml_path, 'r', encoding='utf-8') as f:
-                yaml_data = yaml.safe_load(f)
-            
-            if yaml_data is None:
-                return False
-            
-            # YAMLデータを設定形式に変換
-            config = self._yaml_to_config(yaml_data)
-            
-            if self.validate_config(config):
-                self.config.update(config)
-                return True
-        
-        except Exception:
-            pass
+        if yaml_data is None:
+            return None
         
-        return False
+        # YAMLデータを設定形式に変換
+        return self._yaml_to_config(yaml_data)
     
     def _yaml_to_config(self, yaml_data: Dict) -> Dict:
         """YAMLデータを設定形式に変換"""
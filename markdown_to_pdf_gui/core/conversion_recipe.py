@@ -0,0 +1,250 @@
+"""変換レシピ: 設定から事前に構築したPandocコマンドのテンプレート"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from .config_manager import apply_conversion_mode
+from .path_index import FileSignature, PathIndex, file_signature
+
+
+def config_digest(config: Dict) -> str:
+    """設定の内容から安定したダイジェストを生成"""
+    payload = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class ConversionRecipe:
+    """
+    設定・モード・テンプレートから構築した変換レシピ（不変・ハッシュ可能）
+    
+    入力ファイルと出力ファイル以外の引数を保持し、ファイルごとのコマンドは
+    build_commandで組み立てる。digestは設定の内容と参照するファイルの
+    シグネチャから作成され、キャッシュのキーとして使用できる。
+    """
+    mode: str
+    output_format: str
+    options: Tuple[str, ...]
+    template_path: Optional[Path]
+    header_path: Optional[Path]
+    engine_passes: int
+    file_signatures: Tuple[FileSignature, FileSignature]
+    digest: str
+    
+    def build_command(self, md_file: Path, output_file: Path) -> List[str]:
+        """
+        ファイルごとのPandocコマンドを組み立て
+        
+        Args:
+            md_file: 入力マークダウンファイル
+            output_file: 出力ファイル
+        
+        Returns:
+            Pandocコマンドの引数リスト
+        """
+        cmd = ["pandoc", str(md_file), *self.options]
+        if self.output_format == "html":
+            cmd.extend(["--metadata", f"pagetitle:{md_file.stem}"])
+        cmd.extend(["--output", str(output_file)])
+        return cmd
+
+
+def compile_recipe(
+    config: Dict,
+    template_path: Optional[Path] = None,
+    header_path: Optional[Path] = None,
+    mode: Optional[str] = None
+) -> ConversionRecipe:
+    """
+    設定から変換レシピを構築
+    
+    Args:
+        config: 変換設定
+        template_path: テンプレートファイルのパス
+        header_path: ヘッダーファイルのパス
+        mode: 変換モード（Noneの場合は設定の"mode"）
+    
+    Returns:
+        変換レシピ
+    """
+    config = apply_conversion_mode(config, mode or config.get("mode", "final"))
+    signatures = (file_signature(template_path), file_signature(header_path))
+    # 存在しないテンプレート・ヘッダーは使用しない
+    template_path = template_path if signatures[0] else None
+    header_path = header_path if signatures[1] else None
+    
+    output_format = config.get("output_format", "pdf")
+    if output_format == "html":
+        options = _html_options(config)
+    else:
+        options = _pdf_options(config, template_path, header_path)
+    
+    digest = config_digest({"config": config, "files": list(signatures), "options": options})
+    return ConversionRecipe(
+        mode=config["mode"],
+        output_format=output_format,
+        options=tuple(options),
+        template_path=template_path,
+        header_path=header_path,
+        engine_passes=config.get("engine_passes", 3),
+        file_signatures=signatures,
+        digest=digest
+    )
+
+
+def _pdf_options(
+    config: Dict,
+    template_path: Optional[Path],
+    header_path: Optional[Path]
+) -> List[str]:
+    """PDF出力用のPandocオプション"""
+    cmd = []
+    
+    # PDFエンジン
+    pdf_engine = config.get("pdf_engine", "xelatex")
+    cmd.extend(["--pdf-engine", pdf_engine])
+    
+    # 入力形式
+    from_format = config.get("from", "markdown+tex_math_dollars+raw_tex")
+    cmd.extend(["--from", from_format])
+    
+    # 出力形式
+    cmd.extend(["--to", "pdf"])
+    
+    # テンプレート
+    if template_path:
+        cmd.extend(["--template", str(template_path)])
+    
+    # ヘッダーファイル
+    if header_path:
+        cmd.extend(["--include-in-header", str(header_path)])
+    
+    # 変数
+    variables = {
+        "mainfont": config.get("mainfont", "Hiragino Sans"),
+        "CJKmainfont": config.get("cjk_mainfont", "Hiragino Sans"),
+        "geometry": config.get("geometry", "margin=2.5cm"),
+        "fontsize": config.get("fontsize", "10pt"),
+        "documentclass": config.get("documentclass", "article"),
+    }
+    
+    for key, value in variables.items():
+        cmd.extend(["--variable", f"{key}:{value}"])
+    
+    # 画像を枠だけで表示（プレビュー用、graphicxがクラスオプションを引き継ぐ）
+    if config.get("draft_images", False):
+        cmd.extend(["--variable", "classoption:draft"])
+    
+    # 目次
+    if config.get("toc", True):
+        cmd.append("--toc")
+        toc_depth = config.get("toc_depth", 2)
+        cmd.extend(["--toc-depth", str(toc_depth)])
+    
+    # セクション番号
+    if config.get("number_sections", False):
+        cmd.append("--number-sections")
+    
+    # ハイパーリンク
+    if config.get("colorlinks", True):
+        linkcolor = config.get("linkcolor", "blue")
+        urlcolor = config.get("urlcolor", "blue")
+        toccolor = config.get("toccolor", "blue")
+        cmd.extend(["--variable", "colorlinks:true"])
+        cmd.extend(["--variable", f"linkcolor:{linkcolor}"])
+        cmd.extend(["--variable", f"urlcolor:{urlcolor}"])
+        cmd.extend(["--variable", f"toccolor:{toccolor}"])
+    
+    # スタンドアロン
+    cmd.append("--standalone")
+    
+    return cmd
+
+
+def _html_options(config: Dict) -> List[str]:
+    """HTMLプレビュー用のPandocオプション（LaTeXエンジンを使用しない）"""
+    cmd = []
+    cmd.extend(["--from", config.get("from", "markdown+tex_math_dollars+raw_tex")])
+    cmd.extend(["--to", "html5"])
+    cmd.append("--standalone")
+    cmd.append("--mathml")
+    if config.get("toc", False):
+        cmd.append("--toc")
+    if config.get("number_sections", False):
+        cmd.append("--number-sections")
+    return cmd
+
+
+class RecipeCache:
+    """
+    変換レシピのキャッシュ
+    
+    設定の内容のダイジェスト・モード・テンプレートのパスをキーにレシピを
+    保持する。プロファイルのファイルが変更されて内容が変わった設定では
+    別のレシピを構築し、同じ内容の設定（読み込み直したプロファイルなど）
+    ではレシピを再利用する。参照するファイルのシグネチャが変わった場合も
+    再構築する。PathIndexを指定した場合、シグネチャの確認はバッチ（世代）
+    ごとに1回だけ行う。
+    """
+    
+    # 保持するレシピの最大数（超えた場合は古いものから削除）
+    MAX_ENTRIES = 64
+    
+    def __init__(self, path_index: Optional[PathIndex] = None):
+        """
+        レシピキャッシュを初期化
+        
+        Args:
+            path_index: バッチの世代を参照するインデックス
+        """
+        self.path_index = path_index
+        # キー → (レシピ, 確認した世代)
+        self._recipes: "OrderedDict[Tuple, Tuple[ConversionRecipe, Optional[int]]]" = OrderedDict()
+    
+    def get(
+        self,
+        config: Dict,
+        template_path: Optional[Path] = None,
+        header_path: Optional[Path] = None,
+        mode: Optional[str] = None
+    ) -> ConversionRecipe:
+        """
+        レシピを取得（キャッシュがないか無効な場合は構築）
+        
+        Args:
+            config: 変換設定
+            template_path: テンプレートファイルのパス
+            header_path: ヘッダーファイルのパス
+            mode: 変換モード（Noneの場合は設定の"mode"）
+        
+        Returns:
+            変換レシピ
+        """
+        mode = mode or config.get("mode", "final")
+        key = (config_digest(config), mode, str(template_path), str(header_path))
+        generation = self.path_index.generation if self.path_index is not None else None
+        
+        cached = self._recipes.get(key)
+        if cached is not None:
+            self._recipes.move_to_end(key)
+            recipe, checked_generation = cached
+            if generation is not None and checked_generation == generation:
+                return recipe
+            current = (file_signature(template_path), file_signature(header_path))
+            if current == recipe.file_signatures:
+                self._recipes[key] = (recipe, generation)
+                return recipe
+        
+        recipe = compile_recipe(config, template_path, header_path, mode)
+        self._recipes[key] = (recipe, generation)
+        self._recipes.move_to_end(key)
+        while len(self._recipes) > self.MAX_ENTRIES:
+            self._recipes.popitem(last=False)
+        return recipe
+    
+    def clear(self) -> None:
+        """キャッシュをクリア"""
+        self._recipes.clear()
@@ -0,0 +1,203 @@
+"""変換ワーカー: ジョブキューから変換ジョブを取得して実行
+
+使い方::
+    
+    python -m markdown_to_pdf_gui.core.conversion_worker --queue /shared/mdtopdf/queue.db
+
+キューのデータベースと変換するファイルは、すべてのマシンから同じパスで
+参照できる共有ファイルシステム上に置く。
+"""
+
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+from .asset_bundle import BlobStore
+from .converter import Converter
+from .job_queue import ConversionJob, JobQueue, default_worker_id
+from .path_index import PathIndex
+from .pdf_validator import PDFValidator
+
+
+class ConversionWorker:
+    """
+    ジョブキューのジョブを1件ずつ変換するワーカー
+    
+    変換はワーカーの一時ディレクトリに出力し、成功した場合は結果をキューの
+    結果ディレクトリに保存する。進捗の報告でジョブのキャンセルを検出した
+    場合は結果を破棄する。バンドル付きのジョブは、ローカルのblobキャッシュに
+    ないblobだけをキューから取得し、一時ディレクトリに展開して変換する。
+    
+    変換中はConverter.abort_checkからハートビートを送り、リースを維持する。
+    ハートビートが拒否された場合（キャンセル・再割り当て）はその時点で変換を中断する。
+    """
+    
+    # 変換中にハートビートを送る最大の間隔（秒）。リースの猶予が短い場合はその1/4
+    HEARTBEAT_INTERVAL = 10.0
+    
+    def __init__(
+        self,
+        queue: JobQueue,
+        worker_id: Optional[str] = None,
+        converter: Optional[Converter] = None,
+        pdf_validator: Optional[PDFValidator] = None,
+        cache_dir: Optional[Path] = None
+    ):
+        """
+        ワーカーを初期化
+        
+        Args:
+            queue: ジョブキュー
+            worker_id: ワーカーID（Noneの場合はホスト名:プロセスID）
+            converter: 変換エンジン
+            pdf_validator: PDF検証
+            cache_dir: blobキャッシュのディレクトリ（Noneの場合はデフォルト）
+        """
+        self.queue = queue
+        self.worker_id = worker_id or default_worker_id()
+        self.path_index = PathIndex()
+        self.converter = converter or Converter(path_index=self.path_index)
+        self.pdf_validator = pdf_validator or PDFValidator()
+        if cache_dir is None:
+            cache_dir = Path.home() / "Library" / "Application Support" / "MarkdownToPDF" / "blobs"
+        self.blob_cache = BlobStore(cache_dir)
+        # 直前のジョブでキューから取得したblobの数
+        self.last_transferred = 0
+        self._stop = threading.Event()
+    
+    def run_once(self) -> bool:
+        """
+        ジョブを1件実行
+        
+        Returns:
+            ジョブを実行した場合はTrue、待機中のジョブがない場合はFalse
+        """
+        job = self.queue.claim(self.worker_id)
+        if job is None:
+            return False
+        
+        try:
+            self._process(job)
+        except Exception as e:
+            self.queue.fail(job.id, self.worker_id, f"予期しないエラー: {str(e)}")
+        return True
+    
+    def run(self, poll_interval: float = 2.0, max_jobs: Optional[int] = None) -> int:
+        """
+        stopが呼ばれるまでジョブを実行
+        
+        Args:
+            poll_interval: 待機中のジョブがない場合の確認間隔（秒）
+            max_jobs: 実行するジョブの最大数（Noneの場合は無制限）
+        
+        Returns:
+            実行したジョブの数
+        """
+        processed = 0
+        while not self._stop.is_set() and (max_jobs is None or processed < max_jobs):
+            if self.run_once():
+                processed += 1
+            else:
+                self._stop.wait(poll_interval)
+        return processed
+    
+    def stop(self) -> None:
+        """ワーカーを停止（実行中のジョブは完了まで続ける）"""
+        self._stop.set()
+    
+    def _process(self, job: ConversionJob) -> None:
+        """ジョブを変換して結果を報告"""
+        self.path_index.begin_batch()
+        if not self.queue.heartbeat(job.id, self.worker_id, 10.0, f"変換中: {job.md_path.name}"):
+            return
+        
+        md_file, template_path, header_path = job.md_path, job.template_path, job.header_path
+        self.last_transferred = 0
+        
+        with tempfile.TemporaryDirectory(prefix="mdtopdf-worker-") as tmp_dir:
+            if job.bundle is not None:
+                # 保持していないblobだけを取得してバンドルを展開
+                transferred = self.queue.blobs.transfer_to(self.blob_cache, job.bundle.blobs)
+                self.last_transferred = len(transferred)
+                bundle = self.blob_cache.materialize(job.bundle, Path(tmp_dir) / "bundle")
+                md_file, template_path, header_path = bundle.md_file, bundle.template_path, bundle.header_path
+            
+            output_dir = Path(tmp_dir) / "output"
+            output_dir.mkdir()
+            self.converter.abort_check = self._lease_keeper(job)
+            try:
+                success, output_file, error_msg = self.converter.convert(
+                    md_file,
+                    output_dir,
+                    job.config,
+                    template_path,
+                    header_path,
+                    mode=job.mode
+                )
+            finally:
+                self.converter.abort_check = None
+            if not success or output_file is None:
+                self.queue.fail(job.id, self.worker_id, error_msg or "変換に失敗しました")
+                return
+            
+            if not self.queue.heartbeat(job.id, self.worker_id, 90.0, f"後処理中: {job.md_path.name}"):
+                return
+            
+            if output_file.suffix == ".pdf" and job.mode != "preview":
+                pdf_result = self.pdf_validator.validate(output_file)
+                if not pdf_result.is_valid:
+                    self.queue.fail(
+                        job.id, self.worker_id, f"PDF検証エラー: {'; '.join(pdf_result.errors)}"
+                    )
+                    return
+                self.pdf_validator.set_metadata(output_file, title=job.md_path.stem)
+            
+            self.queue.complete(job.id, self.worker_id, output_file)
+    
+    def _lease_keeper(self, job: ConversionJob) -> Callable[[], bool]:
+        """
+        変換中のハートビートを送るabort_checkを作成
+        
+        Converterから頻繁に呼び出されるため、ハートビートは間隔を空けて送る。
+        
+        Returns:
+            ジョブを中断すべき場合にTrueを返す関数
+        """
+        interval = min(self.HEARTBEAT_INTERVAL, self.queue.lease_timeout / 4)
+        message = f"変換中: {job.md_path.name}"
+        state = {"last": time.monotonic(), "lost": False}
+        
+        def should_abort() -> bool:
+            if state["lost"]:
+                return True
+            now = time.monotonic()
+            if now - state["last"] >= interval:
+                state["last"] = now
+                state["lost"] = not self.queue.heartbeat(job.id, self.worker_id, 10.0, message)
+            return state["lost"]
+        
+        return should_abort
+
+
+def main() -> None:
+    """ワーカーのメイン関数"""
+    parser = argparse.ArgumentParser(description="Markdown to PDF 変換ワーカー")
+    parser.add_argument("--queue", type=Path, required=True, help="キューのデータベースファイル")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="キューの確認間隔（秒）")
+    parser.add_argument("--max-jobs", type=int, default=None, help="実行するジョブの最大数")
+    args = parser.parse_args()
+    
+    worker = ConversionWorker(JobQueue(args.queue))
+    print(f"ワーカー {worker.worker_id} を開始しました: {args.queue}")
+    try:
+        processed = worker.run(args.poll_interval, args.max_jobs)
+    except KeyboardInterrupt:
+        processed = None
+    if processed is not None:
+        print(f"{processed}件のジョブを実行しました")
+
+
+if __name__ == "__main__":
+    main()
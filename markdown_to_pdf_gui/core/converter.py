@@ -1,16 +1,61 @@
 """Pandoc変換エンジン: 基本的な変換機能"""
 
+import os
+import re
+import shutil
 import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List, Union
 from .error_handler import ErrorHandler, ErrorType, ErrorCategory
+from .config_manager import apply_conversion_mode
+from .chunk_cache import ChunkCache, split_markdown_chunks
+from .conversion_recipe import RecipeCache
+from .latex_format import LatexFormatCache
+from .latex_log_monitor import LatexDiagnosis, run_monitored
+from .path_index import PathIndex
+
+
+# チャンク変換で本文を差し込む位置
+CHUNK_BODY_PLACEHOLDER = "%%MDTOPDF-CHUNK-BODY%%"
+SKELETON_BEGIN = "MDTOPDFSKELETONBEGIN"
+SKELETON_END = "MDTOPDFSKELETONEND"
+
+# 中断した変換のメッセージ
+ABORTED_MESSAGE = "変換を中断しました"
+
+# 本文のLaTeXで使われている機能と、骨組みの生成時にPandocへ渡す見本
+# （テンプレートのgraphics・tables・strikeout・highlighting-macrosの分岐に対応）
+SKELETON_FEATURE_PROBES = [
+    (re.compile(r'\\includegraphics'), "![](probe.png)"),
+    (re.compile(r'\\begin\{longtable\}'), "| probe |\n|---|\n| probe |"),
+    (re.compile(r'\\st\{'), "~~probe~~"),
+    (re.compile(r'\\begin\{Shaded\}'), "```c\nprobe\n```"),
+]
 
 
 class Converter:
     """Pandocを使用したPDF変換エンジン"""
     
-    def __init__(self, error_handler: Optional[ErrorHandler] = None):
+    def __init__(
+        self,
+        error_handler: Optional[ErrorHandler] = None,
+        format_cache: Optional[LatexFormatCache] = None,
+        chunk_cache: Optional[ChunkCache] = None,
+        path_index: Optional[PathIndex] = None
+    ):
         self.error_handler = error_handler or ErrorHandler()
+        self.format_cache = format_cache or LatexFormatCache()
+        self.chunk_cache = chunk_cache or ChunkCache()
+        # 設定ごとに構築済みのコマンドテンプレート（テンプレートの確認はバッチごと）
+        self.recipes = RecipeCache(path_index)
+        self._pandoc_version: Optional[str] = None
+        # 直前の変換でLaTeXログの監視が検出した致命的エラー
+        self.last_diagnosis: Optional[LatexDiagnosis] = None
+        # Trueを返した時点で実行中のPandoc・LaTeXを中断する関数（優先度の高い変換への切り替えなど）
+        self.abort_check: Optional[Callable[[], bool]] = None
     
     def build_pandoc_command(
         self,
@@ -18,7 +63,8 @@ class Converter:
         output_file: Path,
         config: Dict,
         template_path: Optional[Path] = None,
-        header_path: Optional[Path] = None
+        header_path: Optional[Path] = None,
+        mode: Optional[str] = None
     ) -> List[str]:
         """
         Pandocコマンドを構築
@@ -29,70 +75,42 @@ class Converter:
             config: 変換設定
             template_path: テンプレートファイルのパス
             header_path: ヘッダーファイルのパス
+            mode: 変換モード（"final" または "preview"、Noneの場合は設定の"mode"）
         
         Returns:
             Pandocコマンドの引数リスト
         """
-        cmd = ["pandoc", str(md_file)]
-        
-        # PDFエンジン
-        pdf_engine = config.get("pdf_engine", "xelatex")
-        cmd.extend(["--pdf-engine", pdf_engine])
-        
-        # 入力形式
-        from_format = config.get("from", "markdown+tex_math_dollars+raw_tex")
-        cmd.extend(["--from", from_format])
-        
-        # 出力形式
-        cmd.extend(["--to", "pdf"])
-        
-        # テンプレート
-        if template_path and template_path.exists():
-            cmd.extend(["--template", str(template_path)])
-        
-        # ヘッダーファイル
-        if header_path and header_path.exists():
-            cmd.extend(["--include-in-header", str(header_path)])
-        
-        # 変数
-        variables = {
-            "mainfont": config.get("mainfont", "Hiragino Sans"),
-            "CJKmainfont": config.get("cjk_mainfont", "Hiragino Sans"),
-            "geometry": config.get("geometry", "margin=2.5cm"),
-            "fontsize": config.get("fontsize", "10pt"),
-            "documentclass": config.get("documentclass", "article"),
-        }
-        
-        for key, value in variables.items():
-            cmd.extend(["--variable", f"{key}:{value}"])
-        
-        # 目次
-        if config.get("toc", True):
-            cmd.append("--toc")
-            toc_depth = config.get("toc_depth", 2)
-            cmd.extend(["--toc-depth", str(toc_depth)])
-        
-        # セクション番号
-        if config.get("number_sections", False):
-            cmd.append("--number-sections")
-        
-        # ハイパーリンク
-        if config.get("colorlinks", True):
-            linkcolor = config.get("linkcolor", "blue")
-            urlcolor = config.get("urlcolor", "blue")
-            toccolor = config.get("toccolor", "blue")
-            cmd.extend(["--variable", f"colorlinks:true"])
-            cmd.extend(["--variable", f"linkcolor:{linkcolor}"])
-            cmd.extend(["--variable", f"urlcolor:{urlcolor}"])
-            cmd.extend(["--variable", f"toccolor:{toccolor}"])
-        
-        # スタンドアロン
-        cmd.append("--standalone")
+        recipe = self.recipes.get(config, template_path, header_path, mode)
+        return recipe.build_command(md_file, output_file)
+    
+    def _resolve_config(self, config: Optional[Dict], mode: str) -> Dict:
+        """変換モードを適用した設定を取得（レシピは設定の内容をキーに再利用される）"""
+        return apply_conversion_mode(config or {}, mode)
+    
+    def output_path(
+        self,
+        md_file: Path,
+        output_dir: Optional[Path],
+        config: Dict,
+        mode: str = "final"
+    ) -> Path:
+        """
+        出力ファイルのパスを決定
         
-        # 出力ファイル
-        cmd.extend(["--output", str(output_file)])
+        Args:
+            md_file: 入力マークダウンファイル
+            output_dir: 出力ディレクトリ（Noneの場合はmd_fileと同じディレクトリ）
+            config: モードを適用済みの変換設定
+            mode: 変換モード
         
-        return cmd
+        Returns:
+            出力ファイルのパス
+        """
+        if output_dir is None:
+            output_dir = md_file.parent
+        if mode == "preview":
+            return output_dir / f"{md_file.stem}.preview.{config.get('output_format', 'pdf')}"
+        return output_dir / f"{md_file.stem}.pdf"
     
     def convert(
         self,
@@ -100,7 +118,8 @@ class Converter:
         output_dir: Optional[Path] = None,
         config: Optional[Dict] = None,
         template_path: Optional[Path] = None,
-        header_path: Optional[Path] = None
+        header_path: Optional[Path] = None,
+        mode: str = "final"
     ) -> tuple[bool, Optional[Path], str]:
         """
         マークダウンファイルをPDFに変換
@@ -111,32 +130,70 @@ class Converter:
             config: 変換設定
             template_path: テンプレートファイルのパス
             header_path: ヘッダーファイルのパス
+            mode: 変換モード（"preview"の場合は<名前>.preview.pdf/.htmlに出力）
         
         Returns:
             (成功フラグ, 出力PDFファイルパス, エラーメッセージ)
         """
-        if config is None:
-            config = {}
+        config = self._resolve_config(config, mode)
         
-        if output_dir is None:
-            output_dir = md_file.parent
+        self.last_diagnosis = None
         
-        output_file = output_dir / f"{md_file.stem}.pdf"
+        output_file = self.output_path(md_file, output_dir, config, mode)
+        is_pdf = output_file.suffix == ".pdf"
+        
+        # 見出しごとに分割してLaTeXに変換（変更のないチャンクはキャッシュを使用）
+        if is_pdf and config.get("chunked_conversion", False):
+            result = self._convert_chunked(
+                md_file, output_file, config, template_path, header_path
+            )
+            if result is not None:
+                return result
+            # 組み立てたLaTeXのビルドに失敗した場合は通常の変換で作り直す
+            self.last_diagnosis = None
+        
+        # 事前コンパイル済みフォーマットを使用（使用できない場合は通常の変換）
+        if is_pdf and config.get("precompiled_format", False) and self.format_cache.is_supported(
+            config.get("pdf_engine", "xelatex")
+        ):
+            result = self._convert_with_format(
+                md_file, output_file, config, template_path, header_path
+            )
+            if result is not None:
+                return result
+        
+        # エンジンの実行回数を指定した場合（プレビューは1回）はLaTeXを生成してから実行
+        # （Pandocに任せると目次・相互参照のために再実行されるため）
+        if is_pdf and config.get("engine_passes") is not None:
+            result = self._convert_with_passes(
+                md_file, output_file, config, template_path, header_path
+            )
+            if result is not None:
+                return result
         
         # コマンドの構築
         cmd = self.build_pandoc_command(
             md_file, output_file, config, template_path, header_path
         )
         
-        # Pandocの実行
+        # Pandocの実行（LaTeXの出力を監視し、致命的エラーが出た時点で中断）
         try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300,  # 5分のタイムアウト
-                check=False
-            )
+            with tempfile.TemporaryDirectory(prefix="md2pdf_") as tmp:
+                # pandocの作業ディレクトリ（tex2pdf.*）をここに作成させて.logを監視する
+                env = dict(os.environ, TMPDIR=tmp, TMP=tmp, TEMP=tmp)
+                result = run_monitored(
+                    cmd,
+                    timeout=300,  # 5分のタイムアウト
+                    env=env,
+                    log_dir=Path(tmp),
+                    abort=self.abort_check
+                )
+            
+            if result.aborted:
+                return False, None, ABORTED_MESSAGE
+            
+            if result.diagnosis is not None:
+                return self._handle_diagnosis(md_file, result.diagnosis)
             
             if result.returncode == 0:
                 if output_file.exists():
@@ -164,3 +221,437 @@ class Converter:
             error_msg = f"予期しないエラー: {str(e)}"
             self.error_handler.handle_conversion_error(md_file, error_msg)
             return False, None, error_msg
+    
+    def _convert_with_format(
+        self,
+        md_file: Path,
+        output_file: Path,
+        config: Dict,
+        template_path: Optional[Path] = None,
+        header_path: Optional[Path] = None
+    ) -> Optional[tuple[bool, Optional[Path], str]]:
+        """
+        事前コンパイル済みフォーマットを使用して変換
+        
+        PandocでLaTeXを生成し、プリアンブルをフォーマットから読み込んでエンジンを実行する。
+        
+        Args:
+            md_file: 入力マークダウンファイル
+            output_file: 出力PDFファイル
+            config: 変換設定
+            template_path: テンプレートファイルのパス
+            header_path: ヘッダーファイルのパス
+        
+        Returns:
+            (成功フラグ, 出力PDFファイルパス, エラーメッセージ)、
+            フォーマットを使用できない場合はNone
+        """
+        pdf_engine = config.get("pdf_engine", "xelatex")
+        
+        try:
+            with tempfile.TemporaryDirectory(prefix="md2pdf_") as tmp:
+                build_dir = Path(tmp)
+                tex_file = build_dir / f"{md_file.stem}.tex"
+                
+                # LaTeXソースの生成
+                cmd = self.build_pandoc_command(
+                    md_file, tex_file, config, template_path, header_path
+                )
+                cmd[cmd.index("--to") + 1] = "latex"
+                result = subprocess.run(
+                    cmd,
+                    capture_output=True,
+                    text=True,
+                    timeout=300,
+                    check=False
+                )
+                if result.returncode != 0 or not tex_file.exists():
+                    return None
+                
+                prepared = self.format_cache.prepare_document(
+                    tex_file.read_text(encoding="utf-8"), pdf_engine
+                )
+                if prepared is None:
+                    return None
+                
+                latex, format_base = prepared
+                return self._run_engine(md_file, tex_file, latex, output_file, config, format_base)
+        
+        except subprocess.TimeoutExpired:
+            error_msg = "変換がタイムアウトしました（5分以上）"
+            self.error_handler.handle_conversion_error(md_file, error_msg)
+            return False, None, error_msg
+        
+        except (FileNotFoundError, OSError):
+            # フォーマットを使用できない場合は通常の変換にフォールバック
+            return None
+    
+    def _convert_with_passes(
+        self,
+        md_file: Path,
+        output_file: Path,
+        config: Dict,
+        template_path: Optional[Path] = None,
+        header_path: Optional[Path] = None
+    ) -> Optional[tuple[bool, Optional[Path], str]]:
+        """
+        PandocでLaTeXを生成し、設定のengine_passes回までエンジンを実行して変換
+        
+        Args:
+            md_file: 入力マークダウンファイル
+            output_file: 出力PDFファイル
+            config: 変換設定
+            template_path: テンプレートファイルのパス
+            header_path: ヘッダーファイルのパス
+        
+        Returns:
+            (成功フラグ, 出力PDFファイルパス, エラーメッセージ)、
+            LaTeXを生成できない場合はNone（通常の変換にフォールバック）
+        """
+        try:
+            with tempfile.TemporaryDirectory(prefix="md2pdf_") as tmp:
+                tex_file = Path(tmp) / f"{md_file.stem}.tex"
+                cmd = self.build_pandoc_command(
+                    md_file, tex_file, config, template_path, header_path
+                )
+                cmd[cmd.index("--to") + 1] = "latex"
+                result = run_monitored(cmd, timeout=300, abort=self.abort_check)
+                if result.aborted:
+                    return False, None, ABORTED_MESSAGE
+                if result.returncode != 0 or not tex_file.exists():
+                    return None
+                
+                latex = tex_file.read_text(encoding="utf-8")
+                return self._run_engine(md_file, tex_file, latex, output_file, config)
+        
+        except subprocess.TimeoutExpired:
+            error_msg = "変換がタイムアウトしました（5分以上）"
+            self.error_handler.handle_conversion_error(md_file, error_msg)
+            return False, None, error_msg
+        
+        except (FileNotFoundError, OSError):
+            # PandocまたはPDFエンジンが見つからない場合は通常の変換でエラーを報告
+            return None
+    
+    def _handle_diagnosis(
+        self,
+        md_file: Path,
+        diagnosis: LatexDiagnosis
+    ) -> tuple[bool, Optional[Path], str]:
+        """LaTeXログの監視で検出した致命的エラーを記録"""
+        self.last_diagnosis = diagnosis
+        self.error_handler.handle_latex_diagnosis(md_file, diagnosis)
+        return False, None, diagnosis.format_message()
+    
+    def _convert_chunked(
+        self,
+        md_file: Path,
+        output_file: Path,
+        config: Dict,
+        template_path: Optional[Path] = None,
+        header_path: Optional[Path] = None
+    ) -> Optional[tuple[bool, Optional[Path], str]]:
+        """
+        レベル1見出しごとのチャンクに分割して変換
+        
+        各チャンクをPandocで並列にLaTeXへ変換し（内容が変わっていなければ
+        キャッシュを使用）、共通のテンプレートから生成した文書の骨組みに
+        組み込んでからエンジンを1回だけ実行する。脚注や参照リンクの定義は
+        チャンク内で完結している必要がある。\newcommand等のマクロはPandocで
+        展開せずにLaTeXへそのまま渡す（他のチャンクで定義したマクロも使えるように）。
+        ビルドに失敗した場合はエラーを記録せずにNoneを返し、通常の変換に任せる。
+        
+        Args:
+            md_file: 入力マークダウンファイル
+            output_file: 出力PDFファイル
+            config: 変換設定
+            template_path: テンプレートファイルのパス
+            header_path: ヘッダーファイルのパス
+        
+        Returns:
+            (成功フラグ, 出力PDFファイルパス, エラーメッセージ)、
+            チャンク変換を使用できない場合・失敗した場合はNone
+        """
+        pdf_engine = config.get("pdf_engine", "xelatex")
+        
+        try:
+            text = md_file.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            return None
+        
+        front_matter, chunks = split_markdown_chunks(text)
+        if len(chunks) < 2:
+            return None
+        
+        try:
+            body_parts = self._convert_chunks_to_latex(md_file, chunks, config)
+            if body_parts == ABORTED_MESSAGE:
+                return False, None, ABORTED_MESSAGE
+            if body_parts is None:
+                return None
+            
+            with tempfile.TemporaryDirectory(prefix="md2pdf_") as tmp:
+                build_dir = Path(tmp)
+                body = "\n".join(body_parts)
+                skeleton = self._build_skeleton(
+                    md_file, build_dir, front_matter, body, config, template_path, header_path
+                )
+                if skeleton is None:
+                    return None
+                
+                latex = skeleton.replace(CHUNK_BODY_PLACEHOLDER, body)
+                format_base = None
+                if config.get("precompiled_format", False) and self.format_cache.is_supported(pdf_engine):
+                    prepared = self.format_cache.prepare_document(latex, pdf_engine)
+                    if prepared is not None:
+                        latex, format_base = prepared
+                
+                tex_file = build_dir / f"{md_file.stem}.tex"
+                result = self._run_engine(
+                    md_file, tex_file, latex, output_file, config, format_base, report_errors=False
+                )
+                if result[0] or result[2] == ABORTED_MESSAGE:
+                    return result
+                return None
+        
+        except subprocess.TimeoutExpired:
+            error_msg = "変換がタイムアウトしました（5分以上）"
+            self.error_handler.handle_conversion_error(md_file, error_msg)
+            return False, None, error_msg
+        
+        except (FileNotFoundError, OSError):
+            return None
+        
+        finally:
+            self.chunk_cache.prune()
+    
+    def _convert_chunks_to_latex(
+        self,
+        md_file: Path,
+        chunks: List[str],
+        config: Dict
+    ) -> Union[List[str], str, None]:
+        """
+        チャンクをLaTeXに変換（キャッシュにないチャンクのみPandocを並列実行）
+        
+        Returns:
+            チャンクごとのLaTeXのリスト、変換に失敗した場合はNone、
+            abort_checkで中断した場合はABORTED_MESSAGE
+        """
+        options = self._chunk_pandoc_options(config)
+        cache_options = [self._get_pandoc_version(), *options]
+        keys = [self.chunk_cache.get_key(chunk, cache_options) for chunk in chunks]
+        
+        converted: Dict[str, str] = {}
+        missing: Dict[str, str] = {}
+        for key, chunk in zip(keys, chunks):
+            if key in converted or key in missing:
+                continue
+            cached = self.chunk_cache.get(key)
+            if cached is None:
+                missing[key] = chunk
+            else:
+                converted[key] = cached
+        
+        if missing:
+            max_workers = config.get("max_parallel") or os.cpu_count() or 1
+            if not config.get("parallel_processing", True):
+                max_workers = 1
+            
+            aborted = threading.Event()
+            
+            def convert_chunk(item: tuple) -> Optional[str]:
+                index, chunk = item
+                if aborted.is_set():
+                    return None
+                chunk_file = chunk_dir / f"chunk{index}.md"
+                chunk_file.write_text(chunk, encoding="utf-8")
+                result = run_monitored(
+                    ["pandoc", *options, str(chunk_file)],
+                    cwd=md_file.parent,
+                    timeout=300,
+                    abort=self.abort_check
+                )
+                if result.aborted:
+                    aborted.set()
+                    return None
+                if result.returncode != 0 or result.diagnosis is not None:
+                    return None
+                return result.stdout
+            
+            with tempfile.TemporaryDirectory(prefix="md2pdf_chunks_") as tmp:
+                chunk_dir = Path(tmp)
+                with ThreadPoolExecutor(max_workers=min(max_workers, len(missing))) as executor:
+                    results = dict(zip(
+                        missing, executor.map(convert_chunk, enumerate(missing.values()))
+                    ))
+            
+            if aborted.is_set():
+                return ABORTED_MESSAGE
+            for key, latex in results.items():
+                if latex is None:
+                    return None
+                self.chunk_cache.put(key, latex)
+                converted[key] = latex
+        
+        return [converted[key] for key in keys]
+    
+    def _chunk_pandoc_options(self, config: Dict) -> List[str]:
+        """
+        チャンクの変換に使用するPandocのオプション（本文の出力に影響するもの）
+        
+        マクロの定義は定義したチャンクにしか見えないため、latex_macrosを無効にして
+        展開をLaTeXに任せる（定義は本文にそのまま残り、文書全体で有効になる）。
+        """
+        input_format = config.get("from", "markdown+tex_math_dollars+raw_tex")
+        if "latex_macros" not in input_format:
+            input_format += "-latex_macros"
+        options = [
+            "--from", input_format,
+            "--to", "latex",
+        ]
+        if config.get("number_sections", False):
+            options.append("--number-sections")
+        return options
+    
+    def _get_pandoc_version(self) -> str:
+        """Pandocのバージョン（チャンクキャッシュのキーに使用）"""
+        if self._pandoc_version is None:
+            result = subprocess.run(
+                ["pandoc", "--version"],
+                capture_output=True,
+                text=True,
+                timeout=10,
+                check=False
+            )
+            self._pandoc_version = result.stdout.split("\n", 1)[0]
+        return self._pandoc_version
+    
+    def _build_skeleton(
+        self,
+        md_file: Path,
+        build_dir: Path,
+        front_matter: str,
+        body: str,
+        config: Dict,
+        template_path: Optional[Path] = None,
+        header_path: Optional[Path] = None
+    ) -> Optional[str]:
+        """
+        テンプレートから本文を除いた文書の骨組みを生成
+        
+        テンプレートの条件分岐（graphicx、longtable等の読み込み）が本文と同じに
+        なるよう、本文のLaTeXで使われている機能の見本を含めてPandocを実行する。
+        
+        Returns:
+            本文の位置にCHUNK_BODY_PLACEHOLDERを含むLaTeXソース、失敗した場合はNone
+        """
+        probes = [probe for pattern, probe in SKELETON_FEATURE_PROBES if pattern.search(body)]
+        skeleton_md = build_dir / f"{md_file.stem}.skeleton.md"
+        skeleton_md.write_text(
+            front_matter
+            + f"\n{SKELETON_BEGIN}\n\n"
+            + "\n\n".join(probes)
+            + f"\n\n{SKELETON_END}\n",
+            encoding="utf-8"
+        )
+        skeleton_tex = build_dir / f"{md_file.stem}.skeleton.tex"
+        
+        cmd = self.build_pandoc_command(
+            skeleton_md, skeleton_tex, config, template_path, header_path
+        )
+        cmd[cmd.index("--to") + 1] = "latex"
+        result = subprocess.run(
+            cmd,
+            cwd=str(md_file.parent),
+            capture_output=True,
+            text=True,
+            timeout=300,
+            check=False
+        )
+        if result.returncode != 0 or not skeleton_tex.exists():
+            return None
+        
+        latex = skeleton_tex.read_text(encoding="utf-8")
+        begin = latex.find(SKELETON_BEGIN)
+        end = latex.find(SKELETON_END)
+        if begin < 0 or end < begin:
+            return None
+        
+        return latex[:begin] + CHUNK_BODY_PLACEHOLDER + latex[end + len(SKELETON_END):]
+    
+    def _run_engine(
+        self,
+        md_file: Path,
+        tex_file: Path,
+        latex: str,
+        output_file: Path,
+        config: Dict,
+        format_base: Optional[Path] = None,
+        report_errors: bool = True
+    ) -> tuple[bool, Optional[Path], str]:
+        """
+        LaTeXソースからエンジンを実行してPDFを生成
+        
+        目次・相互参照のため必要に応じて再実行する（設定のengine_passes回まで、デフォルト3回）。
+        
+        Args:
+            md_file: 入力マークダウンファイル（相対パスの基準）
+            tex_file: 書き出すLaTeXファイル（出力も同じディレクトリに作成）
+            latex: LaTeXソース
+            output_file: 出力PDFファイル
+            config: 変換設定
+            format_base: 事前コンパイル済みフォーマット（拡張子なし）
+            report_errors: 失敗をエラーハンドラーに記録するか（Falseは別の方法で変換し直す場合）
+        
+        Returns:
+            (成功フラグ, 出力PDFファイルパス, エラーメッセージ)
+        """
+        pdf_engine = config.get("pdf_engine", "xelatex")
+        tex_file.write_text(latex, encoding="utf-8")
+        
+        engine_cmd = [pdf_engine]
+        if format_base is not None:
+            engine_cmd.append(f"-fmt={format_base}")
+        engine_cmd.extend([
+            "-interaction=nonstopmode",
+            "-halt-on-error",
+            "-file-line-error",
+            f"-output-directory={tex_file.parent}",
+            str(tex_file),
+        ])
+        log_file = tex_file.with_suffix(".log")
+        for run in range(config.get("engine_passes", 3)):
+            result = run_monitored(
+                engine_cmd,
+                cwd=md_file.parent,
+                timeout=300,
+                abort=self.abort_check
+            )
+            if result.aborted:
+                return False, None, ABORTED_MESSAGE
+            if result.diagnosis is not None:
+                if not report_errors:
+                    return False, None, result.diagnosis.format_message()
+                return self._handle_diagnosis(md_file, result.diagnosis)
+            if result.returncode != 0:
+                error_msg = result.stdout[-2000:] or "変換に失敗しました"
+                if report_errors:
+                    self.error_handler.handle_latex_error(md_file, error_msg)
+                return False, None, error_msg
+            
+            log = log_file.read_text(encoding="utf-8", errors="replace") if log_file.exists() else ""
+            needs_rerun = "Rerun to get" in log or (run == 0 and config.get("toc", True))
+            if not needs_rerun:
+                break
+        
+        built_pdf = tex_file.with_suffix(".pdf")
+        if not built_pdf.exists():
+            error_msg = "PDFファイルが生成されませんでした"
+            if report_errors:
+                self.error_handler.handle_conversion_error(md_file, error_msg)
+            return False, None, error_msg
+        
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(built_pdf), str(output_file))
+        return True, output_file, ""
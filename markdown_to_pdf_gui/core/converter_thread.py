@@ -1,8 +1,10 @@
 """非同期変換エンジン: QThreadを使用した非同期処理"""
 
 from enum import Enum
+from functools import cached_property
 from pathlib import Path
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Iterator, Optional, List, Tuple
+import os
 import time
 from PyQt6.QtCore import QThread, pyqtSignal
 from .converter import Converter
@@ -12,7 +14,14 @@ from .performance_monitor import PerformanceMonitor
 from .emoji_converter import EmojiConverter
 from .image_processor import ImageProcessor
 from .figure_generator import FigureGenerator
+from .script_sandbox import SandboxLimits
 from .pdf_validator import PDFValidator
+from .path_index import PathIndex, file_signature
+from .batch_dedup import BatchDeduplicator
+from .config_manager import apply_conversion_mode
+from .job_queue import (
+    PRIORITY_BATCH, PRIORITY_INTERACTIVE, ConversionJob, JobQueue, default_worker_id
+)
 from ..utils.logger import StructuredLogger
 
 
@@ -28,13 +37,29 @@ class ConversionState(Enum):
 
 
 class ConverterThread(QThread):
-    """非同期変換を実行するQThread"""
+    """
+    非同期変換を実行するQThread
+    
+    job_queueを指定した場合は、ファイルごとのジョブをキューに登録してから
+    1件ずつ取得して変換する。優先度の高いジョブ（編集中のファイルの
+    プレビューなど）が登録されると、実行中の変換を打ち切ってキューに戻し、
+    そのジョブが終わるまで待機する。キューはアプリの再起動後も残るため、
+    中断されたバッチはresumeで残りのファイルから再開できる。
+    """
+    
+    # 優先度の高いジョブを確認する間隔（秒）
+    PREEMPT_CHECK_INTERVAL = 1.0
+    
+    # 優先度の高いジョブの完了を待つ間の確認間隔（ミリ秒）
+    SUSPEND_POLL_INTERVAL_MS = 500
     
     # シグナル定義
     progress_updated = pyqtSignal(int, str)  # 進捗率(0-100), メッセージ
     state_changed = pyqtSignal(str, float)  # 状態, 進捗率
     file_completed = pyqtSignal(str, bool, str)  # ファイル名, 成功/失敗, メッセージ
     error_occurred = pyqtSignal(str, str, str)  # エラータイプ, カテゴリ, メッセージ
+    preview_ready = pyqtSignal(str)  # プレビューファイルのパス（previewモードのみ）
+    figures_executed = pyqtSignal(str, list)  # ファイル名, 図生成スクリプトごとの実行結果（辞書）
     
     def __init__(
         self,
@@ -43,7 +68,12 @@ class ConverterThread(QThread):
         config: Optional[Dict] = None,
         template_path: Optional[Path] = None,
         header_path: Optional[Path] = None,
-        logger: Optional[StructuredLogger] = None
+        logger: Optional[StructuredLogger] = None,
+        path_index: Optional[PathIndex] = None,
+        mode: str = "final",
+        job_queue: Optional[JobQueue] = None,
+        priority: int = PRIORITY_BATCH,
+        batch_id: Optional[str] = None
     ):
         super().__init__()
         self.md_files = md_files
@@ -52,26 +82,113 @@ class ConverterThread(QThread):
         self.template_path = template_path
         self.header_path = header_path
         self.logger = logger
+        # 変換モード（"preview"は低品質・高速、"final"は印刷用）
+        self.mode = mode
+        
+        # バッチ内の存在確認はディレクトリ一覧のインデックスで共有
+        self.path_index = path_index or PathIndex()
+        
+        # ジョブキュー（Noneの場合はmd_filesを順に変換）
+        self.job_queue = job_queue
+        self.priority = priority
+        # 再開するバッチのID（Noneの場合は実行時に登録）
+        self.batch_id = batch_id
+        self._worker_id = f"{default_worker_id()}:{id(self):x}"
+        self._current_job: Optional[ConversionJob] = None
+        self._file_success = False
+        self._preempted = False
+        self._suspended = False
+        self._last_preempt_check = 0.0
         
-        self.converter = Converter()
-        self.validator = MarkdownValidator()
-        self.error_handler = ErrorHandler()
-        self.performance_monitor = PerformanceMonitor()
-        self.emoji_converter = EmojiConverter()
-        self.image_processor = ImageProcessor()
-        self.figure_generator = FigureGenerator()
-        self.pdf_validator = PDFValidator()
         self.state = ConversionState.IDLE
         self._cancelled = False
         self.conversion_durations: Dict[Path, float] = {}
     
+    @classmethod
+    def resume(
+        cls,
+        job_queue: JobQueue,
+        batch_id: str,
+        logger: Optional[StructuredLogger] = None,
+        path_index: Optional[PathIndex] = None
+    ) -> "ConverterThread":
+        """
+        キューに残っているバッチを再開するスレッドを作成
+        
+        Args:
+            job_queue: ジョブキュー
+            batch_id: 再開するバッチのID
+            logger: ロガー
+            path_index: パスインデックス
+        
+        Returns:
+            変換スレッド（完了済みのファイルは変換しない）
+        """
+        jobs = job_queue.get_batch(batch_id)
+        first = jobs[0]
+        return cls(
+            [job.md_path for job in jobs],
+            output_dir=first.output_dir,
+            config=first.config,
+            template_path=first.template_path,
+            header_path=first.header_path,
+            logger=logger,
+            path_index=path_index,
+            mode=first.mode,
+            job_queue=job_queue,
+            priority=first.priority,
+            batch_id=batch_id
+        )
+    
+    # 変換に使う補助オブジェクトは初回使用時に構築する
+    # （スレッドの作成時点ではなく、実際に必要になったworkerスレッド側で初期化される）
+    
+    @cached_property
+    def converter(self) -> Converter:
+        return Converter(path_index=self.path_index)
+    
+    @cached_property
+    def validator(self) -> MarkdownValidator:
+        return MarkdownValidator(self.path_index)
+    
+    @cached_property
+    def error_handler(self) -> ErrorHandler:
+        return ErrorHandler()
+    
+    @cached_property
+    def performance_monitor(self) -> PerformanceMonitor:
+        return PerformanceMonitor()
+    
+    @cached_property
+    def emoji_converter(self) -> EmojiConverter:
+        return EmojiConverter()
+    
+    @cached_property
+    def image_processor(self) -> ImageProcessor:
+        return ImageProcessor(self.path_index)
+    
+    @cached_property
+    def figure_generator(self) -> FigureGenerator:
+        return FigureGenerator(SandboxLimits.from_config(self.config.get("figure_limits")))
+    
+    @cached_property
+    def pdf_validator(self) -> PDFValidator:
+        return PDFValidator()
+    
+    @cached_property
+    def dedup(self) -> BatchDeduplicator:
+        return BatchDeduplicator()
+    
     def run(self) -> None:
         """変換処理を実行"""
         try:
+            self.path_index.begin_batch()
+            self.dedup.begin_batch()
+            self.converter.abort_check = self._should_abort
             total_files = len(self.md_files)
             overall_start_time = time.time()
             
-            for idx, md_file in enumerate(self.md_files):
+            for idx, md_file in self._iterate_files():
                 if self.isInterruptionRequested() or self._cancelled:
                     self.state = ConversionState.CANCELLED
                     self.state_changed.emit(self.state.value, 0.0)
@@ -95,21 +212,23 @@ class ConverterThread(QThread):
                 
                 self.progress_updated.emit(int(progress), f"前処理中: {md_file.name}{remaining_str}")
                 
-                # 図生成スクリプトの実行（オプション）
+                # 図生成スクリプトの実行（オプション、同じディレクトリではバッチ内で1回だけ）
                 if self.config.get("auto_generate_figures", False):
-                    executed, figure_warnings = self.figure_generator.process_markdown_file(
-                        md_file, auto_execute=True
+                    self.dedup.shared(
+                        ("figures", md_file.parent),
+                        lambda: self._generate_figures(md_file, progress)
                     )
-                    for warning in figure_warnings:
-                        self.progress_updated.emit(int(progress), f"警告: {warning}")
                 
-                # マークダウンファイルの検証
-                validation_result = self.validator.validate(md_file)
+                # マークダウンファイルの検証（同じファイルはバッチ内で1回だけ）
+                validation_result = self.dedup.shared(
+                    ("validate", file_signature(md_file)),
+                    lambda: self.validator.validate(md_file)
+                )
                 
                 if not validation_result.is_valid():
                     error_msg = "; ".join(validation_result.errors)
                     self.error_handler.handle_conversion_error(md_file, error_msg)
-                    self.file_completed.emit(str(md_file), False, error_msg)
+                    self._report_file(str(md_file), False, error_msg)
                     if self.logger:
                         self.logger.log_conversion(
                             str(md_file),
@@ -139,23 +258,34 @@ class ConverterThread(QThread):
                     except Exception:
                         pass  # エラー時はスキップ
                 
-                # 画像処理（SVG変換など）
+                # 画像処理（SVG変換など、同じ画像の組はバッチ内で1回だけ）
                 if validation_result.image_paths:
-                    processed_images, image_warnings = self.image_processor.process_images(
-                        md_file, validation_result.image_paths,
-                        convert_svg=self.config.get("svg_to_png", True)
+                    convert_svg = self.config.get("svg_to_png", True)
+                    processed_images, image_warnings = self.dedup.shared(
+                        ("images", md_file.parent, tuple(validation_result.image_paths), convert_svg),
+                        lambda: self.image_processor.process_images(
+                            md_file, validation_result.image_paths, convert_svg=convert_svg
+                        )
                     )
                     for warning in image_warnings:
                         self.progress_updated.emit(int(progress), f"警告: {warning}")
                 
-                # 画像処理（SVG変換など）
-                if validation_result.image_paths:
-                    processed_images, image_warnings = self.image_processor.process_images(
-                        md_file, validation_result.image_paths,
-                        convert_svg=self.config.get("svg_to_png", True)
-                    )
-                    for warning in image_warnings:
-                        self.progress_updated.emit(int(progress), f"警告: {warning}")
+                # 入力が同一のジョブを変換済みの場合は出力をコピー
+                recipe = self.converter.recipes.get(
+                    self.config, self.template_path, self.header_path, self.mode
+                )
+                fingerprint = self.dedup.fingerprint(
+                    md_file,
+                    validation_result.image_paths,
+                    recipe.digest,
+                    md_file.stem if recipe.output_format == "html" else None
+                )
+                if self.dedup.lookup(fingerprint) is not None:
+                    self._fan_out_duplicate(md_file, fingerprint)
+                    progress = ((idx + 1) / total_files) * 100
+                    self.state_changed.emit(ConversionState.COMPLETED.value, progress)
+                    self.progress_updated.emit(int(progress), f"完了: {md_file.name}")
+                    continue
                 
                 # 変換
                 self.state = ConversionState.CONVERTING
@@ -176,11 +306,17 @@ class ConverterThread(QThread):
                     self.output_dir,
                     self.config,
                     self.template_path,
-                    self.header_path
+                    self.header_path,
+                    mode=self.mode
                 )
                 conversion_duration = time.time() - conversion_start_time
                 self.conversion_durations[md_file] = conversion_duration
                 
+                if self._preempted or self.isInterruptionRequested() or self._cancelled:
+                    # 優先度の高いジョブ・中断・キャンセルのため打ち切った（ジョブはキューに戻すか取り消す）
+                    self.performance_monitor.end_conversion()
+                    continue
+                
                 # 後処理
                 self.state = ConversionState.POSTPROCESSING
                 progress = ((idx + 0.9) / total_files) * 100
@@ -188,6 +324,16 @@ class ConverterThread(QThread):
                 self.progress_updated.emit(int(progress), f"後処理中: {md_file.name}")
                 
                 if success and output_file:
+                    self.dedup.record(fingerprint, md_file, output_file)
+                
+                if success and output_file and self.mode == "preview":
+                    # プレビューは検証・メタデータ設定を省略
+                    self.performance_monitor.end_conversion()
+                    self.preview_ready.emit(str(output_file))
+                    self._report_file(
+                        str(md_file), True, f"プレビュー: {output_file.name} ({conversion_duration:.1f}秒)"
+                    )
+                elif success and output_file:
                     # PDF検証
                     pdf_result = self.pdf_validator.validate(output_file)
                     if pdf_result.is_valid:
@@ -201,7 +347,7 @@ class ConverterThread(QThread):
                         if actual_duration == 0.0:
                             actual_duration = perf_stats.get('duration', 0.0)
                         
-                        self.file_completed.emit(str(md_file), True, f"完了: {output_file.name} ({actual_duration:.1f}秒)")
+                        self._report_file(str(md_file), True, f"完了: {output_file.name} ({actual_duration:.1f}秒)")
                         if self.logger:
                             self.logger.log_conversion(
                                 str(md_file),
@@ -216,17 +362,23 @@ class ConverterThread(QThread):
                             )
                     else:
                         error_msg = "; ".join(pdf_result.errors)
-                        self.file_completed.emit(str(md_file), False, f"PDF検証エラー: {error_msg}")
+                        self._report_file(str(md_file), False, f"PDF検証エラー: {error_msg}")
                 else:
                     actual_duration = self.conversion_durations.get(md_file, 0.0)
-                    self.file_completed.emit(str(md_file), False, error_msg or "変換に失敗しました")
+                    self._report_file(str(md_file), False, error_msg or "変換に失敗しました")
                     if self.logger:
+                        error_type = "CONVERSION_ERROR"
+                        context = {"duration": actual_duration}
+                        diagnosis = self.converter.last_diagnosis
+                        if diagnosis is not None:
+                            error_type = "FONT_NOT_FOUND" if diagnosis.kind == "missing_font" else "LATEX_COMPILE_ERROR"
+                            context["diagnosis"] = diagnosis.to_context()
                         self.logger.log_conversion(
                             str(md_file),
                             False,
-                            "CONVERSION_ERROR",
+                            error_type,
                             error_msg or "変換に失敗しました",
-                            {"duration": actual_duration}
+                            context
                         )
                 
                 # 完了
@@ -234,6 +386,11 @@ class ConverterThread(QThread):
                 self.state_changed.emit(ConversionState.COMPLETED.value, progress)
                 self.progress_updated.emit(int(progress), f"完了: {md_file.name}")
             
+            if self.isInterruptionRequested() or self._cancelled:
+                self.state = ConversionState.CANCELLED
+                self.state_changed.emit(self.state.value, 0.0)
+                return
+            
             self.state = ConversionState.COMPLETED
             self.state_changed.emit(self.state.value, 100.0)
         
@@ -248,8 +405,164 @@ class ConverterThread(QThread):
                     error_msg,
                     "GENERAL"
                 )
+        
+        finally:
+            self._release_batch()
+    
+    def _iterate_files(self) -> Iterator[Tuple[int, Path]]:
+        """
+        変換するファイルを順に返す
+        
+        ジョブキューがある場合は、ジョブを1件ずつ取得して返し、次のファイルに
+        進む時点でジョブの結果（完了・失敗・キューに戻す）を記録する。
+        
+        Returns:
+            (完了済みのファイル数, マークダウンファイル) のイテレータ
+        """
+        if self.job_queue is None:
+            yield from enumerate(self.md_files)
+            return
+        
+        if self.batch_id is None:
+            self.batch_id = self.job_queue.submit(
+                self.md_files, self.config, self.template_path, self.header_path, self.mode,
+                priority=self.priority, output_dir=self.output_dir
+            )
+        finished = sum(job.is_finished for job in self.job_queue.get_batch(self.batch_id))
+        
+        while True:
+            job = self._claim_next_job(int(finished / max(len(self.md_files), 1) * 100))
+            if job is None:
+                return
+            self._current_job = job
+            self._file_success = False
+            self._preempted = False
+            yield finished, job.md_path
+            
+            self._current_job = None
+            if self._preempted or self._suspended:
+                self.job_queue.requeue(job.id, self._worker_id)
+            elif self._file_success:
+                self.job_queue.mark_done(job.id, self._worker_id)
+                finished += 1
+            else:
+                self.job_queue.fail(job.id, self._worker_id, "変換に失敗しました")
+                finished += 1
+    
+    def _claim_next_job(self, progress: int) -> Optional[ConversionJob]:
+        """
+        バッチの次のジョブを取得（優先度の高いジョブがある間は待機）
+        
+        Args:
+            progress: 待機中に表示する進捗率
+        
+        Returns:
+            ジョブ、残りがない場合・中断した場合はNone
+        """
+        waiting = False
+        while not (self.isInterruptionRequested() or self._cancelled):
+            if not self._higher_priority_waiting():
+                return self.job_queue.claim(self._worker_id, self.batch_id)
+            if not waiting:
+                self.progress_updated.emit(progress, "一時停止中: 優先度の高い変換の完了を待っています")
+                waiting = True
+            self.msleep(self.SUSPEND_POLL_INTERVAL_MS)
+        return None
+    
+    def _higher_priority_waiting(self) -> bool:
+        """このバッチより優先されるジョブがキューにあるかどうか"""
+        if self.job_queue is None or self.priority <= PRIORITY_INTERACTIVE:
+            return False
+        return self.job_queue.has_higher_priority(self.priority, self.batch_id)
+    
+    def _should_abort(self) -> bool:
+        """実行中のPandoc・LaTeXを中断するかどうか（Converter.abort_check）"""
+        if self._cancelled or self.isInterruptionRequested():
+            return True
+        now = time.monotonic()
+        if not self._preempted and now - self._last_preempt_check >= self.PREEMPT_CHECK_INTERVAL:
+            self._last_preempt_check = now
+            self._preempted = self._current_job is not None and self._higher_priority_waiting()
+        return self._preempted
+    
+    def _release_batch(self) -> None:
+        """終了時に実行中のジョブを片付け、完了したバッチをキューから削除"""
+        if self.job_queue is None or self.batch_id is None:
+            return
+        if self._current_job is not None:
+            if self._suspended:
+                self.job_queue.requeue(self._current_job.id, self._worker_id)
+            else:
+                self.job_queue.fail(self._current_job.id, self._worker_id, "変換が中断されました")
+            self._current_job = None
+        # 中断（suspend）したバッチは次回の起動時に再開するため残す
+        if not self._suspended:
+            self.job_queue.purge(self.batch_id)
+    
+    def _report_file(self, file_path: str, success: bool, message: str) -> None:
+        """ファイルの変換結果を記録してfile_completedを発行"""
+        self._file_success = success
+        self.file_completed.emit(file_path, success, message)
+    
+    def _generate_figures(self, md_file: Path, progress: float) -> None:
+        """図生成スクリプトを実行し、警告と実行結果を通知"""
+        first_result = len(self.figure_generator.results)
+        executed, figure_warnings = self.figure_generator.process_markdown_file(
+            md_file, auto_execute=True
+        )
+        for warning in figure_warnings:
+            self.progress_updated.emit(int(progress), f"警告: {warning}")
+        figure_results = self.figure_generator.results[first_result:]
+        # 生成した図がバッチ開始時の一覧に隠れないよう、出力先の一覧を破棄
+        directories = {md_file.parent, md_file.parent / "figures"}
+        for result in figure_results:
+            script_dir = Path(result.script).parent
+            directories.update(
+                Path(os.path.normpath(script_dir / output)).parent for output in result.outputs
+            )
+        for directory in directories:
+            self.path_index.invalidate(directory)
+        if figure_results:
+            self.figures_executed.emit(str(md_file), [r.to_dict() for r in figure_results])
+    
+    def _fan_out_duplicate(self, md_file: Path, fingerprint: str) -> None:
+        """入力が同一のジョブの出力をこのファイルの出力先にコピー"""
+        source_md, source_output = self.dedup.lookup(fingerprint)
+        config = apply_conversion_mode(self.config, self.mode)
+        destination = self.converter.output_path(md_file, self.output_dir, config, self.mode)
+        try:
+            output_file = self.dedup.fan_out(fingerprint, destination)
+            if output_file.suffix == ".pdf" and self.mode != "preview":
+                self.pdf_validator.set_metadata(output_file, title=md_file.stem)
+        except OSError as e:
+            self.performance_monitor.end_conversion()
+            self._report_file(str(md_file), False, f"出力のコピーに失敗しました: {str(e)}")
+            return
+        
+        self.performance_monitor.end_conversion()
+        self.conversion_durations[md_file] = 0.0
+        if self.mode == "preview" and output_file != source_output:
+            self.preview_ready.emit(str(output_file))
+        self._report_file(
+            str(md_file), True, f"完了: {output_file.name} (0.0秒) {source_md.name}と同一の入力のため複製"
+        )
+        if self.logger:
+            self.logger.log_conversion(
+                str(md_file),
+                True,
+                None,
+                f"出力: {output_file}",
+                {"output_file": str(output_file), "duration": 0.0, "deduplicated_from": str(source_md)}
+            )
     
     def cancel(self) -> None:
-        """変換をキャンセル"""
+        """変換をキャンセル（実行中のPandoc・LaTeXも中断）"""
         self._cancelled = True
         self.requestInterruption()
+        if self.job_queue is not None and self.batch_id is not None:
+            self.job_queue.cancel(self.batch_id)
+    
+    def suspend(self) -> None:
+        """変換を中断し、残りのジョブを次回の起動時に再開できるようにキューに残す"""
+        self._suspended = True
+        self.requestInterruption()
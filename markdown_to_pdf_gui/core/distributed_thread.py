@@ -0,0 +1,194 @@
+"""分散変換スレッド: ジョブキューに変換を投入し、ワーカーの進捗を集約"""
+
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from PyQt6.QtCore import QThread, pyqtSignal
+from .asset_bundle import BundleManifest, build_bundle
+from .converter_thread import ConversionState
+from .job_queue import JOB_DONE, JOB_CANCELLED, ConversionJob, JobQueue
+from .markdown_validator import MarkdownValidator
+from ..utils.logger import StructuredLogger
+
+
+class DistributedConverterThread(QThread):
+    """
+    ジョブキュー経由で他のマシンのワーカーに変換を依頼するQThread
+    
+    ConverterThreadと同じシグナルを発行するため、MainWindowからは
+    同じように扱える。完了したジョブの結果はハッシュを検証してから
+    出力ディレクトリ（指定がない場合はマークダウンと同じディレクトリ）に
+    コピーする。バッチが完了またはキャンセルされたら、キューからジョブと
+    結果ファイルを削除する。
+    
+    bundle_assetsが有効な場合は、マークダウン・参照する画像・テンプレート・
+    ヘッダーをバンドルとしてキューのblobストアに登録するため、ワーカーと
+    同じパスでファイルを共有する必要はない（キューが保持していないblobだけを
+    書き込む）。
+    """
+    
+    # シグナル定義
+    progress_updated = pyqtSignal(int, str)  # 進捗率(0-100), メッセージ
+    state_changed = pyqtSignal(str, float)  # 状態, 進捗率
+    file_completed = pyqtSignal(str, bool, str)  # ファイル名, 成功/失敗, メッセージ
+    error_occurred = pyqtSignal(str, str, str)  # エラータイプ, カテゴリ, メッセージ
+    preview_ready = pyqtSignal(str)  # プレビューファイルのパス（previewモードのみ）
+    figures_executed = pyqtSignal(str, list)  # 互換用（図生成はワーカー側では実行しない）
+    
+    def __init__(
+        self,
+        md_files: List[Path],
+        queue_path: Path,
+        output_dir: Optional[Path] = None,
+        config: Optional[Dict] = None,
+        template_path: Optional[Path] = None,
+        header_path: Optional[Path] = None,
+        logger: Optional[StructuredLogger] = None,
+        mode: str = "final",
+        poll_interval: float = 1.0,
+        bundle_assets: bool = True
+    ):
+        super().__init__()
+        self.md_files = md_files
+        self.queue_path = queue_path
+        self.output_dir = output_dir
+        self.config = config or {}
+        self.template_path = template_path
+        self.header_path = header_path
+        self.logger = logger
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.bundle_assets = bundle_assets
+        
+        self.state = ConversionState.IDLE
+        self._cancelled = False
+        self.batch_id: Optional[str] = None
+        self.conversion_durations: Dict[Path, float] = {}
+    
+    def run(self) -> None:
+        """ジョブを投入し、すべて完了するまで進捗を集約"""
+        try:
+            queue = JobQueue(self.queue_path)
+            bundles = self._build_bundles(queue) if self.bundle_assets else None
+            self.batch_id = queue.submit(
+                self.md_files, self.config, self.template_path, self.header_path, self.mode,
+                bundles=bundles
+            )
+            self.state = ConversionState.CONVERTING
+            self.state_changed.emit(self.state.value, 0.0)
+            self.progress_updated.emit(0, f"{len(self.md_files)}件のジョブをキューに登録しました")
+            
+            submitted_at = time.time()
+            reported: Set[int] = set()
+            last_message = ""
+            
+            while True:
+                if self.isInterruptionRequested() or self._cancelled:
+                    queue.cancel(self.batch_id)
+                    # 実行中のワーカーは次のハートビートでジョブがないことを検出して中断する
+                    queue.purge(self.batch_id)
+                    self.state = ConversionState.CANCELLED
+                    self.state_changed.emit(self.state.value, 0.0)
+                    return
+                
+                jobs = queue.get_batch(self.batch_id)
+                for job in jobs:
+                    if job.is_finished and job.id not in reported:
+                        reported.add(job.id)
+                        self._report_job(queue, job, time.time() - submitted_at)
+                
+                # 完了したジョブは100%、実行中のジョブはワーカーの報告した進捗
+                progress = sum(100.0 if job.is_finished else job.progress for job in jobs) / max(len(jobs), 1)
+                running = [job for job in jobs if job.worker and not job.is_finished]
+                message = f"分散変換中: {len(reported)}/{len(jobs)}件完了, 実行中のワーカー {len({job.worker for job in running})}台"
+                if message != last_message:
+                    self.progress_updated.emit(int(progress), message)
+                    last_message = message
+                self.state_changed.emit(self.state.value, progress)
+                
+                if len(reported) == len(jobs):
+                    break
+                time.sleep(self.poll_interval)
+            
+            # 結果はすべて出力ディレクトリにコピー済みのため、ジョブと結果ファイルを削除
+            queue.purge(self.batch_id)
+            self.state = ConversionState.COMPLETED
+            self.state_changed.emit(self.state.value, 100.0)
+        
+        except Exception as e:
+            self.state = ConversionState.ERROR
+            self.state_changed.emit(self.state.value, 0.0)
+            error_msg = f"予期しないエラー: {str(e)}"
+            self.error_occurred.emit("FATAL", "GENERAL", error_msg)
+            if self.logger:
+                self.logger.log_error(
+                    "UNEXPECTED_ERROR",
+                    error_msg,
+                    "GENERAL"
+                )
+    
+    def _build_bundles(self, queue: JobQueue) -> List[Optional[BundleManifest]]:
+        """ファイルごとのバンドルを作成（作成できないファイルは共有パスで変換）"""
+        validator = MarkdownValidator()
+        bundles: List[Optional[BundleManifest]] = []
+        for md_file in self.md_files:
+            self.progress_updated.emit(0, f"バンドル作成中: {md_file.name}")
+            result = validator.validate(md_file)
+            try:
+                bundles.append(build_bundle(
+                    md_file,
+                    result.image_paths,
+                    queue.blobs,
+                    self.template_path,
+                    self.header_path,
+                    encoding=result.encoding or "utf-8"
+                ))
+            except (OSError, UnicodeError, ValueError) as e:
+                self.progress_updated.emit(
+                    0, f"警告: バンドルを作成できないため共有パスで変換します（{md_file.name}）: {e}"
+                )
+                bundles.append(None)
+        return bundles
+    
+    def _report_job(self, queue: JobQueue, job: ConversionJob, elapsed: float) -> None:
+        """完了したジョブの結果を取得してシグナルを発行"""
+        if job.status == JOB_CANCELLED:
+            return
+        
+        md_file = job.md_path
+        self.conversion_durations[md_file] = elapsed
+        if job.status == JOB_DONE:
+            try:
+                output_file = queue.fetch_result(job, self.output_dir or md_file.parent)
+            except (OSError, ValueError) as e:
+                self.file_completed.emit(str(md_file), False, f"結果の取得に失敗しました: {str(e)}")
+                return
+            if self.mode == "preview":
+                self.preview_ready.emit(str(output_file))
+            self.file_completed.emit(
+                str(md_file), True, f"完了: {output_file.name} ({elapsed:.1f}秒) [{job.worker}]"
+            )
+            if self.logger:
+                self.logger.log_conversion(
+                    str(md_file),
+                    True,
+                    None,
+                    f"出力: {output_file}",
+                    {"output_file": str(output_file), "duration": elapsed, "worker": job.worker}
+                )
+        else:
+            error_msg = job.error or "変換に失敗しました"
+            self.file_completed.emit(str(md_file), False, f"{error_msg} [{job.worker}]")
+            if self.logger:
+                self.logger.log_conversion(
+                    str(md_file),
+                    False,
+                    "CONVERSION_ERROR",
+                    error_msg,
+                    {"duration": elapsed, "worker": job.worker}
+                )
+    
+    def cancel(self) -> None:
+        """変換をキャンセル（キューの未完了のジョブも取り消す）"""
+        self._cancelled = True
+        self.requestInterruption()
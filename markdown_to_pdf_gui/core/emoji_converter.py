@@ -1,7 +1,47 @@
 """絵文字変換: 絵文字→LaTeXコマンド変換"""
 
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+
+# 異体字セレクタ16（絵文字表示）: '⚠️' は '⚠' + U+FE0F
+VARIATION_SELECTOR = '\ufe0f'
+
+
+def _build_trie_pattern(words) -> str:
+    """
+    文字列の集合からトライ構造の正規表現を生成（最長一致）
+    
+    各文字の直後の異体字セレクタは省略可能として扱う。
+    
+    Args:
+        words: 異体字セレクタを除いた文字列の集合
+    
+    Returns:
+        正規表現パターン文字列
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    
+    def to_pattern(node: Dict) -> str:
+        branches = [
+            f"{re.escape(char)}{VARIATION_SELECTOR}?{to_pattern(child)}"
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ''
+        pattern = '|'.join(branches)
+        if '' in node:
+            # ここで終わる語もあるため続きは省略可能（貪欲なので最長一致になる）
+            return f"(?:{pattern})?"
+        return pattern if len(branches) == 1 else f"(?:{pattern})"
+    
+    return to_pattern(trie)
 
 
 class EmojiConverter:
@@ -22,6 +62,10 @@ class EmojiConverter:
             '🔗': r'\link{}',
         }
         
+        # コンパイル済みの変換用正規表現（マッピング変更時に再構築）
+        self._translator: Optional[Tuple['re.Pattern', Dict[str, Tuple[str, str]]]] = None
+        self._compiled_map: Dict[str, str] = {}
+        
         # 絵文字パターン（Unicode範囲）
         self.emoji_pattern = re.compile(
             r'[\U0001F300-\U0001F9FF]|'  # 絵文字範囲1
@@ -37,28 +81,30 @@ class EmojiConverter:
         """
         マークダウンコンテンツ内の絵文字をLaTeXコマンドに変換
         
+        マッピング全体を1つの正規表現にまとめ、1回の走査で置換と
+        未マッピング絵文字の検出を行う。
+        
         Args:
             content: 変換するマークダウンコンテンツ
         
         Returns:
             (変換後のコンテンツ, 変換された絵文字のリスト)
         """
-        converted_emojis = []
-        converted_content = content
-        
-        # マッピングされている絵文字を変換
-        for emoji, latex_cmd in self.emoji_map.items():
-            if emoji in converted_content:
-                converted_content = converted_content.replace(emoji, latex_cmd)
-                converted_emojis.append(emoji)
-        
-        # その他の絵文字を検出（警告用）
-        other_emojis = set(self.emoji_pattern.findall(converted_content))
-        for emoji in other_emojis:
-            if emoji not in self.emoji_map:
-                converted_emojis.append(emoji)
+        translator, lookup = self._get_translator()
+        found = set()
+        
+        def replace(match: 're.Match') -> str:
+            mapped = match.group('mapped')
+            if mapped is not None:
+                emoji, latex_cmd = lookup[mapped.replace(VARIATION_SELECTOR, '')]
+                found.add(emoji)
+                return latex_cmd
+            # その他の絵文字は変換せず記録のみ（警告用）
+            found.add(match.group('other'))
+            return match.group(0)
         
-        return converted_content, list(set(converted_emojis))
+        converted_content = translator.sub(replace, content)
+        return converted_content, list(found)
     
     def add_mapping(self, emoji: str, latex_command: str) -> None:
         """
@@ -80,9 +126,39 @@ class EmojiConverter:
         Returns:
             マッピングされていない絵文字のリスト
         """
-        all_emojis = set(self.emoji_pattern.findall(content))
-        missing = [e for e in all_emojis if e not in self.emoji_map]
-        return missing
+        translator, _ = self._get_translator()
+        missing = {
+            match.group('other')
+            for match in translator.finditer(content)
+            if match.group('other') is not None
+        }
+        return list(missing)
+    
+    def _get_translator(self) -> Tuple['re.Pattern', Dict[str, Tuple[str, str]]]:
+        """
+        コンパイル済みの変換用正規表現を取得（マッピング変更時のみ再構築）
+        
+        Returns:
+            (変換用正規表現, 異体字セレクタを除いた絵文字→(元の絵文字, LaTeXコマンド))
+        """
+        if self._translator is None or self._compiled_map != self.emoji_map:
+            self._compiled_map = dict(self.emoji_map)
+            
+            # 異体字セレクタ(U+FE0F)の有無にかかわらず同じ絵文字として扱う
+            lookup: Dict[str, Tuple[str, str]] = {}
+            for emoji, latex_cmd in self.emoji_map.items():
+                base = emoji.replace(VARIATION_SELECTOR, '')
+                if base:
+                    lookup[base] = (emoji, latex_cmd)
+            
+            alternatives = []
+            if lookup:
+                alternatives.append(f"(?P<mapped>{_build_trie_pattern(lookup)})")
+            alternatives.append(f"(?P<other>{self.emoji_pattern.pattern}){VARIATION_SELECTOR}?")
+            
+            self._translator = (re.compile('|'.join(alternatives)), lookup)
+        
+        return self._translator
     
     def generate_latex_definitions(self, emojis: List[str]) -> str:
         """
@@ -1,15 +1,26 @@
 """環境チェッカー: Pandoc、XeLaTeX、フォントの存在確認"""
 
+import json
+import os
 import subprocess
 import shutil
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from pathlib import Path
+from .font_cache import FontCache
+
+
+# キャッシュの無効化に使用するツール（バイナリのmtimeを確認）
+CHECKED_TOOLS = ["pandoc", "xelatex", "inkscape", "fc-list"]
 
 
 class EnvironmentChecker:
     """環境依存関係をチェックするクラス"""
     
-    def __init__(self):
+    def __init__(self, font_cache: Optional[FontCache] = None, cache_file: Optional[Path] = None):
+        if cache_file is None:
+            cache_file = Path.home() / "Library" / "Application Support" / "MarkdownToPDF" / "environment_cache.json"
+        self.cache_file = cache_file
+        self.font_cache = font_cache or FontCache()
         self.errors: List[str] = []
         self.warnings: List[str] = []
         self.pandoc_version: Optional[str] = None
@@ -43,6 +54,71 @@ class EnvironmentChecker:
         
         return len(self.errors) == 0, self.errors, self.warnings
     
+    def check_all_cached(self, force: bool = False) -> Tuple[bool, List[str], List[str]]:
+        """
+        前回の結果を再利用して依存関係をチェック
+        
+        ツールのバイナリとフォントディレクトリが前回から変わっていなければ、
+        外部コマンドを実行せずに保存済みの結果を返す。
+        
+        Args:
+            force: Trueの場合はキャッシュを使わずに再チェック
+        
+        Returns:
+            (成功フラグ, エラーリスト, 警告リスト)
+        """
+        signature = self._environment_signature()
+        
+        if not force and self.cache_file.exists():
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+                if cached.get('signature') == signature:
+                    self.errors = cached['errors']
+                    self.warnings = cached['warnings']
+                    self.pandoc_version = cached.get('pandoc_version')
+                    self.xelatex_version = cached.get('xelatex_version')
+                    self.available_fonts = cached.get('available_fonts', [])
+                    return len(self.errors) == 0, self.errors, self.warnings
+            except Exception:
+                pass
+        
+        success, errors, warnings = self.check_all()
+        
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'signature': signature,
+                    'errors': errors,
+                    'warnings': warnings,
+                    'pandoc_version': self.pandoc_version,
+                    'xelatex_version': self.xelatex_version,
+                    'available_fonts': self.available_fonts,
+                }, f, indent=2, ensure_ascii=False)
+        except Exception:
+            pass
+        
+        return success, errors, warnings
+    
+    def _environment_signature(self) -> Dict:
+        """ツールのパスとmtime、フォントディレクトリのmtimeからなるシグネチャ"""
+        tools = {}
+        for tool in CHECKED_TOOLS:
+            tool_path = shutil.which(tool)
+            if tool_path is None:
+                tools[tool] = None
+                continue
+            try:
+                tools[tool] = [tool_path, os.stat(tool_path).st_mtime]
+            except OSError:
+                tools[tool] = [tool_path, None]
+        
+        return {
+            'tools': tools,
+            'fonts': self.font_cache.font_directory_signature(),
+        }
+    
     def check_pandoc(self) -> bool:
         """Pandocの存在を確認"""
         pandoc_path = shutil.which("pandoc")
@@ -88,28 +164,22 @@ class EnvironmentChecker:
         return False
     
     def check_fonts(self) -> None:
-        """日本語フォントの存在を確認"""
-        try:
-            result = subprocess.run(
-                ["fc-list", ":lang=ja"],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode == 0:
-                fonts = result.stdout.strip().split('\n')
-                self.available_fonts = [f.split(':')[0] for f in fonts if f]
-                
-                # Hiragino Sansの確認
-                hiragino_found = any("Hiragino" in f for f in self.available_fonts)
-                if not hiragino_found:
-                    self.warnings.append(
-                        "Hiragino Sansフォントが見つかりません。"
-                        "macOSでは通常インストールされていますが、"
-                        "他のフォントを使用する場合は設定で変更できます。"
-                    )
-        except (subprocess.TimeoutExpired, FileNotFoundError):
+        """日本語フォントの存在を確認（fc-listの結果はキャッシュを使用）"""
+        fonts = self.font_cache.get_fc_fonts("ja")
+        if fonts is None:
             self.warnings.append("fc-listコマンドが見つかりません（フォント確認スキップ）")
+            return
+        
+        self.available_fonts = [f.split(':')[0] for f in fonts]
+        
+        # Hiragino Sansの確認
+        hiragino_found = any("Hiragino" in f for f in self.available_fonts)
+        if not hiragino_found:
+            self.warnings.append(
+                "Hiragino Sansフォントが見つかりません。"
+                "macOSでは通常インストールされていますが、"
+                "他のフォントを使用する場合は設定で変更できます。"
+            )
     
     def check_inkscape(self) -> bool:
         """Inkscapeの存在を確認（オプション）"""
@@ -1,25 +1,50 @@
 """エラーログ分析: エラーパターンの集計と解決策の提案"""
 
 import json
+import re
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from collections import Counter
 
 
+# StructuredLoggerが出力するレコードの先頭行: "asctime - name - LEVEL - message"
+LOG_RECORD_PATTERN = re.compile(
+    r'^(\d{4}-\d{2}-\d{2}) \d{2}:\d{2}:\d{2}(?:,\d+)? - (\S+) - ([A-Z]+) - (.*)$'
+)
+
+# errors.logと同じレコードを複製して書き込むロガー（app.log）。二重に数えないよう集計しない
+MIRROR_LOGGERS = frozenset({"markdown_to_pdf_gui.app"})
+
+# インデックスのフォーマットバージョン（変更時は再構築）
+INDEX_VERSION = 2
+
+
 class ErrorAnalyzer:
-    """エラーログを分析するクラス"""
+    """エラーログを分析するクラス
     
-    def __init__(self, log_dir: Optional[Path] = None):
+    ログファイルごとに読み込み済みのバイトオフセットを記録し、エラータイプ・
+    カテゴリ別の日次集計をインデックスとして永続化する。分析時には前回以降に
+    追記された部分のみを読み込む。
+    """
+    
+    # インデックスに保持する日次集計の日数
+    INDEX_RETENTION_DAYS = 400
+    
+    def __init__(self, log_dir: Optional[Path] = None, index_file: Optional[Path] = None):
         """
         エラー分析器を初期化
         
         Args:
             log_dir: ログディレクトリ（Noneの場合はデフォルト）
+            index_file: 集計インデックスのパス（Noneの場合はログディレクトリ内）
         """
         if log_dir is None:
             log_dir = Path.home() / "Library" / "Application Support" / "MarkdownToPDF" / "logs"
         self.log_dir = log_dir
+        self.index_file = index_file or log_dir / "error_index.json"
+        self.index: Dict = {}
+        self.load_index()
     
     def analyze_patterns(self, log_files: Optional[List[Path]] = None, days: int = 30) -> Dict:
         """
@@ -32,41 +57,120 @@ class ErrorAnalyzer:
         Returns:
             エラーパターンの集計結果
         """
+        auto_detected = log_files is None
         if log_files is None:
             log_files = self._find_recent_logs(days)
         
-        error_counts = Counter()
+        file_keys = self.update_index(log_files, prune_missing=auto_detected)
+        
+        buckets = [self.index['files'][key]['days'] for key in file_keys]
+        if auto_detected:
+            # 削除済み（ローテーションで消えた）ログの集計も含める
+            buckets.append(self.index['archived'])
+        
         error_types = Counter()
         error_by_category = Counter()
+        cutoff = (datetime.now() - timedelta(days=days)).date().isoformat()
         
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        for log_file in log_files:
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        if line.strip():
-                            try:
-                                log_entry = json.loads(line)
-                                if log_entry.get('level') == 'ERROR':
-                                    error_type = log_entry.get('error_type', 'UNKNOWN')
-                                    category = log_entry.get('category', 'GENERAL')
-                                    
-                                    error_counts[error_type] += 1
-                                    error_types[error_type] += 1
-                                    error_by_category[category] += 1
-                            except json.JSONDecodeError:
-                                pass
-            except Exception:
-                pass
+        for days_bucket in buckets:
+            for day, counts in days_bucket.items():
+                if day >= cutoff:
+                    error_types.update(counts['error_types'])
+                    error_by_category.update(counts['error_by_category'])
         
         return {
-            'total_errors': sum(error_counts.values()),
+            'total_errors': sum(error_types.values()),
             'error_types': dict(error_types),
             'error_by_category': dict(error_by_category),
-            'most_common_errors': error_counts.most_common(10),
+            'most_common_errors': error_types.most_common(10),
         }
     
+    def update_index(self, log_files: List[Path], prune_missing: bool = False) -> List[str]:
+        """
+        ログファイルの追記部分を読み込んでインデックスを更新
+        
+        Args:
+            log_files: 対象のログファイル
+            prune_missing: 存在しなくなったログの集計をarchivedに移すか
+        
+        Returns:
+            対象ログファイルのインデックスキーのリスト
+        """
+        files = self.index['files']
+        changed = False
+        file_keys = []
+        
+        for log_file in log_files:
+            try:
+                stat = log_file.stat()
+            except OSError:
+                continue
+            
+            # ローテーション（リネーム）後も同じエントリを使うためinodeをキーにする
+            key = f"{stat.st_dev}:{stat.st_ino}"
+            file_keys.append(key)
+            entry = files.get(key)
+            
+            if entry is not None and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+                if entry['path'] != str(log_file):
+                    entry['path'] = str(log_file)
+                    changed = True
+                continue
+            
+            if entry is None or stat.st_size < entry['offset']:
+                # 新しいファイル、または切り詰められたファイル
+                if entry is not None:
+                    self._merge_days(self.index['archived'], entry['days'])
+                entry = files[key] = {'path': str(log_file), 'offset': 0, 'days': {}}
+            
+            try:
+                entry['offset'] = self._scan_file(log_file, entry['offset'], entry['days'], stat.st_mtime)
+            except OSError:
+                continue
+            entry['path'] = str(log_file)
+            entry['size'] = stat.st_size
+            entry['mtime'] = stat.st_mtime
+            changed = True
+        
+        if prune_missing:
+            for key in list(files):
+                if not Path(files[key]['path']).exists():
+                    self._merge_days(self.index['archived'], files.pop(key)['days'])
+                    changed = True
+        
+        if changed:
+            self._prune_old_days()
+            self.save_index()
+        
+        return file_keys
+    
+    def load_index(self) -> None:
+        """インデックスを読み込み"""
+        self.index = {}
+        if self.index_file.exists():
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    self.index = json.load(f)
+            except Exception:
+                self.index = {}
+        
+        if self.index.get('version') != INDEX_VERSION:
+            self.index = {'version': INDEX_VERSION, 'files': {}, 'archived': {}}
+    
+    def save_index(self) -> None:
+        """インデックスを保存"""
+        try:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.index_file, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, ensure_ascii=False)
+        except Exception:
+            pass
+    
+    def clear_index(self) -> None:
+        """インデックスをクリア（次回の分析で全ログを再読み込み）"""
+        self.index = {'version': INDEX_VERSION, 'files': {}, 'archived': {}}
+        self.save_index()
+    
     def suggest_solutions(self, error_type: str) -> List[str]:
         """
         エラータイプに応じた解決策を提案
@@ -117,7 +221,11 @@ class ErrorAnalyzer:
         cutoff_date = datetime.now() - timedelta(days=days)
         log_files = []
         
-        for log_file in self.log_dir.glob("*.log"):
+        # ローテーション済みのログ（errors.log.1 など）も含める。
+        # app.logのエラーはerrors.logの複製のため読み込まない
+        for log_file in [*self.log_dir.glob("*.log"), *self.log_dir.glob("*.log.[0-9]*")]:
+            if log_file.name.startswith("app.log"):
+                continue
             try:
                 if log_file.stat().st_mtime >= cutoff_date.timestamp():
                     log_files.append(log_file)
@@ -133,3 +241,130 @@ class ErrorAnalyzer:
                 pass
         
         return log_files
+    
+    def _scan_file(self, log_file: Path, offset: int, days: Dict, mtime: float) -> int:
+        """
+        オフセット以降のレコードを集計
+        
+        Args:
+            log_file: ログファイル
+            offset: 読み込み開始位置（バイト）
+            days: 集計先の日次バケット
+            mtime: ファイルの更新時刻（日付のないレコードに使用）
+        
+        Returns:
+            次回の読み込み開始位置（未完了のレコードの先頭）
+        """
+        with open(log_file, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        
+        # 改行で終わっていない行は書き込み途中として次回に回す
+        data = data[:data.rfind(b'\n') + 1]
+        fallback_date = datetime.fromtimestamp(mtime).date().isoformat()
+        
+        committed = offset
+        record_start = 0
+        record: Optional[Tuple[Optional[str], Optional[str], List[str]]] = None
+        position = 0
+        
+        for raw_line in data.splitlines(keepends=True):
+            line = raw_line.decode('utf-8', errors='replace').rstrip('\r\n')
+            match = LOG_RECORD_PATTERN.match(line)
+            
+            if match:
+                # 新しいレコードの開始で直前のレコードが確定する
+                if record is not None:
+                    self._count_record(record, days, fallback_date, complete=True)
+                    committed = offset + position
+                record = (match.group(1), match.group(2), [match.group(4)])
+                record_start = position
+            elif record is not None:
+                record[2].append(line)
+            elif line.strip():
+                # ヘッダのないJSONレコード（1行または複数行）
+                record = (None, None, [line])
+                record_start = position
+            else:
+                committed = offset + position + len(raw_line)
+            
+            position += len(raw_line)
+            
+            # ヘッダのないレコードはJSONとして完結した時点で確定
+            if record is not None and record[0] is None:
+                if self._count_record(record, days, fallback_date, complete=False):
+                    record = None
+                    committed = offset + position
+        
+        if record is not None:
+            if self._count_record(record, days, fallback_date, complete=False):
+                committed = offset + position
+            else:
+                committed = offset + record_start
+        
+        return committed
+    
+    def _count_record(
+        self,
+        record: Tuple[Optional[str], Optional[str], List[str]],
+        days: Dict,
+        fallback_date: str,
+        complete: bool
+    ) -> bool:
+        """
+        レコードを日次バケットに集計
+        
+        Args:
+            record: (ログの日付, ロガー名, メッセージ行)
+            days: 集計先の日次バケット
+            fallback_date: 日付が不明な場合に使用する日付
+            complete: レコードが確定しているか（Falseの場合、不完全なJSONは保留）
+        
+        Returns:
+            レコードを処理した場合はTrue、続きを待つ場合はFalse
+        """
+        log_date, logger_name, lines = record
+        message = "\n".join(lines).strip()
+        
+        if logger_name in MIRROR_LOGGERS:
+            # errors.logに同じレコードがある
+            return True
+        
+        if not message.startswith('{'):
+            # 構造化されていないメッセージは集計対象外
+            return bool(message) or complete
+        
+        try:
+            log_entry = json.loads(message)
+        except json.JSONDecodeError:
+            return complete
+        
+        if not isinstance(log_entry, dict) or log_entry.get('level') != 'ERROR':
+            return True
+        
+        timestamp = log_entry.get('timestamp')
+        day = timestamp[:10] if isinstance(timestamp, str) and len(timestamp) >= 10 else log_date or fallback_date
+        
+        counts = days.setdefault(day, {'error_types': {}, 'error_by_category': {}})
+        error_type = log_entry.get('error_type', 'UNKNOWN')
+        category = log_entry.get('category', 'GENERAL')
+        counts['error_types'][error_type] = counts['error_types'].get(error_type, 0) + 1
+        counts['error_by_category'][category] = counts['error_by_category'].get(category, 0) + 1
+        return True
+    
+    def _merge_days(self, target: Dict, source: Dict) -> None:
+        """日次バケットを合算"""
+        for day, counts in source.items():
+            merged = target.setdefault(day, {'error_types': {}, 'error_by_category': {}})
+            for field in ('error_types', 'error_by_category'):
+                for name, count in counts[field].items():
+                    merged[field][name] = merged[field].get(name, 0) + count
+    
+    def _prune_old_days(self) -> None:
+        """保持期間を過ぎた日次バケットを削除"""
+        cutoff = (datetime.now() - timedelta(days=self.INDEX_RETENTION_DAYS)).date().isoformat()
+        buckets = [entry['days'] for entry in self.index['files'].values()]
+        buckets.append(self.index['archived'])
+        for days_bucket in buckets:
+            for day in [day for day in days_bucket if day < cutoff]:
+                del days_bucket[day]
@@ -3,6 +3,7 @@
 from enum import Enum
 from typing import List, Optional, Dict
 from pathlib import Path
+from .latex_log_monitor import LatexDiagnosis
 
 
 class ErrorType(Enum):
@@ -190,6 +191,18 @@ class ErrorHandler:
             ]
         )
     
+    def handle_latex_diagnosis(self, file_path: Path, diagnosis: LatexDiagnosis) -> ConversionError:
+        """LaTeXログの監視で検出した致命的エラー（ファイル・行番号付き）"""
+        category = ErrorCategory.FONT if diagnosis.kind == "missing_font" else ErrorCategory.LATEX
+        return self.handle_error(
+            error_type=ErrorType.CONVERSION,
+            category=category,
+            message=f"LaTeXコンパイルエラー: {diagnosis.format_message()}",
+            file_path=file_path,
+            suggestions=diagnosis.suggestions,
+            context=diagnosis.to_context()
+        )
+    
     def clear(self) -> None:
         """エラーと警告をクリア"""
         self.errors.clear()
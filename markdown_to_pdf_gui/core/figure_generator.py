@@ -1,16 +1,26 @@
 """図生成スクリプトの自動実行"""
 
-import subprocess
 from pathlib import Path
 from typing import List, Optional, Tuple
-import os
+from .script_sandbox import SandboxLimits, ScriptRunResult, run_sandboxed
 
 
 class FigureGenerator:
     """図生成スクリプトを実行するクラス"""
     
-    def __init__(self):
+    def __init__(self, limits: Optional[SandboxLimits] = None, python: str = "python3"):
+        """
+        図生成を初期化
+        
+        Args:
+            limits: スクリプトごとの資源の上限（Noneの場合はデフォルト）
+            python: スクリプトを実行するPython
+        """
+        self.limits = limits or SandboxLimits()
+        self.python = python
         self.executed_scripts: List[Path] = []
+        # スクリプトごとの実行結果（CPU時間・最大RSSを含む）
+        self.results: List[ScriptRunResult] = []
     
     def detect_scripts(self, md_file_dir: Path) -> List[Path]:
         """
@@ -25,7 +35,7 @@ class FigureGenerator:
         scripts = []
         
         # .pyスクリプトを検索
-        for py_file in md_file_dir.glob("*.py"):
+        for py_file in sorted(md_file_dir.glob("*.py")):
             # 図生成スクリプトの可能性があるファイル名パターン
             name_lower = py_file.name.lower()
             if any(keyword in name_lower for keyword in ['figure', 'plot', 'generate', 'graph']):
@@ -77,11 +87,15 @@ class FigureGenerator:
     
     def execute_script(self, script_path: Path, working_dir: Optional[Path] = None) -> Tuple[bool, str]:
         """
-        Pythonスクリプトを実行
+        Pythonスクリプトを資源制限付きで実行
+        
+        スクリプトは一時ディレクトリで実行され、宣言された出力（スクリプト先頭の
+        "# outputs: ..."、宣言がない場合は画像ファイル）だけがworking_dirに
+        コピーされる。実行結果と資源の使用量はresultsに追加される。
         
         Args:
             script_path: 実行するスクリプトファイルのパス
-            working_dir: 作業ディレクトリ（Noneの場合はscript_pathのディレクトリ）
+            working_dir: 出力のコピー先（Noneの場合はscript_pathのディレクトリ）
         
         Returns:
             (成功フラグ, エラーメッセージ)
@@ -93,31 +107,15 @@ class FigureGenerator:
             return False, f"スクリプトファイルが存在しません: {script_path}"
         
         try:
-            # Pythonスクリプトを実行
-            result = subprocess.run(
-                ["python3", str(script_path)],
-                cwd=str(working_dir),
-                capture_output=True,
-                text=True,
-                timeout=300,  # 5分のタイムアウト
-                check=False
-            )
-            
-            if result.returncode == 0:
-                self.executed_scripts.append(script_path)
-                return True, ""
-            else:
-                error_msg = result.stderr or "スクリプトの実行に失敗しました"
-                return False, error_msg
-        
-        except subprocess.TimeoutExpired:
-            return False, "スクリプトの実行がタイムアウトしました（5分以上）"
-        
-        except FileNotFoundError:
-            return False, "python3が見つかりません"
-        
+            result = run_sandboxed(script_path, working_dir, self.limits, python=self.python)
         except Exception as e:
             return False, f"予期しないエラー: {str(e)}"
+        
+        self.results.append(result)
+        if result.success:
+            self.executed_scripts.append(script_path)
+            return True, ""
+        return False, result.error
     
     def process_markdown_file(self, md_file: Path, auto_execute: bool = False) -> Tuple[List[Path], List[str]]:
         """
@@ -142,6 +140,7 @@ class FigureGenerator:
                     success, error_msg = self.execute_script(script)
                     if success:
                         executed.append(script)
+                        warnings.extend(f"{script.name}: {message}" for message in self.results[-1].warnings)
                     else:
                         warnings.append(f"スクリプト実行エラー ({script.name}): {error_msg}")
                 else:
@@ -0,0 +1,209 @@
+"""フォント検出キャッシュ: fc-listとmatplotlibのフォント一覧の永続キャッシュ
+
+環境チェッカーと図生成スクリプトの両方から使用する（PyQtには依存しない）。
+スクリプトからは次のように読み込む::
+    
+    from markdown_to_pdf_gui.core.font_cache import setup_japanese_font
+    setup_japanese_font()
+
+GUIから実行するスクリプトはそのまま読み込める（サンドボックスがパッケージの
+場所をPYTHONPATHに追加する）。単独で実行する場合は``pip install -e markdown_to_pdf_gui``
+でパッケージをインストールしておく。
+"""
+
+import json
+import os
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+
+# 図生成スクリプトで使用する日本語フォントの優先順位
+DEFAULT_JAPANESE_FONTS = [
+    'Hiragino Sans', 'Hiragino Kaku Gothic ProN', 'Hiragino Maru Gothic Pro',
+    'Yu Gothic', 'Meiryo', 'AppleGothic', 'Arial Unicode MS', 'Osaka',
+    'Takao', 'IPAexGothic', 'IPAPGothic', 'VL PGothic', 'Noto Sans CJK JP',
+    'MS Gothic',
+]
+
+# フォントのインストール先（mtimeをキャッシュの無効化に使用）
+FONT_DIRECTORIES = [
+    Path("/System/Library/Fonts"),
+    Path("/Library/Fonts"),
+    Path.home() / "Library" / "Fonts",
+    Path("/usr/share/fonts"),
+    Path("/usr/local/share/fonts"),
+    Path.home() / ".fonts",
+    Path.home() / ".local" / "share" / "fonts",
+    Path("C:/Windows/Fonts"),
+]
+
+
+class FontCache:
+    """フォント一覧とフォント選択結果を永続化するクラス"""
+    
+    def __init__(self, cache_file: Optional[Path] = None):
+        """
+        フォントキャッシュを初期化
+        
+        Args:
+            cache_file: キャッシュファイルのパス（Noneの場合はデフォルト）
+        """
+        if cache_file is None:
+            cache_file = Path.home() / "Library" / "Application Support" / "MarkdownToPDF" / "font_cache.json"
+        self.cache_file = cache_file
+        self.cache: Dict = {}
+        self.load_cache()
+    
+    def load_cache(self) -> None:
+        """キャッシュを読み込み（フォントディレクトリが変更されていれば破棄）"""
+        self.cache = {}
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    self.cache = json.load(f)
+            except Exception:
+                self.cache = {}
+        
+        signature = self.font_directory_signature()
+        if self.cache.get('signature') != signature:
+            self.cache = {'signature': signature}
+    
+    def save_cache(self) -> None:
+        """キャッシュを保存"""
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(self.cache, f, indent=2, ensure_ascii=False)
+        except Exception:
+            pass
+    
+    def clear_cache(self) -> None:
+        """キャッシュをクリア"""
+        self.cache = {'signature': self.font_directory_signature()}
+        self.save_cache()
+    
+    def get_fc_fonts(self, lang: str = "ja") -> Optional[List[str]]:
+        """
+        fc-listの結果を取得（キャッシュがあればfc-listを実行しない）
+        
+        Args:
+            lang: 言語（fc-listの:lang=に指定）
+        
+        Returns:
+            fc-listの出力行のリスト、fc-listが使用できない場合はNone
+        """
+        fc_list = self.cache.setdefault('fc_list', {})
+        if lang in fc_list:
+            return fc_list[lang]
+        
+        try:
+            result = subprocess.run(
+                ["fc-list", f":lang={lang}"],
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+        except (subprocess.TimeoutExpired, FileNotFoundError):
+            return None
+        
+        if result.returncode != 0:
+            return None
+        
+        fc_list[lang] = [line for line in result.stdout.strip().split('\n') if line]
+        self.save_cache()
+        return fc_list[lang]
+    
+    def get_matplotlib_fonts(self) -> List[str]:
+        """
+        matplotlibのフォントマネージャーが認識しているフォント名を取得
+        
+        Returns:
+            フォント名のリスト（重複なし）
+        """
+        import matplotlib
+        
+        entry = self.cache.get('matplotlib')
+        if entry and entry.get('version') == matplotlib.__version__:
+            return entry['fonts']
+        
+        import matplotlib.font_manager as fm
+        
+        fonts = sorted({f.name for f in fm.fontManager.ttflist})
+        self.cache['matplotlib'] = {'version': matplotlib.__version__, 'fonts': fonts}
+        self.save_cache()
+        return fonts
+    
+    def resolve_matplotlib_font(self, candidates: Sequence[str]) -> Optional[str]:
+        """
+        候補のうちmatplotlibで使用できる最初のフォントを取得
+        
+        Args:
+            candidates: 優先順に並べたフォント名
+        
+        Returns:
+            フォント名、見つからない場合はNone
+        """
+        import matplotlib
+        
+        resolved = self.cache.setdefault('resolved', {})
+        key = f"{matplotlib.__version__}|{'|'.join(candidates)}"
+        if key in resolved:
+            return resolved[key]
+        
+        available = set(self.get_matplotlib_fonts())
+        selected = next((font for font in candidates if font in available), None)
+        resolved[key] = selected
+        self.save_cache()
+        return selected
+    
+    def font_directory_signature(self) -> Dict[str, float]:
+        """フォントディレクトリのmtime（フォントの追加・削除の検出に使用）"""
+        signature = {}
+        for directory in FONT_DIRECTORIES:
+            try:
+                signature[str(directory)] = os.stat(directory).st_mtime
+            except OSError:
+                continue
+        return signature
+
+
+def setup_japanese_font(
+    candidates: Sequence[str] = DEFAULT_JAPANESE_FONTS,
+    cache: Optional[FontCache] = None,
+    verbose: bool = False
+) -> Optional[str]:
+    """
+    matplotlibの日本語フォントを設定（選択結果はキャッシュされる）
+    
+    Args:
+        candidates: 優先順に並べたフォント名
+        cache: 使用するフォントキャッシュ（Noneの場合はデフォルト）
+        verbose: 選択したフォントを表示するか
+    
+    Returns:
+        選択されたフォント名、見つからない場合はNone
+    """
+    import matplotlib
+    
+    cache = cache or FontCache()
+    selected = cache.resolve_matplotlib_font(candidates)
+    
+    if selected:
+        matplotlib.rcParams['font.family'] = selected
+        matplotlib.rcParams['font.sans-serif'] = [selected] + list(candidates)
+    else:
+        # フォントが見つからない場合はsans-serifの候補として設定
+        matplotlib.rcParams['font.family'] = 'sans-serif'
+        matplotlib.rcParams['font.sans-serif'] = list(candidates)
+    
+    # マイナス記号の文字化けを防ぐ
+    matplotlib.rcParams['axes.unicode_minus'] = False
+    
+    if verbose:
+        if selected:
+            print(f"日本語フォントを使用: {selected}")
+        else:
+            print("デフォルトフォントを使用")
+    
+    return selected
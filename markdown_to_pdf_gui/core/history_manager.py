@@ -1,6 +1,7 @@
 """変換履歴管理: 履歴の記録、検索、フィルタ"""
 
 import json
+import threading
 from pathlib import Path
 from typing import List, Dict, Optional
 from datetime import datetime
@@ -20,17 +21,20 @@ class ConversionHistory:
     profile_name: Optional[str] = None
     error_type: Optional[str] = None
     error_message: Optional[str] = None
+    # 図生成スクリプトごとの実行結果（CPU時間・最大RSS・上限超過など）
+    figure_runs: Optional[List[Dict]] = None
 
 
 class HistoryManager:
     """変換履歴を管理するクラス"""
     
-    def __init__(self, history_file: Optional[Path] = None):
+    def __init__(self, history_file: Optional[Path] = None, lazy: bool = False):
         """
         履歴マネージャーを初期化
         
         Args:
             history_file: 履歴ファイルのパス（Noneの場合はデフォルト）
+            lazy: Trueの場合は履歴ファイルを初回アクセス時まで読み込まない
         """
         if history_file is None:
             history_dir = Path.home() / "Library" / "Application Support" / "MarkdownToPDF"
@@ -38,22 +42,49 @@ class HistoryManager:
             history_file = history_dir / "conversion_history.json"
         
         self.history_file = history_file
-        self.history: List[ConversionHistory] = []
-        self.load_history()
+        self._history: Optional[List[ConversionHistory]] = None
+        self._load_lock = threading.Lock()
+        if not lazy:
+            self.load_history()
+    
+    @property
+    def history(self) -> List[ConversionHistory]:
+        """履歴のリスト（未読み込みの場合はここで読み込む）"""
+        self.ensure_loaded()
+        return self._history
+    
+    @history.setter
+    def history(self, value: List[ConversionHistory]) -> None:
+        self._history = value
+    
+    def is_loaded(self) -> bool:
+        """履歴が読み込み済みかどうか"""
+        return self._history is not None
+    
+    def ensure_loaded(self) -> None:
+        """履歴が未読み込みの場合のみ読み込み（バックグラウンドでの先読みにも使用）"""
+        if self._history is None:
+            with self._load_lock:
+                if self._history is None:
+                    self._history = self._read_history_file()
     
     def load_history(self) -> None:
         """履歴を読み込み"""
+        with self._load_lock:
+            self._history = self._read_history_file()
+    
+    def _read_history_file(self) -> List[ConversionHistory]:
+        """履歴ファイルを読み込み"""
         if self.history_file.exists():
             try:
                 with open(self.history_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self.history = [
+                    return [
                         ConversionHistory(**item) for item in data
                     ]
             except Exception:
-                self.history = []
-        else:
-            self.history = []
+                return []
+        return []
     
     def save_history(self) -> None:
         """履歴を保存"""
@@ -72,7 +103,8 @@ class HistoryManager:
         duration: float,
         profile_name: Optional[str] = None,
         error_type: Optional[str] = None,
-        error_message: Optional[str] = None
+        error_message: Optional[str] = None,
+        figure_runs: Optional[List[Dict]] = None
     ) -> None:
         """
         履歴を追加
@@ -85,6 +117,7 @@ class HistoryManager:
             profile_name: 使用したプロファイル名
             error_type: エラータイプ（失敗時）
             error_message: エラーメッセージ（失敗時）
+            figure_runs: 図生成スクリプトごとの実行結果
         """
         file_size_before = md_file.stat().st_size if md_file.exists() else 0
         file_size_after = pdf_file.stat().st_size if pdf_file.exists() and success else 0
@@ -99,7 +132,8 @@ class HistoryManager:
             file_size_after=file_size_after,
             profile_name=profile_name,
             error_type=error_type,
-            error_message=error_message
+            error_message=error_message,
+            figure_runs=figure_runs
         )
         
         self.history.append(entry)
@@ -1,15 +1,23 @@
-"""画像処理: SVG→PNG変換、サイズ調整、graphicspath自動設定"""
+"""画像処理: SVG→PNG変換、サイズ調整"""
 
 import subprocess
 from pathlib import Path
 from typing import List, Optional, Tuple
 import shutil
+from .path_index import PathIndex
 
 
 class ImageProcessor:
     """画像処理を行うクラス"""
     
-    def __init__(self):
+    def __init__(self, path_index: Optional[PathIndex] = None):
+        """
+        画像処理を初期化
+        
+        Args:
+            path_index: 共有するパスインデックス（Noneの場合は専用のものを作成）
+        """
+        self.path_index = path_index or PathIndex()
         self.temp_dir: Optional[Path] = None
         self.has_cairosvg = shutil.which("cairosvg") is not None
         self.has_inkscape = shutil.which("inkscape") is not None
@@ -36,7 +44,7 @@ class ImageProcessor:
         md_dir = md_file.parent
         
         for img_path in image_paths:
-            if not img_path.exists():
+            if not self.path_index.exists(img_path):
                 warnings.append(f"画像が見つかりません: {img_path}")
                 continue
             
@@ -101,56 +109,6 @@ class ImageProcessor:
         
         return None
     
-    def find_image_directories(self, md_file: Path) -> List[Path]:
-        """
-        画像ディレクトリを検出
-        
-        Args:
-            md_file: マークダウンファイルのパス
-        
-        Returns:
-            画像ディレクトリのパスリスト
-        """
-        directories = []
-        md_dir = md_file.parent
-        
-        # 検索パス
-        search_paths = [
-            md_dir,
-            md_dir / "figures",
-            md_dir.parent / "figures",
-        ]
-        
-        for path in search_paths:
-            if path.exists() and path.is_dir():
-                # 画像ファイルが含まれているか確認
-                image_extensions = ['.png', '.jpg', '.jpeg', '.gif', '.svg', '.pdf']
-                has_images = any(
-                    f.suffix.lower() in image_extensions
-                    for f in path.iterdir()
-                    if f.is_file()
-                )
-                if has_images:
-                    directories.append(path)
-        
-        return directories
-    
-    def generate_graphicspath(self, directories: List[Path]) -> str:
-        """
-        graphicspathコマンドを生成
-        
-        Args:
-            directories: 画像ディレクトリのパスリスト
-        
-        Returns:
-            LaTeXのgraphicspathコマンド
-        """
-        if not directories:
-            return ""
-        
-        paths = [f"{{{str(d)}}}" for d in directories]
-        return f"\\graphicspath{{{','.join(paths)}}}"
-    
     def optimize_image(self, image_path: Path, max_size: Optional[Tuple[int, int]] = None) -> Optional[Path]:
         """
         画像を最適化（リサイズなど）
@@ -0,0 +1,546 @@
+"""変換ジョブキュー: 共有ファイルシステム上のSQLiteで複数マシンに変換を分散"""
+
+import hashlib
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+from .asset_bundle import BlobStore, BundleManifest
+
+
+# ジョブの状態
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+# ジョブの優先度（値が小さいほど優先）
+PRIORITY_INTERACTIVE = 0  # 編集中のファイルのプレビューなど
+PRIORITY_BATCH = 1  # ユーザーが開始した変換
+PRIORITY_BACKGROUND = 2  # プレビュー後の最終版の作成など
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch_id TEXT NOT NULL,
+    md_path TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    worker TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result_hash TEXT,
+    result_name TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    heartbeat REAL,
+    bundle TEXT,
+    priority INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS jobs_batch ON jobs (batch_id);
+"""
+
+# 既存のデータベースに追加する列（列名, 定義）
+MIGRATIONS = [
+    ("bundle", "bundle TEXT"),
+    ("priority", "priority INTEGER NOT NULL DEFAULT 1"),
+]
+
+
+def default_worker_id() -> str:
+    """ワーカーID（ホスト名:プロセスID）"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def worker_is_gone(worker: Optional[str]) -> bool:
+    """
+    ワーカーIDのプロセスが終了しているかどうか
+    
+    このホストのワーカー（ホスト名:プロセスID[:...]）のみ判定し、他のホストの
+    ワーカーや形式の異なるIDは生存しているものとして扱う。
+    
+    Args:
+        worker: ワーカーID
+    
+    Returns:
+        プロセスが存在しない場合はTrue
+    """
+    if not worker:
+        return True
+    host, _, rest = worker.partition(":")
+    pid_text = rest.split(":", 1)[0]
+    if host != socket.gethostname() or not pid_text.isdigit():
+        return False
+    pid = int(pid_text)
+    if pid == os.getpid():
+        return False
+    if os.name != "posix":
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False
+    return False
+
+
+def file_sha256(path: Path) -> str:
+    """ファイルのSHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class ConversionJob:
+    """キューに登録された変換ジョブ"""
+    id: int
+    batch_id: str
+    md_path: Path
+    config: Dict
+    template_path: Optional[Path]
+    header_path: Optional[Path]
+    mode: str
+    status: str
+    worker: Optional[str] = None
+    progress: float = 0.0
+    message: str = ""
+    attempts: int = 0
+    result_hash: Optional[str] = None
+    result_name: Optional[str] = None
+    error: Optional[str] = None
+    bundle: Optional[BundleManifest] = None
+    priority: int = PRIORITY_BATCH
+    output_dir: Optional[Path] = None
+    
+    @property
+    def is_finished(self) -> bool:
+        """完了（成功・失敗・キャンセル）しているかどうか"""
+        return self.status in FINISHED_STATES
+
+
+class JobQueue:
+    """
+    SQLiteを使用した変換ジョブキュー
+    
+    データベースと結果ディレクトリを共有ファイルシステム上に置くと、複数の
+    マシンのワーカーが同じキューからジョブを取得できる。ジョブの取得は
+    BEGIN IMMEDIATEの排他トランザクションで行い、同じジョブが2つの
+    ワーカーに渡らないようにする。ハートビートが途絶えたジョブ
+    （ワーカーの停止など）は再びキューに戻す。
+    
+    生成したPDFはSHA-256をファイル名として結果ディレクトリに保存し、
+    投入側は取得時にハッシュを検証する。マークダウン・画像・テンプレートを
+    バンドルとして登録したジョブの入力は、キューのblobストアに保存される。
+    
+    ジョブは優先度の高い順（同じ優先度では登録順）に取得する。実行中の
+    ジョブは途中で打ち切ってキューに戻せるため、優先度の低いバッチは
+    優先度の高いジョブが登録されると中断し、後で残りのファイルから再開できる。
+    """
+    
+    # ハートビートが途絶えてからジョブを再投入するまでの時間（秒）
+    LEASE_TIMEOUT = 120.0
+    
+    # 1つのジョブを試行する最大回数
+    MAX_ATTEMPTS = 3
+    
+    def __init__(self, db_path: Path, lease_timeout: Optional[float] = None):
+        """
+        ジョブキューを初期化
+        
+        Args:
+            db_path: キューのデータベースファイル
+            lease_timeout: ジョブを再投入するまでのハートビートの猶予（秒）
+        """
+        self.db_path = Path(db_path)
+        self.results_dir = self.db_path.parent / f"{self.db_path.stem}_results"
+        self.blobs = BlobStore(self.db_path.parent / f"{self.db_path.stem}_blobs")
+        self.lease_timeout = lease_timeout if lease_timeout is not None else self.LEASE_TIMEOUT
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            conn.executescript(SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, definition in MIGRATIONS:
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {definition}")
+            conn.commit()
+        finally:
+            conn.close()
+    
+    @contextmanager
+    def _connect(self, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        """接続を開き、ブロックの終わりでコミットして閉じる"""
+        # ネットワークファイルシステムではWALを使用できないため既定のジャーナルを使用
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+    
+    def submit(
+        self,
+        md_files: Sequence[Path],
+        config: Optional[Dict] = None,
+        template_path: Optional[Path] = None,
+        header_path: Optional[Path] = None,
+        mode: str = "final",
+        batch_id: Optional[str] = None,
+        bundles: Optional[Sequence[Optional[BundleManifest]]] = None,
+        priority: int = PRIORITY_BATCH,
+        output_dir: Optional[Path] = None
+    ) -> str:
+        """
+        ファイルごとのジョブを登録
+        
+        バンドルを指定しないジョブのパスは、ワーカーからも同じパスで参照
+        できる共有ファイルシステム上のものを指定する。バンドルのblobは
+        事前にself.blobsに保存しておく。
+        
+        Args:
+            md_files: 変換するマークダウンファイル
+            config: 変換設定
+            template_path: テンプレートファイルのパス
+            header_path: ヘッダーファイルのパス
+            mode: 変換モード
+            batch_id: バッチID（Noneの場合は新規に作成）
+            bundles: ファイルごとのバンドル（md_filesと同じ順序）
+            priority: 優先度（PRIORITY_INTERACTIVE・PRIORITY_BATCH・PRIORITY_BACKGROUND）
+            output_dir: 出力ディレクトリ（Noneの場合はマークダウンと同じディレクトリ）
+        
+        Returns:
+            バッチID
+        """
+        batch_id = batch_id or uuid.uuid4().hex
+        payload = json.dumps({
+            "config": config or {},
+            "template_path": str(template_path) if template_path else None,
+            "header_path": str(header_path) if header_path else None,
+            "mode": mode,
+            "output_dir": str(output_dir) if output_dir else None,
+        }, ensure_ascii=False, default=str)
+        now = time.time()
+        bundles = list(bundles) if bundles is not None else [None] * len(md_files)
+        
+        with self._connect(immediate=True) as conn:
+            conn.executemany(
+                "INSERT INTO jobs (batch_id, md_path, payload, status, created_at, updated_at, bundle, priority)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(batch_id, str(Path(md_file).resolve()), payload, JOB_QUEUED, now, now,
+                  json.dumps(bundle.to_dict(), ensure_ascii=False) if bundle is not None else None,
+                  priority)
+                 for md_file, bundle in zip(md_files, bundles)]
+            )
+        return batch_id
+    
+    def claim(self, worker: str, batch_id: Optional[str] = None) -> Optional[ConversionJob]:
+        """
+        待機中のジョブを優先度の高い順に1件取得して実行中にする
+        
+        Args:
+            worker: ワーカーID
+            batch_id: 指定した場合はこのバッチのジョブだけを取得
+        
+        Returns:
+            取得したジョブ、待機中のジョブがない場合はNone
+        """
+        now = time.time()
+        with self._connect(immediate=True) as conn:
+            self._requeue_expired(conn, now)
+            if batch_id is None:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY priority, id LIMIT 1", (JOB_QUEUED,)
+                ).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? AND batch_id = ? ORDER BY id LIMIT 1",
+                    (JOB_QUEUED, batch_id)
+                ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1,"
+                " progress = 0, message = '', heartbeat = ?, updated_at = ? WHERE id = ?",
+                (JOB_RUNNING, worker, now, now, row["id"])
+            )
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+        return self._to_job(row)
+    
+    def heartbeat(self, job_id: int, worker: str, progress: float, message: str = "") -> bool:
+        """
+        進捗を報告（ハートビートを兼ねる）
+        
+        Returns:
+            ジョブを継続してよい場合はTrue（キャンセル・再割り当て済みの場合はFalse）
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET progress = ?, message = ?, heartbeat = ?, updated_at = ?"
+                " WHERE id = ? AND worker = ? AND status = ?",
+                (progress, message, now, now, job_id, worker, JOB_RUNNING)
+            )
+        return cursor.rowcount == 1
+    
+    def complete(self, job_id: int, worker: str, output_file: Path) -> Optional[str]:
+        """
+        ジョブを完了にして、生成したファイルを結果ディレクトリに保存
+        
+        Args:
+            job_id: ジョブID
+            worker: ワーカーID
+            output_file: 生成したファイル
+        
+        Returns:
+            ファイルのSHA-256、ジョブが既に他のワーカーに移っていた場合はNone
+        """
+        result_hash = file_sha256(output_file)
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        result_file = self.results_dir / f"{result_hash}{output_file.suffix}"
+        if not result_file.exists():
+            tmp_file = result_file.with_name(f"{result_file.name}.{uuid.uuid4().hex}.tmp")
+            shutil.copyfile(output_file, tmp_file)
+            tmp_file.replace(result_file)
+        
+        now = time.time()
+        with self._connect(immediate=True) as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, progress = 100, result_hash = ?, result_name = ?,"
+                " error = NULL, updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+                (JOB_DONE, result_hash, output_file.name, now, job_id, worker, JOB_RUNNING)
+            )
+            if cursor.rowcount == 1:
+                return result_hash
+            # キャンセル・削除されたジョブの結果は、他のジョブが参照していなければ残さない
+            in_use = conn.execute(
+                "SELECT 1 FROM jobs WHERE result_hash = ? LIMIT 1", (result_hash,)
+            ).fetchone()
+            if in_use is None:
+                try:
+                    result_file.unlink()
+                except OSError:
+                    pass
+        return None
+    
+    def mark_done(self, job_id: int, worker: str) -> bool:
+        """
+        結果ファイルを保存せずにジョブを完了にする（出力を直接書き込むローカルの変換）
+        
+        Returns:
+            完了にした場合はTrue（キャンセル・再割り当て済みの場合はFalse）
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, progress = 100, error = NULL, updated_at = ?"
+                " WHERE id = ? AND worker = ? AND status = ?",
+                (JOB_DONE, now, job_id, worker, JOB_RUNNING)
+            )
+        return cursor.rowcount == 1
+    
+    def requeue(self, job_id: int, worker: str) -> bool:
+        """
+        実行中のジョブを打ち切ってキューに戻す（優先度の高いジョブへの切り替えなど）
+        
+        打ち切りは失敗ではないため、試行回数には数えない。
+        
+        Returns:
+            キューに戻した場合はTrue
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, attempts = MAX(attempts - 1, 0),"
+                " progress = 0, message = '', updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+                (JOB_QUEUED, now, job_id, worker, JOB_RUNNING)
+            )
+        return cursor.rowcount == 1
+    
+    def requeue_running(self) -> int:
+        """
+        終了したプロセスが実行中のまま残したジョブをキューに戻す
+        
+        アプリ内のキューで、前回の終了時（強制終了を含む）に変換中だった
+        ジョブを回収するために起動時に呼び出す。同じキューを使っている
+        他のインスタンス（他のプロセス・他のホスト）が実行中のジョブは戻さない。
+        
+        Returns:
+            キューに戻したジョブの数
+        """
+        now = time.time()
+        requeued = 0
+        with self._connect(immediate=True) as conn:
+            rows = conn.execute(
+                "SELECT id, worker FROM jobs WHERE status = ?", (JOB_RUNNING,)
+            ).fetchall()
+            for row in rows:
+                if not worker_is_gone(row["worker"]):
+                    continue
+                cursor = conn.execute(
+                    "UPDATE jobs SET status = ?, worker = NULL, attempts = MAX(attempts - 1, 0),"
+                    " progress = 0, message = '', updated_at = ? WHERE id = ? AND status = ?",
+                    (JOB_QUEUED, now, row["id"], JOB_RUNNING)
+                )
+                requeued += cursor.rowcount
+        return requeued
+    
+    def has_higher_priority(self, priority: int, batch_id: Optional[str] = None) -> bool:
+        """
+        指定した優先度より優先されるジョブが待機中・実行中かどうか
+        
+        Args:
+            priority: 比較する優先度
+            batch_id: 除外するバッチ（自分自身のバッチ）
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM jobs WHERE priority < ? AND status IN (?, ?) AND batch_id != ? LIMIT 1",
+                (priority, JOB_QUEUED, JOB_RUNNING, batch_id or "")
+            ).fetchone()
+        return row is not None
+    
+    def unfinished_batches(self) -> List[str]:
+        """待機中のジョブが残っているバッチ（優先度の高い順、同じ優先度では登録順）"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT batch_id FROM jobs WHERE status = ?"
+                " GROUP BY batch_id ORDER BY MIN(priority), MIN(id)", (JOB_QUEUED,)
+            ).fetchall()
+        return [row["batch_id"] for row in rows]
+    
+    def fail(self, job_id: int, worker: str, error: str) -> None:
+        """ジョブを失敗にする"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ?"
+                " WHERE id = ? AND worker = ? AND status = ?",
+                (JOB_FAILED, error, now, job_id, worker, JOB_RUNNING)
+            )
+    
+    def cancel(self, batch_id: str) -> None:
+        """バッチの未完了のジョブをキャンセル（実行中のジョブは次の進捗報告で中断）"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ?"
+                " WHERE batch_id = ? AND status IN (?, ?)",
+                (JOB_CANCELLED, now, batch_id, JOB_QUEUED, JOB_RUNNING)
+            )
+    
+    def get_batch(self, batch_id: str) -> List[ConversionJob]:
+        """バッチのジョブを登録順に取得"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE batch_id = ? ORDER BY id", (batch_id,)
+            ).fetchall()
+        return [self._to_job(row) for row in rows]
+    
+    def fetch_result(self, job: ConversionJob, output_dir: Path) -> Path:
+        """
+        完了したジョブの結果を出力ディレクトリにコピー
+        
+        Args:
+            job: 完了したジョブ
+            output_dir: 出力ディレクトリ
+        
+        Returns:
+            コピーしたファイルのパス
+        
+        Raises:
+            ValueError: ジョブが完了していない、または結果のハッシュが一致しない場合
+        """
+        if job.status != JOB_DONE or not job.result_hash or not job.result_name:
+            raise ValueError(f"ジョブ{job.id}は完了していません")
+        
+        result_file = self.results_dir / f"{job.result_hash}{Path(job.result_name).suffix}"
+        if not result_file.exists() or file_sha256(result_file) != job.result_hash:
+            raise ValueError(f"ジョブ{job.id}の結果のハッシュが一致しません: {result_file}")
+        
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_file = output_dir / job.result_name
+        shutil.copyfile(result_file, output_file)
+        return output_file
+    
+    def purge(self, batch_id: str) -> None:
+        """バッチのジョブと、他のジョブが参照していない結果ファイルを削除"""
+        with self._connect(immediate=True) as conn:
+            hashes = {
+                (row["result_hash"], Path(row["result_name"]).suffix)
+                for row in conn.execute(
+                    "SELECT result_hash, result_name FROM jobs"
+                    " WHERE batch_id = ? AND result_hash IS NOT NULL", (batch_id,)
+                )
+            }
+            conn.execute("DELETE FROM jobs WHERE batch_id = ?", (batch_id,))
+            in_use = {
+                row["result_hash"]
+                for row in conn.execute("SELECT result_hash FROM jobs WHERE result_hash IS NOT NULL")
+            }
+        for result_hash, suffix in hashes:
+            if result_hash in in_use:
+                continue
+            try:
+                (self.results_dir / f"{result_hash}{suffix}").unlink()
+            except OSError:
+                pass
+    
+    def _requeue_expired(self, conn: sqlite3.Connection, now: float) -> None:
+        """ハートビートが途絶えた実行中のジョブを再投入（試行回数の上限を超えた場合は失敗）"""
+        expired = now - self.lease_timeout
+        conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ?"
+            " WHERE status = ? AND heartbeat < ? AND attempts >= ?",
+            (JOB_FAILED, "ワーカーからの応答がありません", now, JOB_RUNNING, expired, self.MAX_ATTEMPTS)
+        )
+        conn.execute(
+            "UPDATE jobs SET status = ?, worker = NULL, updated_at = ?"
+            " WHERE status = ? AND heartbeat < ?",
+            (JOB_QUEUED, now, JOB_RUNNING, expired)
+        )
+    
+    def _to_job(self, row: sqlite3.Row) -> ConversionJob:
+        """行をジョブに変換"""
+        payload = json.loads(row["payload"])
+        return ConversionJob(
+            id=row["id"],
+            batch_id=row["batch_id"],
+            md_path=Path(row["md_path"]),
+            config=payload.get("config", {}),
+            template_path=Path(payload["template_path"]) if payload.get("template_path") else None,
+            header_path=Path(payload["header_path"]) if payload.get("header_path") else None,
+            mode=payload.get("mode", "final"),
+            status=row["status"],
+            worker=row["worker"],
+            progress=row["progress"],
+            message=row["message"],
+            attempts=row["attempts"],
+            result_hash=row["result_hash"],
+            result_name=row["result_name"],
+            error=row["error"],
+            bundle=BundleManifest.from_dict(json.loads(row["bundle"])) if row["bundle"] else None,
+            priority=row["priority"],
+            output_dir=Path(payload["output_dir"]) if payload.get("output_dir") else None,
+        )
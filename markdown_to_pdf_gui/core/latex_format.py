@@ -0,0 +1,189 @@
+"""LaTeXフォーマットキャッシュ: プリアンブルを事前コンパイルした.fmtの管理"""
+
+import hashlib
+import re
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+
+# フォーマットに含められない（文書ごとに変わる・XeTeXではダンプできない）命令
+# これらが最初に現れる位置の直前までをフォーマットに含める
+DUMP_BOUNDARY_PATTERN = re.compile(
+    r'^[ \t]*\\(?:'
+    r'setmainfont|setsansfont|setmonofont|setmathfont|newfontfamily|'
+    r'setCJKmainfont|setCJKsansfont|setCJKmonofont|setCJKfamilyfont|newCJKfontfamily|'
+    r'title|author|date|hypersetup|begin\{document\}'
+    r')',
+    re.MULTILINE
+)
+
+# プリアンブルの読み込みを省略するためのマーカー（mylatexformatが解釈する）
+END_OF_DUMP = "\\endofdump"
+
+
+class LatexFormatCache:
+    """
+    プリアンブルを事前コンパイルしたフォーマット(.fmt)を管理するクラス
+    
+    mylatexformatを使用して、pandocが生成したLaTeXのうちパッケージ読み込み部分を
+    フォーマットとしてダンプする。フォーマットはプリアンブルのハッシュごとに
+    作成され、以降の実行ではパッケージの再読み込みを省略できる。
+    """
+    
+    # フォーマットに対応するエンジン
+    SUPPORTED_ENGINES = ("xelatex", "pdflatex", "lualatex")
+    
+    def __init__(self, cache_dir: Optional[Path] = None):
+        """
+        フォーマットキャッシュを初期化
+        
+        Args:
+            cache_dir: フォーマットの保存ディレクトリ（Noneの場合はデフォルト）
+        """
+        if cache_dir is None:
+            cache_dir = Path.home() / "Library" / "Application Support" / "MarkdownToPDF" / "formats"
+        self.cache_dir = cache_dir
+        self._supported: Dict[str, bool] = {}
+        # 作成に失敗したフォーマット（同じプリアンブルで再試行しない）
+        self._failed: Set[str] = set()
+    
+    def is_supported(self, pdf_engine: str) -> bool:
+        """エンジンがフォーマットに対応しているか（mylatexformatの有無も確認）"""
+        if pdf_engine not in self._supported:
+            self._supported[pdf_engine] = self._check_support(pdf_engine)
+        return self._supported[pdf_engine]
+    
+    def split_preamble(self, latex: str) -> Optional[Tuple[str, str]]:
+        """
+        LaTeXソースをフォーマット化できる部分と残りに分割
+        
+        Args:
+            latex: pandocが生成したLaTeXソース
+        
+        Returns:
+            (フォーマットに含める部分, 残り)、分割できない場合はNone
+        """
+        if "\\documentclass" not in latex:
+            return None
+        
+        match = DUMP_BOUNDARY_PATTERN.search(latex)
+        if match is None:
+            return None
+        
+        return latex[:match.start()], latex[match.start():]
+    
+    def get_format_name(self, dumpable: str, pdf_engine: str) -> str:
+        """プリアンブルとエンジンからフォーマット名を生成"""
+        digest = hashlib.sha256(f"{pdf_engine}\n{dumpable}".encode("utf-8")).hexdigest()
+        return f"preamble-{pdf_engine}-{digest[:16]}"
+    
+    def get_format(self, dumpable: str, pdf_engine: str) -> Optional[Path]:
+        """
+        プリアンブルに対応するフォーマットを取得（未作成の場合は作成）
+        
+        Args:
+            dumpable: フォーマットに含めるプリアンブル
+            pdf_engine: PDFエンジン
+        
+        Returns:
+            フォーマットファイルのパス（拡張子なし）、作成に失敗した場合はNone
+        """
+        format_name = self.get_format_name(dumpable, pdf_engine)
+        format_base = self.cache_dir / format_name
+        
+        if format_base.with_suffix(".fmt").exists():
+            return format_base
+        
+        if format_name in self._failed:
+            return None
+        
+        if self._build_format(dumpable, pdf_engine, format_name):
+            return format_base
+        
+        self._failed.add(format_name)
+        return None
+    
+    def prepare_document(self, latex: str, pdf_engine: str) -> Optional[Tuple[str, Path]]:
+        """
+        フォーマットを使用する文書を準備
+        
+        Args:
+            latex: pandocが生成したLaTeXソース
+            pdf_engine: PDFエンジン
+        
+        Returns:
+            (\\endofdumpを挿入したLaTeXソース, フォーマットのパス)、使用できない場合はNone
+        """
+        parts = self.split_preamble(latex)
+        if parts is None:
+            return None
+        
+        dumpable, rest = parts
+        format_base = self.get_format(dumpable, pdf_engine)
+        if format_base is None:
+            return None
+        
+        return f"{dumpable}{END_OF_DUMP}\n{rest}", format_base
+    
+    def clear(self) -> None:
+        """作成済みのフォーマットをすべて削除"""
+        if not self.cache_dir.exists():
+            return
+        
+        for fmt_file in self.cache_dir.glob("preamble-*"):
+            try:
+                fmt_file.unlink()
+            except OSError:
+                pass
+    
+    def _check_support(self, pdf_engine: str) -> bool:
+        """エンジンとmylatexformatの存在を確認"""
+        if pdf_engine not in self.SUPPORTED_ENGINES or shutil.which(pdf_engine) is None:
+            return False
+        
+        kpsewhich = shutil.which("kpsewhich")
+        if kpsewhich is None:
+            return False
+        
+        try:
+            result = subprocess.run(
+                [kpsewhich, "mylatexformat.ltx"],
+                capture_output=True,
+                text=True,
+                timeout=10,
+                check=False
+            )
+            return result.returncode == 0 and bool(result.stdout.strip())
+        except (subprocess.TimeoutExpired, FileNotFoundError):
+            return False
+    
+    def _build_format(self, dumpable: str, pdf_engine: str, format_name: str) -> bool:
+        """mylatexformatでフォーマットをダンプ"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            source = self.cache_dir / f"{format_name}.tex"
+            source.write_text(f"{dumpable}{END_OF_DUMP}\n", encoding="utf-8")
+            
+            result = subprocess.run(
+                [
+                    pdf_engine,
+                    "-ini",
+                    "-interaction=nonstopmode",
+                    f"-jobname={format_name}",
+                    f"&{pdf_engine}",
+                    "mylatexformat.ltx",
+                    source.name,
+                ],
+                cwd=str(self.cache_dir),
+                capture_output=True,
+                text=True,
+                timeout=300,
+                check=False
+            )
+            
+            return result.returncode == 0 and (self.cache_dir / f"{format_name}.fmt").exists()
+        
+        except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
+            return False
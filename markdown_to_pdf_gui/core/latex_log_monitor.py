@@ -0,0 +1,372 @@
+"""LaTeXログ監視: エンジン出力と.logを逐次解析し、致命的エラーで変換を中断"""
+
+import queue
+import re
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+# 致命的エラーのパターン（種類, 正規表現）
+# -file-line-error 形式（"./doc.tex:12: ..."）と通常形式（"! ..."）の両方に対応
+_ERROR_PREFIX = r'^(?:(?P<file>[^\s:][^:]*?):(?P<line>\d+): |! )'
+FATAL_PATTERNS = [
+    ("missing_package", re.compile(
+        _ERROR_PREFIX + r"LaTeX Error: File `(?P<name>[^']+)' not found"
+    )),
+    ("missing_font", re.compile(
+        _ERROR_PREFIX + r'(?:Package fontspec Error: The font "(?P<name>[^"]+)" cannot be found'
+        r'|Font \S+=(?P<font>\S+?)(?::\S*)? not loadable)'
+    )),
+    ("undefined_control_sequence", re.compile(
+        _ERROR_PREFIX + r'Undefined control sequence'
+    )),
+    ("emergency_stop", re.compile(
+        _ERROR_PREFIX + r'(?:Emergency stop|\s*==> Fatal error occurred)'
+    )),
+]
+
+# エラー箇所の行番号（"l.12 \foo"）
+LINE_NUMBER_PATTERN = re.compile(r'^l\.(?P<line>\d+)(?: (?P<context>.*))?$')
+
+# 行番号の行を待つ最大行数
+LINE_NUMBER_LOOKAHEAD = 8
+
+# 種類ごとの説明と解決策
+DIAGNOSIS_DETAILS: Dict[str, tuple] = {
+    "missing_package": (
+        "LaTeXパッケージ（ファイル）が見つかりません",
+        [
+            "tlmgr install <パッケージ名> でパッケージをインストールしてください",
+            "ヘッダーファイルの\\usepackageを確認してください",
+        ],
+    ),
+    "missing_font": (
+        "フォントが見つかりません",
+        [
+            "フォントがシステムにインストールされているか確認してください",
+            "設定で別のフォントを指定してください",
+            "fc-listコマンドで利用可能なフォントを確認してください",
+        ],
+    ),
+    "undefined_control_sequence": (
+        "未定義の制御綴（コマンド）が使われています",
+        [
+            "コマンド名の綴りを確認してください",
+            "コマンドを定義するパッケージを読み込んでいるか確認してください",
+        ],
+    ),
+    "emergency_stop": (
+        "LaTeXの処理が緊急停止しました",
+        [
+            "直前のエラーメッセージを確認してください",
+            "入力ファイルが存在するか確認してください",
+        ],
+    ),
+}
+
+
+@dataclass
+class LatexDiagnosis:
+    """検出した致命的エラーの診断結果"""
+    kind: str
+    message: str
+    file: Optional[str] = None
+    line: Optional[int] = None
+    name: Optional[str] = None
+    excerpt: List[str] = field(default_factory=list)
+    
+    @property
+    def suggestions(self) -> List[str]:
+        """解決策の提案"""
+        return list(DIAGNOSIS_DETAILS[self.kind][1])
+    
+    def format_message(self) -> str:
+        """ユーザー向けのメッセージを生成"""
+        description = DIAGNOSIS_DETAILS[self.kind][0]
+        if self.name:
+            description += f": {self.name}"
+        
+        location = ""
+        if self.file and self.line:
+            location = f" ({self.file}:{self.line})"
+        elif self.line:
+            location = f" (l.{self.line})"
+        
+        return f"{description}{location}\n" + "\n".join(self.excerpt)
+    
+    def to_context(self) -> Dict:
+        """ErrorHandlerのコンテキスト用の辞書"""
+        return {
+            "kind": self.kind,
+            "file": self.file,
+            "line": self.line,
+            "name": self.name,
+            "excerpt": self.excerpt,
+        }
+
+
+class LatexLogMonitor:
+    """
+    LaTeXの出力を1行ずつ解析するクラス
+    
+    致命的エラーの行を検出すると診断を作成し、続く数行から行番号（l.N）と
+    抜粋を補完する。行番号が得られた時点、または一定行数を過ぎた時点で
+    診断が確定する。
+    """
+    
+    def __init__(self):
+        self.diagnosis: Optional[LatexDiagnosis] = None
+        self._pending: Optional[LatexDiagnosis] = None
+        self._pending_lines = 0
+    
+    def feed(self, line: str) -> Optional[LatexDiagnosis]:
+        """
+        1行を解析
+        
+        Args:
+            line: エンジン出力または.logの1行
+        
+        Returns:
+            診断が確定した場合はその診断、それ以外はNone
+        """
+        if self.diagnosis is not None:
+            return self.diagnosis
+        
+        line = line.rstrip('\r\n')
+        
+        if self._pending is not None:
+            self._pending.excerpt.append(line)
+            self._pending_lines += 1
+            match = LINE_NUMBER_PATTERN.match(line)
+            if match:
+                if self._pending.line is None:
+                    self._pending.line = int(match.group('line'))
+                return self._confirm()
+            if self._pending_lines >= LINE_NUMBER_LOOKAHEAD:
+                return self._confirm()
+            return None
+        
+        for kind, pattern in FATAL_PATTERNS:
+            match = pattern.match(line)
+            if match:
+                groups = match.groupdict()
+                self._pending = LatexDiagnosis(
+                    kind=kind,
+                    message=line,
+                    file=groups.get('file'),
+                    line=int(groups['line']) if groups.get('line') else None,
+                    name=groups.get('name') or groups.get('font'),
+                    excerpt=[line],
+                )
+                self._pending_lines = 0
+                return None
+        
+        return None
+    
+    def has_pending(self) -> bool:
+        """行番号待ちの診断があるかどうか"""
+        return self._pending is not None
+    
+    def finish(self) -> Optional[LatexDiagnosis]:
+        """入力の終端で保留中の診断を確定"""
+        if self.diagnosis is None and self._pending is not None:
+            return self._confirm()
+        return self.diagnosis
+    
+    def _confirm(self) -> LatexDiagnosis:
+        """保留中の診断を確定"""
+        self.diagnosis = self._pending
+        self._pending = None
+        return self.diagnosis
+
+
+@dataclass
+class MonitoredResult:
+    """監視付きで実行したプロセスの結果"""
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    diagnosis: Optional[LatexDiagnosis] = None
+    aborted: bool = False
+
+
+def run_monitored(
+    cmd: Sequence[str],
+    cwd: Optional[Path] = None,
+    timeout: float = 300,
+    env: Optional[Dict[str, str]] = None,
+    log_dir: Optional[Path] = None,
+    poll_interval: float = 0.1,
+    settle_time: float = 1.0,
+    abort: Optional[Callable[[], bool]] = None
+) -> MonitoredResult:
+    """
+    出力を逐次監視しながらコマンドを実行
+    
+    標準出力・標準エラーと、log_dir以下に作成される.logファイルを監視し、
+    致命的エラーを検出した時点でプロセスを終了する。
+    
+    Args:
+        cmd: 実行するコマンド
+        cwd: 作業ディレクトリ
+        timeout: タイムアウト（秒）
+        env: 環境変数
+        log_dir: .logファイルを探すディレクトリ（サブディレクトリも含む）
+        poll_interval: .logファイルの確認間隔（秒）
+        settle_time: エラー検出後に出力が止まってから診断を確定するまでの時間（秒）
+        abort: Trueを返した時点でプロセスを終了する関数（確認間隔ごとに呼び出す）
+    
+    Returns:
+        実行結果（致命的エラーで中断した場合はdiagnosisを含む、abortで中断した場合はaborted）
+    
+    Raises:
+        subprocess.TimeoutExpired: タイムアウトした場合
+    """
+    process = subprocess.Popen(
+        list(cmd),
+        cwd=str(cwd) if cwd else None,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        errors='replace'
+    )
+    
+    lines: "queue.Queue" = queue.Queue()
+    outputs: Dict[str, List[str]] = {"stdout": [], "stderr": []}
+    monitors = {"stdout": LatexLogMonitor(), "stderr": LatexLogMonitor(), "log": LatexLogMonitor()}
+    
+    def read_stream(stream, name: str) -> None:
+        for line in stream:
+            lines.put((name, line))
+        lines.put((name, None))
+    
+    readers = [
+        threading.Thread(target=read_stream, args=(process.stdout, "stdout"), daemon=True),
+        threading.Thread(target=read_stream, args=(process.stderr, "stderr"), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    
+    log_tail = _LogTail(log_dir) if log_dir is not None else None
+    deadline = time.monotonic() + timeout
+    open_streams = 2
+    diagnosis: Optional[LatexDiagnosis] = None
+    last_output = time.monotonic()
+    aborted = False
+    
+    try:
+        while open_streams > 0 and diagnosis is None:
+            now = time.monotonic()
+            if now > deadline:
+                raise subprocess.TimeoutExpired(list(cmd), timeout)
+            if abort is not None and abort():
+                aborted = True
+                break
+            
+            try:
+                name, line = lines.get(timeout=poll_interval)
+            except queue.Empty:
+                name, line = None, None
+            
+            if name is not None:
+                if line is None:
+                    open_streams -= 1
+                else:
+                    outputs[name].append(line)
+                    diagnosis = monitors[name].feed(line)
+                    last_output = now
+            
+            if log_tail is not None and diagnosis is None:
+                for log_line in log_tail.read_lines():
+                    last_output = now
+                    diagnosis = monitors["log"].feed(log_line)
+                    if diagnosis is not None:
+                        break
+            
+            # エラー後に出力が止まった場合（入力待ちなど）は行番号を待たずに確定
+            if diagnosis is None and now - last_output > settle_time:
+                pending = [monitor for monitor in monitors.values() if monitor.has_pending()]
+                if pending:
+                    diagnosis = pending[0].finish()
+        
+        if diagnosis is None and not aborted:
+            remaining = max(deadline - time.monotonic(), 0)
+            process.wait(timeout=remaining)
+            if log_tail is not None:
+                for log_line in log_tail.read_lines():
+                    monitors["log"].feed(log_line)
+            if process.returncode != 0:
+                diagnosis = next(
+                    (d for d in (m.finish() for m in monitors.values()) if d is not None),
+                    None
+                )
+    
+    except subprocess.TimeoutExpired:
+        _terminate(process)
+        raise
+    
+    if process.poll() is None:
+        # 致命的エラーを検出したため、または呼び出し側の要求で中断
+        _terminate(process)
+    
+    for reader in readers:
+        reader.join(timeout=1)
+    while not lines.empty():
+        name, line = lines.get_nowait()
+        if line is not None:
+            outputs[name].append(line)
+    
+    return MonitoredResult(
+        returncode=process.returncode,
+        stdout="".join(outputs["stdout"]),
+        stderr="".join(outputs["stderr"]),
+        diagnosis=diagnosis,
+        aborted=aborted
+    )
+
+
+def _terminate(process: subprocess.Popen) -> None:
+    """プロセスを終了（応答がなければ強制終了）"""
+    process.terminate()
+    try:
+        process.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+class _LogTail:
+    """ディレクトリ以下に作成される.logファイルの追記部分を読み込む"""
+    
+    def __init__(self, log_dir: Path):
+        self.log_dir = log_dir
+        self.offsets: Dict[Path, int] = {}
+        self.partial: Dict[Path, bytes] = {}
+    
+    def read_lines(self) -> List[str]:
+        """前回以降に追記された完全な行を取得"""
+        lines = []
+        for log_file in sorted(self.log_dir.glob("**/*.log")):
+            offset = self.offsets.get(log_file, 0)
+            try:
+                with open(log_file, 'rb') as f:
+                    f.seek(offset)
+                    data = f.read()
+            except OSError:
+                continue
+            if not data:
+                continue
+            
+            self.offsets[log_file] = offset + len(data)
+            *complete, rest = (self.partial.pop(log_file, b"") + data).split(b'\n')
+            if rest:
+                self.partial[log_file] = rest
+            lines.extend(line.decode('utf-8', errors='replace') for line in complete)
+        return lines
@@ -4,6 +4,7 @@ import chardet
 from pathlib import Path
 from typing import List, Tuple, Optional, Dict
 import re
+from .path_index import PathIndex
 
 
 class ValidationResult:
@@ -28,7 +29,14 @@ class ValidationResult:
 class MarkdownValidator:
     """マークダウンファイルの検証を行うクラス"""
     
-    def __init__(self):
+    def __init__(self, path_index: Optional[PathIndex] = None):
+        """
+        バリデーターを初期化
+        
+        Args:
+            path_index: 共有するパスインデックス（Noneの場合は専用のものを作成）
+        """
+        self.path_index = path_index or PathIndex()
         self.emoji_pattern = re.compile(
             r'[\U0001F300-\U0001F9FF]|'  # 絵文字範囲1
             r'[\U0001FA00-\U0001FAFF]|'  # 絵文字範囲2
@@ -118,7 +126,7 @@ class MarkdownValidator:
         for alt_text, img_path in matches:
             # パスの解決
             resolved_path = self._resolve_image_path(img_path, md_dir)
-            if resolved_path and resolved_path.exists():
+            if resolved_path:
                 result.image_paths.append(resolved_path)
             else:
                 result.missing_images.append(img_path)
@@ -128,7 +136,7 @@ class MarkdownValidator:
         """画像パスを解決"""
         # 絶対パスの場合
         if Path(img_path).is_absolute():
-            return Path(img_path) if Path(img_path).exists() else None
+            return Path(img_path) if self.path_index.exists(Path(img_path)) else None
         
         # 相対パスの場合、複数の場所を試す
         search_paths = [
@@ -137,11 +145,7 @@ class MarkdownValidator:
             base_dir.parent / "figures" / img_path,
         ]
         
-        for path in search_paths:
-            if path.exists():
-                return path
-        
-        return None
+        return self.path_index.find_first(search_paths)
     
     def _check_links(self, content: str, md_file: Path, result: ValidationResult) -> None:
         """リンクの妥当性を確認"""
@@ -161,7 +165,7 @@ class MarkdownValidator:
             # 相対パスの場合、ファイルの存在確認
             if not link_url.startswith('/'):
                 link_path = md_dir / link_url
-                if not link_path.exists():
+                if not self.path_index.exists(link_path):
                     result.broken_links.append(link_url)
                     result.warnings.append(f"リンク先が見つかりません: {link_url}")
     
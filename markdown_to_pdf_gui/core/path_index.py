@@ -0,0 +1,187 @@
+"""パスインデックス: ディレクトリ一覧のキャッシュによるファイル存在確認"""
+
+import os
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+# ファイルのシグネチャ（パス, 更新時刻[ns], サイズ）、存在しない場合はNone
+FileSignature = Optional[Tuple[str, int, int]]
+
+
+def file_signature(path: Optional[Path]) -> FileSignature:
+    """ファイルのシグネチャを取得（変更の検出に使用）"""
+    if path is None:
+        return None
+    try:
+        stat = Path(path).stat()
+    except OSError:
+        return None
+    return str(path), stat.st_mtime_ns, stat.st_size
+
+
+def _fold_name(name: str) -> str:
+    """表記ゆれ（Unicode正規化・大文字小文字）を吸収したエントリ名"""
+    return unicodedata.normalize('NFC', name).casefold()
+
+
+class PathIndex:
+    """
+    ディレクトリ一覧をメモリ上に保持し、存在確認をまとめて解決するクラス
+    
+    画像・テンプレート・リンクの存在確認ごとに stat を発行する代わりに、
+    ディレクトリ単位で一度だけ一覧を取得する。一覧はディレクトリの
+    mtime で無効化され、mtime の確認はバッチごとに1ディレクトリ1回に限る。
+    バッチの途中でファイルを生成した場合は invalidate() で一覧を破棄する。
+    
+    一覧にない名前でも、NFC正規化と大文字小文字の違いだけで一致するエントリが
+    ある場合は stat で確認する（macOSのNFD形式のファイル名や大文字小文字を
+    区別しないファイルシステムでの判定をOSに委ねる）。
+    """
+    
+    def __init__(self):
+        # ディレクトリ → (mtime, {エントリ名: ディレクトリかどうか}, 正規化したエントリ名)
+        self._listings: Dict[Path, Tuple[float, Dict[str, bool], Set[str]]] = {}
+        # 現在のバッチでmtimeを確認済みのディレクトリ（存在しないものも含む）
+        self._checked: Set[Path] = set()
+        # バッチの世代番号（インデックスに基づく結果をメモ化する側が参照する）
+        self.generation = 0
+    
+    def begin_batch(self) -> None:
+        """新しいバッチを開始（次回参照時にmtimeを再確認する）"""
+        self._checked.clear()
+        self.generation += 1
+    
+    def clear(self) -> None:
+        """インデックスをすべて破棄"""
+        self._listings.clear()
+        self._checked.clear()
+        self.generation += 1
+    
+    def invalidate(self, directory: Path) -> None:
+        """
+        ディレクトリの一覧を破棄（バッチの途中で内容を変更した場合に使用）
+        
+        Args:
+            directory: ディレクトリのパス
+        """
+        directory = Path(directory)
+        self._listings.pop(directory, None)
+        self._checked.discard(directory)
+        self.generation += 1
+    
+    def listdir(self, directory: Path) -> Optional[Dict[str, bool]]:
+        """
+        ディレクトリの一覧を取得
+        
+        Args:
+            directory: ディレクトリのパス
+        
+        Returns:
+            {エントリ名: ディレクトリかどうか}、ディレクトリでない場合はNone
+        """
+        cached = self._load(Path(directory))
+        return cached[1] if cached else None
+    
+    def _load(self, directory: Path) -> Optional[Tuple[float, Dict[str, bool], Set[str]]]:
+        """ディレクトリの一覧をキャッシュから取得（必要なら再取得）"""
+        cached = self._listings.get(directory)
+        
+        if directory in self._checked:
+            return cached
+        self._checked.add(directory)
+        
+        try:
+            mtime = directory.stat().st_mtime
+        except OSError:
+            self._listings.pop(directory, None)
+            return None
+        
+        if cached and cached[0] == mtime:
+            return cached
+        
+        entries: Dict[str, bool] = {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        entries[entry.name] = entry.is_dir()
+                    except OSError:
+                        entries[entry.name] = False
+        except OSError:
+            self._listings.pop(directory, None)
+            return None
+        
+        self._listings[directory] = (mtime, entries, {_fold_name(name) for name in entries})
+        return self._listings[directory]
+    
+    def _entry(self, path: Path) -> Optional[bool]:
+        """
+        エントリの種類を取得
+        
+        Returns:
+            ディレクトリならTrue、それ以外のエントリならFalse、存在しない場合はNone
+        """
+        if path.name in ('', '.', '..'):
+            return True if self.listdir(path) is not None else None
+        cached = self._load(path.parent)
+        if cached is None:
+            return None
+        entries, folded = cached[1], cached[2]
+        if path.name in entries:
+            return entries[path.name]
+        if _fold_name(path.name) not in folded:
+            return None
+        try:
+            return path.is_dir() if path.exists() else None
+        except OSError:
+            return None
+    
+    def exists(self, path: Path) -> bool:
+        """パスが存在するかどうか"""
+        return self._entry(Path(path)) is not None
+    
+    def is_dir(self, path: Path) -> bool:
+        """パスがディレクトリかどうか"""
+        return self._entry(Path(path)) is True
+    
+    def is_file(self, path: Path) -> bool:
+        """パスがディレクトリ以外のエントリかどうか"""
+        return self._entry(Path(path)) is False
+    
+    def find_first(self, candidates: Iterable[Path]) -> Optional[Path]:
+        """
+        候補の中で最初に存在するパスを取得
+        
+        Args:
+            candidates: 優先順に並べた候補パス
+        
+        Returns:
+            最初に存在するパス、見つからない場合はNone
+        """
+        for candidate in candidates:
+            if self.exists(candidate):
+                return Path(candidate)
+        return None
+    
+    def files_with_suffix(self, directory: Path, suffixes: Iterable[str]) -> List[Path]:
+        """
+        ディレクトリ直下で指定した拡張子を持つファイルを列挙
+        
+        Args:
+            directory: ディレクトリのパス
+            suffixes: 小文字の拡張子（例: '.png'）
+        
+        Returns:
+            ファイルパスのリスト
+        """
+        listing = self.listdir(directory)
+        if listing is None:
+            return []
+        suffixes = tuple(suffixes)
+        return [
+            Path(directory) / name
+            for name, is_dir in listing.items()
+            if not is_dir and name.lower().endswith(suffixes)
+        ]
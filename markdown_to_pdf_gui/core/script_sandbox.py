@@ -0,0 +1,430 @@
+"""スクリプトサンドボックス: 図生成スクリプトを資源制限付きの一時ディレクトリで実行"""
+
+import fnmatch
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# スクリプト先頭のコメントで宣言する出力（例: "# outputs: figures/*.png, result.pdf"）
+OUTPUT_DECLARATION_PATTERN = re.compile(r'^#\s*outputs?\s*:\s*(?P<patterns>.+)$', re.IGNORECASE)
+
+# 出力の宣言を探す先頭の行数
+OUTPUT_DECLARATION_LINES = 30
+
+# 宣言がない場合に持ち帰る出力（scripts/から"../figures"に書くスクリプトも含める）
+DEFAULT_OUTPUT_PATTERNS = [
+    "figures/*", "*.png", "*.jpg", "*.jpeg", "*.pdf", "*.svg", "../figures/*",
+]
+
+# setrlimitを適用できない環境（prlimitのないmacOSなど）で、子プロセスのPythonが
+# 自分に上限を設定してからスクリプトを実行するためのコード
+# 引数: 上限（"RLIMIT_AS=soft:hard" をカンマ区切り）、スクリプト、スクリプトの引数
+LIMIT_BOOTSTRAP = (
+    "import resource, runpy, sys\n"
+    "for item in filter(None, sys.argv[1].split(',')):\n"
+    "    name, values = item.split('=')\n"
+    "    try:\n"
+    "        resource.setrlimit(getattr(resource, name), tuple(int(v) for v in values.split(':')))\n"
+    "    except (AttributeError, ValueError, OSError):\n"
+    "        pass\n"
+    "sys.argv = sys.argv[2:]\n"
+    "runpy.run_path(sys.argv[0], run_name='__main__')\n"
+)
+
+# markdown_to_pdf_guiパッケージを含むディレクトリ（スクリプトがfont_cacheなどを読み込めるようにする）
+PACKAGE_PARENT = Path(__file__).resolve().parent.parent.parent
+
+# スクリプトに引き継ぐ環境変数
+INHERITED_ENVIRONMENT = ("PATH", "HOME", "LANG", "LC_ALL", "LC_CTYPE", "PYTHONPATH", "VIRTUAL_ENV")
+
+
+@dataclass
+class SandboxLimits:
+    """スクリプトごとの資源の上限"""
+    memory_mb: int = 2048  # アドレス空間（MB）
+    cpu_seconds: int = 120  # CPU時間（秒）
+    timeout: float = 300.0  # 経過時間（秒）
+    
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> "SandboxLimits":
+        """設定の"figure_limits"から作成（指定のない項目はデフォルト）"""
+        limits = cls()
+        for key, value in (config or {}).items():
+            if hasattr(limits, key) and value is not None:
+                setattr(limits, key, value)
+        return limits
+
+
+@dataclass
+class ScriptRunResult:
+    """スクリプトの実行結果と資源の使用量"""
+    script: str
+    success: bool
+    returncode: Optional[int] = None
+    error: str = ""
+    cpu_time: float = 0.0  # ユーザー+システム時間（秒）
+    peak_rss_mb: float = 0.0
+    wall_time: float = 0.0
+    limit_exceeded: Optional[str] = None  # "memory", "cpu", "timeout"
+    outputs: List[str] = field(default_factory=list)
+    # 作業ディレクトリの外に書き込まれ、出力のパターンに一致しないため破棄したファイル
+    discarded: List[str] = field(default_factory=list)
+    # 宣言された出力のパターンのうち、一致するファイルがなかったもの
+    missing_outputs: List[str] = field(default_factory=list)
+    
+    @property
+    def warnings(self) -> List[str]:
+        """持ち帰れなかった出力についての警告"""
+        messages = []
+        if self.discarded:
+            messages.append(f"作業ディレクトリの外への書き込みを破棄しました: {', '.join(self.discarded)}")
+        if self.missing_outputs:
+            messages.append(f"宣言された出力が作成されませんでした: {', '.join(self.missing_outputs)}")
+        return messages
+    
+    def to_dict(self) -> Dict:
+        """履歴に記録する辞書"""
+        return asdict(self)
+
+
+def read_output_declaration(script_path: Path) -> Optional[List[str]]:
+    """
+    スクリプト先頭のコメントから出力の宣言を読み取る
+    
+    Returns:
+        出力のパターン（作業ディレクトリからの相対パス）、宣言がない場合はNone
+    """
+    patterns: List[str] = []
+    try:
+        with open(script_path, 'r', encoding='utf-8', errors='replace') as f:
+            for _, line in zip(range(OUTPUT_DECLARATION_LINES), f):
+                match = OUTPUT_DECLARATION_PATTERN.match(line.strip())
+                if match:
+                    patterns.extend(p.strip() for p in match.group('patterns').split(',') if p.strip())
+    except OSError:
+        return None
+    return patterns or None
+
+
+def _limit_values(limits: SandboxLimits) -> List[Tuple[str, Tuple[int, int]]]:
+    """設定する資源の上限（resourceの名前, (ソフト上限, ハード上限)）"""
+    memory = limits.memory_mb * 1024 * 1024
+    values = [(name, (memory, memory)) for name in ("RLIMIT_AS", "RLIMIT_DATA")]
+    # ソフト上限でSIGXCPU、猶予を置いたハード上限でSIGKILL
+    values.append(("RLIMIT_CPU", (limits.cpu_seconds, limits.cpu_seconds + 5)))
+    return values
+
+
+def _apply_limits(pid: int, limits: SandboxLimits) -> None:
+    """起動した子プロセスに資源の上限を設定（resource.prlimit）"""
+    for name, value in _limit_values(limits):
+        if hasattr(resource, name):
+            try:
+                resource.prlimit(pid, getattr(resource, name), value)
+            except (ValueError, OSError):
+                pass
+
+
+def _script_command(python: str, script: Path, limits: SandboxLimits) -> List[str]:
+    """
+    スクリプトを実行するコマンド
+    
+    prlimitで起動後に上限を設定できない環境では、子プロセスのPythonが
+    LIMIT_BOOTSTRAPで自分に上限を設定してからスクリプトを実行する。
+    """
+    if resource is None or hasattr(resource, "prlimit"):
+        return [python, str(script)]
+    spec = ",".join(f"{name}={soft}:{hard}" for name, (soft, hard) in _limit_values(limits))
+    return [python, "-c", LIMIT_BOOTSTRAP, spec, str(script)]
+
+
+def _exit_code(status: int) -> int:
+    """waitのステータスを終了コードに変換（シグナルの場合は負の値）"""
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _peak_rss_mb(maxrss: int) -> float:
+    """ru_maxrssをMBに変換（macOSはバイト、それ以外はKB）"""
+    if sys.platform == "darwin":
+        return maxrss / (1024 * 1024)
+    return maxrss / 1024
+
+
+def _matches_output(rel_path: str, output_patterns: Sequence[str]) -> bool:
+    """作業ディレクトリからの相対パスが出力のパターンに一致するか"""
+    return any(fnmatch.fnmatch(rel_path, pattern) for pattern in output_patterns)
+
+
+def _copy_inputs(
+    source_dir: Path,
+    target_dir: Path,
+    prefix: str,
+    output_patterns: Sequence[str],
+    copied: Set[Path],
+    skip: Sequence[str] = (),
+    visited: Optional[Set[str]] = None
+) -> None:
+    """
+    source_dirの内容をtarget_dirに複製（出力のパターンに一致するファイルは作成しない）
+    
+    ディレクトリは実体として作成し、ファイルはコピーする。シンボリックリンクで
+    参照すると、既存のファイルへの書き込みが元のファイルに及ぶため使わない。
+    隠しファイル（".git"など）とskipの名前は複製しない。
+    
+    Args:
+        prefix: target_dirの作業ディレクトリからの相対パス（"", "../"など）
+        copied: 複製したファイルを追加する集合（持ち帰りの対象から除く）
+        visited: 複製したディレクトリの実体（シンボリックリンクの循環を防ぐ）
+    """
+    visited = set() if visited is None else visited
+    real = os.path.realpath(source_dir)
+    if real in visited:
+        return
+    visited.add(real)
+    try:
+        entries = sorted(os.scandir(source_dir), key=lambda e: e.name)
+    except OSError:
+        return
+    for entry in entries:
+        if entry.name.startswith(".") or entry.name in skip:
+            continue
+        rel_path = prefix + entry.name
+        target = target_dir / entry.name
+        try:
+            if entry.is_dir():
+                target.mkdir(exist_ok=True)
+                _copy_inputs(Path(entry.path), target, rel_path + "/", output_patterns, copied, (), visited)
+            elif entry.is_file() and not _matches_output(rel_path, output_patterns):
+                shutil.copy2(entry.path, target)
+                copied.add(target)
+        except OSError:
+            # 読めないファイルはスクリプトからも参照できないままにする
+            continue
+
+
+def _prepare_workdir(source_dir: Path, work_dir: Path, output_patterns: Sequence[str]) -> Set[Path]:
+    """
+    スクリプトのディレクトリとその親ディレクトリの内容を、作業ディレクトリ（work_dir）と
+    その親に複製
+    
+    出力のパターンに一致する既存のファイル（"figures/*"の図、宣言された"result.txt"など）は
+    複製せず、スクリプトが新しく作成したものだけが持ち帰られるようにする。
+    
+    Returns:
+        複製した入力ファイルのパス
+    """
+    copied: Set[Path] = set()
+    _copy_inputs(source_dir, work_dir, "", output_patterns, copied)
+    parent = source_dir.parent
+    if parent != source_dir:
+        # 作業ディレクトリ自体（source_dirの名前）は複製しない
+        _copy_inputs(parent, work_dir.parent, "../", output_patterns, copied, skip=(source_dir.name,))
+    return copied
+
+
+def _collect_outputs(
+    sandbox_root: Path,
+    work_dir: Path,
+    dest_dir: Path,
+    output_patterns: Sequence[str],
+    inputs: Set[Path] = frozenset()
+) -> Tuple[List[str], List[str]]:
+    """
+    サンドボックスで作成されたファイルのうちパターンに一致するものを持ち帰る
+    
+    パターンと結果は作業ディレクトリからの相対パス（"../figures/a.png"のように
+    作業ディレクトリの外も含む）。複製した入力ファイル（inputs）は対象にしない。
+    
+    Returns:
+        (持ち帰ったファイル, 作業ディレクトリの外に書かれて破棄したファイル)
+    """
+    copied, discarded = [], []
+    for dirpath, _, filenames in os.walk(sandbox_root):
+        for filename in sorted(filenames):
+            path = Path(dirpath) / filename
+            if path in inputs or path.is_symlink():
+                continue
+            rel_path = Path(os.path.relpath(path, work_dir)).as_posix()
+            if not _matches_output(rel_path, output_patterns):
+                if rel_path.startswith("../"):
+                    discarded.append(rel_path)
+                continue
+            target = Path(os.path.normpath(dest_dir / rel_path))
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(path, target)
+            copied.append(rel_path)
+    return sorted(copied), sorted(discarded)
+
+
+def run_sandboxed(
+    script_path: Path,
+    dest_dir: Optional[Path] = None,
+    limits: Optional[SandboxLimits] = None,
+    output_patterns: Optional[Sequence[str]] = None,
+    python: str = "python3"
+) -> ScriptRunResult:
+    """
+    スクリプトを資源制限付きで実行し、宣言された出力だけを持ち帰る
+    
+    スクリプトは専用の一時ディレクトリで実行する（元のディレクトリと親の
+    ディレクトリのファイルは複製を参照でき、書き込んでも元のファイルは
+    変わらない。出力のパターンに一致する既存のファイルは複製しない）。作業ディレクトリの
+    外（"../figures"など）に書き込まれたファイルもパターンに一致すれば持ち帰り、
+    一致しないものは破棄してdiscardedに記録する。メモリ（アドレス空間）と
+    CPU時間の上限はsetrlimitで、経過時間の上限はタイムアウトで制限する。
+    資源を制限するための仕組みであり、悪意のあるスクリプトの隔離は
+    目的としない。
+    
+    Args:
+        script_path: 実行するスクリプト
+        dest_dir: 出力のコピー先（Noneの場合はスクリプトのディレクトリ）
+        limits: 資源の上限
+        output_patterns: 持ち帰る出力のパターン（Noneの場合はスクリプトの宣言、
+            宣言もない場合はDEFAULT_OUTPUT_PATTERNS）
+        python: Pythonの実行ファイル
+    
+    Returns:
+        実行結果（CPU時間・最大RSSを含む）
+    """
+    limits = limits or SandboxLimits()
+    script_path = Path(script_path).resolve()
+    dest_dir = dest_dir or script_path.parent
+    result = ScriptRunResult(script=str(script_path), success=False)
+    
+    if not script_path.exists():
+        result.error = f"スクリプトファイルが存在しません: {script_path}"
+        return result
+    
+    declared = output_patterns is not None
+    if output_patterns is None:
+        output_patterns = read_output_declaration(script_path)
+        declared = output_patterns is not None
+        output_patterns = output_patterns or DEFAULT_OUTPUT_PATTERNS
+    
+    with tempfile.TemporaryDirectory(prefix="mdtopdf-figure-") as tmp:
+        # sandbox/parent/<スクリプトのディレクトリ名> を作業ディレクトリにする
+        # （"../../"より外への書き込みもsandboxの中に残るため検出できる）
+        sandbox_root = Path(tmp) / "sandbox"
+        work_dir = sandbox_root / "parent" / script_path.parent.name
+        work_dir.mkdir(parents=True)
+        tmp_dir = Path(tmp) / "tmp"
+        tmp_dir.mkdir()
+        inputs = _prepare_workdir(script_path.parent, work_dir, output_patterns)
+        
+        env = {key: os.environ[key] for key in INHERITED_ENVIRONMENT if key in os.environ}
+        env.update({"TMPDIR": str(tmp_dir), "MPLBACKEND": "Agg", "PYTHONDONTWRITEBYTECODE": "1"})
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(PACKAGE_PARENT), env.get("PYTHONPATH")]))
+        
+        stdout_file = Path(tmp) / "stdout.txt"
+        stderr_file = Path(tmp) / "stderr.txt"
+        start = time.monotonic()
+        try:
+            with open(stdout_file, 'wb') as stdout, open(stderr_file, 'wb') as stderr:
+                # 端末からのシグナルを親と分けるため新しいセッションにする
+                # （スレッドから起動するためpreexec_fnは使わない）
+                process = subprocess.Popen(
+                    _script_command(python, work_dir / script_path.name, limits),
+                    cwd=str(work_dir),
+                    env=env,
+                    stdin=subprocess.DEVNULL,
+                    stdout=stdout,
+                    stderr=stderr,
+                    start_new_session=os.name == "posix"
+                )
+        except FileNotFoundError:
+            result.error = f"{python}が見つかりません"
+            return result
+        if resource is not None and hasattr(resource, "prlimit"):
+            _apply_limits(process.pid, limits)
+        
+        returncode, usage = _wait_with_timeout(process, limits.timeout)
+        result.wall_time = time.monotonic() - start
+        stderr_text = stderr_file.read_text(encoding='utf-8', errors='replace')
+        
+        if returncode is None:
+            result.limit_exceeded = "timeout"
+            result.error = f"スクリプトの実行がタイムアウトしました（{limits.timeout:.0f}秒以上）"
+        else:
+            result.returncode = returncode
+            if usage is not None:
+                result.cpu_time = usage.ru_utime + usage.ru_stime
+                result.peak_rss_mb = _peak_rss_mb(usage.ru_maxrss)
+            if result.returncode == 0:
+                result.success = True
+            elif result.returncode in (-signal.SIGXCPU, -signal.SIGKILL) and result.cpu_time >= limits.cpu_seconds - 1:
+                result.limit_exceeded = "cpu"
+                result.error = f"CPU時間の上限（{limits.cpu_seconds}秒）を超えました"
+            elif "MemoryError" in stderr_text or "Cannot allocate memory" in stderr_text:
+                result.limit_exceeded = "memory"
+                result.error = f"メモリの上限（{limits.memory_mb}MB）を超えました"
+            else:
+                result.error = stderr_text or "スクリプトの実行に失敗しました"
+        
+        if result.success:
+            result.outputs, result.discarded = _collect_outputs(
+                sandbox_root, work_dir, dest_dir, output_patterns, inputs
+            )
+            if declared:
+                result.missing_outputs = [
+                    pattern for pattern in output_patterns
+                    if not any(fnmatch.fnmatch(output, pattern) for output in result.outputs)
+                ]
+    
+    return result
+
+
+def _wait_with_timeout(process: subprocess.Popen, timeout: float):
+    """
+    子プロセスの終了を待ち、資源の使用量を取得
+    
+    Returns:
+        (終了コード, rusage)、タイムアウトした場合は (None, None)
+        （wait4のない環境ではrusageはNone）
+    """
+    if not hasattr(os, "wait4"):
+        try:
+            return process.wait(timeout=timeout), None
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            return None, None
+    
+    deadline = time.monotonic() + timeout
+    interval = 0.01
+    while True:
+        pid, status, usage = os.wait4(process.pid, os.WNOHANG)
+        if pid != 0:
+            # Popenにも終了を伝える（二重のwaitを防ぐ）
+            process.returncode = _exit_code(status)
+            return process.returncode, usage
+        if time.monotonic() > deadline:
+            _kill_group(process)
+            os.wait4(process.pid, 0)
+            process.returncode = -signal.SIGKILL
+            return None, None
+        time.sleep(interval)
+        interval = min(interval * 2, 0.2)
+
+
+def _kill_group(process: subprocess.Popen) -> None:
+    """スクリプトと、スクリプトが起動した子プロセスを終了"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        process.kill()
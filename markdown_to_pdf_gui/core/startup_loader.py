@@ -0,0 +1,34 @@
+"""起動時の遅延処理: 環境チェックと履歴読み込みをバックグラウンドで実行"""
+
+from typing import Optional
+from PyQt6.QtCore import QThread, pyqtSignal
+from .environment_checker import EnvironmentChecker
+from .history_manager import HistoryManager
+
+
+class StartupLoader(QThread):
+    """ウィンドウ表示後に重い初期化処理を実行するQThread"""
+    
+    # シグナル定義
+    environment_checked = pyqtSignal(bool, list, list, str)  # 成功/失敗, エラー, 警告, インストール方法
+    history_loaded = pyqtSignal()
+    
+    def __init__(
+        self,
+        history_manager: Optional[HistoryManager] = None,
+        force_environment_check: bool = False
+    ):
+        super().__init__()
+        self.history_manager = history_manager
+        self.force_environment_check = force_environment_check
+    
+    def run(self) -> None:
+        """環境チェック（前回結果を再利用）と履歴の先読みを実行"""
+        checker = EnvironmentChecker()
+        success, errors, warnings = checker.check_all_cached(force=self.force_environment_check)
+        instructions = "" if success else checker.get_installation_instructions()
+        self.environment_checked.emit(success, list(errors), list(warnings), instructions)
+        
+        if self.history_manager is not None:
+            self.history_manager.ensure_loaded()
+            self.history_loaded.emit()
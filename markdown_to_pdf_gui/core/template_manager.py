@@ -1,15 +1,30 @@
 """テンプレート管理: 自動検出、優先順位実装"""
 
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 import re
+from .path_index import PathIndex
 
 
 class TemplateManager:
     """テンプレートを管理するクラス"""
     
-    def __init__(self):
+    def __init__(self, path_index: Optional[PathIndex] = None):
+        """
+        テンプレートマネージャーを初期化
+        
+        Args:
+            path_index: 共有するパスインデックス（Noneの場合は専用のものを作成）
+        """
+        self.path_index = path_index or PathIndex()
         self.default_template_dir = Path(__file__).parent.parent / "templates"
+        # (ディレクトリ, ユーザーテンプレート, ユーザーヘッダー) → 検出結果
+        # パスインデックスの世代が変わるまで有効
+        self._resolution_cache: Dict[
+            Tuple[Path, Optional[Path], Optional[Path]],
+            Tuple[Optional[Path], Optional[Path]]
+        ] = {}
+        self._cache_generation = self.path_index.generation
     
     def find_templates(
         self,
@@ -28,18 +43,36 @@ class TemplateManager:
         Returns:
             (テンプレートパス, ヘッダーパス)
         """
+        # 検出結果はディレクトリ単位でメモ化（バッチ内の同一ディレクトリは再検索しない）
+        if self._cache_generation != self.path_index.generation:
+            self._resolution_cache.clear()
+            self._cache_generation = self.path_index.generation
+        
+        cache_key = (md_file.parent, user_template, user_header)
+        if cache_key not in self._resolution_cache:
+            self._resolution_cache[cache_key] = self._resolve_templates(
+                md_file.parent, user_template, user_header
+            )
+        return self._resolution_cache[cache_key]
+    
+    def _resolve_templates(
+        self,
+        md_dir: Path,
+        user_template: Optional[Path],
+        user_header: Optional[Path]
+    ) -> Tuple[Optional[Path], Optional[Path]]:
+        """テンプレートとヘッダーファイルを優先順位に従って検索"""
         template_path = None
         header_path = None
         
         # 1. ユーザー指定を最優先
-        if user_template and user_template.exists():
+        if user_template and self.path_index.exists(user_template):
             template_path = user_template
         
-        if user_header and user_header.exists():
+        if user_header and self.path_index.exists(user_header):
             header_path = user_header
         
         # 2. 同一ディレクトリを検索
-        md_dir = md_file.parent
         if template_path is None:
             template_path = self._find_in_directory(md_dir, ['pandoc_template.tex'])
         
@@ -52,7 +85,7 @@ class TemplateManager:
         # 3. 親ディレクトリのtemplates/フォルダ
         if template_path is None:
             parent_templates = md_dir.parent / "templates"
-            if parent_templates.exists():
+            if self.path_index.is_dir(parent_templates):
                 template_path = self._find_in_directory(
                     parent_templates,
                     ['pandoc_template.tex', 'template.tex']
@@ -60,7 +93,7 @@ class TemplateManager:
         
         if header_path is None:
             parent_templates = md_dir.parent / "templates"
-            if parent_templates.exists():
+            if self.path_index.is_dir(parent_templates):
                 header_path = self._find_in_directory(
                     parent_templates,
                     ['pandoc_header.tex', 'latex_header.tex', 'header.tex']
@@ -69,23 +102,19 @@ class TemplateManager:
         # 4. デフォルトテンプレート
         if template_path is None:
             default_template = self.default_template_dir / "default_template.tex"
-            if default_template.exists():
+            if self.path_index.exists(default_template):
                 template_path = default_template
         
         if header_path is None:
             default_header = self.default_template_dir / "default_header.tex"
-            if default_header.exists():
+            if self.path_index.exists(default_header):
                 header_path = default_header
         
         return template_path, header_path
     
     def _find_in_directory(self, directory: Path, filenames: List[str]) -> Optional[Path]:
         """ディレクトリ内でファイルを検索"""
-        for filename in filenames:
-            file_path = directory / filename
-            if file_path.exists():
-                return file_path
-        return None
+        return self.path_index.find_first(directory / filename for filename in filenames)
     
     def validate_template(self, template_path: Path) -> Tuple[bool, List[str]]:
         """
@@ -5,23 +5,25 @@ from PyQt6.QtWidgets import (
     QPushButton, QLabel, QProgressBar, QTextEdit, QListWidget,
     QMessageBox, QFileDialog, QMenuBar, QMenu
 )
-from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QShortcut, QKeySequence, QAction
-from PyQt6.QtGui import QDragEnterEvent, QDropEvent
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QThread, QUrl
+from PyQt6.QtGui import QShortcut, QKeySequence, QAction, QDesktopServices
+from PyQt6.QtGui import QDragEnterEvent, QDropEvent, QCloseEvent
+from functools import cached_property
 from pathlib import Path
-from typing import List, Optional
-from ..core.environment_checker import EnvironmentChecker
-from ..core.converter_thread import ConverterThread
+from typing import TYPE_CHECKING, Dict, List, Optional
 from ..core.error_handler import ErrorHandler
 from ..core.config_manager import ConfigManager
 from ..core.template_manager import TemplateManager
+from ..core.path_index import PathIndex
+from ..core.startup_loader import StartupLoader
 from ..utils.logger import StructuredLogger
-from .settings_dialog import SettingsDialog
-from .profile_dialog import ProfileDialog
-from .history_dialog import HistoryDialog
-from .log_viewer import LogViewer
 from ..core.history_manager import HistoryManager
 
+if TYPE_CHECKING:
+    # 変換エンジン（pypdf等を含む）は最初の変換開始時に読み込む
+    from ..core.converter_thread import ConverterThread
+    from ..core.job_queue import JobQueue
+
 
 class MainWindow(QMainWindow):
     """メインウィンドウクラス"""
@@ -31,20 +33,20 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("Markdown to PDF Converter")
         self.setMinimumSize(800, 600)
         
-        # コンポーネントの初期化
-        self.logger = StructuredLogger()
+        # コンポーネントの初期化（ロガー・設定・テンプレート・履歴は初回使用時に構築）
         self.error_handler = ErrorHandler()
-        self.config_manager = ConfigManager()
-        self.template_manager = TemplateManager()
-        self.history_manager = HistoryManager()
-        self.converter_thread: Optional[ConverterThread] = None
+        self.path_index = PathIndex()
+        self.converter_thread: Optional["ConverterThread"] = None
+        # プレビュー後にバックグラウンドで最終版を作成するスレッド
+        self.final_thread: Optional["ConverterThread"] = None
+        # 変換中のバッチとは別に作成するプレビュー（バッチより優先して変換）
+        self.preview_thread: Optional["ConverterThread"] = None
+        # 前回の起動時に中断されたバッチ（順に再開）
+        self.pending_batches: List[str] = []
+        self.startup_loader: Optional[StartupLoader] = None
         self.selected_files: List[Path] = []
-        
-        # 設定の読み込み
-        self.config_manager.load_config()
-        
-        # 環境チェック
-        self.check_environment()
+        # 図生成スクリプトの実行結果（履歴に記録するまで保持）
+        self.figure_runs: Dict[str, List[Dict]] = {}
         
         # UIの構築
         self.setup_ui()
@@ -54,6 +56,39 @@ class MainWindow(QMainWindow):
         
         # キーボードショートカットの設定
         self.setup_shortcuts()
+        
+        # 環境チェックと履歴の読み込みはウィンドウ表示後にバックグラウンドで実行
+        QTimer.singleShot(0, self.start_startup_tasks)
+    
+    @cached_property
+    def logger(self) -> StructuredLogger:
+        """構造化ロガー（初回使用時に構築）"""
+        return StructuredLogger()
+    
+    @cached_property
+    def config_manager(self) -> ConfigManager:
+        """設定マネージャー（初回使用時に構築し、設定を読み込む）"""
+        config_manager = ConfigManager()
+        config_manager.load_config()
+        return config_manager
+    
+    @cached_property
+    def template_manager(self) -> TemplateManager:
+        """テンプレートマネージャー（初回使用時に構築）"""
+        return TemplateManager(self.path_index)
+    
+    @cached_property
+    def history_manager(self) -> HistoryManager:
+        """履歴マネージャー（履歴ファイルはバックグラウンドで先読み）"""
+        return HistoryManager(lazy=True)
+    
+    @cached_property
+    def job_queue(self) -> "JobQueue":
+        """変換ジョブキュー（アプリの再起動後も中断したバッチを保持）"""
+        from ..core.job_queue import JobQueue
+        queue_path = Path.home() / "Library" / "Application Support" / "MarkdownToPDF" / "conversion_queue.db"
+        # 終了したインスタンスが変換中だったジョブは起動時にrequeue_runningで回収するため、期限切れによる再投入は行わない
+        return JobQueue(queue_path, lease_timeout=float("inf"))
     
     def setup_shortcuts(self) -> None:
         """キーボードショートカットを設定"""
@@ -66,22 +101,93 @@ class MainWindow(QMainWindow):
         # Cmd+R: 変換開始
         QShortcut(QKeySequence("Ctrl+R"), self, self.start_conversion)
         
+        # Cmd+P: プレビュー
+        QShortcut(QKeySequence("Ctrl+P"), self, self.start_preview)
+        
         # Cmd+H: 履歴
         QShortcut(QKeySequence("Ctrl+H"), self, self.show_history)
     
+    def start_startup_tasks(self) -> None:
+        """起動時の環境チェック（前回結果を再利用）と履歴の先読みを開始"""
+        self._run_startup_loader(self.history_manager, force_environment_check=False)
+        self.resume_interrupted_batches()
+    
+    def resume_interrupted_batches(self) -> None:
+        """前回の終了時に完了していなかったバッチを残りのファイルから再開"""
+        try:
+            self.job_queue.requeue_running()
+            self.pending_batches = self.job_queue.unfinished_batches()
+        except Exception as e:
+            self.log_message(f"変換キューを読み込めませんでした: {str(e)}")
+            return
+        if self.pending_batches:
+            self.log_message(f"中断された変換が{len(self.pending_batches)}件あります。再開します")
+            self._resume_next_batch()
+    
+    def _resume_next_batch(self) -> None:
+        """中断されたバッチを1件再開"""
+        if self.converter_thread and self.converter_thread.isRunning():
+            return
+        while self.pending_batches:
+            batch_id = self.pending_batches.pop(0)
+            if not self.job_queue.get_batch(batch_id):
+                continue
+            from ..core.converter_thread import ConverterThread
+            thread = ConverterThread.resume(
+                self.job_queue, batch_id, logger=self.logger, path_index=self._path_index_for_new_batch()
+            )
+            # 再開したプレビューは開かない（最終版はバッチのファイルから作成）
+            self._start_converter_thread(thread, open_previews=False)
+            self.log_message(f"中断された変換を再開しました（{len(thread.md_files)}ファイル）")
+            return
+    
     def check_environment(self) -> None:
-        """環境チェックを実行"""
-        checker = EnvironmentChecker()
-        success, errors, warnings = checker.check_all()
+        """環境チェックを実行（キャッシュを使わずにバックグラウンドで再チェック）"""
+        self._run_startup_loader(None, force_environment_check=True)
+    
+    def _run_startup_loader(
+        self,
+        history_manager: Optional[HistoryManager],
+        force_environment_check: bool
+    ) -> None:
+        """StartupLoaderを起動"""
+        if self.startup_loader and self.startup_loader.isRunning():
+            return
         
+        self.startup_loader = StartupLoader(history_manager, force_environment_check)
+        self.startup_loader.environment_checked.connect(self.on_environment_checked)
+        self.startup_loader.start()
+    
+    def on_environment_checked(
+        self,
+        success: bool,
+        errors: List[str],
+        warnings: List[str],
+        instructions: str
+    ) -> None:
+        """環境チェック完了"""
         if not success:
             msg = "環境チェックに失敗しました:\n\n" + "\n".join(errors)
             if warnings:
                 msg += "\n\n警告:\n" + "\n".join(warnings)
-            msg += "\n\n" + checker.get_installation_instructions()
+            msg += "\n\n" + instructions
             
             QMessageBox.critical(self, "環境エラー", msg)
     
+    def closeEvent(self, event: QCloseEvent) -> None:
+        """ウィンドウを閉じる前にバックグラウンド処理の終了を待つ"""
+        if self.startup_loader and self.startup_loader.isRunning():
+            self.startup_loader.wait()
+        # 変換中のバッチは中断し、次回の起動時に残りのファイルから再開する
+        for thread in (self.preview_thread, self.converter_thread, self.final_thread):
+            if thread is not None and thread.isRunning():
+                if hasattr(thread, "suspend"):
+                    thread.suspend()
+                else:
+                    thread.cancel()
+                thread.wait()
+        super().closeEvent(event)
+    
     def setup_ui(self) -> None:
         """UIを構築"""
         central_widget = QWidget()
@@ -197,6 +303,11 @@ class MainWindow(QMainWindow):
         self.convert_button.setEnabled(False)
         layout.addWidget(self.convert_button)
         
+        self.preview_button = QPushButton("プレビュー")
+        self.preview_button.clicked.connect(self.start_preview)
+        self.preview_button.setEnabled(False)
+        layout.addWidget(self.preview_button)
+        
         self.cancel_button = QPushButton("キャンセル")
         self.cancel_button.clicked.connect(self.cancel_conversion)
         self.cancel_button.setEnabled(False)
@@ -286,51 +397,199 @@ class MainWindow(QMainWindow):
                 self.file_list.addItem(str(file_path))
         
         self.convert_button.setEnabled(len(self.selected_files) > 0)
+        self.preview_button.setEnabled(len(self.selected_files) > 0)
         self.log_message(f"{len(files)}個のファイルを追加しました")
     
     def start_conversion(self) -> None:
         """変換を開始"""
+        self._start_conversion("final")
+    
+    def start_preview(self) -> None:
+        """プレビュー（目次なし・画像は枠のみ・エンジン1回）を作成し、完了後に最終版を作成"""
+        self._start_conversion("preview")
+    
+    def _start_conversion(self, mode: str) -> None:
+        """指定したモードで変換を開始"""
         if not self.selected_files:
             QMessageBox.warning(self, "警告", "変換するファイルを選択してください")
             return
         
-        # ボタンの状態を更新
+        # バックグラウンドの最終版作成は中断（新しい内容で作り直す）
+        self._cancel_final_pass()
+        
+        # 変換中のバッチがある場合、プレビューは優先度を上げて別に作成（バッチは一時停止）
+        if mode == "preview" and self.converter_thread and self.converter_thread.isRunning():
+            self._start_interactive_preview()
+            return
+        
+        self.log_text.clear()
+        self._start_converter_thread(self._create_converter_thread(mode))
+        if mode == "preview":
+            self.log_message("プレビューを作成しています...")
+        else:
+            self.log_message("変換を開始しました...")
+    
+    def _start_converter_thread(self, thread: "ConverterThread", open_previews: bool = True) -> None:
+        """
+        変換スレッドを開始し、完了までボタンを無効にする
+        
+        Args:
+            thread: 変換スレッド
+            open_previews: 作成したプレビューを開くか
+        """
+        # ボタンの状態を更新（バッチの変換中もプレビューは作成できる）
         self.convert_button.setEnabled(False)
+        self.preview_button.setEnabled(thread.mode != "preview" and bool(self.selected_files))
         self.cancel_button.setEnabled(True)
         self.select_button.setEnabled(False)
         
         # 進捗バーをリセット
         self.progress_bar.setValue(0)
-        self.log_text.clear()
+        
+        self.converter_thread = thread
+        
+        # シグナル接続
+        self.converter_thread.progress_updated.connect(self.on_progress_updated)
+        self.converter_thread.file_completed.connect(self.on_file_completed)
+        self.converter_thread.error_occurred.connect(self.on_error_occurred)
+        if open_previews:
+            self.converter_thread.preview_ready.connect(self.on_preview_ready)
+        self.converter_thread.figures_executed.connect(self.on_figures_executed)
+        self.converter_thread.finished.connect(self.on_conversion_finished)
+        
+        # 変換開始
+        self.converter_thread.start()
+    
+    def _start_interactive_preview(self) -> None:
+        """変換中のバッチより優先してプレビューを作成"""
+        if self.preview_thread and self.preview_thread.isRunning():
+            self.preview_thread.cancel()
+            self.preview_thread.wait()
+        self.preview_thread = self._create_converter_thread("preview")
+        self.preview_thread.progress_updated.connect(self.on_progress_updated)
+        self.preview_thread.file_completed.connect(self.on_file_completed)
+        self.preview_thread.error_occurred.connect(self.on_error_occurred)
+        self.preview_thread.preview_ready.connect(self.on_preview_ready)
+        self.preview_thread.finished.connect(self.on_interactive_preview_finished)
+        self.preview_thread.start(QThread.Priority.HighPriority)
+        self.log_message("プレビューを作成しています（変換中のバッチは一時停止します）...")
+    
+    def _create_converter_thread(
+        self,
+        mode: str,
+        priority: Optional[int] = None,
+        md_files: Optional[List[Path]] = None
+    ) -> "ConverterThread":
+        """
+        変換スレッドを作成
+        
+        Args:
+            mode: 変換モード
+            priority: ジョブキューの優先度（Noneの場合はプレビューを優先、それ以外はバッチ）
+            md_files: 変換するファイル（Noneの場合は選択ファイル）
+        """
+        md_files = list(self.selected_files if md_files is None else md_files)
+        path_index = self._path_index_for_new_batch()
+        template_manager = self.template_manager if path_index is self.path_index else TemplateManager(path_index)
         
         # テンプレートの検出（最初のファイルから）
         template_path, header_path = None, None
-        if self.selected_files:
-            template_path, header_path = self.template_manager.find_templates(
-                self.selected_files[0]
-            )
+        if md_files:
+            template_path, header_path = template_manager.find_templates(md_files[0])
         
         # 設定を取得
         config = self.config_manager.get_config()
         
+        # 分散変換（プレビューは応答性のため常にローカルで変換）
+        distributed = config.get("distributed") or {}
+        if mode != "preview" and distributed.get("enabled") and distributed.get("queue_path"):
+            from ..core.distributed_thread import DistributedConverterThread
+            return DistributedConverterThread(
+                md_files,
+                Path(distributed["queue_path"]),
+                config=config,
+                template_path=template_path,
+                header_path=header_path,
+                logger=self.logger,
+                mode=mode,
+                poll_interval=distributed.get("poll_interval", 1.0),
+                bundle_assets=distributed.get("bundle_assets", True)
+            )
+        
         # 変換スレッドを作成
-        self.converter_thread = ConverterThread(
-            self.selected_files,
+        from ..core.converter_thread import ConverterThread
+        from ..core.job_queue import PRIORITY_BATCH, PRIORITY_INTERACTIVE
+        if priority is None:
+            priority = PRIORITY_INTERACTIVE if mode == "preview" else PRIORITY_BATCH
+        return ConverterThread(
+            md_files,
             config=config,
             template_path=template_path,
             header_path=header_path,
-            logger=self.logger
+            logger=self.logger,
+            path_index=path_index,
+            mode=mode,
+            job_queue=self.job_queue,
+            priority=priority
         )
-        
-        # シグナル接続
-        self.converter_thread.progress_updated.connect(self.on_progress_updated)
-        self.converter_thread.file_completed.connect(self.on_file_completed)
-        self.converter_thread.error_occurred.connect(self.on_error_occurred)
-        self.converter_thread.finished.connect(self.on_conversion_finished)
-        
-        # 変換開始
-        self.converter_thread.start()
-        self.log_message("変換を開始しました...")
+    
+    def _path_index_for_new_batch(self) -> PathIndex:
+        """
+        新しい変換スレッドのパスインデックス
+        
+        共有のインデックスを使うスレッドが実行中の場合は、そのバッチの
+        スナップショットを無効にしないよう専用のインデックスを作成する。
+        それ以外は共有のインデックスで新しいバッチを開始する。
+        """
+        in_use = any(
+            thread is not None and thread.isRunning() and getattr(thread, "path_index", None) is self.path_index
+            for thread in (self.converter_thread, self.preview_thread, self.final_thread)
+        )
+        if in_use:
+            return PathIndex()
+        self.path_index.begin_batch()
+        return self.path_index
+    
+    def start_final_pass(self, md_files: List[Path]) -> None:
+        """
+        最終版のPDFをバックグラウンドで作成
+        
+        Args:
+            md_files: プレビューを作成したファイル
+        """
+        from ..core.job_queue import PRIORITY_BACKGROUND
+        self._cancel_final_pass()
+        self.final_thread = self._create_converter_thread("final", PRIORITY_BACKGROUND, md_files)
+        self.final_thread.file_completed.connect(self.on_file_completed)
+        self.final_thread.error_occurred.connect(self.on_error_occurred)
+        self.final_thread.figures_executed.connect(self.on_figures_executed)
+        self.final_thread.finished.connect(self.on_final_pass_finished)
+        self.final_thread.start(QThread.Priority.LowPriority)
+        self.log_message("最終版のPDFをバックグラウンドで作成しています...")
+    
+    def _cancel_final_pass(self) -> None:
+        """バックグラウンドの最終版作成を中断"""
+        if self.final_thread and self.final_thread.isRunning():
+            self.final_thread.finished.disconnect(self.on_final_pass_finished)
+            self.final_thread.cancel()
+            self.final_thread.wait()
+        self.final_thread = None
+    
+    def on_final_pass_finished(self) -> None:
+        """最終版の作成完了"""
+        self.log_message("最終版のPDFの作成が完了しました")
+    
+    def on_interactive_preview_finished(self) -> None:
+        """バッチと並行して作成したプレビューが完了したら最終版をバックグラウンドで作成"""
+        thread = self.sender()
+        # 作り直しのためにキャンセルした古いプレビューでは作成しない
+        if (thread is self.preview_thread and thread.state.value == "completed"
+                and not thread.isInterruptionRequested()):
+            self.start_final_pass(thread.md_files)
+    
+    def on_preview_ready(self, preview_path: str) -> None:
+        """プレビューを既定のアプリケーションで開く"""
+        QDesktopServices.openUrl(QUrl.fromLocalFile(preview_path))
     
     def cancel_conversion(self) -> None:
         """変換をキャンセル"""
@@ -345,10 +604,26 @@ class MainWindow(QMainWindow):
         self.progress_bar.setValue(progress)
         self.log_message(message)
     
+    def on_figures_executed(self, file_path: str, runs: List[Dict]) -> None:
+        """図生成スクリプトの実行結果を表示し、履歴用に保持"""
+        for run in runs:
+            name = Path(run["script"]).name
+            usage = f"CPU {run['cpu_time']:.1f}秒, 最大メモリ {run['peak_rss_mb']:.0f}MB"
+            if run["success"]:
+                self.log_message(f"図生成: {name} ({usage}, 出力{len(run['outputs'])}件)")
+            else:
+                self.log_message(f"図生成エラー: {name}: {run['error'].strip()} ({usage})")
+        self.figure_runs[file_path] = runs
+    
     def on_file_completed(self, file_path: str, success: bool, message: str) -> None:
         """ファイル変換完了"""
         status = "✓" if success else "✗"
         self.log_message(f"{status} {Path(file_path).name}: {message}")
+        figure_runs = self.figure_runs.pop(file_path, None)
+        
+        # プレビューは履歴に記録しない
+        if getattr(self.sender(), "mode", "final") == "preview":
+            return
         
         # 履歴に記録（変換時間はメッセージから抽出を試みる）
         md_file = Path(file_path)
@@ -366,7 +641,8 @@ class MainWindow(QMainWindow):
         
         self.history_manager.add_history(
             md_file, pdf_file, success, duration,
-            profile_name, error_type, error_message
+            profile_name, error_type, error_message,
+            figure_runs=figure_runs
         )
     
     def on_error_occurred(self, error_type: str, category: str, message: str) -> None:
@@ -378,10 +654,19 @@ class MainWindow(QMainWindow):
     def on_conversion_finished(self) -> None:
         """変換完了"""
         self.convert_button.setEnabled(True)
+        self.preview_button.setEnabled(True)
         self.cancel_button.setEnabled(False)
         self.select_button.setEnabled(True)
         self.progress_bar.setValue(100)
         self.log_message("すべての変換が完了しました")
+        
+        # プレビューが完了したら最終版をバックグラウンドで作成
+        thread = self.converter_thread
+        if (thread is not None and thread.mode == "preview"
+                and thread.state.value == "completed" and not thread.isInterruptionRequested()):
+            self.start_final_pass(thread.md_files)
+        elif self.pending_batches:
+            self._resume_next_batch()
     
     def log_message(self, message: str) -> None:
         """ログメッセージを追加"""
@@ -392,6 +677,7 @@ class MainWindow(QMainWindow):
     
     def show_settings(self) -> None:
         """設定ダイアログを表示"""
+        from .settings_dialog import SettingsDialog
         dialog = SettingsDialog(self.config_manager, self)
         if dialog.exec():
             # 設定が保存された場合、再読み込み
@@ -399,16 +685,19 @@ class MainWindow(QMainWindow):
     
     def show_profile_dialog(self) -> None:
         """プロファイル管理ダイアログを表示"""
+        from .profile_dialog import ProfileDialog
         dialog = ProfileDialog(self.config_manager, self)
         dialog.exec()
     
     def show_history(self) -> None:
         """変換履歴ダイアログを表示"""
+        from .history_dialog import HistoryDialog
         dialog = HistoryDialog(self.history_manager, self)
         dialog.exec()
     
     def show_log_viewer(self) -> None:
         """ログビューアーを表示"""
+        from .log_viewer import LogViewer
         log_dir = Path.home() / "Library" / "Application Support" / "MarkdownToPDF" / "logs"
         log_dir.mkdir(parents=True, exist_ok=True)
         dialog = LogViewer(log_dir, self)
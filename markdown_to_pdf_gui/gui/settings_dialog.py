@@ -70,6 +70,11 @@ class SettingsDialog(QDialog):
         self.linkcolor_edit = QLineEdit()
         form_layout.addRow("リンク色:", self.linkcolor_edit)
         
+        # プレビューの出力形式
+        self.preview_format_combo = QComboBox()
+        self.preview_format_combo.addItems(["pdf", "html"])
+        form_layout.addRow("プレビュー形式:", self.preview_format_combo)
+        
         layout.addLayout(form_layout)
         
         # ボタン
@@ -112,6 +117,9 @@ class SettingsDialog(QDialog):
         self.number_sections_checkbox.setChecked(config.get("number_sections", False))
         self.colorlinks_checkbox.setChecked(config.get("colorlinks", True))
         self.linkcolor_edit.setText(config.get("linkcolor", "blue"))
+        self.preview_format_combo.setCurrentText(
+            self.config_manager.get_preview_profile().get("output_format", "pdf")
+        )
     
     def save_settings(self) -> None:
         """設定を保存"""
@@ -128,6 +136,10 @@ class SettingsDialog(QDialog):
             "linkcolor": self.linkcolor_edit.text(),
         }
         
+        preview = self.config_manager.get_preview_profile()
+        preview["output_format"] = self.preview_format_combo.currentText()
+        updates["preview"] = preview
+        
         if self.config_manager.update_config(updates):
             if self.config_manager.save_config():
                 QMessageBox.information(self, "設定", "設定を保存しました")
@@ -12,7 +12,12 @@ setup(
     description="マークダウンファイルをPDFに変換するためのGUI管理ツール",
     long_description=long_description,
     long_description_content_type="text/markdown",
-    packages=find_packages(),
+    # このディレクトリ自体がmarkdown_to_pdf_guiパッケージ（図生成スクリプトから
+    # markdown_to_pdf_gui.core.font_cacheとしてインポートできるようにする）
+    package_dir={"markdown_to_pdf_gui": "."},
+    packages=["markdown_to_pdf_gui"] + [
+        f"markdown_to_pdf_gui.{name}" for name in find_packages(exclude=["tests", "tests.*", "benchmarks*"])
+    ],
     install_requires=[
         "PyQt6>=6.6.0",
         "pyyaml>=6.0",
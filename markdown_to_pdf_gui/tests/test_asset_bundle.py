@@ -0,0 +1,94 @@
+"""アセットバンドルのテスト"""
+
+import pytest
+from pathlib import Path
+from core.asset_bundle import BlobStore, BundleManifest, build_bundle
+
+
+def make_document(tmp_path):
+    """画像を参照するマークダウンを作成"""
+    doc_dir = tmp_path / "project" / "chapter1"
+    figures = tmp_path / "project" / "figures"
+    doc_dir.mkdir(parents=True)
+    figures.mkdir(parents=True)
+    (doc_dir / "local.png").write_bytes(b"local image")
+    (figures / "shared.png").write_bytes(b"shared image")
+    outside = tmp_path / "elsewhere" / "abs.png"
+    outside.parent.mkdir()
+    outside.write_bytes(b"absolute image")
+    
+    md_file = doc_dir / "doc.md"
+    md_file.write_text(
+        "# Doc\n\n![a](local.png)\n![b](../figures/shared.png)\n![c](" + str(outside) + ")\n",
+        encoding="utf-8"
+    )
+    images = [doc_dir / "local.png", figures / "shared.png", outside]
+    return md_file, images
+
+
+class TestAssetBundle:
+    """バンドルのテスト"""
+    
+    def test_build_keeps_relative_layout(self, tmp_path):
+        """相対参照の配置を保ち、絶対パスの参照は書き換える"""
+        md_file, images = make_document(tmp_path)
+        template = tmp_path / "template.tex"
+        template.write_text("$body$")
+        store = BlobStore(tmp_path / "store")
+        
+        manifest = build_bundle(md_file, images, store, template_path=template)
+        bundle = store.materialize(manifest, tmp_path / "out")
+        
+        assert manifest.markdown == "chapter1/doc.md"
+        assert (bundle.md_file.parent / "local.png").read_bytes() == b"local image"
+        assert (bundle.md_file.parent / "../figures/shared.png").read_bytes() == b"shared image"
+        assert bundle.template_path.read_text() == "$body$"
+        
+        text = bundle.md_file.read_text(encoding="utf-8")
+        assert str(images[2]) not in text
+        external = [line for line in text.splitlines() if line.startswith("![c]")][0]
+        reference = external[len("![c]("):-1]
+        assert (bundle.md_file.parent / reference).read_bytes() == b"absolute image"
+    
+    def test_manifest_roundtrip_and_digest(self, tmp_path):
+        """マニフェストは辞書を経由しても同じダイジェスト"""
+        md_file, images = make_document(tmp_path)
+        store = BlobStore(tmp_path / "store")
+        
+        manifest = build_bundle(md_file, images, store)
+        restored = BundleManifest.from_dict(manifest.to_dict())
+        
+        assert restored.digest == manifest.digest
+        assert build_bundle(md_file, images, store).digest == manifest.digest
+        md_file.write_text("# Changed\n", encoding="utf-8")
+        assert build_bundle(md_file, images, store).digest != manifest.digest
+    
+    def test_transfer_only_missing_blobs(self, tmp_path):
+        """相手が保持しているblobは転送しない"""
+        md_file, images = make_document(tmp_path)
+        source = BlobStore(tmp_path / "source")
+        worker = BlobStore(tmp_path / "worker")
+        manifest = build_bundle(md_file, images, source)
+        
+        assert len(source.transfer_to(worker, manifest.blobs)) == 4
+        assert source.transfer_to(worker, manifest.blobs) == []
+        
+        # 本文だけを変更した場合は本文のblobだけを転送
+        md_file.write_text(md_file.read_text(encoding="utf-8") + "\nmore\n", encoding="utf-8")
+        manifest = build_bundle(md_file, images, source)
+        assert len(source.transfer_to(worker, manifest.blobs)) == 1
+        assert worker.missing(manifest.blobs) == []
+    
+    def test_header_with_input_is_rejected(self, tmp_path):
+        """別のファイルを読み込むヘッダーはバンドルにしない"""
+        md_file, images = make_document(tmp_path)
+        store = BlobStore(tmp_path / "store")
+        header = tmp_path / "header.tex"
+        header.write_text("\\usepackage{amsmath}\n% \\input{old}\n50\\% off\n", encoding="utf-8")
+        
+        manifest = build_bundle(md_file, images, store, header_path=header)
+        assert manifest.header == "_header/header.tex"
+        
+        header.write_text("\\usepackage{amsmath}\n\\input{macros}\n", encoding="utf-8")
+        with pytest.raises(ValueError, match="input"):
+            build_bundle(md_file, images, store, header_path=header)
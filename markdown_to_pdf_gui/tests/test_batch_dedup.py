@@ -0,0 +1,74 @@
+"""BatchDeduplicatorのテスト"""
+
+from pathlib import Path
+from core.batch_dedup import BatchDeduplicator
+
+
+def make_job(directory: Path, name: str, text: str = "# Doc\n\n![](fig.png)\n") -> Path:
+    """画像を参照するマークダウンを作成"""
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / "fig.png").write_bytes(b"image")
+    md_file = directory / f"{name}.md"
+    md_file.write_text(text, encoding="utf-8")
+    return md_file
+
+
+class TestBatchDeduplicator:
+    """重複排除のテスト"""
+    
+    def test_identical_inputs_share_fingerprint(self, tmp_path):
+        """内容が同じジョブは名前や場所が違っても同じ指紋"""
+        dedup = BatchDeduplicator()
+        first = make_job(tmp_path / "a", "report")
+        second = make_job(tmp_path / "b", "copy")
+        
+        fp1 = dedup.fingerprint(first, [first.parent / "fig.png"], "recipe")
+        fp2 = dedup.fingerprint(second, [second.parent / "fig.png"], "recipe")
+        
+        assert fp1 == fp2
+        assert dedup.fingerprint(first, [first.parent / "fig.png"], "other") != fp1
+        assert dedup.fingerprint(first, [first.parent / "fig.png"], "recipe", "report") != fp1
+    
+    def test_changed_image_changes_fingerprint(self, tmp_path):
+        """参照する画像の内容が違えば別のジョブ"""
+        dedup = BatchDeduplicator()
+        first = make_job(tmp_path / "a", "report")
+        second = make_job(tmp_path / "b", "report")
+        (second.parent / "fig.png").write_bytes(b"other image")
+        
+        assert dedup.fingerprint(first, [first.parent / "fig.png"], "r") != \
+            dedup.fingerprint(second, [second.parent / "fig.png"], "r")
+        assert dedup.fingerprint(first, [tmp_path / "missing.png"], "r") is None
+    
+    def test_fan_out(self, tmp_path):
+        """変換済みの出力を別の出力先にコピー"""
+        dedup = BatchDeduplicator()
+        md_file = make_job(tmp_path / "a", "report")
+        output = tmp_path / "a" / "report.pdf"
+        output.write_bytes(b"%PDF")
+        fingerprint = dedup.fingerprint(md_file, [], "r")
+        
+        assert dedup.lookup(fingerprint) is None
+        dedup.record(fingerprint, md_file, output)
+        assert dedup.lookup(fingerprint) == (md_file, output)
+        
+        copied = dedup.fan_out(fingerprint, tmp_path / "out" / "copy.pdf")
+        assert copied.read_bytes() == b"%PDF"
+        assert dedup.fan_out(fingerprint, output) == output
+        
+        dedup.begin_batch()
+        assert dedup.lookup(fingerprint) is None
+    
+    def test_shared_preprocessing(self, tmp_path):
+        """同じキーの前処理はバッチ内で1回だけ実行"""
+        dedup = BatchDeduplicator()
+        calls = []
+        
+        def compute():
+            calls.append(1)
+            return len(calls)
+        
+        assert dedup.shared(("figures", tmp_path), compute) == 1
+        assert dedup.shared(("figures", tmp_path), compute) == 1
+        dedup.begin_batch()
+        assert dedup.shared(("figures", tmp_path), compute) == 2
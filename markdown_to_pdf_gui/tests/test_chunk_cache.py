@@ -0,0 +1,60 @@
+"""ChunkCacheとチャンク分割のテスト"""
+
+from core.chunk_cache import ChunkCache, split_markdown_chunks
+
+
+class TestSplitMarkdownChunks:
+    """split_markdown_chunksのテスト"""
+    
+    def test_split_at_level1_headings(self):
+        """レベル1見出しで分割し、下位の見出しでは分割しない"""
+        text = "前文\n\n# 第1章\n\n## 節\n\n本文\n\n# 第2章\n\n本文\n"
+        
+        front_matter, chunks = split_markdown_chunks(text)
+        
+        assert front_matter == ""
+        assert len(chunks) == 3
+        assert chunks[0] == "前文\n\n"
+        assert chunks[1].startswith("# 第1章") and "## 節" in chunks[1]
+        assert chunks[2].startswith("# 第2章")
+        assert "".join(chunks) == text
+    
+    def test_front_matter_and_code_blocks(self):
+        """YAMLメタデータを分離し、コードブロック内の#は無視"""
+        text = (
+            "---\ntitle: テスト\n---\n"
+            "# 第1章\n\n```python\n# コメント\n```\n\n"
+            "# 第2章\n"
+        )
+        
+        front_matter, chunks = split_markdown_chunks(text)
+        
+        assert front_matter == "---\ntitle: テスト\n---\n"
+        assert len(chunks) == 2
+        assert "# コメント" in chunks[0]
+
+
+class TestChunkCache:
+    """ChunkCacheクラスのテスト"""
+    
+    def test_key_depends_on_content_and_options(self, tmp_path):
+        """キーは内容とオプションで変わる"""
+        cache = ChunkCache(cache_dir=tmp_path)
+        key = cache.get_key("# 章\n", ["--to", "latex"])
+        
+        assert key == cache.get_key("# 章\n", ["--to", "latex"])
+        assert key != cache.get_key("# 章!\n", ["--to", "latex"])
+        assert key != cache.get_key("# 章\n", ["--to", "latex", "--number-sections"])
+    
+    def test_put_get_and_prune(self, tmp_path):
+        """保存・取得と最大数を超えた分の削除"""
+        cache = ChunkCache(cache_dir=tmp_path)
+        cache.MAX_ENTRIES = 2
+        
+        assert cache.get("missing") is None
+        for idx in range(3):
+            cache.put(f"key{idx}", f"\\section{{{idx}}}")
+        assert cache.get("key2") == "\\section{2}"
+        
+        cache.prune()
+        assert len(list(tmp_path.glob("*.tex"))) == 2
@@ -72,3 +72,45 @@ class TestConfigManager:
         # プロファイルを読み込み
         assert manager.load_profile("test_profile")
         assert manager.get_config()["toc_depth"] == 3
+    
+    def test_preview_mode_config(self, tmp_path):
+        """プレビューモードの設定"""
+        manager = ConfigManager(config_dir=tmp_path)
+        
+        preview = manager.get_mode_config("preview")
+        assert preview["mode"] == "preview"
+        assert preview["toc"] is False
+        assert preview["engine_passes"] == 1
+        
+        final = manager.get_mode_config("final")
+        assert final["toc"] == manager.get_config()["toc"]
+        
+        assert manager.update_preview_profile({"output_format": "html"})
+        assert manager.get_mode_config("preview")["output_format"] == "html"
+        assert not manager.update_preview_profile({"output_format": "docx"})
+    
+    def test_unchanged_profile_is_not_revalidated(self, tmp_path, monkeypatch):
+        """変更のないプロファイルは読み込み・存在確認を省略し、変更されたら再確認"""
+        template = tmp_path / "template.tex"
+        template.write_text("$body$")
+        manager = ConfigManager(config_dir=tmp_path)
+        profile_file = manager.profiles_dir / "custom.json"
+        profile = dict(manager.get_config(), template_path=str(template), toc_depth=3)
+        profile_file.write_text(json.dumps(profile), encoding="utf-8")
+        
+        exists_calls = []
+        original_exists = Path.exists
+        monkeypatch.setattr(Path, "exists", lambda self: exists_calls.append(self) or original_exists(self))
+        
+        assert manager.load_profile("custom")
+        checked = len(exists_calls)
+        assert manager.load_profile("custom")
+        assert manager.update_config({"toc": False})
+        assert len(exists_calls) == checked
+        
+        # プロファイルのファイルが変更されたらテンプレートの存在を再確認
+        template.unlink()
+        profile["linkcolor"] = "darkred"
+        profile_file.write_text(json.dumps(profile), encoding="utf-8")
+        assert not manager.load_profile("custom")
+        assert manager.get_config()["toc_depth"] == 3
@@ -0,0 +1,86 @@
+"""ConversionRecipeとRecipeCacheのテスト"""
+
+import os
+import pytest
+from pathlib import Path
+from core.conversion_recipe import RecipeCache, compile_recipe
+from core.converter import Converter
+from core.path_index import PathIndex
+
+
+class TestConversionRecipe:
+    """変換レシピのテスト"""
+    
+    def test_recipe_is_hashable_and_stable(self, tmp_path):
+        """同じ設定からは同じダイジェストのレシピを構築"""
+        recipe = compile_recipe({"toc": True})
+        
+        assert hash(recipe) == hash(compile_recipe({"toc": True}))
+        assert recipe.digest == compile_recipe({"toc": True}).digest
+        assert recipe.digest != compile_recipe({"toc": False}).digest
+        assert recipe.digest != compile_recipe({"toc": True}, mode="preview").digest
+    
+    def test_build_command(self, tmp_path):
+        """ファイルごとのコマンドの組み立て"""
+        recipe = compile_recipe({}, template_path=tmp_path / "missing.tex")
+        
+        cmd = recipe.build_command(Path("a.md"), Path("a.pdf"))
+        
+        assert cmd[:2] == ["pandoc", "a.md"]
+        assert cmd[-2:] == ["--output", "a.pdf"]
+        assert "--template" not in cmd
+        assert recipe.template_path is None
+    
+    def test_cache_reuses_until_template_changes(self, tmp_path):
+        """テンプレートが変更されるまでレシピを再利用"""
+        template = tmp_path / "template.tex"
+        template.write_text("$body$")
+        cache = RecipeCache()
+        config = {"toc": True}
+        
+        recipe = cache.get(config, template_path=template)
+        assert cache.get(config, template_path=template) is recipe
+        
+        template.write_text("$body$ changed")
+        stat = template.stat()
+        os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert cache.get(config, template_path=template) is not recipe
+    
+    def test_cache_checks_files_once_per_batch(self, tmp_path):
+        """PathIndexを指定した場合はバッチごとに1回だけ確認"""
+        template = tmp_path / "template.tex"
+        template.write_text("$body$")
+        index = PathIndex()
+        index.begin_batch()
+        cache = RecipeCache(index)
+        config = {}
+        
+        recipe = cache.get(config, template_path=template)
+        template.unlink()
+        assert cache.get(config, template_path=template) is recipe
+        
+        index.begin_batch()
+        assert cache.get(config, template_path=template).template_path is None
+    
+    def test_cache_keys_on_config_content(self):
+        """同じ内容の設定ではレシピを再利用し、内容が変わった設定では再構築"""
+        cache = RecipeCache()
+        
+        recipe = cache.get({"toc": True})
+        assert cache.get({"toc": True}) is recipe
+        assert cache.get({"toc": True}, mode="preview") is not recipe
+        
+        # プロファイルを変更して読み込み直した設定（同じidになり得る新しい辞書）
+        changed = cache.get({"toc": False})
+        assert changed is not recipe
+        assert "--toc" not in changed.options
+    
+    def test_converter_reuses_recipe_within_batch(self, tmp_path):
+        """バッチ内のファイルではレシピを再利用し、ファイルごとに構築しない"""
+        converter = Converter()
+        config = {"toc": True}
+        
+        recipe = converter.recipes.get(converter._resolve_config(config, "final"))
+        assert converter.recipes.get(converter._resolve_config(config, "final")) is recipe
+        assert converter.recipes.get(converter._resolve_config(dict(config), "final")) is recipe
+        assert converter.recipes.get(converter._resolve_config(config, "preview")) is not recipe
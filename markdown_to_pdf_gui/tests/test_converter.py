@@ -2,8 +2,27 @@
 
 import pytest
 from pathlib import Path
-from core.converter import Converter
+import core.converter as converter_module
+from core.chunk_cache import ChunkCache
+from core.converter import ABORTED_MESSAGE, CHUNK_BODY_PLACEHOLDER, Converter
 from core.error_handler import ErrorHandler
+from core.latex_log_monitor import MonitoredResult
+
+
+CHUNKED_MARKDOWN = "# 第1章\n\n$\\newcommand{\\R}{\\mathbb{R}}$\n\n# 第2章\n\n$x \\in \\R$\n"
+
+
+def make_chunked_converter(tmp_path, monkeypatch, run_monitored):
+    """外部コマンドを置き換えたチャンク変換用のConverterを作成"""
+    converter = Converter(chunk_cache=ChunkCache(cache_dir=tmp_path / "chunks"))
+    monkeypatch.setattr(converter, "_get_pandoc_version", lambda: "pandoc 3.1")
+    monkeypatch.setattr(
+        converter, "_build_skeleton", lambda *args, **kwargs: f"\\begin{{document}}{CHUNK_BODY_PLACEHOLDER}\\end{{document}}"
+    )
+    monkeypatch.setattr(converter_module, "run_monitored", run_monitored)
+    md_file = tmp_path / "doc.md"
+    md_file.write_text(CHUNKED_MARKDOWN, encoding="utf-8")
+    return converter, md_file
 
 
 class TestConverter:
@@ -57,3 +76,100 @@ class TestConverter:
         assert "--toc" in cmd
         assert "--toc-depth" in cmd
         assert "3" in cmd
+    
+    def test_build_pandoc_command_preview_mode(self):
+        """プレビューモードのPandocコマンドの構築"""
+        converter = Converter()
+        config = {"toc": True}
+        
+        cmd = converter.build_pandoc_command(Path("test.md"), Path("test.pdf"), config, mode="preview")
+        
+        assert "--toc" not in cmd
+        assert "classoption:draft" in cmd
+        
+        html_cmd = converter.build_pandoc_command(
+            Path("test.md"), Path("test.html"), {"preview": {"output_format": "html"}}, mode="preview"
+        )
+        assert "html5" in html_cmd
+        assert "--pdf-engine" not in html_cmd
+
+    def test_chunk_options_keep_macros_for_latex(self):
+        """チャンクの変換ではマクロを展開せずLaTeXに渡す"""
+        converter = Converter()
+        
+        options = converter._chunk_pandoc_options({})
+        assert options[options.index("--from") + 1].endswith("-latex_macros")
+        
+        options = converter._chunk_pandoc_options({"from": "markdown+latex_macros"})
+        assert options[options.index("--from") + 1] == "markdown+latex_macros"
+    
+    def test_chunk_conversion_can_be_aborted(self, tmp_path, monkeypatch):
+        """チャンクのPandocもabort_checkで中断"""
+        calls = []
+        
+        def fake_run_monitored(cmd, cwd=None, timeout=300, abort=None, **kwargs):
+            calls.append(cmd)
+            assert abort is not None and abort()
+            return MonitoredResult(returncode=None, stdout="", stderr="", aborted=True)
+        
+        converter, md_file = make_chunked_converter(tmp_path, monkeypatch, fake_run_monitored)
+        converter.abort_check = lambda: True
+        
+        result = converter.convert(md_file, config={"chunked_conversion": True, "max_parallel": 1})
+        
+        assert result == (False, None, ABORTED_MESSAGE)
+        assert calls and all(cmd[0] == "pandoc" for cmd in calls)
+    
+    def test_failed_chunked_build_falls_back(self, tmp_path, monkeypatch):
+        """組み立てたLaTeXのビルドに失敗した場合は通常の変換で作り直す"""
+        commands = []
+        
+        def fake_run_monitored(cmd, cwd=None, timeout=300, abort=None, **kwargs):
+            commands.append(cmd[0])
+            if cmd[0] == "pandoc" and "--output" not in cmd:
+                return MonitoredResult(returncode=0, stdout="\\section{章}\n", stderr="")
+            if cmd[0] == "pandoc":
+                Path(cmd[cmd.index("--output") + 1]).write_bytes(b"%PDF")
+                return MonitoredResult(returncode=0, stdout="", stderr="")
+            return MonitoredResult(returncode=1, stdout="! Undefined control sequence.", stderr="")
+        
+        converter, md_file = make_chunked_converter(tmp_path, monkeypatch, fake_run_monitored)
+        reported = []
+        monkeypatch.setattr(converter.error_handler, "handle_latex_error", lambda *args: reported.append(args))
+        
+        success, output_file, message = converter.convert(md_file, config={"chunked_conversion": True})
+        
+        assert success, message
+        assert output_file == tmp_path / "doc.pdf"
+        assert commands == ["pandoc", "pandoc", "xelatex", "pandoc"]
+        assert reported == []
+    
+    def test_preview_runs_engine_once(self, tmp_path, monkeypatch):
+        """通常の変換でもプレビューのengine_passesに従い、エンジンを1回だけ実行"""
+        commands = []
+        
+        def fake_run_monitored(cmd, cwd=None, timeout=300, abort=None, **kwargs):
+            commands.append(cmd[0])
+            if cmd[0] == "pandoc":
+                output = Path(cmd[cmd.index("--output") + 1])
+                assert cmd[cmd.index("--to") + 1] == "latex"
+                output.write_text("\\begin{document}\\end{document}", encoding="utf-8")
+            else:
+                tex_file = Path(cmd[-1])
+                tex_file.with_suffix(".log").write_text("Rerun to get cross-references right.")
+                tex_file.with_suffix(".pdf").write_bytes(b"%PDF")
+            return MonitoredResult(returncode=0, stdout="", stderr="")
+        
+        monkeypatch.setattr(converter_module, "run_monitored", fake_run_monitored)
+        md_file = tmp_path / "doc.md"
+        md_file.write_text("# Doc\n", encoding="utf-8")
+        converter = Converter()
+        
+        success, output_file, message = converter.convert(md_file, config={"toc": True}, mode="preview")
+        assert success, message
+        assert output_file == tmp_path / "doc.preview.pdf"
+        assert commands == ["pandoc", "xelatex"]
+        
+        commands.clear()
+        converter.convert(md_file, config={"toc": True, "preview": {"engine_passes": 2}}, mode="preview")
+        assert commands == ["pandoc", "xelatex", "xelatex"]
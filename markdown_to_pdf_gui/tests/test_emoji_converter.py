@@ -36,3 +36,35 @@ class TestEmojiConverter:
         converted, _ = converter.convert(content)
         
         assert r'\checkmark{}' in converted
+    
+    def test_convert_without_variation_selector(self):
+        """異体字セレクタの有無にかかわらず同じ絵文字として変換"""
+        converter = EmojiConverter()
+        content = "⚠ と ⚠️"
+        
+        converted, emojis = converter.convert(content)
+        
+        assert converted == r'\warning{} と \warning{}'
+        assert emojis == ['⚠️']
+    
+    def test_convert_collects_unmapped_emojis(self):
+        """未マッピングの絵文字は変換せずに検出"""
+        converter = EmojiConverter()
+        content = "🚀 ⭐ 🚀"
+        
+        converted, emojis = converter.convert(content)
+        
+        assert converted == r"🚀 \staricon{} 🚀"
+        assert sorted(emojis) == sorted(['🚀', '⭐'])
+        assert converter.get_missing_emojis(content) == ['🚀']
+    
+    def test_mapping_change_rebuilds_translator(self):
+        """マッピング変更後は新しいマッピングで変換"""
+        converter = EmojiConverter()
+        assert converter.convert("🚀")[0] == "🚀"
+        
+        converter.add_mapping('🚀', r'\rocket{}')
+        assert converter.convert("🚀")[0] == r'\rocket{}'
+        
+        converter.emoji_map['🚀'] = r'\launch{}'
+        assert converter.convert("🚀")[0] == r'\launch{}'
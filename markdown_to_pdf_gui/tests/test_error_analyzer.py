@@ -0,0 +1,115 @@
+"""ErrorAnalyzerのテスト"""
+
+import json
+import logging
+from datetime import datetime
+from core.error_analyzer import ErrorAnalyzer
+from utils.logger import StructuredLogger
+
+
+def make_record(error_type, category="CONVERSION", level="ERROR"):
+    """StructuredLoggerと同じ形式のログレコードを作成"""
+    now = datetime.now()
+    entry = {
+        "timestamp": now.isoformat(),
+        "level": level,
+        "category": category,
+        "error_type": error_type,
+        "message": "エラー",
+    }
+    header = now.strftime("%Y-%m-%d %H:%M:%S,000")
+    return f"{header} - markdown_to_pdf_gui.error - {level} - {json.dumps(entry, ensure_ascii=False, indent=2)}\n"
+
+
+class TestErrorAnalyzer:
+    """ErrorAnalyzerクラスのテスト"""
+    
+    def test_multiline_records(self, tmp_path):
+        """複数行のJSONレコードを集計"""
+        (tmp_path / "errors.log").write_text(
+            make_record("FONT_NOT_FOUND")
+            + make_record("FONT_NOT_FOUND", category="FONT")
+            + make_record("LATEX_COMPILE_ERROR")
+            + make_record("IGNORED", level="INFO"),
+            encoding="utf-8"
+        )
+        
+        result = ErrorAnalyzer(tmp_path).analyze_patterns()
+        
+        assert result['total_errors'] == 3
+        assert result['error_types'] == {"FONT_NOT_FOUND": 2, "LATEX_COMPILE_ERROR": 1}
+        assert result['error_by_category'] == {"CONVERSION": 2, "FONT": 1}
+        assert result['most_common_errors'][0] == ("FONT_NOT_FOUND", 2)
+    
+    def test_incremental_update(self, tmp_path):
+        """追記部分のみを読み込み、インデックスを再利用"""
+        log_file = tmp_path / "errors.log"
+        log_file.write_text(make_record("TEMPLATE_ERROR"), encoding="utf-8")
+        ErrorAnalyzer(tmp_path).analyze_patterns()
+        
+        with open(log_file, 'a', encoding='utf-8') as f:
+            f.write(make_record("TEMPLATE_ERROR"))
+        
+        analyzer = ErrorAnalyzer(tmp_path)
+        assert analyzer.analyze_patterns()['error_types'] == {"TEMPLATE_ERROR": 2}
+        
+        entry = next(iter(analyzer.index['files'].values()))
+        assert entry['offset'] == log_file.stat().st_size
+        assert analyzer.analyze_patterns()['total_errors'] == 2
+    
+    def test_incomplete_record_is_deferred(self, tmp_path):
+        """書き込み途中のレコードは完成後に集計"""
+        log_file = tmp_path / "errors.log"
+        record = make_record("IMAGE_NOT_FOUND")
+        split = record.index("\n", record.index("error_type")) + 1
+        log_file.write_text(record[:split], encoding="utf-8")
+        
+        analyzer = ErrorAnalyzer(tmp_path)
+        assert analyzer.analyze_patterns()['total_errors'] == 0
+        
+        with open(log_file, 'a', encoding='utf-8') as f:
+            f.write(record[split:])
+        
+        assert analyzer.analyze_patterns()['error_types'] == {"IMAGE_NOT_FOUND": 1}
+    
+    def test_rotated_log_is_not_counted_twice(self, tmp_path):
+        """ローテーション後も集計済みのレコードを再集計しない"""
+        log_file = tmp_path / "errors.log"
+        log_file.write_text(make_record("PANDOC_NOT_FOUND"), encoding="utf-8")
+        ErrorAnalyzer(tmp_path).analyze_patterns()
+        
+        log_file.rename(tmp_path / "errors.log.1")
+        log_file.write_text(make_record("PANDOC_NOT_FOUND"), encoding="utf-8")
+        
+        result = ErrorAnalyzer(tmp_path).analyze_patterns()
+        assert result['error_types'] == {"PANDOC_NOT_FOUND": 2}
+    
+    def test_deleted_log_counts_are_kept(self, tmp_path):
+        """削除されたログの集計はインデックスに残る"""
+        log_file = tmp_path / "errors.log"
+        log_file.write_text(make_record("XELATEX_NOT_FOUND"), encoding="utf-8")
+        ErrorAnalyzer(tmp_path).analyze_patterns()
+        log_file.unlink()
+        
+        result = ErrorAnalyzer(tmp_path).analyze_patterns()
+        assert result['error_types'] == {"XELATEX_NOT_FOUND": 1}
+    
+    def test_failed_conversion_is_counted_once(self, tmp_path):
+        """errors.logとapp.logの両方に書かれた失敗を1件として集計"""
+        logger = StructuredLogger(tmp_path)
+        try:
+            logger.log_conversion("doc.md", success=False, error_type="LATEX_COMPILE_ERROR", message="失敗")
+        finally:
+            for name in ("markdown_to_pdf_gui.app", "markdown_to_pdf_gui.error"):
+                for handler in logging.getLogger(name).handlers[:]:
+                    handler.close()
+                    logging.getLogger(name).removeHandler(handler)
+        
+        assert "LATEX_COMPILE_ERROR" in (tmp_path / "app.log").read_text(encoding="utf-8")
+        result = ErrorAnalyzer(tmp_path).analyze_patterns()
+        assert result['total_errors'] == 1
+        assert result['error_types'] == {"LATEX_COMPILE_ERROR": 1}
+        
+        # ファイルを明示した場合もapp.logの複製は数えない
+        log_files = [tmp_path / "errors.log", tmp_path / "app.log"]
+        assert ErrorAnalyzer(tmp_path).analyze_patterns(log_files)['total_errors'] == 1
@@ -0,0 +1,57 @@
+"""FontCacheのテスト"""
+
+import json
+import pytest
+from pathlib import Path
+from core.font_cache import FontCache, setup_japanese_font
+
+# matplotlibは図生成スクリプト用のオプション依存
+matplotlib = pytest.importorskip("matplotlib")
+
+
+class TestFontCache:
+    """FontCacheクラスのテスト"""
+    
+    def test_resolve_uses_cached_font_list(self, tmp_path):
+        """保存済みのフォント一覧から選択"""
+        cache = FontCache(cache_file=tmp_path / "font_cache.json")
+        cache.cache['matplotlib'] = {'version': matplotlib.__version__, 'fonts': ['Font B', 'Font C']}
+        
+        assert cache.resolve_matplotlib_font(['Font A', 'Font B', 'Font C']) == 'Font B'
+        assert cache.resolve_matplotlib_font(['Font A']) is None
+    
+    def test_resolution_persisted(self, tmp_path):
+        """選択結果はファイルに保存され、次回起動時に再利用"""
+        cache_file = tmp_path / "font_cache.json"
+        cache = FontCache(cache_file=cache_file)
+        cache.cache['matplotlib'] = {'version': matplotlib.__version__, 'fonts': ['Font B']}
+        cache.resolve_matplotlib_font(['Font B'])
+        
+        cache2 = FontCache(cache_file=cache_file)
+        cache2.cache.pop('matplotlib')
+        
+        assert cache2.resolve_matplotlib_font(['Font B']) == 'Font B'
+    
+    def test_cache_discarded_when_font_directories_change(self, tmp_path):
+        """フォントディレクトリが変更されていればキャッシュを破棄"""
+        cache_file = tmp_path / "font_cache.json"
+        cache_file.write_text(json.dumps({
+            'signature': {'/nonexistent': 0.0},
+            'fc_list': {'ja': ['/fonts/a.ttf: A']},
+        }))
+        
+        cache = FontCache(cache_file=cache_file)
+        
+        assert 'fc_list' not in cache.cache
+    
+    def test_setup_japanese_font(self, tmp_path):
+        """rcParamsの設定"""
+        cache = FontCache(cache_file=tmp_path / "font_cache.json")
+        cache.cache['matplotlib'] = {'version': matplotlib.__version__, 'fonts': ['Font B']}
+        
+        selected = setup_japanese_font(['Font A', 'Font B'], cache=cache)
+        
+        assert selected == 'Font B'
+        assert matplotlib.rcParams['font.sans-serif'][0] == 'Font B'
+        assert matplotlib.rcParams['axes.unicode_minus'] is False
+        matplotlib.rcdefaults()
@@ -0,0 +1,406 @@
+"""JobQueueとConversionWorkerのテスト"""
+
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from core.conversion_worker import ConversionWorker
+import sqlite3
+import pytest
+from core.job_queue import (
+    JOB_CANCELLED, JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING,
+    PRIORITY_BACKGROUND, PRIORITY_BATCH, PRIORITY_INTERACTIVE, JobQueue, default_worker_id, file_sha256
+)
+
+
+def dead_worker_id() -> str:
+    """終了したプロセスのワーカーID（このホスト）"""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return f"{socket.gethostname()}:{process.pid}:1"
+
+
+class FakeConverter:
+    """Pandocを使用せずに入力をそのまま出力する変換エンジン"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def convert(self, md_file, output_dir=None, config=None, template_path=None, header_path=None, mode="final"):
+        self.calls.append((md_file, mode))
+        if "fail" in md_file.stem:
+            return False, None, "変換エラー"
+        output_file = output_dir / f"{md_file.stem}.html"
+        output_file.write_bytes(md_file.read_bytes())
+        return True, output_file, ""
+
+
+class SlowConverter(FakeConverter):
+    """abort_checkを確認しながら指定した時間だけ変換を続ける変換エンジン"""
+    
+    def __init__(self, duration, on_start=None):
+        super().__init__()
+        self.duration = duration
+        self.on_start = on_start
+        self.abort_check = None
+        self.aborted = False
+    
+    def convert(self, md_file, output_dir=None, config=None, template_path=None, header_path=None, mode="final"):
+        if self.on_start is not None:
+            self.on_start()
+        deadline = time.monotonic() + self.duration
+        while time.monotonic() < deadline:
+            if self.abort_check is not None and self.abort_check():
+                self.aborted = True
+                return False, None, "中断しました"
+            time.sleep(0.01)
+        return super().convert(md_file, output_dir, config, template_path, header_path, mode)
+
+
+def make_files(tmp_path, names):
+    """テスト用のマークダウンファイルを作成"""
+    files = []
+    for name in names:
+        md_file = tmp_path / f"{name}.md"
+        md_file.write_text(f"# {name}\n", encoding="utf-8")
+        files.append(md_file)
+    return files
+
+
+class TestJobQueue:
+    """ジョブキューのテスト"""
+    
+    def test_claim_is_exclusive(self, tmp_path):
+        """同じジョブが2つのワーカーに渡らない"""
+        queue = JobQueue(tmp_path / "queue.db")
+        batch_id = queue.submit(make_files(tmp_path, ["a", "b"]), {"toc": False})
+        
+        first = queue.claim("host1:1")
+        second = queue.claim("host2:1")
+        
+        assert first.id != second.id
+        assert first.config == {"toc": False}
+        assert queue.claim("host3:1") is None
+        assert [job.worker for job in queue.get_batch(batch_id)] == ["host1:1", "host2:1"]
+    
+    def test_expired_job_is_requeued(self, tmp_path):
+        """ハートビートが途絶えたジョブは再投入される"""
+        queue = JobQueue(tmp_path / "queue.db", lease_timeout=0)
+        batch_id = queue.submit(make_files(tmp_path, ["a"]))
+        
+        job = queue.claim("host1:1")
+        again = queue.claim("host2:1")
+        
+        assert again.id == job.id
+        assert again.attempts == 2
+        # 元のワーカーの報告は無視される
+        assert not queue.heartbeat(job.id, "host1:1", 50.0)
+        assert queue.get_batch(batch_id)[0].worker == "host2:1"
+    
+    def test_cancel(self, tmp_path):
+        """キャンセルしたジョブは取得されない"""
+        queue = JobQueue(tmp_path / "queue.db")
+        batch_id = queue.submit(make_files(tmp_path, ["a", "b"]))
+        job = queue.claim("host1:1")
+        
+        queue.cancel(batch_id)
+        
+        assert queue.claim("host1:1") is None
+        assert not queue.heartbeat(job.id, "host1:1", 50.0)
+        assert {job.status for job in queue.get_batch(batch_id)} == {JOB_CANCELLED}
+
+
+class TestJobPriority:
+    """優先度・打ち切り・再起動後の再開のテスト"""
+    
+    def test_claim_by_priority(self, tmp_path):
+        """優先度の高いジョブは後から登録しても先に取得される"""
+        queue = JobQueue(tmp_path / "queue.db")
+        background = queue.submit(make_files(tmp_path, ["bg"]), priority=PRIORITY_BACKGROUND)
+        batch = queue.submit(make_files(tmp_path, ["a", "b"]), priority=PRIORITY_BATCH)
+        preview = queue.submit(make_files(tmp_path, ["edit"]), mode="preview", priority=PRIORITY_INTERACTIVE)
+        
+        order = [queue.claim("host1:1").batch_id for _ in range(4)]
+        
+        assert order == [preview, batch, batch, background]
+        # バッチを指定した取得は優先度に関係なくそのバッチのジョブだけ
+        assert queue.claim("host1:1", background) is None
+    
+    def test_preempted_job_is_requeued(self, tmp_path):
+        """打ち切ったジョブは試行回数に数えずにキューに戻る"""
+        queue = JobQueue(tmp_path / "queue.db")
+        batch = queue.submit(make_files(tmp_path, ["a", "b"]), priority=PRIORITY_BATCH)
+        job = queue.claim("gui:1", batch)
+        assert not queue.has_higher_priority(PRIORITY_BATCH, batch)
+        
+        preview = queue.submit(make_files(tmp_path, ["edit"]), priority=PRIORITY_INTERACTIVE)
+        assert queue.has_higher_priority(PRIORITY_BATCH, batch)
+        assert not queue.has_higher_priority(PRIORITY_INTERACTIVE, preview)
+        
+        assert queue.requeue(job.id, "gui:1")
+        again = queue.claim("gui:1", batch)
+        assert again.id == job.id
+        assert again.attempts == 1
+        
+        interactive = queue.claim("gui:2", preview)
+        assert queue.mark_done(interactive.id, "gui:2")
+        assert not queue.has_higher_priority(PRIORITY_BATCH, batch)
+    
+    def test_unfinished_batch_survives_restart(self, tmp_path):
+        """終了時に実行中だったジョブを回収し、残りのファイルから再開できる"""
+        queue = JobQueue(tmp_path / "queue.db", lease_timeout=float("inf"))
+        batch = queue.submit(make_files(tmp_path, ["a", "b", "c"]), {"toc": True}, output_dir=tmp_path / "out")
+        worker = dead_worker_id()
+        done = queue.claim(worker, batch)
+        queue.mark_done(done.id, worker)
+        queue.claim(worker, batch)
+        
+        # アプリを再起動
+        restarted = JobQueue(tmp_path / "queue.db", lease_timeout=float("inf"))
+        assert restarted.requeue_running() == 1
+        assert restarted.unfinished_batches() == [batch]
+        
+        jobs = restarted.get_batch(batch)
+        assert [job.status for job in jobs] == [JOB_DONE, JOB_QUEUED, JOB_QUEUED]
+        assert jobs[1].output_dir == tmp_path / "out"
+        assert jobs[1].config == {"toc": True}
+        assert restarted.claim("gui:2", batch).md_path.stem == "b"
+    
+    def test_restart_keeps_jobs_of_live_instances(self, tmp_path):
+        """他のインスタンスが実行中のジョブは起動時に回収しない"""
+        queue = JobQueue(tmp_path / "queue.db", lease_timeout=float("inf"))
+        batch = queue.submit(make_files(tmp_path, ["a", "b", "c", "d"]), {})
+        queue.claim(f"{default_worker_id()}:1", batch)
+        queue.claim("other-host:123:1", batch)
+        live = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        try:
+            queue.claim(f"{socket.gethostname()}:{live.pid}:1", batch)
+            queue.claim(dead_worker_id(), batch)
+            
+            restarted = JobQueue(tmp_path / "queue.db", lease_timeout=float("inf"))
+            assert restarted.requeue_running() == 1
+            assert [job.status for job in restarted.get_batch(batch)] == [
+                JOB_RUNNING, JOB_RUNNING, JOB_RUNNING, JOB_QUEUED
+            ]
+        finally:
+            live.kill()
+            live.wait()
+    
+    def test_existing_database_is_migrated(self, tmp_path):
+        """優先度の列がないデータベースには列を追加し、既存のジョブはバッチの優先度になる"""
+        db_path = tmp_path / "queue.db"
+        conn = sqlite3.connect(str(db_path))
+        conn.execute(
+            "CREATE TABLE jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, batch_id TEXT NOT NULL,"
+            " md_path TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL, worker TEXT,"
+            " progress REAL NOT NULL DEFAULT 0, message TEXT NOT NULL DEFAULT '',"
+            " attempts INTEGER NOT NULL DEFAULT 0, result_hash TEXT, result_name TEXT, error TEXT,"
+            " created_at REAL NOT NULL, updated_at REAL NOT NULL, heartbeat REAL)"
+        )
+        conn.execute(
+            "INSERT INTO jobs (batch_id, md_path, payload, status, created_at, updated_at)"
+            " VALUES ('old', '/tmp/a.md', '{}', ?, 0, 0)", (JOB_RUNNING,)
+        )
+        conn.commit()
+        conn.close()
+        
+        queue = JobQueue(db_path)
+        job = queue.get_batch("old")[0]
+        
+        assert job.priority == PRIORITY_BATCH
+        assert job.bundle is None
+
+
+class TestConversionWorker:
+    """ワーカーのテスト（同一マシン上のキューで代用）"""
+    
+    def test_worker_pushes_hashed_results(self, tmp_path):
+        """ワーカーの結果はハッシュを検証して取得できる"""
+        queue = JobQueue(tmp_path / "shared" / "queue.db")
+        files = make_files(tmp_path, ["a", "fail"])
+        batch_id = queue.submit(files, mode="preview")
+        
+        worker = ConversionWorker(queue, "host1:1", converter=FakeConverter())
+        assert worker.run(poll_interval=0, max_jobs=2) == 2
+        
+        done, failed = queue.get_batch(batch_id)
+        assert done.status == JOB_DONE
+        assert failed.status == JOB_FAILED
+        assert failed.error == "変換エラー"
+        
+        output_file = queue.fetch_result(done, tmp_path / "out")
+        assert output_file.read_bytes() == files[0].read_bytes()
+        assert file_sha256(output_file) == done.result_hash
+    
+    def test_corrupted_result_is_rejected(self, tmp_path):
+        """ハッシュが一致しない結果は取得しない"""
+        queue = JobQueue(tmp_path / "queue.db")
+        batch_id = queue.submit(make_files(tmp_path, ["a"]), mode="preview")
+        ConversionWorker(queue, "host1:1", converter=FakeConverter()).run_once()
+        
+        job = queue.get_batch(batch_id)[0]
+        next(queue.results_dir.iterdir()).write_bytes(b"corrupted")
+        
+        try:
+            queue.fetch_result(job, tmp_path / "out")
+            assert False, "ValueErrorが発生するべき"
+        except ValueError:
+            pass
+    
+    def test_multiple_workers_share_queue(self, tmp_path):
+        """複数のワーカーがジョブを分担する"""
+        queue = JobQueue(tmp_path / "queue.db")
+        batch_id = queue.submit(make_files(tmp_path, [f"doc{i}" for i in range(8)]), mode="preview")
+        
+        workers = [ConversionWorker(queue, f"host{i}:1", converter=FakeConverter()) for i in range(3)]
+        threads = [threading.Thread(target=worker.run, kwargs={"poll_interval": 0.01}) for worker in workers]
+        for thread in threads:
+            thread.start()
+        
+        try:
+            for _ in range(500):
+                jobs = queue.get_batch(batch_id)
+                if all(job.is_finished for job in jobs):
+                    break
+                threading.Event().wait(0.01)
+        finally:
+            for worker in workers:
+                worker.stop()
+            for thread in threads:
+                thread.join()
+        
+        jobs = queue.get_batch(batch_id)
+        assert all(job.status == JOB_DONE for job in jobs)
+        assert sum(len(worker.converter.calls) for worker in workers) == 8
+        assert JOB_QUEUED not in {job.status for job in jobs}
+    
+    def test_bundled_job_transfers_missing_blobs(self, tmp_path):
+        """バンドル付きのジョブは共有パスなしで変換し、キャッシュにないblobだけを取得"""
+        from core.asset_bundle import build_bundle
+        
+        queue = JobQueue(tmp_path / "shared" / "queue.db")
+        files = make_files(tmp_path, ["a", "b"])
+        (tmp_path / "fig.png").write_bytes(b"image")
+        for md_file in files:
+            md_file.write_text(f"# {md_file.stem}\n\n![](fig.png)\n", encoding="utf-8")
+        bundles = [build_bundle(md_file, [tmp_path / "fig.png"], queue.blobs) for md_file in files]
+        batch_id = queue.submit(files, mode="preview", bundles=bundles)
+        for md_file in files:
+            md_file.unlink()
+        
+        worker = ConversionWorker(queue, "host1:1", converter=FakeConverter(), cache_dir=tmp_path / "cache")
+        worker.run_once()
+        assert worker.last_transferred == 2
+        worker.run_once()
+        # 画像はキャッシュ済みのため本文だけを取得
+        assert worker.last_transferred == 1
+        
+        first, second = queue.get_batch(batch_id)
+        assert first.bundle.digest == bundles[0].digest
+        output_file = queue.fetch_result(second, tmp_path / "out")
+        assert output_file.read_text(encoding="utf-8") == "# b\n\n![](fig.png)\n"
+    
+    def test_long_conversion_keeps_lease(self, tmp_path):
+        """リースの猶予より長い変換でもハートビートでジョブを保持する"""
+        queue = JobQueue(tmp_path / "queue.db", lease_timeout=0.2)
+        batch_id = queue.submit(make_files(tmp_path, ["a"]), mode="preview")
+        claims = []
+        started = threading.Event()
+        converter = SlowConverter(0.8, on_start=started.set)
+        worker = ConversionWorker(queue, "host1:1", converter=converter)
+        
+        thread = threading.Thread(target=worker.run_once)
+        thread.start()
+        try:
+            assert started.wait(5.0)
+            deadline = time.monotonic() + 0.7
+            while time.monotonic() < deadline:
+                claims.append(queue.claim("host2:1"))
+                time.sleep(0.05)
+        finally:
+            thread.join()
+        
+        assert claims and all(job is None for job in claims)
+        job = queue.get_batch(batch_id)[0]
+        assert job.status == JOB_DONE
+        assert job.attempts == 1
+        assert len(converter.calls) == 1
+        assert converter.abort_check is None
+    
+    def test_cancel_aborts_running_conversion(self, tmp_path):
+        """キャンセルしたジョブの変換は次のハートビートで中断する"""
+        queue = JobQueue(tmp_path / "queue.db", lease_timeout=0.2)
+        batch_id = queue.submit(make_files(tmp_path, ["a"]), mode="preview")
+        converter = SlowConverter(30.0, on_start=lambda: queue.cancel(batch_id))
+        worker = ConversionWorker(queue, "host1:1", converter=converter)
+        
+        started = time.monotonic()
+        worker.run_once()
+        
+        assert converter.aborted
+        assert time.monotonic() - started < 5.0
+        assert queue.get_batch(batch_id)[0].status == JOB_CANCELLED
+    
+    def test_result_of_purged_job_is_not_kept(self, tmp_path):
+        """削除されたバッチのジョブを完了しても結果ファイルは残らない"""
+        queue = JobQueue(tmp_path / "queue.db")
+        files = make_files(tmp_path, ["a"])
+        batch_id = queue.submit(files, mode="preview")
+        job = queue.claim("host1:1")
+        
+        queue.purge(batch_id)
+        
+        assert queue.complete(job.id, "host1:1", files[0]) is None
+        assert list(queue.results_dir.iterdir()) == []
+
+
+def distributed_thread_class():
+    """DistributedConverterThread（PyQtとパッケージの相対インポートが必要）"""
+    module = pytest.importorskip("markdown_to_pdf_gui.core.distributed_thread")
+    return module.DistributedConverterThread
+
+
+class TestDistributedConverterThread:
+    """分散変換スレッドのテスト（スレッドのrunを直接呼び出す）"""
+    
+    def test_completed_batch_is_purged(self, tmp_path):
+        """結果を取得したバッチのジョブと結果ファイルはキューから削除される"""
+        DistributedConverterThread = distributed_thread_class()
+        queue_path = tmp_path / "shared" / "queue.db"
+        files = make_files(tmp_path, ["a", "b"])
+        worker = ConversionWorker(JobQueue(queue_path), "host1:1", converter=FakeConverter())
+        worker_thread = threading.Thread(target=worker.run, kwargs={"poll_interval": 0.01, "max_jobs": 2})
+        worker_thread.start()
+        thread = DistributedConverterThread(
+            files, queue_path, output_dir=tmp_path / "out", mode="preview",
+            poll_interval=0.01, bundle_assets=False
+        )
+        completed = []
+        thread.file_completed.connect(lambda path, success, message: completed.append(success))
+        try:
+            thread.run()
+        finally:
+            worker.stop()
+            worker_thread.join()
+        
+        assert completed == [True, True]
+        assert sorted(p.name for p in (tmp_path / "out").iterdir()) == ["a.html", "b.html"]
+        queue = JobQueue(queue_path)
+        assert queue.get_batch(thread.batch_id) == []
+        assert list(queue.results_dir.iterdir()) == []
+    
+    def test_cancelled_batch_is_purged(self, tmp_path):
+        """キャンセルしたバッチのジョブはキューから削除される"""
+        DistributedConverterThread = distributed_thread_class()
+        queue_path = tmp_path / "queue.db"
+        thread = DistributedConverterThread(
+            make_files(tmp_path, ["a"]), queue_path, poll_interval=0.01, bundle_assets=False
+        )
+        thread.cancel()
+        
+        thread.run()
+        
+        assert thread.state.value == "cancelled"
+        assert JobQueue(queue_path).get_batch(thread.batch_id) == []
@@ -0,0 +1,57 @@
+"""LatexFormatCacheのテスト"""
+
+import pytest
+from pathlib import Path
+from core.latex_format import LatexFormatCache, END_OF_DUMP
+
+
+class TestLatexFormatCache:
+    """LatexFormatCacheクラスのテスト"""
+    
+    LATEX = (
+        "\\documentclass{article}\n"
+        "\\usepackage{xeCJK}\n"
+        "\\usepackage{hyperref}\n"
+        "\\setCJKmainfont{Hiragino Sans}\n"
+        "\\title{Test}\n"
+        "\\begin{document}\n"
+        "body\n"
+        "\\end{document}\n"
+    )
+    
+    def test_split_preamble_before_fonts(self, tmp_path):
+        """フォント設定の直前で分割"""
+        cache = LatexFormatCache(cache_dir=tmp_path)
+        
+        dumpable, rest = cache.split_preamble(self.LATEX)
+        
+        assert dumpable.endswith("\\usepackage{hyperref}\n")
+        assert rest.startswith("\\setCJKmainfont")
+    
+    def test_split_preamble_without_documentclass(self, tmp_path):
+        """\\documentclassがない場合は分割しない"""
+        cache = LatexFormatCache(cache_dir=tmp_path)
+        
+        assert cache.split_preamble("\\begin{document}\\end{document}") is None
+    
+    def test_format_name_depends_on_preamble(self, tmp_path):
+        """フォーマット名はプリアンブルとエンジンごとに異なる"""
+        cache = LatexFormatCache(cache_dir=tmp_path)
+        
+        name = cache.get_format_name("\\documentclass{article}\n", "xelatex")
+        
+        assert name == cache.get_format_name("\\documentclass{article}\n", "xelatex")
+        assert name != cache.get_format_name("\\documentclass{report}\n", "xelatex")
+        assert name != cache.get_format_name("\\documentclass{article}\n", "lualatex")
+    
+    def test_prepare_document_uses_existing_format(self, tmp_path):
+        """作成済みのフォーマットを使用して文書を準備"""
+        cache = LatexFormatCache(cache_dir=tmp_path)
+        dumpable, rest = cache.split_preamble(self.LATEX)
+        format_name = cache.get_format_name(dumpable, "xelatex")
+        (tmp_path / f"{format_name}.fmt").write_bytes(b"")
+        
+        latex, format_base = cache.prepare_document(self.LATEX, "xelatex")
+        
+        assert format_base == tmp_path / format_name
+        assert latex == f"{dumpable}{END_OF_DUMP}\n{rest}"
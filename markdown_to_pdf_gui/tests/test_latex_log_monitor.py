@@ -0,0 +1,105 @@
+"""LatexLogMonitorのテスト"""
+
+import sys
+import time
+from core.latex_log_monitor import LatexLogMonitor, run_monitored
+
+
+class TestLatexLogMonitor:
+    """LatexLogMonitorクラスのテスト"""
+    
+    def test_undefined_control_sequence_with_line(self):
+        """未定義の制御綴と行番号"""
+        monitor = LatexLogMonitor()
+        assert monitor.feed("! Undefined control sequence.") is None
+        assert monitor.feed("<recently read> \\foo ") is None
+        diagnosis = monitor.feed("l.42 \\foo")
+        
+        assert diagnosis is not None
+        assert diagnosis.kind == "undefined_control_sequence"
+        assert diagnosis.line == 42
+    
+    def test_missing_package_file_line_error(self):
+        """-file-line-error形式のパッケージ不足"""
+        monitor = LatexLogMonitor()
+        monitor.feed("./doc.tex:5: LaTeX Error: File `foo.sty' not found.")
+        diagnosis = monitor.finish()
+        
+        assert diagnosis.kind == "missing_package"
+        assert diagnosis.file == "./doc.tex"
+        assert diagnosis.line == 5
+        assert diagnosis.name == "foo.sty"
+        assert "foo.sty" in diagnosis.format_message()
+    
+    def test_missing_font(self):
+        """fontspecのフォント不足"""
+        monitor = LatexLogMonitor()
+        monitor.feed('! Package fontspec Error: The font "Hiragino Sans" cannot be found.')
+        diagnosis = monitor.finish()
+        
+        assert diagnosis.kind == "missing_font"
+        assert diagnosis.name == "Hiragino Sans"
+    
+    def test_ordinary_output_is_ignored(self):
+        """通常の出力では診断しない"""
+        monitor = LatexLogMonitor()
+        for line in ["This is XeTeX, Version 3.14", "(./doc.tex", "Output written on doc.pdf"]:
+            assert monitor.feed(line) is None
+        assert monitor.finish() is None
+
+
+class TestRunMonitored:
+    """run_monitoredのテスト"""
+    
+    def test_aborts_on_fatal_error(self):
+        """致命的エラーを検出した時点でプロセスを中断"""
+        script = (
+            "import sys, time\n"
+            "print('! Emergency stop.', flush=True)\n"
+            "print('l.7 \\\\input{missing}', flush=True)\n"
+            "time.sleep(30)\n"
+        )
+        start = time.monotonic()
+        result = run_monitored([sys.executable, "-c", script], timeout=20)
+        
+        assert time.monotonic() - start < 10
+        assert result.diagnosis is not None
+        assert result.diagnosis.kind == "emergency_stop"
+        assert result.diagnosis.line == 7
+    
+    def test_watches_log_file(self, tmp_path):
+        """サブディレクトリに書き込まれる.logを監視"""
+        script = (
+            "import sys, time, pathlib\n"
+            "d = pathlib.Path(sys.argv[1]) / 'tex2pdf.1'\n"
+            "d.mkdir()\n"
+            "with open(d / 'input.log', 'w') as f:\n"
+            "    f.write('! LaTeX Error: File `bar.sty\\' not found.\\n')\n"
+            "    f.flush()\n"
+            "    time.sleep(30)\n"
+        )
+        result = run_monitored([sys.executable, "-c", script, str(tmp_path)], timeout=20, log_dir=tmp_path)
+        
+        assert result.diagnosis is not None
+        assert result.diagnosis.name == "bar.sty"
+    
+    def test_abort_stops_process(self):
+        """abortがTrueを返した時点でプロセスを終了し、診断は行わない"""
+        start = time.monotonic()
+        result = run_monitored(
+            [sys.executable, "-c", "import time; print('start', flush=True); time.sleep(30)"],
+            timeout=20,
+            abort=lambda: time.monotonic() - start > 0.5
+        )
+        
+        assert time.monotonic() - start < 10
+        assert result.aborted
+        assert result.diagnosis is None
+    
+    def test_successful_run(self):
+        """正常終了したプロセスの出力"""
+        result = run_monitored([sys.executable, "-c", "print('ok')"], timeout=20)
+        
+        assert result.returncode == 0
+        assert result.stdout == "ok\n"
+        assert result.diagnosis is None
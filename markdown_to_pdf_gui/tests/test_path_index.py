@@ -0,0 +1,96 @@
+"""PathIndexのテスト"""
+
+import os
+import unicodedata
+import pytest
+from pathlib import Path
+from core.path_index import PathIndex
+
+
+class TestPathIndex:
+    """PathIndexクラスのテスト"""
+    
+    def test_exists_and_kinds(self, tmp_path):
+        """ファイル・ディレクトリの存在確認"""
+        (tmp_path / "figures").mkdir()
+        (tmp_path / "figures" / "fig1.png").write_bytes(b"")
+        index = PathIndex()
+        
+        assert index.exists(tmp_path / "figures" / "fig1.png")
+        assert index.is_file(tmp_path / "figures" / "fig1.png")
+        assert index.is_dir(tmp_path / "figures")
+        assert not index.exists(tmp_path / "figures" / "missing.png")
+        assert not index.exists(tmp_path / "nodir" / "fig1.png")
+    
+    def test_find_first(self, tmp_path):
+        """候補の優先順位"""
+        (tmp_path / "b.tex").write_text("")
+        (tmp_path / "c.tex").write_text("")
+        index = PathIndex()
+        
+        found = index.find_first([tmp_path / "a.tex", tmp_path / "b.tex", tmp_path / "c.tex"])
+        
+        assert found == tmp_path / "b.tex"
+    
+    def test_listing_reused_within_batch(self, tmp_path):
+        """バッチ内では一覧を再取得しない"""
+        index = PathIndex()
+        assert not index.exists(tmp_path / "new.png")
+        
+        (tmp_path / "new.png").write_bytes(b"")
+        assert not index.exists(tmp_path / "new.png")
+    
+    def test_invalidated_by_mtime(self, tmp_path):
+        """次のバッチではmtimeの変化で一覧を再取得"""
+        index = PathIndex()
+        assert not index.exists(tmp_path / "new.png")
+        
+        (tmp_path / "new.png").write_bytes(b"")
+        stat = tmp_path.stat()
+        os.utime(tmp_path, (stat.st_atime, stat.st_mtime + 10))
+        index.begin_batch()
+        
+        assert index.exists(tmp_path / "new.png")
+    
+    def test_files_with_suffix(self, tmp_path):
+        """拡張子によるファイル列挙"""
+        (tmp_path / "a.PNG").write_bytes(b"")
+        (tmp_path / "b.txt").write_text("")
+        (tmp_path / "sub.png").mkdir()
+        index = PathIndex()
+        
+        files = index.files_with_suffix(tmp_path, ['.png'])
+        
+        assert files == [tmp_path / "a.PNG"]
+    
+    def test_invalidate_within_batch(self, tmp_path):
+        """バッチの途中で生成したファイルはinvalidate後に見える"""
+        (tmp_path / "figures").mkdir()
+        index = PathIndex()
+        assert not index.exists(tmp_path / "figures" / "fig1.png")
+        generation = index.generation
+        
+        (tmp_path / "figures" / "fig1.png").write_bytes(b"")
+        index.invalidate(tmp_path / "figures")
+        
+        assert index.exists(tmp_path / "figures" / "fig1.png")
+        assert index.generation > generation
+    
+    def test_unicode_normalization(self, tmp_path):
+        """NFD形式で保存された名前もOSの判定で存在を確認"""
+        nfd_name = unicodedata.normalize('NFD', "グラフ.png")
+        (tmp_path / nfd_name).write_bytes(b"")
+        index = PathIndex()
+        nfc_path = tmp_path / unicodedata.normalize('NFC', "グラフ.png")
+        
+        assert index.exists(nfc_path) == nfc_path.exists()
+        assert index.exists(tmp_path / nfd_name)
+    
+    def test_case_mismatch_follows_filesystem(self, tmp_path):
+        """大文字小文字だけが異なる名前はファイルシステムの判定に従う"""
+        (tmp_path / "Fig1.PNG").write_bytes(b"")
+        index = PathIndex()
+        
+        assert index.is_file(tmp_path / "Fig1.PNG")
+        assert index.exists(tmp_path / "fig1.png") == (tmp_path / "fig1.png").exists()
+        assert not index.exists(tmp_path / "fig2.png")
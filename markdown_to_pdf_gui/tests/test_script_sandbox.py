@@ -0,0 +1,179 @@
+"""スクリプトサンドボックスのテスト"""
+
+import sys
+import pytest
+from pathlib import Path
+from core.figure_generator import FigureGenerator
+from core.script_sandbox import SandboxLimits, read_output_declaration, run_sandboxed
+
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="setrlimitはPOSIXのみ")
+
+
+def write_script(directory: Path, name: str, body: str) -> Path:
+    """テスト用のスクリプトを作成"""
+    script = directory / name
+    script.write_text(body, encoding="utf-8")
+    return script
+
+
+class TestScriptSandbox:
+    """サンドボックス実行のテスト"""
+    
+    def test_copies_only_declared_outputs(self, tmp_path):
+        """宣言された出力だけを持ち帰る"""
+        (tmp_path / "data.txt").write_text("42")
+        script = write_script(tmp_path, "plot_figure.py", (
+            "# outputs: figures/*.png\n"
+            "import os\n"
+            "os.makedirs('figures', exist_ok=True)\n"
+            "value = open('data.txt').read()\n"
+            "open('figures/a.png', 'w').write(value)\n"
+            "open('scratch.log', 'w').write('temp')\n"
+        ))
+        
+        result = run_sandboxed(script, python=sys.executable)
+        
+        assert result.success, result.error
+        assert result.outputs == ["figures/a.png"]
+        assert (tmp_path / "figures" / "a.png").read_text() == "42"
+        assert not (tmp_path / "scratch.log").exists()
+        assert result.peak_rss_mb > 0
+    
+    def test_collects_writes_to_parent_figures(self, tmp_path):
+        """scripts/から"../figures"に書いた図を持ち帰り、それ以外の外への書き込みは報告"""
+        scripts_dir = tmp_path / "scripts"
+        scripts_dir.mkdir()
+        (tmp_path / "figures").mkdir()
+        (tmp_path / "data.txt").write_text("7")
+        script = write_script(scripts_dir, "plot_problem.py", (
+            "value = open('../data.txt').read()\n"
+            "open('../figures/p.png', 'w').write(value)\n"
+            "open('../notes.txt', 'w').write('lost')\n"
+        ))
+        
+        result = run_sandboxed(script, python=sys.executable)
+        
+        assert result.success, result.error
+        assert result.outputs == ["../figures/p.png"]
+        assert (tmp_path / "figures" / "p.png").read_text() == "7"
+        assert result.discarded == ["../notes.txt"]
+        assert not (tmp_path / "notes.txt").exists()
+        assert any("../notes.txt" in warning for warning in result.warnings)
+    
+    def test_rerun_does_not_write_through_to_existing_files(self, tmp_path):
+        """既存の出力・入力ファイルへの書き込みは元のファイルに及ばず、新しい出力だけを持ち帰る"""
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        (data_dir / "input.txt").write_text("original input")
+        (tmp_path / "result.txt").write_text("old result")
+        script = write_script(tmp_path, "generate_result.py", (
+            "# outputs: result.txt\n"
+            "import os\n"
+            "assert not os.path.exists('result.txt')\n"
+            "value = open('data/input.txt').read()\n"
+            "open('data/input.txt', 'w').write('overwritten')\n"
+            "open('data/new.txt', 'w').write('scratch')\n"
+            "open('result.txt', 'w').write('new ' + value)\n"
+        ))
+        
+        result = run_sandboxed(script, dest_dir=tmp_path / "out", python=sys.executable)
+        
+        assert result.success, result.error
+        assert result.outputs == ["result.txt"]
+        assert result.missing_outputs == []
+        assert (tmp_path / "out" / "result.txt").read_text() == "new original input"
+        assert (tmp_path / "result.txt").read_text() == "old result"
+        assert (data_dir / "input.txt").read_text() == "original input"
+        assert not (data_dir / "new.txt").exists()
+    
+    def test_reports_missing_declared_outputs(self, tmp_path):
+        """宣言された出力が作成されなかった場合は報告"""
+        script = write_script(tmp_path, "plot_partial.py", (
+            "# outputs: a.png, figures/*.pdf\n"
+            "open('a.png', 'w').write('ok')\n"
+        ))
+        
+        result = run_sandboxed(script, python=sys.executable)
+        
+        assert result.success, result.error
+        assert result.outputs == ["a.png"]
+        assert result.missing_outputs == ["figures/*.pdf"]
+    
+    def test_memory_limit_without_prlimit(self, tmp_path, monkeypatch):
+        """prlimitのない環境では子プロセスのPythonが上限を設定"""
+        import core.script_sandbox as script_sandbox
+        if script_sandbox.resource is None:
+            pytest.skip("resourceモジュールがありません")
+        monkeypatch.delattr(script_sandbox.resource, "prlimit", raising=False)
+        script = write_script(tmp_path, "generate_big.py", "data = bytearray(1024 * 1024 * 1024)\n")
+        
+        result = run_sandboxed(script, limits=SandboxLimits(memory_mb=256), python=sys.executable)
+        
+        assert not result.success
+        assert result.limit_exceeded == "memory"
+    
+    def test_memory_limit(self, tmp_path):
+        """メモリの上限を超えたスクリプトは失敗として報告"""
+        script = write_script(tmp_path, "generate_big.py", "data = bytearray(1024 * 1024 * 1024)\n")
+        
+        result = run_sandboxed(script, limits=SandboxLimits(memory_mb=256), python=sys.executable)
+        
+        assert not result.success
+        assert result.limit_exceeded == "memory"
+    
+    def test_cpu_limit(self, tmp_path):
+        """CPU時間の上限を超えたスクリプトは中断"""
+        script = write_script(tmp_path, "plot_loop.py", "while True:\n    pass\n")
+        
+        result = run_sandboxed(script, limits=SandboxLimits(cpu_seconds=1, timeout=30), python=sys.executable)
+        
+        assert not result.success
+        assert result.limit_exceeded == "cpu"
+        assert result.cpu_time >= 0.9
+    
+    def test_timeout(self, tmp_path):
+        """経過時間の上限を超えたスクリプトは中断"""
+        script = write_script(tmp_path, "plot_sleep.py", "import time\ntime.sleep(30)\n")
+        
+        result = run_sandboxed(script, limits=SandboxLimits(timeout=0.5), python=sys.executable)
+        
+        assert not result.success
+        assert result.limit_exceeded == "timeout"
+        assert result.wall_time < 10
+    
+    def test_failures_do_not_block_other_scripts(self, tmp_path):
+        """失敗したスクリプトがあっても他のスクリプトは実行される"""
+        md_file = tmp_path / "doc.md"
+        md_file.write_text("# Doc\n")
+        write_script(tmp_path, "figure_a_bad.py", "raise SystemExit('boom')\n")
+        write_script(tmp_path, "figure_b_good.py", (
+            "import os\nos.makedirs('figures', exist_ok=True)\nopen('figures/b.png', 'w').write('ok')\n"
+        ))
+        
+        generator = FigureGenerator(SandboxLimits(timeout=30), python=sys.executable)
+        executed, warnings = generator.process_markdown_file(md_file, auto_execute=True)
+        
+        assert [script.name for script in executed] == ["figure_b_good.py"]
+        assert any("figure_a_bad.py" in warning for warning in warnings)
+        assert (tmp_path / "figures" / "b.png").read_text() == "ok"
+        assert sorted(Path(r.script).name for r in generator.results) == ["figure_a_bad.py", "figure_b_good.py"]
+    
+    def test_read_output_declaration(self, tmp_path):
+        """出力の宣言の読み取り"""
+        script = write_script(tmp_path, "plot.py", "#!/usr/bin/env python3\n# outputs: a.png, figures/*.pdf\n")
+        assert read_output_declaration(script) == ["a.png", "figures/*.pdf"]
+        assert read_output_declaration(write_script(tmp_path, "other.py", "print(1)\n")) is None
+    
+    def test_scripts_can_import_font_cache(self, tmp_path):
+        """スクリプトからmarkdown_to_pdf_guiのfont_cacheを読み込める"""
+        script = write_script(tmp_path, "plot_font.py", (
+            "# outputs: module.txt\n"
+            "from markdown_to_pdf_gui.core.font_cache import setup_japanese_font\n"
+            "open('module.txt', 'w').write(setup_japanese_font.__module__)\n"
+        ))
+        
+        result = run_sandboxed(script, python=sys.executable)
+        
+        assert result.success, result.error
+        assert (tmp_path / "module.txt").read_text() == "markdown_to_pdf_gui.core.font_cache"
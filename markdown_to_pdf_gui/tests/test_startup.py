@@ -0,0 +1,61 @@
+"""起動時の遅延読み込み（履歴・環境チェックキャッシュ）のテスト"""
+
+import json
+from core.environment_checker import EnvironmentChecker
+from core.font_cache import FontCache
+from core.history_manager import HistoryManager
+
+
+class TestHistoryManagerLazy:
+    """HistoryManagerの遅延読み込みのテスト"""
+    
+    def test_lazy_history_is_loaded_on_access(self, tmp_path):
+        """lazy=Trueの場合は初回アクセス時に読み込まれる"""
+        history_file = tmp_path / "history.json"
+        HistoryManager(history_file).add_history(tmp_path / "a.md", tmp_path / "a.pdf", True, 1.0)
+        
+        manager = HistoryManager(history_file, lazy=True)
+        assert not manager.is_loaded()
+        
+        assert len(manager.history) == 1
+        assert manager.is_loaded()
+    
+    def test_ensure_loaded_keeps_loaded_history(self, tmp_path):
+        """読み込み済みの履歴はensure_loadedで再読み込みしない"""
+        manager = HistoryManager(tmp_path / "history.json", lazy=True)
+        manager.ensure_loaded()
+        manager.history.append("sentinel")
+        
+        manager.ensure_loaded()
+        assert manager.history == ["sentinel"]
+
+
+class TestEnvironmentCheckCache:
+    """EnvironmentChecker.check_all_cachedのテスト"""
+    
+    def test_cached_result_is_reused(self, tmp_path, monkeypatch):
+        """シグネチャが一致すればcheck_allを実行しない"""
+        cache_file = tmp_path / "environment_cache.json"
+        font_cache = FontCache(tmp_path / "font_cache.json")
+        checker = EnvironmentChecker(font_cache, cache_file)
+        first = checker.check_all_cached()
+        assert cache_file.exists()
+        
+        def fail_check_all(self):
+            raise AssertionError("check_all should not run")
+        
+        monkeypatch.setattr(EnvironmentChecker, "check_all", fail_check_all)
+        assert EnvironmentChecker(font_cache, cache_file).check_all_cached() == first
+    
+    def test_signature_change_invalidates_cache(self, tmp_path):
+        """シグネチャが変わった場合は再チェックする"""
+        cache_file = tmp_path / "environment_cache.json"
+        font_cache = FontCache(tmp_path / "font_cache.json")
+        cache_file.write_text(json.dumps({
+            'signature': {'tools': {}, 'fonts': {}},
+            'errors': ["stale"],
+            'warnings': [],
+        }), encoding='utf-8')
+        
+        _, errors, _ = EnvironmentChecker(font_cache, cache_file).check_all_cached()
+        assert "stale" not in errors
@@ -68,3 +68,17 @@ class TestTemplateManager:
         is_valid, errors = manager.validate_template(invalid_template)
         assert not is_valid
         assert len(errors) > 0
+    
+    def test_find_templates_memoised_per_directory(self, tmp_path):
+        """同一ディレクトリの検出結果はバッチ内で再利用"""
+        manager = TemplateManager()
+        
+        template, _ = manager.find_templates(tmp_path / "a.md")
+        
+        template_file = tmp_path / "pandoc_template.tex"
+        template_file.write_text("\\documentclass{article}\\begin{document}$body$\\end{document}")
+        assert manager.find_templates(tmp_path / "b.md")[0] == template
+        
+        # 新しいバッチでは再検索
+        manager.path_index.clear()
+        assert manager.find_templates(tmp_path / "b.md")[0] == template_file
@@ -5,28 +5,11 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib import rcParams
-import matplotlib.font_manager as fm
+from markdown_to_pdf_gui.core.font_cache import setup_japanese_font
 
 # 日本語フォント設定
 japanese_fonts = ['Hiragino Sans', 'Hiragino Kaku Gothic ProN', 'Arial Unicode MS', 'AppleGothic', 'Osaka']
-font_found = None
-for font_name in japanese_fonts:
-    try:
-        font_path = fm.findfont(fm.FontProperties(family=font_name))
-        if font_path:
-            font_found = font_name
-            break
-    except:
-        continue
-
-if font_found:
-    rcParams['font.family'] = font_found
-else:
-    import platform
-    if platform.system() == 'Darwin':
-        rcParams['font.family'] = 'Hiragino Sans'
-    else:
-        rcParams['font.family'] = 'DejaVu Sans'
+setup_japanese_font(japanese_fonts)
 
 rcParams['font.size'] = 12
 rcParams['axes.unicode_minus'] = False
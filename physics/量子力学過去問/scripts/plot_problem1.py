@@ -5,32 +5,12 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib import rcParams
-import matplotlib.font_manager as fm
+from markdown_to_pdf_gui.core.font_cache import setup_japanese_font
 
 # 日本語フォントの設定（macOS用）
 # 利用可能な日本語フォントを検索
 japanese_fonts = ['Hiragino Sans', 'Hiragino Kaku Gothic ProN', 'Arial Unicode MS', 'AppleGothic', 'Osaka']
-font_found = None
-for font_name in japanese_fonts:
-    try:
-        font_path = fm.findfont(fm.FontProperties(family=font_name))
-        if font_path:
-            font_found = font_name
-            break
-    except:
-        continue
-
-if font_found:
-    rcParams['font.family'] = font_found
-    print(f"日本語フォントを使用: {font_found}")
-else:
-    # フォールバック: システムのデフォルトフォントを使用
-    import platform
-    if platform.system() == 'Darwin':  # macOS
-        rcParams['font.family'] = 'Hiragino Sans'
-    else:
-        rcParams['font.family'] = 'sans-serif'
-    print("デフォルトフォントを使用")
+setup_japanese_font(japanese_fonts, verbose=True)
 
 rcParams['font.size'] = 12
 # マイナス記号の文字化けを防ぐ
@@ -11,43 +11,16 @@ import matplotlib.pyplot as plt
 from matplotlib.patches import FancyBboxPatch, FancyArrowPatch
 import matplotlib.patches as mpatches
 from scipy.special import hermite
-import platform
-import matplotlib.font_manager as fm
+from markdown_to_pdf_gui.core.font_cache import setup_japanese_font
 
-# 日本語フォントの設定
-def setup_japanese_font():
-    """日本語フォントを設定する関数"""
-    if platform.system() == 'Darwin':  # macOS
-        # macOSで利用可能な日本語フォントを検索
-        japanese_fonts = ['Hiragino Sans', 'Hiragino Maru Gothic Pro', 'Hiragino Mincho ProN', 
-                         'Yu Gothic', 'Yu Mincho', 'Meiryo', 'Takao']
-        available_fonts = [f.name for f in fm.fontManager.ttflist]
-        
-        # 利用可能なフォントを優先順位で検索
-        for font_name in japanese_fonts:
-            if font_name in available_fonts:
-                plt.rcParams['font.family'] = font_name
-                print(f"日本語フォントを設定しました: {font_name}")
-                break
-        else:
-            # フォールバック: システムのデフォルト日本語フォント
-            plt.rcParams['font.sans-serif'] = ['Hiragino Sans', 'Hiragino Maru Gothic Pro', 
-                                               'Yu Gothic', 'Meiryo', 'Takao', 
-                                               'IPAexGothic', 'IPAPGothic', 'VL PGothic', 
-                                               'Noto Sans CJK JP']
-            print("デフォルトの日本語フォント設定を使用します")
-    elif platform.system() == 'Windows':
-        plt.rcParams['font.family'] = 'MS Gothic'
-        print("日本語フォントを設定しました: MS Gothic")
-    else:  # Linux
-        plt.rcParams['font.sans-serif'] = ['Noto Sans CJK JP', 'Yu Gothic', 'Meiryo', 'MS Gothic']
-        print("Linux用の日本語フォント設定を使用します")
-    
-    plt.rcParams['axes.unicode_minus'] = False  # 負の符号の表示を正しくする
-    plt.rcParams['font.size'] = 10
-
-# フォント設定を実行
-setup_japanese_font()
+# 日本語フォントの設定（フォント検出結果はキャッシュを使用）
+setup_japanese_font(
+    ['Hiragino Sans', 'Hiragino Maru Gothic Pro', 'Hiragino Mincho ProN',
+     'Yu Gothic', 'Yu Mincho', 'Meiryo', 'Takao', 'IPAexGothic', 'IPAPGothic',
+     'VL PGothic', 'Noto Sans CJK JP', 'MS Gothic'],
+    verbose=True
+)
+plt.rcParams['font.size'] = 10
 
 # 出力ディレクトリ
 output_dir = '../figures'
@@ -0,0 +1,141 @@
+"""
+軌道を生成しながら更新する統計量（オンライン集計）。
+
+軌道のバッチを受け取るたびに平均・分散・MSD・ヒストグラム・累積分布を更新するため、
+バッチは集計の後すぐに捨てられる。必要なメモリは時刻数やビン数の配列だけで、
+アンサンブルの大きさにはよらない。
+
+    from langevin import simulate_batches
+    from accumulators import RunningMoments, RunningMSD
+
+    x, msd = RunningMoments(), RunningMSD()
+    for ens in simulate_batches(params, n_runs=100000, n_steps=1000, batch_runs=1000, seed=0):
+        x.update(ens.x)
+        msd.update(ens.r)
+    x.mean, x.var, msd.msd
+"""
+import numpy as np
+from scipy import stats
+
+
+class RunningMoments:
+    """
+    標本ごとの平均と分散（Welford 法）。update(values) は最初の軸を標本として、
+    残りの軸（時刻など）ごとに集計する。バッチの平均と偏差平方和を Chan らの方法で
+    合成するため、標本数が大きくても桁落ちしにくい。
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = None
+        self._m2 = None
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        n_b = len(values)
+        if n_b == 0:
+            return self
+        mean_b = values.mean(axis=0)
+        m2_b = ((values - mean_b) ** 2).sum(axis=0)
+        self._combine(n_b, mean_b, m2_b)
+        return self
+
+    def merge(self, other):
+        """別の集計（並列に集計した結果など）を合成する。"""
+        if other.n:
+            self._combine(other.n, other.mean, other._m2)
+        return self
+
+    def _combine(self, n_b, mean_b, m2_b):
+        if self.n == 0:
+            self.n, self.mean, self._m2 = n_b, np.array(mean_b, dtype=float), np.array(m2_b, dtype=float)
+            return
+        total = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean = self.mean + delta * (n_b / total)
+        self._m2 = self._m2 + m2_b + delta ** 2 * (self.n * n_b / total)
+        self.n = total
+
+    @property
+    def var(self):
+        """分散（ddof=0）。"""
+        return self._m2 / self.n
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+    @property
+    def sem(self):
+        """平均の標準誤差。"""
+        return np.sqrt(self._m2 / (self.n - 1) / self.n)
+
+
+class RunningMSD(RunningMoments):
+    """平均二乗変位 <|r(t) - r(0)|²>。update(r) の r は (試行数, 時刻数, 次元)。"""
+
+    def __init__(self, boundary=None):
+        super().__init__()
+        self.boundary = boundary
+
+    def update(self, r):
+        r = np.asarray(r, dtype=float)
+        r0 = r[:, :1]
+        dr = self.boundary.displacement(r, r0) if self.boundary is not None else r - r0
+        return super().update(np.sum(dr ** 2, axis=-1))
+
+    @property
+    def msd(self):
+        return self.mean
+
+
+class RunningHistogram:
+    """
+    固定したビンのヒストグラム。範囲外の値も below, above に数えておく（累積分布に使う）。
+    """
+
+    def __init__(self, bins=30, range=None, edges=None):
+        self.edges = np.asarray(edges, dtype=float) if edges is not None else np.histogram_bin_edges([], bins, range)
+        self.counts = np.zeros(len(self.edges) - 1)
+        self.below = 0
+        self.above = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        self.counts += np.histogram(values, bins=self.edges)[0]
+        self.below += int(np.count_nonzero(values < self.edges[0]))
+        self.above += int(np.count_nonzero(values > self.edges[-1]))
+        return self
+
+    @property
+    def n(self):
+        return int(self.counts.sum()) + self.below + self.above
+
+    def density(self):
+        """確率密度（np.histogram の density=True と同じく、範囲内の度数で規格化）。"""
+        return self.counts / (self.counts.sum() * np.diff(self.edges))
+
+
+class RunningCDF(RunningHistogram):
+    """
+    細かいビンで数えた経験分布関数。ビンの端で理論の累積分布と比べて K-S 検定を行う。
+    ビンの中での差は見ないため、統計量は正確な値より最大で 1 ビンの確率だけ小さくなりうる。
+    """
+
+    def __init__(self, bins=2000, range=None, edges=None):
+        super().__init__(bins, range, edges)
+
+    def cdf(self):
+        """ビンの端 edges での経験分布関数。"""
+        cumulative = self.below + np.concatenate([[0], np.cumsum(self.counts)])
+        return cumulative / self.n
+
+    def ks_test(self, cdf):
+        """
+        理論の累積分布関数 cdf（例: stats.expon(scale=1).cdf）との K-S 検定。
+
+        Returns:
+            (統計量, p値)
+        """
+        statistic = float(np.max(np.abs(self.cdf() - cdf(self.edges))))
+        return statistic, float(stats.kstwo.sf(statistic, self.n))
@@ -1,36 +1,22 @@
 """
 拡散係数 D のブートストラップ信頼区間。
 各試行で D をフィットし、D のリストをリサンプルして 95% CI を求める。
+相関のある時系列（1 本の軌道の運動エネルギー）では、i.i.d. とブロックのリサンプルを比べる。
 """
 import numpy as np
 import matplotlib.pyplot as plt
 import os
+from langevin import LangevinParams, simulate
+from bootstrap import bootstrap
 
 plt.rcParams['font.family'] = 'Hiragino Sans'
 plt.rcParams['axes.unicode_minus'] = False
 
 
-def simulate(T, m, gamma, kB, dt, n_steps, seed):
-    np.random.seed(seed)
-    rx, ry = 0.0, 0.0
-    vx, vy = 0.0, 0.0
-    c1 = gamma / m
-    c2 = np.sqrt(2.0 * gamma * kB * T / m)
-    t = np.arange(n_steps + 1) * dt
-    x, y = np.zeros(n_steps + 1), np.zeros(n_steps + 1)
-    for n in range(n_steps):
-        vx = vx - c1 * vx * dt + c2 * np.sqrt(dt) * np.random.normal(0, 1)
-        vy = vy - c1 * vy * dt + c2 * np.sqrt(dt) * np.random.normal(0, 1)
-        rx += vx * dt
-        ry += vy * dt
-        x[n + 1], y[n + 1] = rx, ry
-    return t, x, y
-
-
 def fit_D(t, x, y):
     n = len(t)
     i0 = n // 2
-    return np.mean((x[i0:] ** 2 + y[i0:] ** 2) / (4.0 * t[i0:]))
+    return np.mean((x[..., i0:] ** 2 + y[..., i0:] ** 2) / (4.0 * t[i0:]), axis=-1)
 
 
 os.makedirs('figures', exist_ok=True)
@@ -40,17 +26,25 @@ D_theory = kB * T / gamma
 dt, n_steps, n_runs = 0.01, 1000, 50
 B = 2000  # ブートストラップ反復
 
-Ds = np.array([fit_D(*simulate(T, m, gamma, kB, dt, n_steps, r)) for r in range(n_runs)])
-boot_means = []
-np.random.seed(123)
-for _ in range(B):
-    idx = np.random.choice(n_runs, size=n_runs, replace=True)
-    boot_means.append(np.mean(Ds[idx]))
-boot_means = np.array(boot_means)
-ci_lo, ci_hi = np.percentile(boot_means, [2.5, 97.5])
+ens = simulate(LangevinParams(T, m, gamma, kB, dt), n_runs, n_steps, rng=0, record_velocity=False)
+Ds = fit_D(ens.t, ens.x, ens.y)
+boot = bootstrap(Ds, np.mean, B, rng=123)
+boot_means = boot.distribution
+ci_lo, ci_hi = boot.low, boot.high
+bca = bootstrap(Ds, np.mean, B, method='bca', rng=123)
 d_mean = np.mean(Ds)
 d_std = np.std(Ds)
 print(f"D_mean={d_mean:.4f}, D_std={d_std:.4f}, 95% CI=[{ci_lo:.4f}, {ci_hi:.4f}], D_theory={D_theory:.4f}")
+print(f"BCa 95% CI=[{bca.low:.4f}, {bca.high:.4f}]")
+
+# 1 本の長い軌道の運動エネルギーの時間平均 <E>（理論 k_B T）。相関時間 τ/2 より十分長い
+# ブロック（10τ）でリサンプルしないと、i.i.d. の CI は区間を狭く見積もる
+ens_long = simulate(LangevinParams(T, m, gamma, kB, dt), 1, 20000, rng=1)
+E = ens_long.kinetic_energy()[0, 1:]
+block = int(round(10 * m / gamma / dt))
+for name, res in [('i.i.d.', bootstrap(E, np.mean, B, rng=123)),
+                  (f'ブロック (長さ {block})', bootstrap(E, np.mean, B, rng=123, block=block))]:
+    print(f"<E> {name}: {res.estimate:.4f}, 95% CI=[{res.low:.4f}, {res.high:.4f}], 理論={kB * T:.4f}")
 
 fig, axes = plt.subplots(1, 2, figsize=(12, 5))
 ax = axes[0]
@@ -5,6 +5,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import os
+from langevin import LangevinParams, PeriodicBox, ReflectingBox, simulate
 
 plt.rcParams['font.family'] = 'Hiragino Sans'
 plt.rcParams['axes.unicode_minus'] = False
@@ -13,85 +14,19 @@ kB, T, m, gamma = 1.0, 1.0, 1.0, 1.0
 D = kB * T / gamma
 
 
-def sim_reflecting(dt, n_steps, L, seed):
-    np.random.seed(seed)
-    rx, ry = 0.0, 0.0
-    vx, vy = 0.0, 0.0
-    c1 = gamma / m
-    c2 = np.sqrt(2.0 * gamma * kB * T / m)
-    t = np.arange(n_steps + 1) * dt
-    x, y = np.zeros(n_steps + 1), np.zeros(n_steps + 1)
-    x[0], y[0] = 0.0, 0.0
-    for n in range(n_steps):
-        vx = vx - c1 * vx * dt + c2 * np.sqrt(dt) * np.random.normal(0, 1)
-        vy = vy - c1 * vy * dt + c2 * np.sqrt(dt) * np.random.normal(0, 1)
-        rx += vx * dt
-        ry += vy * dt
-        # 反射
-        if rx > L:
-            rx = 2 * L - rx
-            vx = -vx
-        elif rx < -L:
-            rx = -2 * L - rx
-            vx = -vx
-        if ry > L:
-            ry = 2 * L - ry
-            vy = -vy
-        elif ry < -L:
-            ry = -2 * L - ry
-            vy = -vy
-        x[n + 1], y[n + 1] = rx, ry
-    return t, x, y
-
-
-def sim_periodic(dt, n_steps, L, seed):
-    np.random.seed(seed)
-    rx, ry = 0.0, 0.0
-    vx, vy = 0.0, 0.0
-    c1 = gamma / m
-    c2 = np.sqrt(2.0 * gamma * kB * T / m)
-    t = np.arange(n_steps + 1) * dt
-    x, y = np.zeros(n_steps + 1), np.zeros(n_steps + 1)
-    x[0], y[0] = 0.0, 0.0
-    for n in range(n_steps):
-        vx = vx - c1 * vx * dt + c2 * np.sqrt(dt) * np.random.normal(0, 1)
-        vy = vy - c1 * vy * dt + c2 * np.sqrt(dt) * np.random.normal(0, 1)
-        rx += vx * dt
-        ry += vy * dt
-        rx = (rx + L) % (2 * L) - L
-        ry = (ry + L) % (2 * L) - L
-        x[n + 1], y[n + 1] = rx, ry
-    return t, x, y
-
-
-def min_image_scalar(d, L):
-    d = d % (2 * L)
-    if d > L:
-        d -= 2 * L
-    return d
-
-
-def msd_periodic(x, y, L):
-    """周期境界での MSD: 最小イメージ距離。"""
-    n = len(x)
-    msd = np.zeros(n)
-    for i in range(n):
-        dx = min_image_scalar(x[i] - x[0], L)
-        dy = min_image_scalar(y[i] - y[0], L)
-        msd[i] = dx ** 2 + dy ** 2
-    return msd
-
-
 os.makedirs('figures', exist_ok=True)
 
 dt, n_steps, L = 0.01, 3000, 3.0
 n_runs = 40
-traj_ref = [sim_reflecting(dt, n_steps, L, r) for r in range(n_runs)]
-traj_per = [sim_periodic(dt, n_steps, L, r) for r in range(n_runs)]
-
-t = traj_ref[0][0]
-msd_ref = np.mean([tr[1] ** 2 + tr[2] ** 2 for tr in traj_ref], axis=0)
-msd_per = np.mean([msd_periodic(tr[1], tr[2], L) for tr in traj_per], axis=0)
+params = LangevinParams(T, m, gamma, kB, dt)
+# 反射壁では壁で折り返して速度を反転、周期境界では位置をボックス内に戻す
+ens_ref = simulate(params.replace(boundary=ReflectingBox(L)), n_runs, n_steps, rng=0, record_velocity=False)
+ens_per = simulate(params.replace(boundary=PeriodicBox(L)), n_runs, n_steps, rng=1, record_velocity=False)
+
+t = ens_ref.t
+msd_ref = ens_ref.msd()
+# 周期境界での MSD: 最小イメージ距離
+msd_per = ens_per.msd()
 msd_free = 4 * D * t
 # 飽和の目安: 2次元等方 半径L の一様分布なら <r^2> ~ L^2 (程度)
 r2_sat = L ** 2
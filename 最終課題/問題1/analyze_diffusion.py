@@ -1,46 +1,20 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import os
+from langevin import LangevinParams, simulate_batches
+from accumulators import RunningMSD
 
 plt.rcParams['font.family'] = 'Hiragino Sans'
 plt.rcParams['axes.unicode_minus'] = False
 
-def simulate_brownian_motion(T, m, gamma, kB=1.0, dt=0.01, n_steps=1000, seed=None):
-    if seed is not None:
-        np.random.seed(seed)
-    rx, ry = 0.0, 0.0
-    vx, vy = 0.0, 0.0
-    coeff1 = gamma / m
-    coeff2 = np.sqrt(2.0 * gamma * kB * T / m)
-    t = np.zeros(n_steps + 1)
-    x = np.zeros(n_steps + 1)
-    y = np.zeros(n_steps + 1)
-    t[0] = 0.0
-    x[0] = rx
-    y[0] = ry
-    for n in range(n_steps):
-        eta_x = np.random.normal(0, 1)
-        eta_y = np.random.normal(0, 1)
-        vx = vx - coeff1 * vx * dt + coeff2 * np.sqrt(dt) * eta_x
-        vy = vy - coeff1 * vy * dt + coeff2 * np.sqrt(dt) * eta_y
-        rx += vx * dt
-        ry += vy * dt
-        t[n+1] = (n+1) * dt
-        x[n+1] = rx
-        y[n+1] = ry
-    return t, x, y
-
-def calculate_msd_from_trajectories(trajectories):
-    t = trajectories[0][0]
-    n_times = len(t)
-    n_runs = len(trajectories)
-    msd = np.zeros(n_times)
-    for t_idx in range(n_times):
-        r2_sum = 0.0
-        for _, x, y in trajectories:
-            r2_sum += x[t_idx]**2 + y[t_idx]**2
-        msd[t_idx] = r2_sum / n_runs
-    return t, msd
+def calculate_msd(T, m, gamma, seed=0):
+    # 各パラメータで同じシードを使い、比較のばらつきを抑える
+    # MSD はバッチごとに更新し、軌道は集計の後に捨てる
+    msd = RunningMSD()
+    for ens in simulate_batches(LangevinParams(T, m, gamma, kB, dt), n_runs, n_steps, batch_runs, seed=seed,
+                                record_velocity=False):
+        msd.update(ens.r)
+    return ens.t, msd.msd
 
 def fit_diffusion_coefficient(t, msd, t_start=None, t_end=None):
     if t_start is None:
@@ -55,7 +29,7 @@ def fit_diffusion_coefficient(t, msd, t_start=None, t_end=None):
 
 os.makedirs('figures', exist_ok=True)
     
-kB, dt, n_steps, n_runs = 1.0, 0.01, 1000, 5
+kB, dt, n_steps, n_runs, batch_runs = 1.0, 0.01, 1000, 200, 50
 T_values = [0.5, 1.0, 2.0, 5.0]
 m_values = [0.5, 1.0, 2.0]
 gamma_values = [0.5, 1.0, 2.0]
@@ -67,11 +41,7 @@ T_results = []
 for T in T_values:
     m, gamma = 1.0, 1.0
     D_theory = kB * T / gamma
-    trajectories = []
-    for run in range(n_runs):
-        t, x, y = simulate_brownian_motion(T, m, gamma, kB, dt, n_steps, seed=run)
-        trajectories.append((t, x, y))
-    t, msd = calculate_msd_from_trajectories(trajectories)
+    t, msd = calculate_msd(T, m, gamma)
     D_fit = fit_diffusion_coefficient(t, msd)
     T_results.append((T, D_theory, D_fit))
     print(f"T={T:.2f}: D_theory={D_theory:.6f}, D_fit={D_fit:.6f}, error={abs(D_theory-D_fit)/D_theory*100:.2f}%")
@@ -83,11 +53,7 @@ m_results = []
 for m in m_values:
     T, gamma = 1.0, 1.0
     D_theory = kB * T / gamma
-    trajectories = []
-    for run in range(n_runs):
-        t, x, y = simulate_brownian_motion(T, m, gamma, kB, dt, n_steps, seed=run)
-        trajectories.append((t, x, y))
-    t, msd = calculate_msd_from_trajectories(trajectories)
+    t, msd = calculate_msd(T, m, gamma)
     D_fit = fit_diffusion_coefficient(t, msd)
     m_results.append((m, D_theory, D_fit))
     print(f"m={m:.2f}: D_theory={D_theory:.6f}, D_fit={D_fit:.6f}, error={abs(D_theory-D_fit)/D_theory*100:.2f}%")
@@ -99,11 +65,7 @@ gamma_results = []
 for gamma in gamma_values:
     T, m = 1.0, 1.0
     D_theory = kB * T / gamma
-    trajectories = []
-    for run in range(n_runs):
-        t, x, y = simulate_brownian_motion(T, m, gamma, kB, dt, n_steps, seed=run)
-        trajectories.append((t, x, y))
-    t, msd = calculate_msd_from_trajectories(trajectories)
+    t, msd = calculate_msd(T, m, gamma)
     D_fit = fit_diffusion_coefficient(t, msd)
     gamma_results.append((gamma, D_theory, D_fit))
     print(f"γ={gamma:.2f}: D_theory={D_theory:.6f}, D_fit={D_fit:.6f}, error={abs(D_theory-D_fit)/D_theory*100:.2f}%")
@@ -6,54 +6,35 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import os
+from langevin import LangevinParams, constant_force, simulate_batches
+from accumulators import RunningMoments
 
 plt.rcParams['font.family'] = 'Hiragino Sans'
 plt.rcParams['axes.unicode_minus'] = False
 
 
-def simulate_drift_diffusion(T, m, gamma, F, kB=1.0, dt=0.01, n_steps=1000, seed=None):
-    """m dv/dt = -γ v + F + ξ, 力は x 方向のみ。"""
-    if seed is not None:
-        np.random.seed(seed)
-    rx, ry = 0.0, 0.0
-    vx, vy = 0.0, 0.0
-    coeff1 = gamma / m
-    coeff2 = np.sqrt(2.0 * gamma * kB * T / m)
-    drift_coeff = F / m * dt
-    t = np.arange(n_steps + 1) * dt
-    x = np.zeros(n_steps + 1)
-    y = np.zeros(n_steps + 1)
-    x[0], y[0] = 0.0, 0.0
-    for n in range(n_steps):
-        eta_x = np.random.normal(0, 1)
-        eta_y = np.random.normal(0, 1)
-        vx = vx - coeff1 * vx * dt + drift_coeff + coeff2 * np.sqrt(dt) * eta_x
-        vy = vy - coeff1 * vy * dt + coeff2 * np.sqrt(dt) * eta_y
-        rx += vx * dt
-        ry += vy * dt
-        x[n + 1] = rx
-        y[n + 1] = ry
-    return t, x, y
-
-
 os.makedirs('figures', exist_ok=True)
 
-kB, dt, n_steps, n_runs = 1.0, 0.01, 1000, 50
+kB, dt, n_steps, n_runs, batch_runs = 1.0, 0.01, 1000, 1000, 100
 T, m, gamma = 1.0, 1.0, 1.0
 F = 0.5
 v_drift = F / gamma
 D = kB * T / gamma
 
-trajectories = []
-for run in range(n_runs):
-    t, x, y = simulate_drift_diffusion(T, m, gamma, F, kB, dt, n_steps, seed=run)
-    trajectories.append((t, x, y))
+# m dv/dt = -γ v + F + ξ, 力は x 方向のみ
+# バッチごとに平均・分散を更新し、軌道は描画する数本だけを残す
+params = LangevinParams(T, m, gamma, kB, dt, force=constant_force(F, 0.0))
+x_stats, y_stats = RunningMoments(), RunningMoments()
+samples = None
+for ens in simulate_batches(params, n_runs, n_steps, batch_runs, seed=0, record_velocity=False):
+    x_stats.update(ens.x)
+    y_stats.update(ens.y)
+    if samples is None:
+        samples = ens.r[:8].copy()
 
-t_arr = trajectories[0][0]
-x_mean = np.mean([tr[1] for tr in trajectories], axis=0)
-y_mean = np.mean([tr[2] for tr in trajectories], axis=0)
-x_var = np.var([tr[1] for tr in trajectories], axis=0)
-y_var = np.var([tr[2] for tr in trajectories], axis=0)
+t_arr = ens.t
+x_mean, y_mean = x_stats.mean, y_stats.mean
+x_var, y_var = x_stats.var, y_stats.var
 # 理論: <x> = v_drift * t, Var(x) ≈ 2 D t (長時間), Var(y) ≈ 2 D t
 x_theory = v_drift * t_arr
 var_theory = 2.0 * D * t_arr
@@ -62,7 +43,7 @@ fig, axes = plt.subplots(1, 2, figsize=(12, 5))
 
 # 左: 軌道のサンプル数本 + 平均
 ax = axes[0]
-for i, (_, x, y) in enumerate(trajectories[:8]):
+for x, y in zip(samples[..., 0], samples[..., 1]):
     ax.plot(x, y, '-', alpha=0.5, color='steelblue')
 ax.plot(x_mean, y_mean, 'r-', lw=2.5, label=r'平均 $\langle \mathbf{r} \rangle$')
 ax.plot(x_mean[0], y_mean[0], 'ko', ms=8, label='原点')
@@ -1,66 +1,68 @@
 """
-時間刻み Δt の収束性：オイラー・マルヤマ法で Δt を変え、拡散係数 D が理論に収束するか確認。
+時間刻み Δt の収束性：オイラー・マルヤマ法と OU 過程の厳密な更新で Δt を変え、
+拡散係数 D が理論に収束するか確認。
 """
 import numpy as np
 import matplotlib.pyplot as plt
 import os
+from langevin import LangevinParams
+from sweep import run_sweep
+from bootstrap import sweep_ci
 
 plt.rcParams['font.family'] = 'Hiragino Sans'
 plt.rcParams['axes.unicode_minus'] = False
 
 
-def simulate(T, m, gamma, kB, dt, n_steps, seed):
-    np.random.seed(seed)
-    rx, ry = 0.0, 0.0
-    vx, vy = 0.0, 0.0
-    c1 = gamma / m
-    c2 = np.sqrt(2.0 * gamma * kB * T / m)
-    t = np.arange(n_steps + 1) * dt
-    x = np.zeros(n_steps + 1)
-    y = np.zeros(n_steps + 1)
-    for n in range(n_steps):
-        vx = vx - c1 * vx * dt + c2 * np.sqrt(dt) * np.random.normal(0, 1)
-        vy = vy - c1 * vy * dt + c2 * np.sqrt(dt) * np.random.normal(0, 1)
-        rx += vx * dt
-        ry += vy * dt
-        x[n + 1] = rx
-        y[n + 1] = ry
-    return t, x, y
-
-
-def fit_D(t, x, y):
+def fit_D(t, x, y, tau):
+    """
+    後半の二乗変位を、初速度 0 から出発した場合の理論形
+    <r²> = 4D [t - τ(3 - 4e^{-t/τ} + e^{-2t/τ})/2] で割って D を推定。
+    （4t で割ると慣性による遅れ 1.5τ の分だけ D を小さく見積もる。）
+    """
     n = len(t)
     i0 = n // 2
     t_f = t[i0:]
-    msd = x[i0:] ** 2 + y[i0:] ** 2
-    return np.mean(msd / (4.0 * t_f))
+    a = np.exp(-t_f / tau)
+    t_eff = t_f - tau * (3.0 - 4.0 * a + a * a) / 2.0
+    msd = x[..., i0:] ** 2 + y[..., i0:] ** 2
+    return np.mean(msd / (4.0 * t_eff), axis=-1)
+
+
+def D_per_run(ens):
+    """試行ごとの D（掃引の各セルで実行）。"""
+    return fit_D(ens.t, ens.x, ens.y, ens.params.tau)
 
 
-os.makedirs('figures', exist_ok=True)
+if __name__ == '__main__':
+    os.makedirs('figures', exist_ok=True)
 
-kB, T, m, gamma = 1.0, 1.0, 1.0, 1.0
-D_theory = kB * T / gamma
-t_total = 15.0
-n_runs = 30
-dt_list = [0.1, 0.05, 0.03, 0.02, 0.01, 0.005, 0.002]
-D_means, D_stds = [], []
+    kB, T, m, gamma = 1.0, 1.0, 1.0, 1.0
+    D_theory = kB * T / gamma
+    t_total = 15.0
+    n_runs = 200
+    dt_list = [0.5, 0.2, 0.1, 0.05, 0.03, 0.02, 0.01, 0.005, 0.002]
+    schemes = [('euler', 'オイラー・マルヤマ法', 'bs'), ('exact', '厳密な更新（OU 過程）', 'go')]
 
-for dt in dt_list:
-    n_steps = int(t_total / dt)
-    Ds = [fit_D(*simulate(T, m, gamma, kB, dt, n_steps, r)) for r in range(n_runs)]
-    D_means.append(np.mean(Ds))
-    D_stds.append(np.std(Ds))
+    # 総時間を固定するため、ステップ数はセルごとに dt から決める
+    cells = [dict(integrator=integrator, dt=dt, n_steps=int(round(t_total / dt)))
+             for integrator, _, _ in schemes for dt in dt_list]
+    results = run_sweep(D_per_run, cells, n_runs, n_steps=None, seed=0, base=LangevinParams(T, m, gamma, kB))
+    # 誤差棒は試行ごとの D の平均のブートストラップ 95% 信頼区間
+    D_means, D_lo, D_hi = (a.reshape(len(schemes), len(dt_list)) for a in sweep_ci(results, B=2000, rng=123))
 
-fig, ax = plt.subplots(figsize=(8, 5))
-ax.errorbar(dt_list, D_means, yerr=D_stds, fmt='bs', capsize=5, label='シミュレーション')
-ax.axhline(D_theory, color='r', linestyle='--', lw=2, label=rf'理論 $D = k_B T/\gamma = {D_theory:.2f}$')
-ax.set_xlabel(r'時間刻み $\Delta t$')
-ax.set_ylabel('拡散係数 $D$')
-ax.set_title(r'$\Delta t$ 依存性：総時間 $t = {:.1f}$ 固定、$n={}$ 試行'.format(t_total, n_runs))
-ax.legend()
-ax.grid(True, alpha=0.3)
-ax.set_xscale('log')
-plt.tight_layout()
-plt.savefig('figures/dt_convergence.png', dpi=150)
-plt.close()
-print("dt_convergence.png を保存しました。")
+    fig, ax = plt.subplots(figsize=(8, 5))
+    for (integrator, label, fmt), mean, lo, hi in zip(schemes, D_means, D_lo, D_hi):
+        for dt, D, a, b in zip(dt_list, mean, lo, hi):
+            print(f"{integrator}: dt={dt}, D={D:.4f}, 95% CI=[{a:.4f}, {b:.4f}]")
+        ax.errorbar(dt_list, mean, yerr=[mean - lo, hi - mean], fmt=fmt, capsize=5, alpha=0.8, label=label)
+    ax.axhline(D_theory, color='r', linestyle='--', lw=2, label=rf'理論 $D = k_B T/\gamma = {D_theory:.2f}$')
+    ax.set_xlabel(r'時間刻み $\Delta t$')
+    ax.set_ylabel('拡散係数 $D$')
+    ax.set_title(r'$\Delta t$ 依存性：総時間 $t = {:.1f}$ 固定、$n={}$ 試行（95% CI）'.format(t_total, n_runs))
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    ax.set_xscale('log')
+    plt.tight_layout()
+    plt.savefig('figures/dt_convergence.png', dpi=150)
+    plt.close()
+    print("dt_convergence.png を保存しました。")
@@ -1,8 +1,9 @@
 import numpy as np
 import matplotlib.pyplot as plt
-import subprocess
 import os
 import sys
+from seeds import spawn
+from trajectory_io import run_brownian_motion
 
 plt.rcParams['font.family'] = 'Hiragino Sans'
 plt.rcParams['axes.unicode_minus'] = False
@@ -11,6 +12,7 @@ plt.rcParams['axes.unicode_minus'] = False
 T_values = [0.5, 1.0, 2.0]
 m, gamma, kB = 1.0, 1.0, 1.0
 dt, n_steps = 0.01, 1000
+seed = 0
 
 os.makedirs('data', exist_ok=True)
 os.makedirs('figures', exist_ok=True)
@@ -18,26 +20,15 @@ os.makedirs('figures', exist_ok=True)
 # 各温度についてシミュレーションを実行し、エネルギーを計算
 energies_by_T = []
 
-for T in T_values:
-    energies = []
-    # 複数回実行して統計を取る（より良い分布を得るため）
+for T, seed_T in zip(T_values, spawn(seed, len(T_values))):
+    # 複数回実行して統計を取る（より良い分布を得るため）。各試行に独立なシードを渡して並列に実行
     n_runs = 10
-    for run in range(n_runs):
-        output_file = os.path.join('data', f'energy_T{T}_run{run+1}.dat')
-        with open(output_file, 'w') as f:
-            subprocess.run(['./brownian_motion', str(T), str(m), str(gamma), str(dt), str(n_steps)], stdout=f)
-        
-        # データを読み込み
-        data = np.loadtxt(output_file, comments='#')
-        t = data[:, 0]
-        vx = data[:, 3]
-        vy = data[:, 4]
-        
-        # 運動エネルギーを計算: E = (1/2) * m * (vx^2 + vy^2)
-        energy = 0.5 * m * (vx**2 + vy**2)
-        energies.extend(energy)
+    traj = run_brownian_motion(os.path.join('data', f'energy_T{T}.traj'), n_runs, T, m, gamma, dt, n_steps,
+                               seed=seed_T)
     
-    energies_by_T.append((T, np.array(energies)))
+    # 運動エネルギーを計算: E = (1/2) * m * (vx^2 + vy^2)
+    energies = 0.5 * m * (traj['vx'] ** 2 + traj['vy'] ** 2)
+    energies_by_T.append((T, energies.ravel()))
 
 # ヒストグラムを描画
 plt.figure(figsize=(10, 7))
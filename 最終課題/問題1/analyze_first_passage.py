@@ -5,32 +5,12 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import os
+from langevin import LangevinParams, first_passage_times, simulate
 
 plt.rcParams['font.family'] = 'Hiragino Sans'
 plt.rcParams['axes.unicode_minus'] = False
 
 
-def simulate_until_first_passage(T, m, gamma, R, kB=1.0, dt=0.01, max_steps=50000, seed=None):
-    """|r| >= R になった最初の時刻を返す。超えなければ max_steps * dt。"""
-    if seed is not None:
-        np.random.seed(seed)
-    rx, ry = 0.0, 0.0
-    vx, vy = 0.0, 0.0
-    coeff1 = gamma / m
-    coeff2 = np.sqrt(2.0 * gamma * kB * T / m)
-    for n in range(max_steps):
-        r2 = rx * rx + ry * ry
-        if r2 >= R * R:
-            return (n + 1) * dt
-        eta_x = np.random.normal(0, 1)
-        eta_y = np.random.normal(0, 1)
-        vx = vx - coeff1 * vx * dt + coeff2 * np.sqrt(dt) * eta_x
-        vy = vy - coeff1 * vy * dt + coeff2 * np.sqrt(dt) * eta_y
-        rx += vx * dt
-        ry += vy * dt
-    return max_steps * dt
-
-
 os.makedirs('figures', exist_ok=True)
 
 kB, dt = 1.0, 0.01
@@ -40,7 +20,9 @@ R = 2.0
 n_runs = 2000
 max_steps = 50000
 
-fpt = np.array([simulate_until_first_passage(T, m, gamma, R, kB, dt, max_steps, seed=r) for r in range(n_runs)])
+params = LangevinParams(T, m, gamma, kB, dt)
+# |r| >= R になった最初の時刻（超えなければ max_steps * dt）
+fpt = first_passage_times(params, R, n_runs, max_steps, rng=0)
 # 理論: 2次元、原点から半径 R の円への平均初到達時間 = R²/(4D)
 tau_theory = R * R / (4.0 * D)
 mean_fpt = np.mean(fpt)
@@ -60,23 +42,10 @@ ax.grid(True, alpha=0.3)
 
 # 右: サンプル軌道の例（R の円に到達するまで）
 ax = axes[1]
-np.random.seed(123)
-rx, ry = 0.0, 0.0
-vx, vy = 0.0, 0.0
-coeff1 = gamma / m
-coeff2 = np.sqrt(2.0 * gamma * kB * T / m)
-path_x, path_y = [0.0], [0.0]
-for n in range(max_steps):
-    if rx * rx + ry * ry >= R * R:
-        break
-    eta_x = np.random.normal(0, 1)
-    eta_y = np.random.normal(0, 1)
-    vx = vx - coeff1 * vx * dt + coeff2 * np.sqrt(dt) * eta_x
-    vy = vy - coeff1 * vy * dt + coeff2 * np.sqrt(dt) * eta_y
-    rx += vx * dt
-    ry += vy * dt
-    path_x.append(rx)
-    path_y.append(ry)
+sample = simulate(params, 1, max_steps, rng=123, record_velocity=False)
+hit = np.nonzero(sample.x[0] ** 2 + sample.y[0] ** 2 >= R * R)[0]
+n_hit = hit[0] + 1 if len(hit) else max_steps + 1
+path_x, path_y = sample.x[0, :n_hit], sample.y[0, :n_hit]
 
 theta = np.linspace(0, 2 * np.pi, 200)
 ax.plot(np.array(path_x), np.array(path_y), 'b-', lw=1.5, label='軌道')
@@ -1,10 +1,13 @@
 """
 複数粒子・排除体積：N 個の粒子を周期ボックス内でランジュバン運動させ、
-排除体積（剛体球）の衝突で反発する簡易モデル。MSD を粒子平均で評価。
+排除体積（剛体円板）の衝突で反発する簡易モデル。MSD を粒子平均で評価し、
+充填率 φ = N π (σ/2)² / (2L)² による拡散の抑制を調べる。
 """
 import numpy as np
 import matplotlib.pyplot as plt
 import os
+from langevin import LangevinParams, PeriodicBox, simulate_particles
+from correlation import unwrap
 
 plt.rcParams['font.family'] = 'Hiragino Sans'
 plt.rcParams['axes.unicode_minus'] = False
@@ -13,86 +16,52 @@ kB, T, m, gamma = 1.0, 1.0, 1.0, 1.0
 D = kB * T / gamma
 
 
-def min_image(dr, L):
-    """周期 [-L,L] での最小イメージ距離。"""
-    return np.where(dr > L, dr - 2 * L, np.where(dr < -L, dr + 2 * L, dr))
+def box_half_width(N, sigma, phi):
+    """充填率 phi になる周期ボックス [-L, L]^2 の L。"""
+    return np.sqrt(N * np.pi * sigma ** 2 / (4.0 * phi)) / 2.0
 
 
-def simulate_n_particles(N, L, sigma, dt, n_steps, seed):
-    """周期 [-L,L]^2、直径 sigma の剛体球。衝突時は反発。"""
-    np.random.seed(seed)
-    c1 = gamma / m
-    c2 = np.sqrt(2.0 * gamma * kB * T / m)
-    n_per_side = int(np.ceil(np.sqrt(N)))
-    dx = 2 * L / (n_per_side + 1)
-    pos = np.zeros((N, 2))
-    vel = np.zeros((N, 2))
-    for i in range(N):
-        ix, iy = i % n_per_side, i // n_per_side
-        pos[i] = [-L + (ix + 1) * dx, -L + (iy + 1) * dx]
-    vel += 0.1 * np.random.standard_normal((N, 2))
+def fit_D(t, msd):
+    """後半の MSD の傾きから D を推定。"""
+    i0 = len(t) // 2
+    return np.polyfit(t[i0:], msd[i0:], 1)[0] / 4.0
 
-    def wrap(z):
-        return (z + L) % (2 * L) - L
 
-    traj = np.zeros((n_steps + 1, N, 2))
-    traj[0] = pos.copy()
-    for n in range(n_steps):
-        for i in range(N):
-            eta = np.random.standard_normal(2)
-            vel[i] = vel[i] - c1 * vel[i] * dt + c2 * np.sqrt(dt) * eta
-        pos = pos + vel * dt
-        pos = wrap(pos)
-        for i in range(N):
-            for j in range(i + 1, N):
-                dr = min_image(pos[j] - pos[i], L)
-                d = np.sqrt(np.sum(dr ** 2))
-                if d < sigma and d > 1e-10:
-                    nvec = dr / d
-                    vn = np.dot(vel[j] - vel[i], nvec)
-                    if vn < 0:
-                        vel[i] = vel[i] + vn * nvec
-                        vel[j] = vel[j] - vn * nvec
-        traj[n + 1] = pos.copy()
-    return traj
+os.makedirs('figures', exist_ok=True)
 
+N, sigma = 10000, 1.0
+dt, n_steps, record_every = 0.01, 1000, 10
+phi_list = [0.01, 0.1, 0.2, 0.3, 0.4, 0.5]
+colors = plt.cm.viridis(np.linspace(0, 0.9, len(phi_list)))
 
-def msd_min_image(traj, L):
-    """周期境界での MSD（最小イメージ）。"""
-    n_t, N, _ = traj.shape
-    msd = np.zeros((n_t, N))
-    for i in range(N):
-        r0 = traj[0, i]
-        for t in range(n_t):
-            dr = min_image(traj[t, i] - r0, L)
-            msd[t, i] = np.sum(dr ** 2)
-    return np.mean(msd, axis=1)
+fig, axes = plt.subplots(1, 2, figsize=(13, 5))
+D_eff = []
+for phi, color in zip(phi_list, colors):
+    L = box_half_width(N, sigma, phi)
+    params = LangevinParams(T, m, gamma, kB, dt, boundary=PeriodicBox(L))
+    # 各充填率で同じシードを使い、比較のばらつきを抑える
+    ens = simulate_particles(params, N, sigma, n_steps, rng=0, record_every=record_every)
+    r = unwrap(ens.r, L)
+    msd = np.mean(np.sum((r - r[:, :1]) ** 2, axis=-1), axis=0)
+    D_eff.append(fit_D(ens.t, msd))
+    print(f"φ={phi:.2f}, L={L:.1f}, D_eff={D_eff[-1]:.4f}")
+    axes[0].plot(ens.t, msd, color=color, lw=2, label=rf'$\phi={phi}$')
+t_arr = ens.t
+axes[0].plot(t_arr, 4 * D * t_arr, 'k--', lw=1.5, label=r'自由空間 $4Dt$')
+axes[0].set_xlabel(r'時間 $t$')
+axes[0].set_ylabel(r'$\langle r^2 \rangle$')
+axes[0].set_title(rf'$N={N}$ 粒子・排除体積 $\sigma={sigma}$（周期境界）')
+axes[0].legend()
+axes[0].grid(True, alpha=0.3)
 
-
-# 簡略化: 粒子数少なめ、σ 小さい
-N, L, sigma = 8, 4.0, 0.4
-dt, n_steps, n_runs = 0.01, 1500, 20
-t_arr = np.arange(n_steps + 1) * dt
-msd_list = []
-for r in range(n_runs):
-    traj = simulate_n_particles(N, L, sigma, dt, n_steps, r)
-    msd = msd_min_image(traj, L)
-    msd_list.append(msd)
-msd_mean = np.mean(msd_list, axis=0)
-msd_std = np.std(msd_list, axis=0)
-msd_free = 4 * D * t_arr
-r2_sat = L ** 2
-
-fig, ax = plt.subplots(figsize=(8, 5))
-ax.fill_between(t_arr, msd_mean - msd_std, msd_mean + msd_std, alpha=0.3, color='blue')
-ax.plot(t_arr, msd_mean, 'b-', lw=2, label=rf'$N={N}$ 粒子・排除体積 $\sigma={sigma}$')
-ax.plot(t_arr, msd_free, 'k--', lw=1.5, label=r'自由空間 $4Dt$')
-ax.axhline(r2_sat, color='gray', ls=':', alpha=0.8, label=rf'飽和目安 $\sim L^2$')
-ax.set_xlabel(r'時間 $t$')
-ax.set_ylabel(r'$\langle r^2 \rangle$')
-ax.set_title('複数粒子・排除体積（周期境界）')
-ax.legend()
-ax.grid(True, alpha=0.3)
+axes[1].plot(phi_list, np.array(D_eff) / D, 'bo-', lw=2, ms=7, label='シミュレーション')
+axes[1].axhline(1.0, color='k', ls='--', lw=1.5, label='自由粒子')
+axes[1].set_xlabel(r'充填率 $\phi$')
+axes[1].set_ylabel(r'$D_{\mathrm{eff}} / D$')
+axes[1].set_title('排除体積による拡散の抑制')
+axes[1].set_ylim(0, 1.1)
+axes[1].legend()
+axes[1].grid(True, alpha=0.3)
 plt.tight_layout()
 plt.savefig('figures/multiparticle.png', dpi=150)
 plt.close()
@@ -7,6 +7,9 @@ import matplotlib.pyplot as plt
 import subprocess
 import os
 from scipy import stats
+from langevin import LangevinParams, simulate, simulate_batches
+from accumulators import RunningCDF, RunningHistogram
+from sweep import run_sweep
 
 plt.rcParams['font.family'] = 'Hiragino Sans'
 plt.rcParams['axes.unicode_minus'] = False
@@ -15,35 +18,18 @@ os.makedirs('data', exist_ok=True)
 os.makedirs('figures', exist_ok=True)
 
 
-def simulate_brownian_motion(T, m, gamma, kB=1.0, dt=0.01, n_steps=1000, seed=None):
-    if seed is not None:
-        np.random.seed(seed)
-    rx, ry = 0.0, 0.0
-    vx, vy = 0.0, 0.0
-    coeff1 = gamma / m
-    coeff2 = np.sqrt(2.0 * gamma * kB * T / m)
-    vx_arr = []
-    vy_arr = []
-    for n in range(n_steps + 1):
-        vx_arr.append(vx)
-        vy_arr.append(vy)
-        if n == n_steps:
-            break
-        eta_x = np.random.normal(0, 1)
-        eta_y = np.random.normal(0, 1)
-        vx = vx - coeff1 * vx * dt + coeff2 * np.sqrt(dt) * eta_x
-        vy = vy - coeff1 * vy * dt + coeff2 * np.sqrt(dt) * eta_y
-        rx += vx * dt
-        ry += vy * dt
-    return np.array(vx_arr), np.array(vy_arr)
-
-
 def fit_diffusion_coefficient(t, x, y):
-    """MSD の長時間傾きから D を推定。"""
+    """MSD の長時間傾きから D を推定。x, y が (試行数, 時刻) なら試行ごとの D を返す。"""
     n = len(t)
     t_fit = t[n // 2:]
-    msd = x[n // 2:] ** 2 + y[n // 2:] ** 2
-    return np.mean(msd / (4.0 * t_fit))
+    msd = x[..., n // 2:] ** 2 + y[..., n // 2:] ** 2
+    return np.mean(msd / (4.0 * t_fit), axis=-1)
+
+
+def diffusion_mean_std(ens):
+    """試行ごとの D の平均と標準偏差（掃引の各セルで実行）。"""
+    D_list = fit_diffusion_coefficient(ens.t, ens.x, ens.y)
+    return np.mean(D_list), np.std(D_list)
 
 
 def run_normal_ks_test():
@@ -53,11 +39,10 @@ def run_normal_ks_test():
     exe = './normal_rand'
     if not os.path.isfile(exe):
         print("normal_rand が存在しません。numpy で代替します。")
-        np.random.seed(42)
-        data = np.random.standard_normal(n_samples)
+        data = np.random.default_rng(42).standard_normal(n_samples)
     else:
         with open(path, 'w') as f:
-            subprocess.run([exe, str(n_samples)], stdout=f)
+            subprocess.run([exe, str(n_samples), '42'], stdout=f)
         data = np.loadtxt(path)
 
     ks_stat, p_value = stats.kstest(data, 'norm', args=(0, 1))
@@ -79,24 +64,28 @@ def run_normal_ks_test():
 
 
 def run_energy_ks_test():
-    """運動エネルギー分布の指数分布への K-S 検定。"""
+    """
+    運動エネルギー分布の指数分布への K-S 検定。エネルギーはバッチごとに
+    細かいビンの累積分布とヒストグラムに集計し、軌道は保持しない。
+    """
     kB, dt, n_steps = 1.0, 0.01, 1000
     T, m, gamma = 1.0, 1.0, 1.0
-    n_runs = 20
-    energies = []
-    for run in range(n_runs):
-        vx, vy = simulate_brownian_motion(T, m, gamma, kB, dt, n_steps, seed=run)
-        E = 0.5 * m * (vx ** 2 + vy ** 2)
-        energies.extend(E)
-    energies = np.array(energies)
-
+    n_runs, batch_runs = 20, 5
     scale = kB * T
-    ks_stat, p_value = stats.kstest(energies, 'expon', args=(0, scale))
+    E_max = 8 * scale
+    cdf = RunningCDF(bins=4000, range=(0, 20 * scale))
+    hist = RunningHistogram(bins=40, range=(0, E_max))
+    for ens in simulate_batches(LangevinParams(T, m, gamma, kB, dt), n_runs, n_steps, batch_runs, seed=0):
+        energies = ens.kinetic_energy()
+        cdf.update(energies)
+        hist.update(energies)
+
+    ks_stat, p_value = cdf.ks_test(stats.expon(0, scale).cdf)
     print(f"エネルギー分布 K-S: 統計量={ks_stat:.5f}, p値={p_value:.5f}")
 
     fig, ax = plt.subplots(figsize=(8, 5))
-    ax.hist(energies, bins=40, density=True, alpha=0.7, color='forestgreen', edgecolor='black', label='ヒストグラム')
-    E_max = min(energies.max(), 8 * kB * T)
+    ax.stairs(hist.density(), hist.edges, fill=True, alpha=0.7, color='forestgreen', label='ヒストグラム')
+    ax.stairs(hist.density(), hist.edges, color='black', lw=0.8)
     E_range = np.linspace(1e-6, E_max, 200)
     ax.plot(E_range, (1 / (kB * T)) * np.exp(-E_range / (kB * T)), 'r-', lw=2,
             label=rf'理論 $P(E)\propto\exp(-E/k_B T)$')
@@ -117,14 +106,9 @@ def run_velocity_components_test():
     kB, dt, n_steps = 1.0, 0.01, 1000
     T, m, gamma = 1.0, 1.0, 1.0
     n_runs = 15
-    vx_all = []
-    vy_all = []
-    for run in range(n_runs):
-        vx, vy = simulate_brownian_motion(T, m, gamma, kB, dt, n_steps, seed=run)
-        vx_all.extend(vx)
-        vy_all.extend(vy)
-    vx_all = np.array(vx_all)
-    vy_all = np.array(vy_all)
+    ens = simulate(LangevinParams(T, m, gamma, kB, dt), n_runs, n_steps, rng=1)
+    vx_all = ens.vx.ravel()
+    vy_all = ens.vy.ravel()
     sigma = np.sqrt(kB * T / m)
 
     fig, axes = plt.subplots(1, 2, figsize=(12, 5))
@@ -149,42 +133,25 @@ def run_diffusion_error_bars():
     kB, dt, n_steps = 1.0, 0.01, 1000
     n_runs = 40
 
-    def sim_traj(T, m, gamma, run):
-        vx, vy = simulate_brownian_motion(T, m, gamma, kB, dt, n_steps, seed=run)
-        rx = np.zeros(n_steps + 1)
-        ry = np.zeros(n_steps + 1)
-        rx[0], ry[0] = 0.0, 0.0
-        for n in range(n_steps):
-            rx[n + 1] = rx[n] + vx[n] * dt
-            ry[n + 1] = ry[n] + vy[n] * dt
-        t = np.arange(n_steps + 1) * dt
-        return t, rx, ry
-
     T_vals = [0.5, 1.0, 2.0, 5.0]
     m_vals = [0.5, 1.0, 2.0]
     gamma_vals = [0.5, 1.0, 2.0]
 
-    def run_sweep(param_vals, vary='T'):
-        D_means, D_stds, D_theory = [], [], []
-        for p in param_vals:
-            if vary == 'T':
-                T, m, gamma = p, 1.0, 1.0
-            elif vary == 'm':
-                T, m, gamma = 1.0, p, 1.0
-            else:
-                T, m, gamma = 1.0, 1.0, p
-            D_theory.append(kB * T / gamma)
-            D_list = []
-            for r in range(n_runs):
-                t, x, y = sim_traj(T, m, gamma, r)
-                D_list.append(fit_diffusion_coefficient(t, x, y))
-            D_means.append(np.mean(D_list))
-            D_stds.append(np.std(D_list))
-        return np.array(D_means), np.array(D_stds), np.array(D_theory), param_vals
-
-    Dm_T, Ds_T, Dt_T, Tv = run_sweep(T_vals, 'T')
-    Dm_m, Ds_m, Dt_m, mv = run_sweep(m_vals, 'm')
-    Dm_g, Ds_g, Dt_g, gv = run_sweep(gamma_vals, 'gamma')
+    # 3 つの掃引をまとめて並列に計算する（共通の T=m=γ=1 のセルは 1 回だけ計算）。
+    # 各パラメータで同じシードを使い、比較のばらつきを抑える
+    sweeps = [('T', T_vals), ('m', m_vals), ('gamma', gamma_vals)]
+    cells = [{name: p} for name, vals in sweeps for p in vals]
+    base = LangevinParams(1.0, 1.0, 1.0, kB, dt)
+    results = iter(run_sweep(diffusion_mean_std, cells, n_runs, n_steps, seed=0, base=base))
+
+    def collect(vary, param_vals):
+        D_means, D_stds = np.array([next(results) for _ in param_vals]).T
+        D_theory = np.array([base.replace(**{vary: p}).D for p in param_vals])
+        return D_means, D_stds, D_theory, param_vals
+
+    Dm_T, Ds_T, Dt_T, Tv = collect('T', T_vals)
+    Dm_m, Ds_m, Dt_m, mv = collect('m', m_vals)
+    Dm_g, Ds_g, Dt_g, gv = collect('gamma', gamma_vals)
 
     fig, axes = plt.subplots(1, 3, figsize=(14, 5))
     axes[0].errorbar(Tv, Dm_T, yerr=Ds_T, fmt='bs', capsize=5, label='シミュレーション')
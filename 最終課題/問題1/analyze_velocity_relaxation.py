@@ -5,45 +5,21 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import os
+from langevin import LangevinParams, simulate
 
 plt.rcParams['font.family'] = 'Hiragino Sans'
 plt.rcParams['axes.unicode_minus'] = False
 
 
-def simulate_brownian_motion_with_velocity(T, m, gamma, kB=1.0, dt=0.01, n_steps=1000, seed=None):
-    """位置と速度の時系列。初期 v=0。"""
-    if seed is not None:
-        np.random.seed(seed)
-    rx, ry = 0.0, 0.0
-    vx, vy = 0.0, 0.0
-    coeff1 = gamma / m
-    coeff2 = np.sqrt(2.0 * gamma * kB * T / m)
-    t = np.arange(n_steps + 1) * dt
-    vx_arr = np.zeros(n_steps + 1)
-    vy_arr = np.zeros(n_steps + 1)
-    vx_arr[0], vy_arr[0] = 0.0, 0.0
-    for n in range(n_steps):
-        eta_x = np.random.normal(0, 1)
-        eta_y = np.random.normal(0, 1)
-        vx = vx - coeff1 * vx * dt + coeff2 * np.sqrt(dt) * eta_x
-        vy = vy - coeff1 * vy * dt + coeff2 * np.sqrt(dt) * eta_y
-        rx += vx * dt
-        ry += vy * dt
-        vx_arr[n + 1] = vx
-        vy_arr[n + 1] = vy
-    return t, vx_arr, vy_arr
-
-
 os.makedirs('figures', exist_ok=True)
 
 kB, dt, n_steps, n_runs = 1.0, 0.01, 1000, 100
 T, m, gamma = 1.0, 1.0, 1.0
 v2_eq = 2.0 * kB * T / m  # 熱平衡での <v²>
 
-v2_list = []
-for run in range(n_runs):
-    t, vx, vy = simulate_brownian_motion_with_velocity(T, m, gamma, kB, dt, n_steps, seed=run)
-    v2_list.append(vx**2 + vy**2)
+# 初期 v=0 の n_runs 本を同時に計算
+ens = simulate(LangevinParams(T, m, gamma, kB, dt), n_runs, n_steps, rng=0)
+v2_list = ens.vx**2 + ens.vy**2
 
 v2_mean = np.mean(v2_list, axis=0)
 v2_std = np.std(v2_list, axis=0)
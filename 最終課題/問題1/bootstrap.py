@@ -0,0 +1,159 @@
+"""
+ブートストラップ（リサンプリング）による信頼区間。
+
+リサンプルの添字は (反復数, 標本数) の行列としてまとめて生成し、統計量は
+statistic(resampled, axis=-1) の形で全反復を一度に計算する。リサンプルした配列が
+max_bytes を超える場合は反復をブロックに分けて計算する（添字の乱数列は分け方によらない）。
+
+    percentile: ブートストラップ分布の分位点
+    bca:        偏りと歪み（ジャックナイフで推定した加速度）を補正した分位点（BCa 法）
+    block=k:    長さ k の連続したブロックを重ねて選ぶ（moving block bootstrap）。
+                時系列のように相関のある標本では i.i.d. のリサンプルは区間を狭く見積もる。
+
+    from bootstrap import bootstrap
+    result = bootstrap(Ds, np.mean, B=2000, rng=123)
+    result.estimate, result.low, result.high       # 点推定と 95% CI
+"""
+from dataclasses import dataclass
+import numpy as np
+from scipy import stats
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+METHODS = ("percentile", "bca")
+
+
+@dataclass
+class BootstrapResult:
+    """点推定、信頼区間の下端・上端と、ブートストラップ分布（(B, ...) の配列）。"""
+    estimate: np.ndarray
+    low: np.ndarray
+    high: np.ndarray
+    distribution: np.ndarray
+
+
+def bootstrap_indices(n, B, rng=None):
+    """i.i.d. リサンプルの添字 (B, n)。"""
+    return np.random.default_rng(rng).integers(0, n, size=(B, n))
+
+
+def block_bootstrap_indices(n, B, block, rng=None):
+    """moving block bootstrap の添字 (B, n)。長さ block の連続したブロックを始点を選んでつなぐ。"""
+    if not 1 <= block <= n:
+        raise ValueError(f"block は 1 以上 {n} 以下である必要があります: {block}")
+    rng = np.random.default_rng(rng)
+    n_blocks = -(-n // block)
+    starts = rng.integers(0, n - block + 1, size=(B, n_blocks))
+    return (starts[..., np.newaxis] + np.arange(block)).reshape(B, -1)[:, :n]
+
+
+def jackknife_indices(n):
+    """i 番目の標本を除いた添字 (n, n - 1)。"""
+    j = np.arange(n - 1)
+    return j[np.newaxis] + (j[np.newaxis] >= np.arange(n)[:, np.newaxis])
+
+
+def _chunk_rows(x, row_len, max_bytes):
+    """1 ブロックの反復数（リサンプルした配列と添字が max_bytes 以下になる数、最低 1）。"""
+    row_bytes = (x.size // x.shape[-1]) * row_len * x.itemsize + row_len * 8
+    return max(1, max_bytes // row_bytes)
+
+
+def _statistic_rows(x, make_indices, n_rows, row_len, statistic, max_bytes):
+    """x (..., n) を添字の行ごとにリサンプルして statistic を計算し、(n_rows, ...) で返す。"""
+    chunk = _chunk_rows(x, row_len, max_bytes)
+    out = []
+    for start in range(0, n_rows, chunk):
+        idx = make_indices(start, min(chunk, n_rows - start))
+        out.append(np.moveaxis(statistic(x[..., idx], axis=-1), -1, 0))
+    return np.concatenate(out, axis=0)
+
+
+def bootstrap_distribution(data, statistic=np.mean, B=2000, axis=-1, rng=None, block=None,
+                           max_bytes=DEFAULT_MAX_BYTES):
+    """
+    ブートストラップ分布。statistic は statistic(array, axis=...) の形で呼べる関数
+    （np.mean, np.median など）。data の axis 以外の軸は独立に（同じ添字で）計算する。
+
+    Returns:
+        (B, ...) の配列（... は data から axis を除いた形）
+    """
+    x = np.moveaxis(np.asarray(data, dtype=float), axis, -1)
+    n = x.shape[-1]
+    rng = np.random.default_rng(rng)
+    if block is None:
+        make = lambda start, rows: bootstrap_indices(n, rows, rng)
+    else:
+        make = lambda start, rows: block_bootstrap_indices(n, rows, block, rng)
+    return _statistic_rows(x, make, B, n, statistic, max_bytes)
+
+
+def jackknife(data, statistic=np.mean, axis=-1, max_bytes=DEFAULT_MAX_BYTES):
+    """ジャックナイフ（1 つ抜き）の統計量 (n, ...)。"""
+    x = np.moveaxis(np.asarray(data, dtype=float), axis, -1)
+    n = x.shape[-1]
+    idx = jackknife_indices(n)
+    return _statistic_rows(x, lambda start, rows: idx[start:start + rows], n, n - 1, statistic, max_bytes)
+
+
+def _quantile(sorted_boot, q):
+    """要素ごとに異なる分位点 q（... の形）を、ソート済みの (B, ...) から線形補間で求める。"""
+    B = len(sorted_boot)
+    pos = np.clip(q, 0.0, 1.0) * (B - 1)
+    lo = np.floor(pos).astype(int)
+    hi = np.minimum(lo + 1, B - 1)
+    take = lambda i: np.take_along_axis(sorted_boot, np.asarray(i)[np.newaxis], axis=0)[0]
+    return take(lo) + (pos - lo) * (take(hi) - take(lo))
+
+
+def bootstrap(data, statistic=np.mean, B=2000, level=0.95, method="percentile", axis=-1, rng=None,
+              block=None, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    statistic の点推定と信頼区間。
+
+    Args:
+        method: "percentile" または "bca"
+        block: None なら i.i.d.、整数なら moving block bootstrap のブロック長
+               （BCa の加速度はジャックナイフで推定するため、block とは組み合わせられない）
+
+    Returns:
+        BootstrapResult
+    """
+    if method not in METHODS:
+        raise ValueError(f"未知の方法です: {method}（{', '.join(METHODS)} のいずれか）")
+    if method == "bca" and block is not None:
+        raise ValueError("BCa 法は block bootstrap と組み合わせられません")
+    x = np.moveaxis(np.asarray(data, dtype=float), axis, -1)
+    estimate = statistic(x, axis=-1)
+    boot = bootstrap_distribution(x, statistic, B, -1, rng, block, max_bytes)
+    alpha = (1.0 - level) / 2.0
+    q = np.broadcast_to(np.array([alpha, 1.0 - alpha]).reshape((2,) + (1,) * np.ndim(estimate)),
+                        (2,) + np.shape(estimate))
+
+    if method == "bca":
+        z0 = stats.norm.ppf((np.sum(boot < estimate, axis=0) + 0.5 * np.sum(boot == estimate, axis=0)) / B)
+        jack = jackknife(x, statistic, -1, max_bytes)
+        d = jack.mean(axis=0) - jack
+        num, den = np.sum(d ** 3, axis=0), 6.0 * np.sum(d ** 2, axis=0) ** 1.5
+        a = np.divide(num, den, out=np.zeros_like(num), where=den > 0)
+        z = z0 + stats.norm.ppf(q)
+        q = stats.norm.cdf(z0 + z / (1.0 - a * z))
+
+    sorted_boot = np.sort(boot, axis=0)
+    low, high = _quantile(sorted_boot, q[0]), _quantile(sorted_boot, q[1])
+    return BootstrapResult(estimate, low, high, boot)
+
+
+def sweep_ci(results, statistic=np.mean, **kwargs):
+    """
+    run_sweep の結果（セルごとの試行ごとの値の配列）に信頼区間を付ける。
+    各セルの試行数が同じならまとめて 1 回のリサンプルで計算する。
+
+    Returns:
+        (点推定, 下端, 上端)、いずれも (セル数,)
+    """
+    results = [np.asarray(r, dtype=float) for r in results]
+    if len({r.shape for r in results}) == 1:
+        res = bootstrap(np.stack(results), statistic, axis=-1, **kwargs)
+        return res.estimate, res.low, res.high
+    res = [bootstrap(r, statistic, axis=-1, **kwargs) for r in results]
+    return tuple(np.array([getattr(r, name) for r in res]) for name in ("estimate", "low", "high"))
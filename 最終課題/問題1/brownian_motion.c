@@ -1,6 +1,7 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <math.h>
+#include <string.h>
 #include <time.h>
 
 double normal_rand() {
@@ -10,6 +11,15 @@ double normal_rand() {
     return sqrt(-2.0 * log(u1)) * cos(2.0 * M_PI * u2);
 }
 
+void write_row(int binary, double t, double rx, double ry, double vx, double vy) {
+    if (binary) {
+        double row[5] = {t, rx, ry, vx, vy};
+        fwrite(row, sizeof(double), 5, stdout);
+    } else {
+        printf("%.15e %.15e %.15e %.15e %.15e\n", t, rx, ry, vx, vy);
+    }
+}
+
 int main(int argc, char *argv[]) {
     double gamma = 1.0, kB = 1.0, T = 1.0, m = 1.0, dt = 0.01;
     int n_steps = 1000;
@@ -18,14 +28,18 @@ int main(int argc, char *argv[]) {
     if (argc >= 4) gamma = atof(argv[3]);
     if (argc >= 5) dt = atof(argv[4]);
     if (argc >= 6) n_steps = atoi(argv[5]);
+    /* 7番目の引数でシードを指定（省略時は現在時刻） */
+    unsigned int seed = (argc >= 7) ? (unsigned int)strtoul(argv[6], NULL, 10) : (unsigned int)time(NULL);
+    /* 8番目の引数が "binary" なら、各行を float64 の 5 値としてそのまま出力（ヘッダーなし） */
+    int binary = (argc >= 8) && strcmp(argv[7], "binary") == 0;
     
     double t = 0.0, rx = 0.0, ry = 0.0, vx = 0.0, vy = 0.0;
     double coeff1 = gamma / m;
     double coeff2 = sqrt(2.0 * gamma * kB * T / m);
     
-    srand((unsigned int)time(NULL));
-    printf("# t x y vx vy\n");
-    printf("%.15e %.15e %.15e %.15e %.15e\n", t, rx, ry, vx, vy);
+    srand(seed);
+    if (!binary) printf("# t x y vx vy\n");
+    write_row(binary, t, rx, ry, vx, vy);
     
     for (int n = 0; n < n_steps; n++) {
         double eta_x = normal_rand();
@@ -35,7 +49,7 @@ int main(int argc, char *argv[]) {
         rx += vx * dt;
         ry += vy * dt;
         t += dt;
-        printf("%.15e %.15e %.15e %.15e %.15e\n", t, rx, ry, vx, vy);
+        write_row(binary, t, rx, ry, vx, vy);
     }
     return 0;
 }
@@ -0,0 +1,94 @@
+"""
+時系列の相関・MSD・スペクトルの推定。
+
+自己相関はウィーナー・ヒンチンの定理により、ゼロ埋めした FFT のパワーを逆変換して
+O(L log L) で計算する。配列は最後の軸（ベクトル量は最後から 2 番目の軸）を時間とし、
+それより前の軸（試行など）はまとめて一度に処理する。
+
+    from correlation import vector_autocorrelation, green_kubo
+    C = vector_autocorrelation(ens.v, max_lag=500).mean(axis=0)   # <v(0)·v(τ)>
+    D = green_kubo(C, dt)
+"""
+import numpy as np
+from scipy import signal
+
+
+def _fft_length(n):
+    """循環相関の折り返しを避けるゼロ埋め長（2 の冪）。"""
+    return 1 << int(np.ceil(np.log2(max(n, 1))))
+
+
+def cross_correlation(x, y, max_lag=None):
+    """
+    相互相関 C_xy(τ) = 1/(L-τ) Σ_t x(t) y(t+τ)（τ = 0, ..., max_lag-1）。
+    x, y は (..., L)、戻り値は (..., max_lag)。
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    L = x.shape[-1]
+    max_lag = L if max_lag is None else min(max_lag, L)
+    n = _fft_length(2 * L - 1)
+    fx = np.fft.rfft(x, n, axis=-1)
+    fy = fx if y is x else np.fft.rfft(y, n, axis=-1)
+    c = np.fft.irfft(np.conj(fx) * fy, n, axis=-1)[..., :max_lag]
+    return c / (L - np.arange(max_lag))
+
+
+def autocorrelation(x, max_lag=None):
+    """自己相関 C(τ) = 1/(L-τ) Σ_t x(t) x(t+τ)。x は (..., L)、戻り値は (..., max_lag)。"""
+    x = np.asarray(x, dtype=float)
+    return cross_correlation(x, x, max_lag)
+
+
+def vector_autocorrelation(v, max_lag=None):
+    """ベクトル量の自己相関 <v(t)·v(t+τ)>（成分の和）。v は (..., L, 次元)、戻り値は (..., max_lag)。"""
+    v = np.moveaxis(np.asarray(v, dtype=float), -1, -2)
+    return np.sum(autocorrelation(v, max_lag), axis=-2)
+
+
+def time_averaged_msd(r, max_lag=None):
+    """
+    時間平均 MSD(τ) = 1/(L-τ) Σ_t |r(t+τ) - r(t)|²。r は (..., L, 次元)、戻り値は (..., max_lag)。
+    |r(t+τ) - r(t)|² = |r(t)|² + |r(t+τ)|² - 2 r(t)·r(t+τ) と分け、第 3 項を FFT の自己相関、
+    前の 2 項を累積和で求める（O(L log L)）。周期境界の軌道は unwrap してから渡す。
+    """
+    r = np.asarray(r, dtype=float)
+    L = r.shape[-2]
+    max_lag = L if max_lag is None else min(max_lag, L)
+    r2 = np.sum(r ** 2, axis=-1)
+    zero = np.zeros(r2.shape[:-1] + (1,))
+    head = np.concatenate([zero, np.cumsum(r2, axis=-1)], axis=-1)[..., :max_lag]
+    tail = np.concatenate([zero, np.cumsum(r2[..., ::-1], axis=-1)], axis=-1)[..., :max_lag]
+    total = 2.0 * np.sum(r2, axis=-1, keepdims=True)
+    s1 = (total - head - tail) / (L - np.arange(max_lag))
+    return s1 - 2.0 * vector_autocorrelation(r, max_lag)
+
+
+def unwrap(r, L):
+    """周期 [-L, L] でボックス内に戻された軌道 (..., 時間, 次元) を、最小イメージの変位をつないで復元する。"""
+    r = np.asarray(r, dtype=float)
+    step = np.diff(r, axis=-2)
+    step -= 2 * L * np.round(step / (2 * L))
+    return np.concatenate([r[..., :1, :], r[..., :1, :] + np.cumsum(step, axis=-2)], axis=-2)
+
+
+def green_kubo(C, dt, dims=2):
+    """Green-Kubo: D = (1/d) ∫_0^∞ <v(0)·v(t)> dt（台形則）。C は vector_autocorrelation の結果。"""
+    C = np.asarray(C, dtype=float)
+    integral = dt * (np.sum(C, axis=-1) - 0.5 * (C[..., 0] + C[..., -1]))
+    return integral / dims
+
+
+def welch_spectrum(x, dt, nperseg=256):
+    """
+    Welch 法のパワースペクトル密度（片側、周波数あたり）。x は (..., L)。
+    ハン窓・半分重ねの区間ごとのピリオドグラムを平均し、さらに先頭の軸（試行など）で平均する。
+    片側密度は自己相関のフーリエ変換の 2 倍：S(f) = 2 ∫ C(τ) e^{-2πifτ} dτ。
+
+    Returns:
+        (周波数 f, S(f))
+    """
+    x = np.asarray(x, dtype=float)
+    freq, S = signal.welch(x, fs=1.0 / dt, window='hann', nperseg=min(nperseg, x.shape[-1]),
+                           detrend=False, axis=-1)
+    return freq, S.reshape(-1, S.shape[-1]).mean(axis=0)
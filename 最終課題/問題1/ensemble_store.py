@@ -0,0 +1,163 @@
+"""
+ディスク上のアンサンブル（.traj、試行 × 時刻 × 成分）と、試行のブロックごとに読む集計。
+
+大きなアンサンブルは試行のブロックごとにシミュレーションして .traj に書き込み、
+集計も同じようにブロックごとに読み込んで、時刻ごとの和を更新していく。
+ブロックは memmap を通さずファイルから直接読み書きするため（memmap で触れたページは
+プロセスに残る）、必要なメモリはブロックの大きさ（既定 64MB）の数倍と時刻数の配列だけで、
+試行数にはよらない。
+
+    from ensemble_store import simulate_to_store, ensemble_msd, ensemble_moments
+    store = simulate_to_store('data/ensemble.traj', LangevinParams(T=1.0), n_runs=100000, n_steps=10000)
+    msd = ensemble_msd(store)
+    mean, var = ensemble_moments(store, 'vx')
+"""
+import dataclasses
+import numpy as np
+from accumulators import RunningHistogram, RunningMoments
+from langevin import simulate_batches
+from trajectory_io import create_trajectories, open_trajectories
+
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def chunk_runs_for(n_times, n_columns, max_bytes=DEFAULT_CHUNK_BYTES, itemsize=8):
+    """1 ブロックの試行数（1 ブロックが max_bytes 以下になる数、最低 1）。"""
+    return max(1, max_bytes // (n_times * n_columns * itemsize))
+
+
+def _run_bytes(store):
+    _, n_times, n_columns = store.data.shape
+    return n_times * n_columns * store.data.itemsize
+
+
+def write_runs(store, start, block):
+    """試行 start から block (試行数, 時刻数, 列数) を書き込む。"""
+    with open(store.path, 'r+b') as f:
+        f.seek(store.data.offset + start * _run_bytes(store))
+        np.ascontiguousarray(block, dtype=store.data.dtype).tofile(f)
+
+
+def read_runs(store, start, stop):
+    """試行 start から stop - 1 までを (試行数, 時刻数, 列数) の配列として読む。"""
+    _, n_times, n_columns = store.data.shape
+    with open(store.path, 'rb') as f:
+        f.seek(store.data.offset + start * _run_bytes(store))
+        block = np.fromfile(f, dtype=store.data.dtype, count=(stop - start) * n_times * n_columns)
+    return block.reshape(stop - start, n_times, n_columns)
+
+
+def _params_dict(params):
+    """LangevinParams をヘッダーに記録できる辞書にする（外力・境界は文字列で記録）。"""
+    record = {}
+    for key, value in dataclasses.asdict(params).items():
+        record[key] = value if value is None or isinstance(value, (int, float, str)) else repr(value)
+    return record
+
+
+def simulate_to_store(path, params, n_runs, n_steps, seed=0, chunk_runs=None, record_velocity=True):
+    """
+    n_runs 本の軌道をブロックごとにシミュレーションして .traj に書き込む。
+    ブロックごとに SeedSequence から独立なシードを作る（結果はシードとブロックの大きさで決まる）。
+
+    Returns:
+        TrajectoryFile（列は x, y[, vx, vy]、時刻は params の dt から求める）
+    """
+    columns = ("x", "y", "vx", "vy") if record_velocity else ("x", "y")
+    n_times = n_steps + 1
+    chunk_runs = chunk_runs or chunk_runs_for(n_times, 2 * len(columns))  # simulate の作業領域の分も見込む
+    header = dict(_params_dict(params), n_steps=n_steps, chunk_runs=chunk_runs)
+    store = create_trajectories(path, (n_runs, n_times, len(columns)), columns, header, seed)
+
+    batches = simulate_batches(params, n_runs, n_steps, chunk_runs, seed=seed, record_velocity=record_velocity)
+    for start, ens in zip(range(0, n_runs, chunk_runs), batches):
+        write_runs(store, start, np.concatenate([ens.r, ens.v], axis=-1) if record_velocity else ens.r)
+        del ens
+    return open_trajectories(path)
+
+
+def iter_chunks(store, chunk_runs=None):
+    """(開始, 終了, ブロック) を順に返す。ブロックは (試行数, 時刻数, 列数) の配列としてディスクから読む。"""
+    n_runs, n_times, n_columns = store.data.shape
+    chunk_runs = chunk_runs or chunk_runs_for(n_times, n_columns, itemsize=store.data.itemsize)
+    for start in range(0, n_runs, chunk_runs):
+        stop = min(start + chunk_runs, n_runs)
+        yield start, stop, read_runs(store, start, stop)
+
+
+def _quantity(store, quantity):
+    """列名、またはブロック → (試行数, 時刻数) の関数を関数にする。"""
+    if callable(quantity):
+        return quantity
+    index = store.columns.index(quantity)
+    return lambda block: block[..., index]
+
+
+def squared_displacement(store, columns=("x", "y")):
+    """二乗変位 |r(t) - r(0)|² を求める関数（ensemble_moments などに渡す）。"""
+    index = [store.columns.index(c) for c in columns]
+
+    def f(block):
+        r = block[..., index]
+        return np.sum((r - r[:, :1]) ** 2, axis=-1)
+
+    return f
+
+
+def kinetic_energy(store, m=None, columns=("vx", "vy")):
+    """運動エネルギー m|v|²/2 を求める関数（m の省略時はヘッダーの m、なければ 1）。"""
+    m = m if m is not None else store.params.get("m", 1.0)
+    index = [store.columns.index(c) for c in columns]
+
+    def f(block):
+        return 0.5 * m * np.sum(block[..., index] ** 2, axis=-1)
+
+    return f
+
+
+def ensemble_moments(store, quantity, chunk_runs=None):
+    """
+    時刻ごとの試行平均と分散（ddof=0）。ブロックごとに RunningMoments で合成するため、
+    試行数が大きくても桁落ちしにくい。
+
+    Returns:
+        (平均, 分散)、いずれも (時刻数,)
+    """
+    f = _quantity(store, quantity)
+    moments = RunningMoments()
+    for _, _, block in iter_chunks(store, chunk_runs):
+        moments.update(f(block))
+    return moments.mean, moments.var
+
+
+def ensemble_mean(store, quantity, chunk_runs=None):
+    """時刻ごとの試行平均 (時刻数,)。"""
+    return ensemble_moments(store, quantity, chunk_runs)[0]
+
+
+def ensemble_msd(store, chunk_runs=None, columns=("x", "y")):
+    """平均二乗変位 <|r(t) - r(0)|²> (時刻数,)。"""
+    return ensemble_mean(store, squared_displacement(store, columns), chunk_runs)
+
+
+def ensemble_histogram(store, quantity, bins=30, range=None, times=slice(None), density=False, chunk_runs=None):
+    """
+    全試行・指定した時刻（times）の値のヒストグラム。range の省略時は最小値・最大値を
+    求めるためにもう 1 回ブロックを読む。
+
+    Returns:
+        (度数または確率密度, ビンの端)
+    """
+    f = _quantity(store, quantity)
+    if range is None:
+        lo, hi = np.inf, -np.inf
+        for _, _, block in iter_chunks(store, chunk_runs):
+            values = f(block)[:, times]
+            lo, hi = min(lo, values.min()), max(hi, values.max())
+        range = (lo, hi)
+    hist = RunningHistogram(bins, range)
+    for _, _, block in iter_chunks(store, chunk_runs):
+        hist.update(f(block)[:, times])
+    if density:
+        return hist.density(), hist.edges
+    return hist.counts, hist.edges
@@ -0,0 +1,370 @@
+"""
+ランジュバン方程式のアンサンブル計算エンジン。
+
+    m dv/dt = -γ v + F(r, t) + ξ(t),   <ξ_i(t) ξ_j(t')> = 2 γ k_B T δ_ij δ(t - t')
+
+を積分する。積分法は LangevinParams.integrator で選ぶ。
+
+    "euler": 各スクリプトと同じオイラー・マルヤマ法（速度を更新してから、新しい速度で位置を更新）
+    "exact": オルンシュタイン・ウーレンベック過程の厳密な遷移。1 ステップの (Δx, Δv) を
+             相関のある 2 変量正規分布から生成するため、Δt によらず離散化の誤差がない
+             （外力はステップ内で一定とみなす。一定の外力なら厳密）。
+
+試行ごとの Python ループの代わりに (試行数 × 次元) の配列を 1 ステップずつ
+まとめて進め、ノイズは numpy.random.Generator からブロック単位で生成する。
+
+    from langevin import LangevinParams, simulate
+    ens = simulate(LangevinParams(T=1.0, gamma=0.5), n_runs=40, n_steps=1000, rng=0)
+    ens.r      # 位置 (試行数, ステップ数+1, 次元)
+    ens.msd()  # 平均二乗変位 (ステップ数+1,)
+"""
+import dataclasses
+import numpy as np
+from neighbours import neighbour_pairs
+from seeds import spawn
+
+NOISE_BLOCK = 256  # 一度に生成するノイズのステップ数
+NOISE_BLOCK_ELEMENTS = 1 << 21  # 一度に生成するノイズの要素数の上限（試行数が多い場合）
+
+
+class ReflectingBox:
+    """反射壁 [-L, L]^d。壁を越えた成分は壁で折り返し、その速度成分を反転する。"""
+
+    def __init__(self, L):
+        self.L = L
+
+    def __repr__(self):
+        return f"ReflectingBox({self.L!r})"
+
+    def apply(self, r, v):
+        L = self.L
+        over = r > L
+        r[over] = 2 * L - r[over]
+        v[over] = -v[over]
+        under = r < -L
+        r[under] = -2 * L - r[under]
+        v[under] = -v[under]
+
+    def displacement(self, r, r0):
+        return r - r0
+
+
+class PeriodicBox:
+    """周期境界 [-L, L]^d。位置はボックス内に戻し、変位は最小イメージで測る。"""
+
+    def __init__(self, L):
+        self.L = L
+
+    def __repr__(self):
+        return f"PeriodicBox({self.L!r})"
+
+    def wrap(self, z):
+        return (z + self.L) % (2 * self.L) - self.L
+
+    def apply(self, r, v):
+        r[...] = self.wrap(r)
+
+    def displacement(self, r, r0):
+        return self.wrap(r - r0)
+
+
+def constant_force(*components):
+    """一定の外力 F = (F_x, F_y, ...)。"""
+    F = np.asarray(components, dtype=float)
+
+    def force(r, t):
+        return F
+
+    return force
+
+
+@dataclasses.dataclass(frozen=True)
+class LangevinParams:
+    """
+    シミュレーションのパラメータ。
+    force は F(r, t)（r は (試行数, 次元) の位置、戻り値は r にブロードキャストできる力）、
+    boundary は ReflectingBox / PeriodicBox / None（自由空間）、
+    integrator は "euler" または "exact"。
+    """
+    T: float = 1.0
+    m: float = 1.0
+    gamma: float = 1.0
+    kB: float = 1.0
+    dt: float = 0.01
+    force: object = None
+    boundary: object = None
+    integrator: str = "euler"
+
+    @property
+    def D(self):
+        """拡散係数 D = k_B T / γ。"""
+        return self.kB * self.T / self.gamma
+
+    @property
+    def tau(self):
+        """速度の緩和時間 τ = m / γ。"""
+        return self.m / self.gamma
+
+    def replace(self, **changes):
+        return dataclasses.replace(self, **changes)
+
+
+@dataclasses.dataclass
+class Ensemble:
+    """アンサンブルの軌道。r, v は (試行数, ステップ数+1, 次元) の C 連続配列。"""
+    t: np.ndarray
+    r: np.ndarray
+    v: np.ndarray
+    params: LangevinParams
+
+    @property
+    def x(self):
+        return self.r[:, :, 0]
+
+    @property
+    def y(self):
+        return self.r[:, :, 1]
+
+    @property
+    def vx(self):
+        return self.v[:, :, 0]
+
+    @property
+    def vy(self):
+        return self.v[:, :, 1]
+
+    def squared_displacement(self):
+        """各試行の二乗変位 |r(t) - r(0)|²（周期境界では最小イメージ）。(試行数, ステップ数+1)"""
+        boundary = self.params.boundary
+        r0 = self.r[:, :1, :]
+        dr = boundary.displacement(self.r, r0) if boundary is not None else self.r - r0
+        return np.sum(dr ** 2, axis=-1)
+
+    def msd(self):
+        """平均二乗変位 <|r(t) - r(0)|²>。(ステップ数+1,)"""
+        return np.mean(self.squared_displacement(), axis=0)
+
+    def kinetic_energy(self):
+        """運動エネルギー E = m|v|²/2。(試行数, ステップ数+1)"""
+        return 0.5 * self.params.m * np.sum(self.v ** 2, axis=-1)
+
+
+def _initial(value, n_runs, dims):
+    if value is None:
+        return np.zeros((n_runs, dims))
+    return np.array(np.broadcast_to(value, (n_runs, dims)), dtype=float)
+
+
+def _euler_step(params):
+    """オイラー・マルヤマ法の 1 ステップ。ノイズは 1 ステップあたり 1 組。"""
+    dt, m, force = params.dt, params.m, params.force
+    decay = 1.0 - params.gamma / m * dt
+    kick = np.sqrt(2.0 * params.gamma * params.kB * params.T * dt) / m
+
+    def step(r, v, t, eta):
+        v *= decay
+        if force is not None:
+            v += force(r, t) * (dt / m)
+        v += kick * eta[0]
+        r += v * dt
+
+    return 1, step
+
+
+def _exact_step(params):
+    """
+    OU 過程の厳密な 1 ステップ。ノイズは 1 ステップあたり 2 組。
+    a = exp(-Δt/τ)、終端速度 u = F/γ からのずれ w = v - u について
+
+        w' = a w + σ_v ξ_1
+        x' = x + u Δt + τ(1 - a) w + (c/σ_v) ξ_1 + sqrt(σ_x² - c²/σ_v²) ξ_2
+
+    σ_v² = (k_B T/m)(1 - a²), σ_x² = D τ (2Δt/τ - 3 + 4a - a²), c = D (1 - a)²
+    """
+    dt, gamma, force = params.dt, params.gamma, params.force
+    D, tau = params.D, params.tau
+    a = np.exp(-dt / tau)
+    b = tau * (1.0 - a)
+    var_v = params.kB * params.T / params.m * (1.0 - a * a)
+    var_x = D * tau * (2.0 * dt / tau - 3.0 + 4.0 * a - a * a)
+    cov = D * (1.0 - a) ** 2
+    sv = np.sqrt(var_v)
+    cx = cov / sv if sv > 0 else 0.0
+    sx = np.sqrt(max(var_x - cx * cx, 0.0))
+
+    def step(r, v, t, eta):
+        if force is not None:
+            u = force(r, t) / gamma
+            v -= u
+            r += u * dt
+        r += b * v + cx * eta[0] + sx * eta[1]
+        v *= a
+        v += sv * eta[0]
+        if force is not None:
+            v += u
+
+    return 2, step
+
+
+INTEGRATORS = {"euler": _euler_step, "exact": _exact_step}
+
+
+def _integrator(params):
+    try:
+        return INTEGRATORS[params.integrator](params)
+    except KeyError:
+        raise ValueError(f"未知の積分法です: {params.integrator!r}（{', '.join(INTEGRATORS)}）") from None
+
+
+def _block_steps(n_noise, n_runs, dims):
+    """一度にノイズを生成するステップ数。"""
+    return max(1, min(NOISE_BLOCK, NOISE_BLOCK_ELEMENTS // (n_noise * n_runs * dims)))
+
+
+def simulate(params, n_runs, n_steps, dims=2, rng=None, r0=None, v0=None, record_velocity=True):
+    """
+    n_runs 本の軌道を同時に n_steps ステップ進める。
+    rng は numpy.random.Generator、またはそのシード（None なら OS のエントロピー）。
+    r0, v0 は初期位置・初期速度（省略時は原点・静止、(次元,) なら全試行で共通）。
+    """
+    rng = np.random.default_rng(rng)
+    n_noise, step = _integrator(params)
+    dt, boundary = params.dt, params.boundary
+
+    r = _initial(r0, n_runs, dims)
+    v = _initial(v0, n_runs, dims)
+    traj = np.empty((n_runs, n_steps + 1, dims))
+    vel = np.empty((n_runs, n_steps + 1, dims)) if record_velocity else None
+    traj[:, 0] = r
+    if vel is not None:
+        vel[:, 0] = v
+
+    block = _block_steps(n_noise, n_runs, dims)
+    for start in range(0, n_steps, block):
+        noise = rng.standard_normal((min(block, n_steps - start), n_noise, n_runs, dims))
+        for k, eta in enumerate(noise):
+            n = start + k
+            step(r, v, n * dt, eta)
+            if boundary is not None:
+                boundary.apply(r, v)
+            traj[:, n + 1] = r
+            if vel is not None:
+                vel[:, n + 1] = v
+
+    t = np.arange(n_steps + 1) * dt
+    return Ensemble(t, traj, vel, params)
+
+
+def simulate_batches(params, n_runs, n_steps, batch_runs, dims=2, seed=0, record_velocity=True):
+    """
+    n_runs 本の軌道を batch_runs 本ずつシミュレーションして Ensemble を順に返すジェネレーター。
+    バッチごとに SeedSequence から独立なシードを作る（結果はシードとバッチの大きさで決まる）。
+    accumulators の集計に渡せば、必要なメモリは 1 バッチ分で済む。
+    """
+    starts = range(0, n_runs, batch_runs)
+    for start, child in zip(starts, spawn(seed, len(starts))):
+        yield simulate(params, min(batch_runs, n_runs - start), n_steps, dims, rng=child,
+                       record_velocity=record_velocity)
+
+def first_passage_times(params, R, n_runs, max_steps, dims=2, rng=None):
+    """
+    原点から出発し、|r| >= R に初めて到達した時刻。到達しなかった試行は max_steps * dt。
+    到達した試行は配列から外し、残りの試行だけを進める。
+    """
+    rng = np.random.default_rng(rng)
+    n_noise, step = _integrator(params)
+    dt = params.dt
+
+    times = np.full(n_runs, max_steps * dt)
+    active = np.arange(n_runs)
+    r = np.zeros((n_runs, dims))
+    v = np.zeros((n_runs, dims))
+    block = _block_steps(n_noise, n_runs, dims)
+    for start in range(0, max_steps, block):
+        noise = rng.standard_normal((min(block, max_steps - start), n_noise, len(active), dims))
+        for k in range(len(noise)):
+            n = start + k
+            step(r, v, n * dt, noise[k])
+            hit = np.sum(r ** 2, axis=1) >= R * R
+            if hit.any():
+                times[active[hit]] = (n + 1) * dt
+                keep = ~hit
+                active, r, v = active[keep], r[keep], v[keep]
+                noise = noise[:, :, keep]
+                if len(active) == 0:
+                    return times
+    return times
+
+
+def square_lattice(n, L):
+    """周期ボックス [-L, L]^2 に等間隔に並べた n 個の初期位置。"""
+    n_side = int(np.ceil(np.sqrt(n)))
+    a = 2 * L / n_side
+    ix, iy = np.divmod(np.arange(n), n_side)
+    return np.column_stack([-L + (ix + 0.5) * a, -L + (iy + 0.5) * a])
+
+
+def resolve_collisions(r, v, L, sigma):
+    """
+    直径 sigma の剛体円板の衝突。接触していて近づいているペアの法線方向の速度を
+    交換する（等質量の弾性衝突）。複数の相手と接触している粒子には、衝突前の速度から
+    求めた力積をすべて加える。
+
+    Returns:
+        衝突したペアの数
+    """
+    i, j, dr, d = neighbour_pairs(r, L, sigma)
+    ok = d > 1e-10
+    i, j, n_vec = i[ok], j[ok], dr[ok] / d[ok, None]
+    vn = np.sum((v[j] - v[i]) * n_vec, axis=1)
+    hit = vn < 0
+    impulse = vn[hit, None] * n_vec[hit]
+    np.add.at(v, i[hit], impulse)
+    np.add.at(v, j[hit], -impulse)
+    return int(hit.sum())
+
+
+def simulate_particles(params, n_particles, sigma, n_steps, rng=None, r0=None, v0=None, record_every=1):
+    """
+    直径 sigma の剛体円板 n_particles 個を同じ周期ボックス（params.boundary は PeriodicBox）で進める。
+    各ステップでランジュバンの更新の後、セルリストで接触しているペアを探して衝突させる。
+    r0 の省略時は正方格子、v0 の省略時はマクスウェル分布。記録は record_every ステップごと。
+
+    Returns:
+        Ensemble（r, v は (粒子数, 記録数, 2)、位置はボックス内に戻した値）
+    """
+    box = params.boundary
+    if not isinstance(box, PeriodicBox):
+        raise ValueError("複数粒子のシミュレーションには PeriodicBox が必要です")
+    rng = np.random.default_rng(rng)
+    n_noise, step = _integrator(params)
+    dt, dims = params.dt, 2
+
+    r = square_lattice(n_particles, box.L) if r0 is None else np.array(r0, dtype=float)
+    if v0 is None:
+        v = rng.standard_normal((n_particles, dims)) * np.sqrt(params.kB * params.T / params.m)
+    else:
+        v = np.array(np.broadcast_to(v0, (n_particles, dims)), dtype=float)
+
+    n_frames = n_steps // record_every + 1
+    traj = np.empty((n_particles, n_frames, dims))
+    vel = np.empty((n_particles, n_frames, dims))
+    traj[:, 0] = r
+    vel[:, 0] = v
+
+    block = _block_steps(n_noise, n_particles, dims)
+    for start in range(0, n_steps, block):
+        noise = rng.standard_normal((min(block, n_steps - start), n_noise, n_particles, dims))
+        for k, eta in enumerate(noise):
+            n = start + k
+            step(r, v, n * dt, eta)
+            box.apply(r, v)
+            resolve_collisions(r, v, box.L, sigma)
+            if (n + 1) % record_every == 0:
+                frame = (n + 1) // record_every
+                traj[:, frame] = r
+                vel[:, frame] = v
+
+    t = np.arange(n_frames) * record_every * dt
+    return Ensemble(t, traj, vel, params)
+
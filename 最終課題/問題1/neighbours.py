@@ -0,0 +1,71 @@
+"""
+周期境界 [-L, L]^2 での近傍粒子の探索（セルリスト）。
+
+ボックスを一辺 cutoff 以上のセルに分け、粒子をセル番号で並べ替えてから、
+各粒子と「自分のセル + 半分の隣接セル（5 方向）」の粒子の組をまとめて配列で作る。
+隣接セルの半分だけを見るので各ペアは 1 回だけ現れる。セルが 1 辺 3 個未満になる
+小さなボックスでは全ペアを調べる。
+"""
+import numpy as np
+
+# 自分のセルと、重複しないように選んだ隣接セルの半分
+HALF_SHELL = ((0, 0), (1, 0), (1, 1), (0, 1), (-1, 1))
+
+# セル数の上限（粒子数あたり）。疎な系で空のセルばかりになるのを防ぐ
+MAX_CELLS_PER_PARTICLE = 4
+
+
+def minimum_image(dr, L):
+    """周期 [-L, L] での最小イメージの変位。"""
+    return dr - 2 * L * np.round(dr / (2 * L))
+
+
+def _all_pairs(n):
+    i, j = np.triu_indices(n, k=1)
+    return i, j
+
+
+def _cell_pairs(pos, L, n_cells):
+    """セルリストで候補のペア (i, j) を作る。"""
+    n = len(pos)
+    cell = np.floor((pos + L) / (2 * L) * n_cells).astype(np.int64)
+    np.clip(cell, 0, n_cells - 1, out=cell)
+    cell_id = cell[:, 0] * n_cells + cell[:, 1]
+    order = np.argsort(cell_id, kind='stable')
+    counts = np.bincount(cell_id, minlength=n_cells * n_cells)
+    starts = np.cumsum(counts) - counts
+
+    particles = np.arange(n)
+    candidates_i, candidates_j = [], []
+    for ox, oy in HALF_SHELL:
+        neighbour = ((cell[:, 0] + ox) % n_cells) * n_cells + (cell[:, 1] + oy) % n_cells
+        cnt = counts[neighbour]
+        i = np.repeat(particles, cnt)
+        k = np.arange(len(i)) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+        j = order[starts[neighbour][i] + k]
+        if (ox, oy) == (0, 0):
+            keep = i < j
+            i, j = i[keep], j[keep]
+        candidates_i.append(i)
+        candidates_j.append(j)
+    return np.concatenate(candidates_i), np.concatenate(candidates_j)
+
+
+def neighbour_pairs(pos, L, cutoff):
+    """
+    最小イメージ距離が cutoff 未満の粒子のペア。pos は (粒子数, 2)。
+
+    Returns:
+        (i, j, dr, d): ペアの添字、i から j への最小イメージの変位 (ペア数, 2)、距離
+    """
+    n = len(pos)
+    n_cells = int(2 * L // cutoff)
+    n_cells = min(n_cells, max(3, int(np.sqrt(MAX_CELLS_PER_PARTICLE * n))))
+    if n_cells < 3:
+        i, j = _all_pairs(n)
+    else:
+        i, j = _cell_pairs(pos, L, n_cells)
+    dr = minimum_image(pos[j] - pos[i], L)
+    d2 = np.sum(dr ** 2, axis=1)
+    close = d2 < cutoff * cutoff
+    return i[close], j[close], dr[close], np.sqrt(d2[close])
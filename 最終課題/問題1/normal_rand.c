@@ -12,7 +12,9 @@ double normal_rand() {
 
 int main(int argc, char *argv[]) {
     int n_samples = atoi(argv[1]);
-    srand((unsigned int)time(NULL));
+    /* 2番目の引数でシードを指定（省略時は現在時刻） */
+    unsigned int seed = (argc >= 3) ? (unsigned int)strtoul(argv[2], NULL, 10) : (unsigned int)time(NULL);
+    srand(seed);
     for (int i = 0; i < n_samples; i++) {
         printf("%.15e\n", normal_rand());
     }
@@ -2,6 +2,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import subprocess
 import os
+from seeds import c_seeds
 
 plt.rcParams['font.family'] = 'Hiragino Sans'
 plt.rcParams['axes.unicode_minus'] = False
@@ -12,14 +13,15 @@ os.makedirs('figures', exist_ok=True)
 # 50, 100, 1000回の正規乱数を生成
 n_samples_list = [50, 100, 1000]
 data_list = []
+seed = 0
 
-for n_samples in n_samples_list:
+for n_samples, sample_seed in zip(n_samples_list, c_seeds(seed, len(n_samples_list))):
     filename = f'normal_rand_{n_samples}.dat' if n_samples != 1000 else 'normal_rand.dat'
     filepath = os.path.join('data', filename)
     
     # Cプログラムを実行してデータを生成
     with open(filepath, 'w') as f:
-        subprocess.run(['./normal_rand', str(n_samples)], stdout=f)
+        subprocess.run(['./normal_rand', str(n_samples), str(sample_seed)], stdout=f)
     
     data = np.loadtxt(filepath)
     data_list.append((n_samples, data))
@@ -0,0 +1,57 @@
+"""
+乱数のシード管理と、C プログラムの並列実行。
+
+1 つのシードから numpy.random.SeedSequence.spawn で試行・ワーカーごとの独立な
+子シードを作り、Python では Generator、C プログラムでは引数のシードとして渡す。
+同じシードからは同じ結果になり、子どうしのストリームは重ならない。
+
+    from seeds import spawn_rngs, c_seeds, run_parallel
+    rngs = spawn_rngs(0, n_runs)                  # 試行ごとの Generator
+    seeds = c_seeds(0, n_runs)                    # C プログラムの srand に渡すシード
+    run_parallel([['./brownian_motion', ..., str(s)] for s in seeds], output_files)
+"""
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+def seed_sequence(seed=None):
+    """シード（整数・SeedSequence・None）を SeedSequence にする。None なら OS のエントロピー。"""
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+
+def spawn(seed, n):
+    """独立な子シード n 個。"""
+    return seed_sequence(seed).spawn(n)
+
+
+def spawn_rngs(seed, n):
+    """独立な Generator n 個。"""
+    return [np.random.default_rng(child) for child in spawn(seed, n)]
+
+
+def c_seeds(seed, n):
+    """C プログラムの srand に渡す 32 ビットのシード n 個（子シードごとに 1 つ）。"""
+    return [int(child.generate_state(1, dtype=np.uint32)[0]) for child in spawn(seed, n)]
+
+
+def _run_to_file(command, output_file):
+    with open(output_file, 'wb') as f:
+        subprocess.run(command, stdout=f, check=True)
+    return output_file
+
+
+def run_parallel(commands, output_files, max_workers=None):
+    """
+    コマンドを並列に実行し、それぞれの標準出力をファイルに書く。
+    シードはコマンドの引数で明示するため、実行の順序やタイミングに結果はよらない。
+
+    Returns:
+        出力ファイルのリスト（commands と同じ順）
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_run_to_file, commands, output_files))
@@ -0,0 +1,152 @@
+"""
+パラメータ掃引の実行（プロセス並列・ディスクへのキャッシュ付き）。
+
+掃引の各点（セル）で simulate を実行し、アンサンブルを reducer で集計した結果だけを返す。
+セルはプロセスプールで並列に計算し、結果は data/sweep_cache/ に保存する。キャッシュのキーは
+パラメータ・試行数・ステップ数・シードと、コードの版（エンジンと reducer を定義したファイルの
+内容のハッシュ）なので、同じ掃引をもう一度実行すると変わったセルだけを計算し直す。
+
+    from sweep import grid, run_sweep
+
+    def fit_D(ens):   # reducer はモジュールの最上位で定義する（プロセス間で受け渡すため）
+        ...
+
+    cells = grid(T=[0.5, 1.0, 2.0], gamma=[0.5, 1.0])          # 直積（dict のリスト）
+    results = run_sweep(fit_D, cells, n_runs=40, n_steps=1000, seed=0)
+
+reducer を使うスクリプトは、処理を if __name__ == '__main__': の中に書く
+（spawn で起動したワーカーがスクリプトを読み込み直すため）。
+"""
+import dataclasses
+import hashlib
+import inspect
+import itertools
+import json
+import os
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from langevin import LangevinParams, simulate
+
+CACHE_DIR = os.path.join('data', 'sweep_cache')
+ENGINE_FILES = ('langevin.py', 'neighbours.py', 'seeds.py', 'sweep.py')
+
+
+def grid(**axes):
+    """各軸の値の直積を dict のリストにする（例: grid(T=[1, 2], m=[1]) → [{'T': 1, 'm': 1}, {'T': 2, 'm': 1}]）。"""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*axes.values())]
+
+
+def _file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def code_version(reducer):
+    """エンジンのソースと reducer を定義したファイルのハッシュ（どれかを変更するとキャッシュが無効になる）。"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    files = [os.path.join(here, name) for name in ENGINE_FILES]
+    source = inspect.getsourcefile(reducer)
+    if source:
+        files.append(source)
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(_file_digest(path).encode())
+    return digest.hexdigest()[:16]
+
+
+def cell_key(reducer, params, n_runs, n_steps, seed, record_velocity, version):
+    """
+    セルのキャッシュのキー。外力・境界は repr で記録する
+    （constant_force のような関数の repr はアドレスを含むため、そのセルは実行のたびに計算し直す）。
+    """
+    record = {
+        'reducer': f"{reducer.__module__}.{reducer.__qualname__}",
+        'params': {f.name: getattr(params, f.name) for f in dataclasses.fields(params)},
+        'n_runs': n_runs,
+        'n_steps': n_steps,
+        'seed': seed,
+        'record_velocity': record_velocity,
+        'version': version,
+    }
+    text = json.dumps(record, sort_keys=True, default=repr)
+    return hashlib.sha256(text.encode()).hexdigest()[:24]
+
+
+def _load(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _store(path, result):
+    """一時ファイルに書いてから置き換える（中断しても壊れたキャッシュを残さない）。"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        pickle.dump(result, f)
+    os.replace(tmp, path)
+
+
+def _run_cell(reducer, params, n_runs, n_steps, seed, record_velocity):
+    ens = simulate(params, n_runs, n_steps, rng=seed, record_velocity=record_velocity)
+    return reducer(ens)
+
+
+def _cell_args(cell, base, n_runs, n_steps):
+    """セル（LangevinParams、または base に上書きするフィールドと n_runs, n_steps の dict）を展開する。"""
+    if isinstance(cell, LangevinParams):
+        return cell, n_runs, n_steps
+    cell = dict(cell)
+    n_runs = cell.pop('n_runs', n_runs)
+    n_steps = cell.pop('n_steps', n_steps)
+    return base.replace(**cell), n_runs, n_steps
+
+
+def run_sweep(reducer, cells, n_runs, n_steps, seed=0, base=None, record_velocity=False,
+              cache_dir=CACHE_DIR, max_workers=None):
+    """
+    各セルで n_runs 本の軌道をシミュレーションし、reducer(ensemble) の結果を返す。
+    各セルで同じシード seed を使う（パラメータ間の比較のばらつきを抑えるため）。
+    同じキーのセルは 1 回だけ計算し、キャッシュにあるセルは計算しない。
+
+    Args:
+        reducer: Ensemble を受け取り、pickle できる結果を返すモジュール最上位の関数
+        cells: LangevinParams、または base に上書きする値の dict（'n_runs', 'n_steps' も指定可）のリスト
+        base: dict のセルの基準になる LangevinParams（省略時は既定値）
+        cache_dir: キャッシュの置き場所（None ならキャッシュしない）
+        max_workers: プロセス数（省略時は CPU 数、1 ならプロセスを使わない）
+
+    Returns:
+        cells と同じ順の結果のリスト
+    """
+    base = base or LangevinParams()
+    version = code_version(reducer)
+    jobs = [(*_cell_args(cell, base, n_runs, n_steps), seed, record_velocity) for cell in cells]
+    keys = [cell_key(reducer, *job, version) for job in jobs]
+
+    results = {}
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        for key in keys:
+            path = os.path.join(cache_dir, f"{key}.pkl")
+            if key not in results and os.path.exists(path):
+                results[key] = _load(path)
+
+    pending = {}
+    for key, job in zip(keys, jobs):
+        if key not in results:
+            pending.setdefault(key, job)
+    if pending:
+        print(f"掃引: {len(pending)} / {len(set(keys))} セルを計算します（残りはキャッシュ）")
+        max_workers = min(max_workers or os.cpu_count() or 1, len(pending))
+        if max_workers == 1:
+            computed = [_run_cell(reducer, *job) for job in pending.values()]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                futures = [pool.submit(_run_cell, reducer, *job) for job in pending.values()]
+                computed = [future.result() for future in futures]
+        for key, result in zip(pending, computed):
+            results[key] = result
+            if cache_dir is not None:
+                _store(os.path.join(cache_dir, f"{key}.pkl"), result)
+    return [results[key] for key in keys]
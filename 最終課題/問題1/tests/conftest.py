@@ -0,0 +1,7 @@
+"""pytest設定ファイル"""
+
+import sys
+from pathlib import Path
+
+# スクリプトのディレクトリ（langevin.py などのあるディレクトリ）をパスに追加
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,77 @@
+"""accumulators のテスト"""
+
+import numpy as np
+import pytest
+from scipy import stats
+from accumulators import RunningCDF, RunningHistogram, RunningMoments, RunningMSD
+
+
+class TestRunningMoments:
+    """RunningMoments のテスト"""
+
+    def test_batches_match_concatenated_data(self):
+        """バッチごとに更新した平均・分散が全データの np.mean / np.var に一致"""
+        rng = np.random.default_rng(0)
+        batches = [rng.normal(3.0, 2.0, size=(n, 5)) for n in (1, 17, 250, 3)]
+        data = np.concatenate(batches)
+
+        moments = RunningMoments()
+        for batch in batches:
+            moments.update(batch)
+
+        assert moments.n == len(data)
+        assert np.allclose(moments.mean, data.mean(axis=0))
+        assert np.allclose(moments.var, data.var(axis=0))
+        assert np.allclose(moments.sem, stats.sem(data, axis=0))
+
+    def test_merge_matches_concatenated_data(self):
+        """並列に集計した結果の合成が全データの np.var に一致（空の集計も合成できる）"""
+        rng = np.random.default_rng(1)
+        parts = [rng.normal(1e6, 1.0, size=(n, 3)) for n in (40, 7, 300)]
+        data = np.concatenate(parts)
+
+        merged = RunningMoments()
+        for part in parts:
+            merged.merge(RunningMoments().update(part))
+        merged.merge(RunningMoments())
+
+        assert merged.n == len(data)
+        assert np.allclose(merged.mean, data.mean(axis=0))
+        # 平均が大きくても桁落ちしない
+        assert np.allclose(merged.var, data.var(axis=0), rtol=1e-8)
+
+    def test_running_msd(self):
+        """RunningMSD は |r(t) - r(0)|² の平均"""
+        r = np.cumsum(np.random.default_rng(2).standard_normal((30, 20, 2)), axis=1)
+        msd = RunningMSD()
+        msd.update(r[:10]).update(r[10:])
+
+        assert np.allclose(msd.msd, np.mean(np.sum((r - r[:, :1]) ** 2, axis=-1), axis=0))
+
+
+class TestRunningHistogram:
+    """RunningHistogram・RunningCDF のテスト"""
+
+    def test_histogram_matches_numpy(self):
+        """バッチごとの度数の和が np.histogram に一致し、範囲外も数える"""
+        values = np.random.default_rng(3).normal(size=1000)
+        hist = RunningHistogram(bins=20, range=(-2, 2))
+        for batch in np.split(values, 4):
+            hist.update(batch)
+
+        counts, edges = np.histogram(values, bins=20, range=(-2, 2))
+        assert np.array_equal(hist.counts, counts)
+        assert hist.below == np.sum(values < -2) and hist.above == np.sum(values > 2)
+        assert hist.n == len(values)
+        assert np.allclose(hist.density(), np.histogram(values, bins=edges, density=True)[0])
+
+    def test_ks_test_close_to_exact(self):
+        """ビンの端で求めた K-S 統計量は正確な値より最大 1 ビンの確率だけ小さい"""
+        values = np.random.default_rng(4).exponential(size=5000)
+        cdf = RunningCDF(bins=4000, range=(0, 12))
+        cdf.update(values)
+
+        statistic, p_value = cdf.ks_test(stats.expon().cdf)
+        exact = stats.kstest(values, stats.expon().cdf)
+        assert exact.statistic - 12 / 4000 <= statistic <= exact.statistic + 1e-12
+        assert p_value == pytest.approx(exact.pvalue, rel=0.2)
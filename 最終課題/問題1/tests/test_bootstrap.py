@@ -0,0 +1,91 @@
+"""bootstrap のテスト"""
+
+import numpy as np
+import pytest
+from scipy import stats
+from bootstrap import (bootstrap, bootstrap_distribution, block_bootstrap_indices, jackknife,
+                       jackknife_indices, sweep_ci)
+
+
+@pytest.fixture
+def skewed():
+    """BCa の補正が効く歪んだ標本"""
+    return np.random.default_rng(0).exponential(size=60)
+
+
+class TestBootstrap:
+    """信頼区間のテスト"""
+
+    @pytest.mark.parametrize("method, scipy_method", [("percentile", "percentile"), ("bca", "BCa")])
+    def test_matches_scipy(self, skewed, method, scipy_method):
+        """信頼区間が scipy.stats.bootstrap と（B が大きい極限で）一致"""
+        res = bootstrap(skewed, np.mean, B=100000, method=method, rng=1)
+        ref = stats.bootstrap((skewed,), np.mean, n_resamples=100000, method=scipy_method,
+                              random_state=2).confidence_interval
+
+        assert res.estimate == pytest.approx(skewed.mean())
+        assert res.low == pytest.approx(ref.low, abs=0.01)
+        assert res.high == pytest.approx(ref.high, abs=0.01)
+
+    def test_bca_shifts_interval_for_skewed_data(self, skewed):
+        """右に歪んだ標本では BCa の区間がパーセンタイル法より右にずれる"""
+        percentile = bootstrap(skewed, B=20000, rng=3)
+        bca = bootstrap(skewed, B=20000, method="bca", rng=3)
+
+        assert bca.low > percentile.low and bca.high > percentile.high
+
+    def test_columns_are_independent(self, skewed):
+        """axis 以外の軸ごとの結果が 1 列ずつ計算した結果と一致（同じ添字を使う）"""
+        data = np.stack([skewed, 2.0 * skewed + 1.0])
+        res = bootstrap(data, B=500, method="bca", rng=4)
+        single = bootstrap(skewed, B=500, method="bca", rng=4)
+
+        assert np.allclose(res.low, [single.low, 2.0 * single.low + 1.0])
+        assert np.allclose(res.high, [single.high, 2.0 * single.high + 1.0])
+
+    def test_bca_with_block_is_rejected(self, skewed):
+        """BCa と block bootstrap の組み合わせ・未知の方法はエラー"""
+        with pytest.raises(ValueError):
+            bootstrap(skewed, method="bca", block=5)
+        with pytest.raises(ValueError):
+            bootstrap(skewed, method="basic")
+
+    def test_sweep_ci_with_uneven_cells(self, skewed):
+        """試行数が異なるセルも 1 セルずつの結果と一致"""
+        estimate, low, high = sweep_ci([skewed, skewed[:20]], B=300, rng=5)
+        single = bootstrap(skewed[:20], B=300, rng=5)
+
+        assert estimate[1] == pytest.approx(single.estimate)
+        assert (low[1], high[1]) == pytest.approx((single.low, single.high))
+
+
+class TestResampling:
+    """添字とブロック分割のテスト"""
+
+    @pytest.mark.parametrize("block", [None, 4])
+    def test_chunking_does_not_change_distribution(self, skewed, block):
+        """max_bytes でブロックに分けてもブートストラップ分布は変わらない"""
+        whole = bootstrap_distribution(skewed, B=1000, rng=6, block=block)
+        chunked = bootstrap_distribution(skewed, B=1000, rng=6, block=block, max_bytes=1000)
+
+        assert np.array_equal(whole, chunked)
+
+    def test_block_indices_are_contiguous(self):
+        """ブロック内の添字は連続し、範囲内に収まる"""
+        idx = block_bootstrap_indices(23, 200, 5, rng=7)
+
+        assert idx.shape == (200, 23)
+        assert idx.min() >= 0 and idx.max() < 23
+        blocks = idx[:, :20].reshape(200, 4, 5)
+        assert np.all(np.diff(blocks, axis=-1) == 1)
+        with pytest.raises(ValueError):
+            block_bootstrap_indices(23, 10, 24)
+
+    def test_jackknife(self, skewed):
+        """i 行目は i 番目の標本を除いた添字、統計量は直接計算と一致"""
+        idx = jackknife_indices(6)
+        expected = np.array([np.delete(np.arange(6), i) for i in range(6)])
+        assert np.array_equal(idx, expected)
+
+        direct = [np.delete(skewed, i).mean() for i in range(len(skewed))]
+        assert np.allclose(jackknife(skewed, max_bytes=100), direct)
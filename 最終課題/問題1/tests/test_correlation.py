@@ -0,0 +1,58 @@
+"""correlation のテスト"""
+
+import numpy as np
+import pytest
+from correlation import autocorrelation, cross_correlation, time_averaged_msd, unwrap, vector_autocorrelation
+
+
+def direct_correlation(x, y, max_lag):
+    """C_xy(τ) = 1/(L-τ) Σ_t x(t) y(t+τ) の直接計算"""
+    L = x.shape[-1]
+    return np.stack([np.mean(x[..., :L - tau] * y[..., tau:], axis=-1) for tau in range(max_lag)], axis=-1)
+
+
+def direct_msd(r, max_lag):
+    """MSD(τ) = 1/(L-τ) Σ_t |r(t+τ) - r(t)|² の直接計算（O(L²)）"""
+    L = r.shape[-2]
+    return np.stack([
+        np.mean(np.sum((r[..., tau:, :] - r[..., :L - tau, :]) ** 2, axis=-1), axis=-1)
+        for tau in range(max_lag)
+    ], axis=-1)
+
+
+class TestCorrelation:
+    """FFT による相関・MSD のテスト"""
+
+    @pytest.mark.parametrize("L", [1, 2, 37, 64, 129])
+    def test_autocorrelation_matches_direct_sum(self, L):
+        """ゼロ埋めした FFT の自己相関が直接計算に一致（循環の折り返しがない）"""
+        x = np.random.default_rng(L).standard_normal((3, L))
+
+        assert np.allclose(autocorrelation(x), direct_correlation(x, x, L))
+        assert np.allclose(autocorrelation(x, max_lag=5), direct_correlation(x, x, min(5, L)))
+
+    def test_cross_and_vector_correlation(self):
+        """相互相関とベクトル量の自己相関"""
+        rng = np.random.default_rng(0)
+        x, y = rng.standard_normal((2, 4, 50))
+        v = rng.standard_normal((4, 50, 2))
+
+        assert np.allclose(cross_correlation(x, y, 20), direct_correlation(x, y, 20))
+        expected = sum(direct_correlation(v[..., k], v[..., k], 20) for k in range(2))
+        assert np.allclose(vector_autocorrelation(v, 20), expected)
+
+    @pytest.mark.parametrize("L, max_lag", [(2, None), (40, None), (100, 30)])
+    def test_time_averaged_msd_matches_direct_sum(self, L, max_lag):
+        """累積和と FFT による時間平均 MSD が O(L²) の直接計算に一致"""
+        r = np.cumsum(np.random.default_rng(L).standard_normal((3, L, 2)), axis=-2) + 10.0
+
+        expected = direct_msd(r, L if max_lag is None else max_lag)
+        assert np.allclose(time_averaged_msd(r, max_lag), expected)
+
+    def test_unwrap_restores_trajectory(self):
+        """ボックス内に戻した軌道を復元"""
+        L = 2.0
+        r = np.cumsum(np.random.default_rng(1).normal(0, 0.3, size=(200, 2)), axis=0)
+        wrapped = (r + L) % (2 * L) - L
+
+        assert np.allclose(unwrap(wrapped, L), r - r[0] + wrapped[0])
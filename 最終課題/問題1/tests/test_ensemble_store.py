@@ -0,0 +1,59 @@
+"""ensemble_store のテスト"""
+
+import numpy as np
+import pytest
+from ensemble_store import (ensemble_histogram, ensemble_moments, ensemble_msd, kinetic_energy,
+                            simulate_to_store)
+from langevin import Ensemble, LangevinParams, simulate_batches
+
+N_RUNS, N_STEPS, CHUNK_RUNS, SEED = 50, 20, 8, 3
+
+
+@pytest.fixture
+def params():
+    return LangevinParams(T=1.5, m=2.0, gamma=0.8, dt=0.1)
+
+
+@pytest.fixture
+def store(tmp_path, params):
+    """ブロックごとに .traj へ書き込んだアンサンブル"""
+    return simulate_to_store(tmp_path / "ensemble.traj", params, N_RUNS, N_STEPS, seed=SEED, chunk_runs=CHUNK_RUNS)
+
+
+@pytest.fixture
+def ensemble(params):
+    """同じシード・ブロックの大きさでメモリ上に作ったアンサンブル"""
+    batches = list(simulate_batches(params, N_RUNS, N_STEPS, CHUNK_RUNS, seed=SEED))
+    return Ensemble(batches[0].t, np.concatenate([e.r for e in batches]),
+                    np.concatenate([e.v for e in batches]), params)
+
+
+class TestEnsembleStore:
+    """ブロックごとの集計のテスト"""
+
+    def test_store_matches_in_memory_ensemble(self, store, ensemble):
+        """書き込んだ軌道はメモリ上のシミュレーションと同じ"""
+        np.testing.assert_array_equal(store["x"], ensemble.x)
+        np.testing.assert_array_equal(store["vy"], ensemble.vy)
+        np.testing.assert_allclose(store.t, ensemble.t)
+
+    @pytest.mark.parametrize("chunk_runs", [None, 1, 7, N_RUNS])
+    def test_chunked_msd_matches_in_memory(self, store, ensemble, chunk_runs):
+        """ブロックの大きさによらず MSD はメモリ上の Ensemble.msd() と一致"""
+        np.testing.assert_allclose(ensemble_msd(store, chunk_runs), ensemble.msd(), rtol=1e-12, atol=1e-14)
+
+    def test_chunked_moments_match_in_memory(self, store, ensemble):
+        """運動エネルギーの平均と分散はメモリ上の計算と一致"""
+        mean, var = ensemble_moments(store, kinetic_energy(store), chunk_runs=7)
+        energy = ensemble.kinetic_energy()
+
+        np.testing.assert_allclose(mean, energy.mean(axis=0), rtol=1e-12)
+        np.testing.assert_allclose(var, energy.var(axis=0), rtol=1e-10, atol=1e-14)
+
+    def test_chunked_histogram_matches_numpy(self, store, ensemble):
+        """全時刻の x のヒストグラムは np.histogram と一致"""
+        counts, edges = ensemble_histogram(store, "x", bins=10, chunk_runs=7)
+        expected, expected_edges = np.histogram(ensemble.x, bins=10)
+
+        np.testing.assert_allclose(edges, expected_edges)
+        np.testing.assert_array_equal(counts, expected)
@@ -0,0 +1,76 @@
+"""langevin のテスト"""
+
+import numpy as np
+import pytest
+from langevin import LangevinParams, simulate
+
+
+def ou_position_variance(params, t):
+    """静止状態から出発した OU 過程の位置の分散（1 成分）: Dτ(2t/τ - 3 + 4e^{-t/τ} - e^{-2t/τ})"""
+    D, tau = params.D, params.tau
+    a = np.exp(-t / tau)
+    return D * tau * (2 * t / tau - 3 + 4 * a - a * a)
+
+
+def ou_velocity_variance(params, t):
+    """静止状態から出発した OU 過程の速度の分散（1 成分）: (k_B T/m)(1 - e^{-2t/τ})"""
+    return params.kB * params.T / params.m * (1 - np.exp(-2 * t / params.tau))
+
+
+class TestExactIntegrator:
+    """厳密な積分法（integrator="exact"）のテスト"""
+
+    N_RUNS = 20000
+
+    def test_msd_matches_analytic(self):
+        """Δt が τ より大きくても MSD が解析解に一致"""
+        params = LangevinParams(T=1.5, m=2.0, gamma=0.8, dt=0.7, integrator="exact")
+        ens = simulate(params, self.N_RUNS, n_steps=12, rng=1)
+
+        expected = 2 * ou_position_variance(params, ens.t)
+        # 2 成分の和 |r|² は σ² χ²_2 に従うので、平均の標準誤差は 2σ²/√n
+        tolerance = 5 * expected / np.sqrt(self.N_RUNS)
+        assert ens.msd()[0] == 0
+        assert np.all(np.abs(ens.msd() - expected) <= tolerance)
+
+    def test_velocity_variance_matches_analytic(self):
+        """速度の分散が緩和して等分配則 k_B T/m に近づく"""
+        params = LangevinParams(T=1.5, m=2.0, gamma=0.8, dt=0.7, integrator="exact")
+        ens = simulate(params, self.N_RUNS, n_steps=12, rng=2)
+
+        expected = ou_velocity_variance(params, ens.t)
+        variance = np.mean(ens.v ** 2, axis=(0, 2))
+        # 2 成分 × n 試行の平均なので、標準誤差は σ² √(2 / 2n)
+        tolerance = 5 * expected / np.sqrt(self.N_RUNS)
+        assert np.all(np.abs(variance - expected) <= tolerance)
+        assert abs(variance[-1] - params.kB * params.T / params.m) < 0.05
+
+    def test_euler_is_biased_for_large_steps(self):
+        """同じ Δt ではオイラー法の速度の分散は解析解からずれる（比較の基準）"""
+        params = LangevinParams(T=1.5, m=2.0, gamma=0.8, dt=0.7)
+        ens = simulate(params, self.N_RUNS, n_steps=12, rng=2)
+
+        expected = ou_velocity_variance(params, ens.t[-1])
+        variance = np.mean(ens.v[:, -1] ** 2)
+        assert abs(variance - expected) > 10 * expected / np.sqrt(self.N_RUNS)
+
+
+class TestEquipartition:
+    """m ≠ 1 での等分配則のテスト（両方の積分法）"""
+
+    N_RUNS = 4000
+
+    @pytest.mark.parametrize("integrator", ["euler", "exact"])
+    def test_maxwell_velocities_stay_stationary(self, integrator):
+        """マクスウェル分布から出発した速度の分散は k_B T/m のまま変わらない"""
+        params = LangevinParams(T=1.0, m=4.0, gamma=1.0, dt=0.05, integrator=integrator)
+        kT_m = params.kB * params.T / params.m
+        v0 = np.random.default_rng(3).standard_normal((self.N_RUNS, 2)) * np.sqrt(kT_m)
+        ens = simulate(params, self.N_RUNS, n_steps=400, rng=4, v0=v0)
+
+        # オイラー法の定常分散は (k_B T/m) / (1 - γΔt/2m)
+        expected = kT_m if integrator == "exact" else kT_m / (1 - params.gamma * params.dt / (2 * params.m))
+        variance = np.mean(ens.v ** 2, axis=(0, 2))
+        tolerance = 5 * expected * np.sqrt(2 / (2 * self.N_RUNS))
+        assert abs(variance[-1] - expected) <= tolerance
+        assert abs(variance.mean() - expected) <= tolerance
@@ -0,0 +1,66 @@
+"""neighbours のテスト"""
+
+import numpy as np
+import pytest
+import neighbours
+from neighbours import minimum_image, neighbour_pairs
+
+
+def brute_force_pairs(pos, L, cutoff):
+    """全ペアを triu_indices で調べた結果 {(i, j): 距離}"""
+    i, j = np.triu_indices(len(pos), k=1)
+    d = np.linalg.norm(minimum_image(pos[j] - pos[i], L), axis=1)
+    close = d < cutoff
+    return dict(zip(zip(i[close].tolist(), j[close].tolist()), d[close]))
+
+
+def found_pairs(pos, L, cutoff):
+    """neighbour_pairs の結果を (小さい添字, 大きい添字) をキーにした辞書にする"""
+    i, j, dr, d = neighbour_pairs(pos, L, cutoff)
+    assert np.allclose(np.linalg.norm(dr, axis=1), d)
+    assert np.allclose(dr, minimum_image(pos[j] - pos[i], L))
+    pairs = {}
+    for a, b, dist in zip(i.tolist(), j.tolist(), d):
+        key = (min(a, b), max(a, b))
+        assert key not in pairs, "同じペアが 2 回現れた"
+        pairs[key] = dist
+    return pairs
+
+
+class TestNeighbourPairs:
+    """neighbour_pairs のテスト"""
+
+    @pytest.mark.parametrize("n, L, cutoff", [
+        (400, 5.0, 0.8),    # セルリスト（1 辺 12 セル）
+        (20, 5.0, 0.5),     # 粒子数でセル数を制限（1 辺 20 → 8 セル）
+        (50, 3.0, 1.9),     # ちょうど 1 辺 3 セル
+        (40, 3.0, 2.5),     # 1 辺 3 セル未満なので全ペア
+    ])
+    def test_matches_brute_force(self, n, L, cutoff):
+        """全ペアを調べた結果と同じペア・距離"""
+        pos = np.random.default_rng(n).uniform(-L, L, size=(n, 2))
+
+        expected = brute_force_pairs(pos, L, cutoff)
+        found = found_pairs(pos, L, cutoff)
+
+        assert found.keys() == expected.keys()
+        for key, dist in expected.items():
+            assert found[key] == pytest.approx(dist)
+
+    def test_cell_list_is_used(self, monkeypatch):
+        """1 辺 3 セル以上ではセルリストを使い、全ペアは作らない"""
+        monkeypatch.setattr(neighbours, "_all_pairs", lambda n: pytest.fail("全ペアを使用した"))
+        pos = np.random.default_rng(0).uniform(-5.0, 5.0, size=(400, 2))
+
+        assert len(found_pairs(pos, 5.0, 0.8)) == len(brute_force_pairs(pos, 5.0, 0.8))
+
+    def test_pairs_across_boundary(self):
+        """周期境界をまたぐペアを最小イメージで検出"""
+        L = 5.0
+        pos = np.array([[-4.95, 0.0], [4.95, 0.0], [0.0, -4.9], [0.0, 4.9], [0.0, 0.0]])
+
+        found = found_pairs(pos, L, 0.5)
+
+        assert set(found) == {(0, 1), (2, 3)}
+        assert found[(0, 1)] == pytest.approx(0.1)
+        assert found[(2, 3)] == pytest.approx(0.2)
@@ -0,0 +1,37 @@
+"""seeds のテスト"""
+
+import sys
+import numpy as np
+from seeds import c_seeds, run_parallel, spawn_rngs
+
+
+class TestSeeds:
+    """子シードのテスト"""
+
+    def test_c_seeds_are_reproducible(self):
+        """同じシードからは同じ C のシード、異なるシードからは異なるシード"""
+        seeds = c_seeds(0, 8)
+
+        assert seeds == c_seeds(0, 8)
+        assert seeds != c_seeds(1, 8)
+        assert len(set(seeds)) == 8
+        assert all(isinstance(s, int) and 0 <= s < 2 ** 32 for s in seeds)
+        # 試行数を増やしても先頭の子シードは変わらない
+        assert c_seeds(0, 16)[:8] == seeds
+
+    def test_spawned_rngs_are_reproducible_and_independent(self):
+        """子の Generator は再現でき、互いに異なる乱数列を出す"""
+        first = [rng.standard_normal(4) for rng in spawn_rngs(3, 3)]
+        again = [rng.standard_normal(4) for rng in spawn_rngs(3, 3)]
+
+        assert all(np.array_equal(a, b) for a, b in zip(first, again))
+        assert not np.array_equal(first[0], first[1])
+
+    def test_run_parallel_keeps_order(self, tmp_path):
+        """並列に実行しても出力ファイルはコマンドと同じ順"""
+        seeds = c_seeds(0, 4)
+        commands = [[sys.executable, "-c", f"print({s})"] for s in seeds]
+        outputs = [tmp_path / f"out_{i}.txt" for i in range(4)]
+
+        assert run_parallel(commands, outputs, max_workers=4) == outputs
+        assert [int(f.read_text()) for f in outputs] == seeds
@@ -0,0 +1,65 @@
+"""sweep のテスト"""
+
+import pytest
+import sweep
+from langevin import LangevinParams, simulate
+from sweep import grid, run_sweep
+
+
+def final_msd(ens):
+    """最後の時刻の MSD"""
+    return float(ens.msd()[-1])
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """計算したセルの温度を記録する"""
+    calls = []
+    run_cell = sweep._run_cell
+
+    def counting(reducer, params, *args):
+        calls.append(params.T)
+        return run_cell(reducer, params, *args)
+
+    monkeypatch.setattr(sweep, "_run_cell", counting)
+    return calls
+
+
+class TestRunSweep:
+    """掃引とキャッシュのテスト"""
+
+    def sweep(self, cache_dir, cells):
+        return run_sweep(final_msd, cells, n_runs=20, n_steps=10, seed=1, cache_dir=cache_dir, max_workers=1)
+
+    def test_results_match_direct_simulation(self, tmp_path, calls):
+        """結果は各セルで直接 simulate したものと同じで、同じセルは 1 回だけ計算"""
+        cells = grid(T=[0.5, 2.0]) + [{"T": 0.5}]
+
+        results = self.sweep(tmp_path, cells)
+
+        expected = [final_msd(simulate(LangevinParams(T=T), 20, 10, rng=1)) for T in (0.5, 2.0, 0.5)]
+        assert results == expected
+        assert calls == [0.5, 2.0]
+
+    def test_reuses_cached_cells(self, tmp_path, calls):
+        """2 回目は新しいセルだけを計算し、キャッシュの結果は 1 回目と同じ"""
+        first = self.sweep(tmp_path, grid(T=[0.5, 1.0]))
+        second = self.sweep(tmp_path, grid(T=[0.5, 1.0, 2.0]))
+
+        assert second[:2] == first
+        assert calls == [0.5, 1.0, 2.0]
+
+    def test_code_version_change_invalidates_cache(self, tmp_path, calls, monkeypatch):
+        """コードの版が変わるとキャッシュのセルも計算し直す"""
+        self.sweep(tmp_path, grid(T=[0.5, 1.0]))
+        monkeypatch.setattr(sweep, "code_version", lambda reducer: "changed")
+        self.sweep(tmp_path, grid(T=[0.5, 1.0]))
+
+        assert calls == [0.5, 1.0, 0.5, 1.0]
+
+    def test_no_cache_dir(self, tmp_path, calls):
+        """cache_dir=None なら毎回計算する"""
+        self.sweep(None, grid(T=[1.0]))
+        self.sweep(None, grid(T=[1.0]))
+
+        assert calls == [1.0, 1.0]
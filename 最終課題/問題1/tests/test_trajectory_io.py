@@ -0,0 +1,85 @@
+"""trajectory_io のテスト"""
+
+import numpy as np
+import pytest
+from trajectory_io import (ALIGNMENT, _read_header, convert_dat, create_trajectories,
+                           open_trajectories, save_trajectories)
+
+
+@pytest.fixture
+def data():
+    """(試行数, 時刻数, 列数) = (3, 6, 5) の軌道"""
+    rng = np.random.default_rng(0)
+    data = rng.standard_normal((3, 6, 5))
+    data[..., 0] = np.arange(6) * 0.1
+    return data
+
+
+class TestTrajectoryFile:
+    """.traj の読み書きのテスト"""
+
+    def test_round_trip(self, tmp_path, data):
+        """保存した配列・列名・パラメータ・シードがそのまま読み戻せる"""
+        path = tmp_path / "a.traj"
+        seed = np.random.SeedSequence(7).spawn(2)[1]
+        save_trajectories(path, data, params={"dt": 0.1}, seed=seed)
+
+        traj = open_trajectories(path)
+
+        np.testing.assert_array_equal(traj.data, data)
+        assert traj.columns == ("t", "x", "y", "vx", "vy")
+        assert traj.params == {"dt": 0.1}
+        assert traj.seed == {"entropy": 7, "spawn_key": [1]}
+        assert traj.n_runs == 3
+        np.testing.assert_array_equal(traj.t, data[0, :, 0])
+
+    def test_columns_are_zero_copy_views(self, tmp_path, data):
+        """データは 64 バイト境界から memmap され、列はコピーのないビュー"""
+        path = tmp_path / "a.traj"
+        save_trajectories(path, data)
+        _, offset = _read_header(path)
+
+        traj = open_trajectories(path)
+        x = traj["x"]
+
+        assert offset % ALIGNMENT == 0
+        assert isinstance(traj.data, np.memmap)
+        assert np.shares_memory(x, traj.data)
+        np.testing.assert_array_equal(x, data[..., 1])
+
+    def test_written_runs_are_visible_after_reopen(self, tmp_path, data):
+        """create_trajectories に試行ごとに書き込んだ内容が開き直すと読める"""
+        path = tmp_path / "a.traj"
+        traj = create_trajectories(path, data.shape, params={"dt": 0.1})
+        for i, run in enumerate(data):
+            traj.data[i] = run
+        traj.data.flush()
+
+        np.testing.assert_array_equal(open_trajectories(path).data, data)
+
+    def test_t_from_dt_without_t_column(self, tmp_path, data):
+        """t の列がない場合はヘッダーの dt から時刻を求める"""
+        path = tmp_path / "a.traj"
+        save_trajectories(path, data[..., 1:3], columns=("x", "y"), params={"dt": 0.5})
+
+        np.testing.assert_allclose(open_trajectories(path).t, np.arange(6) * 0.5)
+
+    def test_convert_dat(self, tmp_path, data):
+        """テキスト出力の列名をコメント行から読んで 1 つの .traj にまとめる"""
+        dat_files = []
+        for i, run in enumerate(data):
+            dat_files.append(tmp_path / f"trajectory_{i + 1}.dat")
+            np.savetxt(dat_files[-1], run, header="t x y vx vy", fmt="%.17g")
+
+        traj = open_trajectories(convert_dat(dat_files, tmp_path / "a.traj"))
+
+        assert traj.columns == ("t", "x", "y", "vx", "vy")
+        np.testing.assert_array_equal(traj.data, data)
+
+    def test_rejects_other_files(self, tmp_path):
+        """マジックのないファイルは開かない"""
+        path = tmp_path / "a.traj"
+        path.write_bytes(b"not a trajectory")
+
+        with pytest.raises(ValueError):
+            open_trajectories(path)
@@ -0,0 +1,183 @@
+"""
+軌道のバイナリ形式（.traj）の読み書き。
+
+    マジック "BMTRAJ1\\n"（8 バイト）
+    ヘッダー長（uint32, リトルエンディアン）
+    JSON ヘッダー（shape, dtype, columns, params, seed。データの先頭が 64 バイト境界になるよう空白で埋める）
+    データ（dtype の C 連続配列、形は (試行数, 時刻数, 列数)）
+
+データは np.memmap で開くため、読み込みは解析せずにそのまま配列として参照でき、
+列はコピーのないビューとして取り出せる。
+
+    python3 trajectory_io.py data/trajectory_*.dat -o data/trajectories.traj   # .dat の変換
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import tempfile
+from dataclasses import dataclass
+import numpy as np
+from seeds import c_seeds, run_parallel
+
+MAGIC = b"BMTRAJ1\n"
+ALIGNMENT = 64
+DEFAULT_COLUMNS = ("t", "x", "y", "vx", "vy")  # brownian_motion の出力の列
+
+
+@dataclass
+class TrajectoryFile:
+    """開いた .traj ファイル。data は (試行数, 時刻数, 列数) の memmap。"""
+    path: str
+    data: np.ndarray
+    columns: tuple
+    params: dict
+    seed: object
+
+    def __getitem__(self, name):
+        """列 name の (試行数, 時刻数) のビュー。"""
+        return self.data[..., self.columns.index(name)]
+
+    @property
+    def t(self):
+        """時刻 (時刻数,)。t の列がない場合はヘッダーの dt から求める。"""
+        if "t" in self.columns:
+            return self["t"][0]
+        return np.arange(self.data.shape[1]) * self.params["dt"]
+
+    @property
+    def n_runs(self):
+        return self.data.shape[0]
+
+
+def _seed_to_json(seed):
+    """シード（整数・SeedSequence・None）をヘッダーに記録できる形にする。"""
+    if isinstance(seed, np.random.SeedSequence):
+        return {"entropy": seed.entropy, "spawn_key": list(seed.spawn_key)}
+    return seed
+
+
+def _write_header(f, header):
+    body = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    prefix = len(MAGIC) + 4
+    padded = -(-(prefix + len(body) + 1) // ALIGNMENT) * ALIGNMENT - prefix
+    body = body + b" " * (padded - len(body) - 1) + b"\n"
+    f.write(MAGIC)
+    f.write(struct.pack("<I", len(body)))
+    f.write(body)
+    return prefix + len(body)
+
+
+def _read_header(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"軌道ファイルではありません: {path}")
+        (length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(length).decode("utf-8"))
+    return header, len(MAGIC) + 4 + length
+
+
+def create_trajectories(path, shape, columns=DEFAULT_COLUMNS, params=None, seed=None, dtype="<f8"):
+    """
+    書き込み用に .traj ファイルを作成する。大きなアンサンブルをメモリに載せずに
+    試行ごとに書き込む場合に使う（戻り値の data に代入して flush する）。
+
+    Args:
+        shape: (試行数, 時刻数, 列数)
+    """
+    shape = tuple(int(n) for n in shape)
+    if len(shape) != 3 or shape[2] != len(columns):
+        raise ValueError(f"shape は (試行数, 時刻数, {len(columns)}) である必要があります: {shape}")
+    header = {
+        "shape": list(shape),
+        "dtype": np.dtype(dtype).str,
+        "columns": list(columns),
+        "params": params or {},
+        "seed": _seed_to_json(seed),
+    }
+    with open(path, "wb") as f:
+        offset = _write_header(f, header)
+        f.truncate(offset + int(np.prod(shape)) * np.dtype(dtype).itemsize)
+    data = np.memmap(path, dtype=dtype, mode="r+", offset=offset, shape=shape)
+    return TrajectoryFile(path, data, tuple(columns), header["params"], header["seed"])
+
+
+def save_trajectories(path, data, columns=DEFAULT_COLUMNS, params=None, seed=None):
+    """配列 (試行数, 時刻数, 列数)（または 1 試行分の (時刻数, 列数)）を .traj に保存する。"""
+    data = np.asarray(data)
+    if data.ndim == 2:
+        data = data[np.newaxis]
+    traj = create_trajectories(path, data.shape, columns, params, seed)
+    traj.data[...] = data
+    traj.data.flush()
+    return path
+
+
+def open_trajectories(path, mode="r"):
+    """.traj ファイルを memmap で開く（mode="r+" で書き換え可能）。"""
+    header, offset = _read_header(path)
+    data = np.memmap(path, dtype=header["dtype"], mode=mode, offset=offset, shape=tuple(header["shape"]))
+    return TrajectoryFile(path, data, tuple(header["columns"]), header["params"], header["seed"])
+
+
+def read_raw(path, n_columns=len(DEFAULT_COLUMNS)):
+    """brownian_motion の binary 出力（float64 の行の並び）を (時刻数, 列数) として読む。"""
+    return np.fromfile(path, dtype="<f8").reshape(-1, n_columns)
+
+
+def _dat_columns(path):
+    with open(path) as f:
+        first = f.readline()
+    if first.startswith("#"):
+        return tuple(first.lstrip("#").split())
+    return None
+
+
+def convert_dat(dat_files, path, params=None, seed=None):
+    """
+    brownian_motion のテキスト出力（.dat、同じ長さ）をまとめて 1 つの .traj に変換する。
+    列名は先頭のコメント行（# t x y vx vy）から読む。
+    """
+    arrays = [np.loadtxt(f, comments="#", ndmin=2) for f in dat_files]
+    lengths = {len(a) for a in arrays}
+    if len(lengths) != 1:
+        raise ValueError(f"長さの異なる軌道は 1 つのファイルにまとめられません: {sorted(lengths)}")
+    columns = _dat_columns(dat_files[0]) or DEFAULT_COLUMNS[:arrays[0].shape[1]]
+    return save_trajectories(path, np.stack(arrays), columns, params, seed)
+
+
+def run_brownian_motion(path, n_runs, T=1.0, m=1.0, gamma=1.0, dt=0.01, n_steps=1000, seed=0,
+                        exe="./brownian_motion"):
+    """
+    brownian_motion を n_runs 回（SeedSequence から作った独立なシードで）並列に実行し、
+    binary 出力を 1 つの .traj にまとめて開く。
+
+    Returns:
+        TrajectoryFile
+    """
+    params = {"T": T, "m": m, "gamma": gamma, "dt": dt, "n_steps": n_steps}
+    with tempfile.TemporaryDirectory(prefix="brownian-") as tmp:
+        raw_files = [os.path.join(tmp, f"run{i + 1}.bin") for i in range(n_runs)]
+        commands = [[exe, str(T), str(m), str(gamma), str(dt), str(n_steps), str(s), "binary"]
+                    for s in c_seeds(seed, n_runs)]
+        run_parallel(commands, raw_files)
+        traj = create_trajectories(path, (n_runs, n_steps + 1, len(DEFAULT_COLUMNS)), params=params, seed=seed)
+        for i, raw in enumerate(raw_files):
+            traj.data[i] = read_raw(raw)
+        traj.data.flush()
+    return open_trajectories(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=".dat（テキスト）の軌道を .traj（バイナリ）に変換")
+    parser.add_argument("dat_files", nargs="+", help="brownian_motion の出力")
+    parser.add_argument("-o", "--output", required=True, help="出力する .traj ファイル")
+    args = parser.parse_args(argv)
+    convert_dat(args.dat_files, args.output)
+    traj = open_trajectories(args.output)
+    print(f"{args.output}: {traj.n_runs} 試行 × {traj.data.shape[1]} 時刻, 列 {', '.join(traj.columns)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
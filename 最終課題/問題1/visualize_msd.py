@@ -1,39 +1,30 @@
 import numpy as np
 import matplotlib.pyplot as plt
-import subprocess
 import os
 import sys
-import time
+from trajectory_io import run_brownian_motion
+from ensemble_store import ensemble_msd
 
 plt.rcParams['font.family'] = 'Hiragino Sans'
 plt.rcParams['axes.unicode_minus'] = False
 
 n_runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
 T = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
 m, gamma, kB = 1.0, 1.0, 1.0
 
 os.makedirs('data', exist_ok=True)
 os.makedirs('figures', exist_ok=True)
 
-trajectories = []
-for i in range(n_runs):
-    output_file = os.path.join('data', f'trajectory_{i+1}.dat')
-    with open(output_file, 'w') as f:
-        subprocess.run(['./brownian_motion', str(T), str(m), str(gamma)], stdout=f)
-    # 各試行で異なるシードを確保するため、1秒待機
-    if i < n_runs - 1:
-        time.sleep(1.0)
-    data = np.loadtxt(output_file, comments='#')
-    trajectories.append((data[:, 0], data[:, 1], data[:, 2]))
+# 各試行に独立なシードを渡して並列に実行し、バイナリ形式でまとめて保存
+traj = run_brownian_motion(os.path.join('data', 'msd_trajectories.traj'), n_runs, T, m, gamma, seed=seed)
+t = traj.t
 
-t = trajectories[0][0]
-# 各試行のMSDを計算
-msd_individual = []
-for _, x, y in trajectories:
-    msd_individual.append(x**2 + y**2)
+# 各試行のMSD（個別に表示する）
+msd_individual = traj['x'] ** 2 + traj['y'] ** 2
 
-# 平均MSDを計算
-msd = np.array([np.mean([msd_individual[j][i] for j in range(n_runs)]) for i in range(len(t))])
+# 平均MSDを試行のブロックごとに集計
+msd = ensemble_msd(traj)
 
 D = kB * T / gamma
 tau = m / gamma
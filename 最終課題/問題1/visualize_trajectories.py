@@ -1,23 +1,20 @@
 import numpy as np
 import matplotlib.pyplot as plt
-import subprocess
 import os
 import sys
+from trajectory_io import run_brownian_motion
 
 plt.rcParams['font.family'] = 'Hiragino Sans'
 plt.rcParams['axes.unicode_minus'] = False
 
 n_runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
 os.makedirs('data', exist_ok=True)
 os.makedirs('figures', exist_ok=True)
 
-trajectories = []
-for i in range(n_runs):
-    output_file = os.path.join('data', f'trajectory_{i+1}.dat')
-    with open(output_file, 'w') as f:
-        subprocess.run(['./brownian_motion'], stdout=f)
-    data = np.loadtxt(output_file, comments='#')
-    trajectories.append((data[:, 0], data[:, 1], data[:, 2]))
+# 各試行に独立なシードを渡して並列に実行し、バイナリ形式でまとめて保存
+traj = run_brownian_motion(os.path.join('data', 'trajectories.traj'), n_runs, seed=seed)
+trajectories = [(traj.t, x, y) for x, y in zip(traj['x'], traj['y'])]
 
 plt.figure(figsize=(10, 10))
 colors = plt.cm.tab10(np.linspace(0, 1, n_runs))
@@ -11,32 +11,14 @@ from math import log
 import os
 import matplotlib
 
-# 日本語フォントの設定（macOS用）
-import matplotlib.font_manager as fm
+from markdown_to_pdf_gui.core.font_cache import setup_japanese_font
 
+# 日本語フォントの設定（フォント検出結果はキャッシュを使用）
 # macOSで利用可能な日本語フォントを優先順位順に設定
 japanese_fonts = ['Hiragino Sans', 'Hiragino Kaku Gothic ProN', 'AppleGothic', 
                   'Yu Gothic', 'Meiryo', 'Takao', 'IPAexGothic', 'IPAPGothic', 
                   'VL PGothic', 'Noto Sans CJK JP']
-
-# 利用可能なフォントを確認
-available_fonts = [f.name for f in fm.fontManager.ttflist]
-selected_font = None
-for font in japanese_fonts:
-    if font in available_fonts:
-        selected_font = font
-        break
-
-if selected_font:
-    plt.rcParams['font.family'] = selected_font
-    matplotlib.rcParams['font.sans-serif'] = [selected_font] + japanese_fonts
-else:
-    # フォントが見つからない場合はデフォルト設定
-    plt.rcParams['font.family'] = 'sans-serif'
-    matplotlib.rcParams['font.sans-serif'] = japanese_fonts
-
-# マイナス記号の文字化けを防ぐ
-plt.rcParams['axes.unicode_minus'] = False
+setup_japanese_font(japanese_fonts)
 
 # 図の保存先ディレクトリ
 FIG_DIR = 'figures'